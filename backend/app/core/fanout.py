@@ -0,0 +1,499 @@
+import asyncio
+import fnmatch
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+# handler(topic, text) called for every message a backend delivers to this process
+Handler = Callable[[str, str], None]
+# listener(message) for in-process consumers of a topic
+Listener = Callable[[Dict[str, Any]], None]
+
+# Hub-internal topic on which every process announces its connected roles
+PRESENCE_TOPIC = "_presence"
+
+
+# --- RESP (Redis serialization protocol), just enough for pub/sub ---
+
+def encode_bulk(arg) -> bytes:
+    data = arg if isinstance(arg, bytes) else str(arg).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def encode_command(*args) -> bytes:
+    return b"*%d\r\n" % len(args) + b"".join(encode_bulk(arg) for arg in args)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise ConnectionError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [await read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"Unexpected RESP reply: {line!r}")
+
+
+# --- Pub/sub backends ---
+
+class InProcessPubSub:
+    """Single-process backend: a publish is delivered straight to this process's sockets."""
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+        self.published = 0
+
+    def start(self, handler: Handler):
+        self._handler = handler
+
+    async def publish(self, topic: str, text: str):
+        self.published += 1
+        if self._handler is not None:
+            self._handler(topic, text)
+
+    async def stop(self):
+        self._handler = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"backend": "in-process", "published": self.published}
+
+
+class RespPubSub:
+    """
+    Relays messages between server processes through a Redis-compatible server
+    (redis://[:password@]host:port). A publish is delivered to this process at once and
+    relayed to the others: every process PSUBSCRIBEs to the channel prefix and drops the
+    echo of its own messages by their origin id, so a relay outage only cuts off the other
+    processes. Publishes are pipelined on one connection; relay delivery is at most once,
+    and messages sent while the link is down are dropped.
+    """
+
+    RECONNECT_SECONDS = 1.0
+
+    def __init__(self, url: str, prefix: str = "risklock:", max_pending: int = 10000):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = parsed.username or None
+        self.password = parsed.password
+        self.prefix = prefix
+        # Fixed-length tag in front of every relayed payload
+        self.origin = uuid.uuid4().hex
+        self._handler: Optional[Handler] = None
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._tasks: List[asyncio.Task] = []
+
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self, handler: Handler):
+        self._handler = handler
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._publish_loop())]
+
+    async def publish(self, topic: str, text: str):
+        if self._handler is not None:
+            self._handler(topic, text)
+        try:
+            self._outbox.put_nowait((self.prefix + topic, self.origin + text))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+            writer.write(encode_command(*auth))
+            await read_reply(reader)
+        return reader, writer
+
+    async def _listen(self):
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._open()
+                writer.write(encode_command("PSUBSCRIBE", self.prefix + "*"))
+                await writer.drain()
+                while True:
+                    reply = await read_reply(reader)
+                    # [b"pmessage", pattern, channel, data]
+                    if isinstance(reply, list) and reply[0] == b"pmessage":
+                        data = reply[3].decode()
+                        if data.startswith(self.origin):
+                            continue  # Delivered locally when it was published
+                        self.received += 1
+                        self._handler(reply[2].decode()[len(self.prefix):], data[len(self.origin):])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Pub/Sub Subscribe Error: {e}")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    async def _publish_loop(self):
+        writer = None
+        while True:
+            batch = [await self._outbox.get()]
+            while not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                if writer is None:
+                    reader, writer = await self._open()
+                # One write and one drain for the whole batch, then collect the replies
+                writer.write(b"".join(encode_command("PUBLISH", channel, text) for channel, text in batch))
+                await writer.drain()
+                for _ in batch:
+                    await read_reply(reader)
+                self.published += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self.dropped += len(batch)
+                print(f"Pub/Sub Publish Error: {e}")
+                if writer is not None:
+                    writer.close()
+                writer = None
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "backend": f"resp://{self.host}:{self.port}",
+            "published": self.published,
+            "received": self.received,
+            "pending": self._outbox.qsize(),
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+
+class LocalPubSubServer:
+    """
+    Stand-in for Redis pub/sub on one machine (PING, AUTH, PUBLISH, SUBSCRIBE, PSUBSCRIBE),
+    so several uvicorn workers can share chat rooms without a Redis install:
+    run `python pubsub_server.py` and point PUBSUB_URL at it.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6380):
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._patterns: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._clients: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await asyncio.gather(*self._clients.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                name, args = command[0].upper(), command[1:]
+                if name == b"PUBLISH":
+                    writer.write(b":%d\r\n" % self._publish(args[0], args[1]))
+                elif name in (b"SUBSCRIBE", b"PSUBSCRIBE"):
+                    registry = self._channels if name == b"SUBSCRIBE" else self._patterns
+                    for count, channel in enumerate(args, 1):
+                        registry.setdefault(channel, set()).add(writer)
+                        # [b"subscribe", channel, subscription count]
+                        writer.write(b"*3\r\n" + encode_bulk(name.lower()) + encode_bulk(channel) + b":%d\r\n" % count)
+                elif name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == b"AUTH":
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(b"-ERR unknown command '%s'\r\n" % name)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for registry in (self._channels, self._patterns):
+                for subscribers in registry.values():
+                    subscribers.discard(writer)
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _publish(self, channel: bytes, data: bytes) -> int:
+        receivers = 0
+        for subscriber in self._channels.get(channel, ()):
+            if subscriber.is_closing():
+                continue
+            subscriber.write(encode_command(b"message", channel, data))
+            receivers += 1
+        for pattern, subscribers in self._patterns.items():
+            if subscribers and fnmatch.fnmatchcase(channel.decode(), pattern.decode()):
+                for subscriber in subscribers:
+                    # A worker that hung up is only unregistered once its reader notices
+                    if subscriber.is_closing():
+                        continue
+                    subscriber.write(encode_command(b"pmessage", pattern, channel, data))
+                    receivers += 1
+        return receivers
+
+
+def backend_from_url(url: str):
+    return RespPubSub(url) if url else InProcessPubSub()
+
+
+# --- Hub ---
+
+class _Subscriber:
+    __slots__ = ("topic", "websocket", "role", "pending", "wake", "idle", "sending_since", "task")
+
+    def __init__(self, topic: str, websocket, role: Optional[str]):
+        self.topic = topic
+        self.websocket = websocket
+        self.role = role
+        self.pending: Deque[str] = deque()
+        self.wake = asyncio.Event()
+        self.idle = True
+        self.sending_since: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class FanoutHub:
+    """
+    Topic fan-out for websockets. A message is serialised once, relayed through the
+    pub/sub backend to every server process, and queued on each local subscriber; every
+    socket has its own sender task, so sends run concurrently and a slow client only
+    delays itself. A subscriber with `queue_size` messages waiting, or whose send has been
+    stuck for `send_timeout` seconds, is disconnected with 1013 so it can reconnect and catch up.
+    Each process announces how many sockets of each role it holds every `presence_interval`
+    seconds (and on every change), so online() counts e.g. staff connected to any worker.
+    """
+
+    def __init__(self, backend=None, queue_size: int = 256, send_timeout: float = 5.0, presence_interval: float = 5.0):
+        self.backend = backend or InProcessPubSub()
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.presence_interval = presence_interval
+        self.origin = uuid.uuid4().hex
+        self._topics: Dict[str, Set[_Subscriber]] = {}
+        # origin -> (role counts, time.monotonic() expiry) of the other processes
+        self._peers: Dict[str, Tuple[Dict[str, int], float]] = {}
+        self._listeners: Dict[str, List[Listener]] = {}
+        self._watchdog: Optional[asyncio.Task] = None
+        self._announcer: Optional[asyncio.Task] = None
+        self._started = False
+
+        self.published = 0
+        self.delivered = 0
+        self.evicted = 0
+
+    def start(self):
+        if not self._started:
+            self.backend.start(self._deliver)
+            self._watchdog = asyncio.create_task(self._watch_sends())
+            self._announcer = asyncio.create_task(self._announce_loop())
+            self._started = True
+
+    async def stop(self):
+        self._started = False
+        await self.backend.stop()
+        for task in (self._watchdog, self._announcer):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._watchdog = self._announcer = None
+        senders = []
+        for subscribers in list(self._topics.values()):
+            for subscriber in list(subscribers):
+                self.leave(subscriber)
+                senders.append(subscriber.task)
+        await asyncio.gather(*senders, return_exceptions=True)
+        self._peers.clear()
+
+    # --- Subscriptions ---
+
+    def join(self, topic: str, websocket, role: Optional[str] = None) -> _Subscriber:
+        """Subscribes an accepted websocket to a topic; call leave() when it disconnects."""
+        self.start()
+        subscriber = _Subscriber(topic, websocket, role)
+        subscriber.task = asyncio.create_task(self._sender(subscriber))
+        self._topics.setdefault(topic, set()).add(subscriber)
+        if role is not None:
+            asyncio.create_task(self._announce())
+        return subscriber
+
+    def leave(self, subscriber: _Subscriber):
+        subscribers = self._topics.get(subscriber.topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._topics[subscriber.topic]
+        if subscriber.task is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+        if subscriber.role is not None and self._started:
+            asyncio.create_task(self._announce())
+
+    def add_listener(self, topic: str, listener: Listener):
+        """In-process consumer of a topic, e.g. a cache kept in step across server processes."""
+        self._listeners.setdefault(topic, []).append(listener)
+
+    def count(self, topic: Optional[str] = None, role: Optional[str] = None) -> int:
+        """Local subscribers, optionally of one topic and/or role."""
+        groups = [self._topics.get(topic, ())] if topic is not None else self._topics.values()
+        return sum(1 for subscribers in groups for s in subscribers if role is None or s.role == role)
+
+    def online(self, role: str) -> int:
+        """Sockets of a role on this process plus those the other processes last announced."""
+        now = time.monotonic()
+        remote = sum(roles.get(role, 0) for roles, expires in self._peers.values() if expires > now)
+        return self.count(role=role) + remote
+
+    # --- Presence ---
+
+    async def _announce(self):
+        roles: Dict[str, int] = {}
+        for subscribers in self._topics.values():
+            for s in subscribers:
+                if s.role is not None:
+                    roles[s.role] = roles.get(s.role, 0) + 1
+        await self.backend.publish(PRESENCE_TOPIC, json.dumps({"origin": self.origin, "roles": roles}))
+
+    async def _announce_loop(self):
+        while True:
+            try:
+                await self._announce()
+            except Exception as e:
+                print(f"Fan-out Presence Error: {e}")
+            await asyncio.sleep(self.presence_interval)
+
+    def _on_presence(self, text: str):
+        announcement = json.loads(text)
+        if announcement["origin"] == self.origin:
+            return
+        # A process that dies without a word drops out after three missed announcements
+        expires = time.monotonic() + 3 * self.presence_interval
+        self._peers[announcement["origin"]] = (announcement["roles"], expires)
+
+    # --- Messages ---
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        self.published += 1
+        await self.backend.publish(topic, json.dumps(message, default=str))
+
+    def _deliver(self, topic: str, text: str):
+        if topic == PRESENCE_TOPIC:
+            self._on_presence(text)
+            return
+        for listener in self._listeners.get(topic, ()):
+            try:
+                listener(json.loads(text))
+            except Exception as e:
+                print(f"Fan-out Listener Error on {topic}: {e}")
+        for subscriber in list(self._topics.get(topic, ())):
+            if len(subscriber.pending) >= self.queue_size:
+                self._evict(subscriber)
+                continue
+            subscriber.pending.append(text)
+            self.delivered += 1
+            # One wake-up per batch: a busy sender picks new messages up on its own
+            if subscriber.idle:
+                subscriber.idle = False
+                subscriber.wake.set()
+
+    async def _sender(self, subscriber: _Subscriber):
+        loop = asyncio.get_running_loop()
+        pending, websocket = subscriber.pending, subscriber.websocket
+        while True:
+            await subscriber.wake.wait()
+            subscriber.wake.clear()
+            try:
+                while pending:
+                    # Stuck sends are timed by the watchdog instead of a timer per message
+                    subscriber.sending_since = loop.time()
+                    await websocket.send_text(pending.popleft())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._evict(subscriber)
+                return
+            subscriber.sending_since = None
+            subscriber.idle = True
+
+    async def _watch_sends(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(max(0.05, self.send_timeout / 4))
+            deadline = loop.time() - self.send_timeout
+            for subscribers in list(self._topics.values()):
+                for subscriber in list(subscribers):
+                    if subscriber.sending_since is not None and subscriber.sending_since < deadline:
+                        self._evict(subscriber)
+
+    def _evict(self, subscriber: _Subscriber):
+        if subscriber not in self._topics.get(subscriber.topic, ()):
+            return
+        self.evicted += 1
+        self.leave(subscriber)
+        asyncio.create_task(self._close(subscriber.websocket))
+
+    @staticmethod
+    async def _close(websocket):
+        try:
+            # 1013 Try Again Later: the client reconnects and reloads the history
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "connections": self.count(),
+            "peers": len(self._peers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "evicted": self.evicted,
+            "queue_size": self.queue_size,
+            "pubsub": self.backend.snapshot()
+        }
+
+
+# Singleton instance
+fanout_hub = FanoutHub(
+    backend_from_url(settings.PUBSUB_URL),
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+    presence_interval=settings.WS_PRESENCE_INTERVAL_SECONDS
+)
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated users keyed by bearer token.
+    Entries are detached User instances; get_current_user merges them into the request
+    session without a SELECT. An entry never outlives its token's `exp`.
+    Invalidation is per process: other workers converge within `ttl`.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (user, expires_at)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Any]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._drop(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: Any, token_exp: Optional[float] = None):
+        if self.ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        if token_exp is not None:
+            # `exp` is wall-clock; translate the remaining lifetime onto the monotonic clock
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+        self._drop(token)
+        self._entries[token] = (user, expires_at)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Forgets every cached session of a user (suspension, force logout, role/permission change)."""
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._drop(token)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "users": len(self._tokens_by_user),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+class ActivityTracker:
+    """
+    Accumulates last_active/last_login/session_start per user in memory and writes them
+    in one bulk UPDATE per interval, instead of a commit on every authenticated request.
+    A new session starts after `session_idle` without activity.
+    """
+
+    def __init__(self, flush_interval: float = 15.0, session_idle: timedelta = timedelta(minutes=30)):
+        self.flush_interval = flush_interval
+        self.session_idle = session_idle
+        self._seen: Dict[int, Dict[str, datetime]] = {}  # user id -> {"session_start", "last_active"}
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.touches = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+
+    def touch(self, user: Any, now: Optional[datetime] = None):
+        now = now or datetime.utcnow()
+        seen = self._seen.get(user.id)
+        if seen is None:
+            seen = self._seen[user.id] = {"session_start": user.session_start, "last_active": user.last_active}
+
+        row = self._pending.setdefault(user.id, {"id": user.id})
+        if not seen["last_active"] or not seen["session_start"] or now - _naive(seen["last_active"]) > self.session_idle:
+            seen["session_start"] = now
+            row["session_start"] = now
+        seen["last_active"] = now
+        row["last_active"] = now
+        row["last_login"] = now
+        self.touches += 1
+
+    def forget(self, user_id: int):
+        self._seen.pop(user_id, None)
+        self._pending.pop(user_id, None)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Writes the accumulated timestamps; rows are grouped by which columns changed."""
+        if not self._pending:
+            return 0
+        from app.models.sql.user import User
+
+        rows, self._pending = list(self._pending.values()), {}
+        own_session = db is None
+        if own_session:
+            from app.db.session import SessionLocal
+            db = SessionLocal()
+        try:
+            with_session = [r for r in rows if "session_start" in r]
+            without_session = [r for r in rows if "session_start" not in r]
+            for group in (with_session, without_session):
+                if group:
+                    db.execute(update(User), group)
+            db.commit()
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+        except Exception as e:
+            db.rollback()
+            self.errors += 1
+            # Keep the newest values for the next attempt unless the user touched again since
+            for row in rows:
+                self._pending.setdefault(row["id"], row)
+            print(f"DEBUG: Failed to flush user activity timestamps: {e}")
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+    def start(self):
+        if self.flush_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pending": len(self._pending),
+            "touches": self.touches,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors
+        }
+
+
+def _naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+# Singleton instances
+principal_cache = PrincipalCache(ttl=settings.AUTH_CACHE_TTL_SECONDS)
+activity_tracker = ActivityTracker(flush_interval=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS)
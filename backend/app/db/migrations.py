@@ -0,0 +1,59 @@
+import os
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.session import Base, DB_DIR, engine
+
+# Revision matching the schema create_all() produced before migrations existed
+BASELINE_REVISION = "0001"
+
+def alembic_config(connection: Optional[Connection] = None) -> Config:
+    config = Config(os.path.join(DB_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(DB_DIR, "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+def current_revision(bind: Engine = None) -> Optional[str]:
+    with (bind or engine).connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+def run_migrations(bind: Engine = None) -> Optional[str]:
+    """
+    Upgrades the database to the latest revision and returns it.
+    Databases created by create_all() before migrations existed (tables but no
+    alembic_version) are brought to the model shape and adopted at the baseline first.
+    """
+    bind = bind or engine
+    # Registers every model so adoption sees the full schema
+    from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup  # noqa: F401
+
+    with bind.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        config = alembic_config(conn)
+        if tables and "alembic_version" not in tables:
+            print("DEBUG: Adopting pre-migration database at baseline revision")
+            Base.metadata.create_all(bind=conn)
+            _add_missing_columns(conn)
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+        return MigrationContext.configure(conn).get_current_revision()
+
+def _add_missing_columns(conn: Connection):
+    """
+    create_all() never alters existing tables, so columns added to models later are
+    appended (nullable, no constraints) before the database is stamped.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        present = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in present:
+                col_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                print(f"DEBUG: Added column {table.name}.{column.name}")
@@ -0,0 +1,114 @@
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Query, Session
+
+from app.db import session as db_session
+
+# Listing endpoints return the page as a JSON array and the next cursor in this header,
+# so existing clients keep working and only paging clients need to read it
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Keyset:
+    """
+    Stable (column, id) ordering for keyset pagination. The cursor is the id of the last
+    row served; the next page starts strictly after that row's (column, id) position,
+    so inserts and deletes elsewhere never shift or repeat rows the way OFFSET does.
+    If the cursor row itself is deleted its position is lost: check_cursor() rejects it
+    with a 400 rather than serving an empty page that looks like the end of the list.
+    """
+
+    def __init__(self, column: Any, id_column: Any, descending: bool = True):
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+
+    def order(self, query: Query) -> Query:
+        if self.descending:
+            return query.order_by(self.column.desc(), self.id_column.desc())
+        return query.order_by(self.column.asc(), self.id_column.asc())
+
+    def check_cursor(self, db: Session, cursor: Optional[int]):
+        """Raises 400 when the anchor row of a (column, id) cursor no longer exists."""
+        if cursor is None or self.column is self.id_column:
+            return
+        if db.query(self.id_column).filter(self.id_column == cursor).first() is None:
+            raise HTTPException(status_code=400, detail="Cursor row no longer exists; restart from the first page")
+
+    def after(self, query: Query, cursor: Optional[int]) -> Query:
+        if cursor is None:
+            return query
+        beyond = (lambda a, b: a < b) if self.descending else (lambda a, b: a > b)
+        if self.column is self.id_column:
+            return query.filter(beyond(self.id_column, cursor))
+        # Compare against the anchor row's stored value rather than a re-encoded timestamp:
+        # SQLite keeps CURRENT_TIMESTAMP and Python datetimes in different text formats
+        anchor = select(self.column).where(self.id_column == cursor).scalar_subquery()
+        return query.filter(
+            or_(beyond(self.column, anchor), and_(self.column == anchor, beyond(self.id_column, cursor)))
+        )
+
+    def apply(self, query: Query, cursor: Optional[int]) -> Query:
+        return self.order(self.after(query, cursor))
+
+
+def keyset_page(query: Query, keyset: Keyset, cursor: Optional[int], limit: int) -> Tuple[List[Any], Optional[int]]:
+    """One page of rows and the cursor for the next one (None on the last page)."""
+    keyset.check_cursor(query.session, cursor)
+    rows = keyset.apply(query, cursor).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def paged(response: Response, rows: List[Any], next_cursor: Optional[int]) -> List[Any]:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+    return rows
+
+
+def row_to_dict(row: Any) -> Dict[str, Any]:
+    return {column.key: getattr(row, column.key) for column in row.__table__.columns}
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_query(build_query: Callable[[Session], Query], chunk_size: int = 1000) -> Iterator[Any]:
+    """
+    Rows of `build_query` pulled from a server-side cursor (yield_per) `chunk_size` at a
+    time, so memory stays flat however many rows match. The generator owns its session:
+    the request's one may be closed before a streamed body finishes sending.
+    """
+    db = db_session.SessionLocal()
+    try:
+        yield from build_query(db).yield_per(chunk_size)
+    finally:
+        db.close()
+
+
+def ndjson_stream(
+    build_query: Callable[[Session], Query],
+    serialize: Callable[[Any], Dict[str, Any]] = row_to_dict,
+    chunk_size: int = 1000
+) -> StreamingResponse:
+    """Bulk export as newline-delimited JSON, written out chunk by chunk from stream_query()."""
+    def generate() -> Iterator[bytes]:
+        lines = []
+        for row in stream_query(build_query, chunk_size):
+            lines.append(json.dumps(serialize(row), default=_json_default))
+            if len(lines) >= chunk_size:
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -1,26 +1,159 @@
 import os
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# SQLite for local development
+from app.core.config import settings
+
+# SQLite for local development unless DATABASE_URL points elsewhere (e.g. Postgres in production)
 # Use absolute path to ensure consistency across different execution contexts
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # This is /backend/app/db/
 DB_DIR = os.path.dirname(os.path.dirname(BASE_DIR)) # This is /backend/
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(DB_DIR, 'risklock_v2.db')}"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL or f"sqlite:///{os.path.join(DB_DIR, 'risklock_v2.db')}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False} # Needed only for SQLite
-)
-print(f"DEBUG: Database Engine initialized with URL: {SQLALCHEMY_DATABASE_URL}")
+def async_database_url(url: str) -> str:
+    """Same database, async driver: aiosqlite for SQLite, asyncpg for Postgres."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    if url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:"
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    create_engine kwargs from Settings: pool sizing/recycle for every backend, the statement
+    timeout as a server setting on Postgres and as the lock wait on SQLite.
+    """
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = {}
+    if backend == "sqlite":
+        connect_args["timeout"] = settings.DB_STATEMENT_TIMEOUT_MS / 1000.0
+        if not is_async:
+            connect_args["check_same_thread"] = False # Needed only for SQLite
+        if _is_memory_sqlite(url):
+            # In-memory databases live and die with their one connection; no pool to size
+            return {"connect_args": connect_args}
+    elif backend == "postgresql":
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    options.update(
+        connect_args=connect_args,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=backend != "sqlite"
+    )
+    return options
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """Per-connection PRAGMAs from Settings; WAL lets readers run alongside the single writer."""
+    pragmas: Dict[str, Any] = {}
+    if settings.SQLITE_WAL:
+        pragmas["journal_mode"] = "WAL"
+    pragmas["synchronous"] = settings.SQLITE_SYNCHRONOUS
+    pragmas["busy_timeout"] = settings.DB_STATEMENT_TIMEOUT_MS
+    if settings.SQLITE_MMAP_SIZE_MB:
+        pragmas["mmap_size"] = settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024
+    if settings.SQLITE_CACHE_SIZE_MB:
+        # Negative cache_size is in KiB rather than pages
+        pragmas["cache_size"] = -settings.SQLITE_CACHE_SIZE_MB * 1024
+    return pragmas
+
+def apply_sqlite_pragmas(bind: Engine, pragmas: Dict[str, Any]):
+    """Runs `pragmas` on every new connection of a SQLite engine (sync or async's sync_engine)."""
+    if bind.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(bind, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def _pool_stat(pool, name: str):
+    # Only QueuePool-style pools expose size()/checkedout()/overflow()
+    stat = getattr(pool, name, None)
+    return stat() if callable(stat) else None
+
+def database_self_check(bind: Engine = None) -> Dict[str, Any]:
+    """
+    Effective database settings as the server reports them (not just what was configured),
+    plus pool state. Run at startup and served on the admin system endpoint.
+    """
+    bind = bind or engine
+    pool = bind.pool
+    report: Dict[str, Any] = {
+        "url": bind.url.render_as_string(hide_password=True),
+        "dialect": bind.dialect.name,
+        "driver": bind.dialect.driver,
+        "pool": {
+            "class": type(pool).__name__,
+            "size": _pool_stat(pool, "size"),
+            "checked_out": _pool_stat(pool, "checkedout"),
+            "overflow": _pool_stat(pool, "overflow"),
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "recycle_seconds": pool._recycle
+        }
+    }
+    try:
+        with bind.connect() as conn:
+            if bind.dialect.name == "sqlite":
+                effective = {
+                    name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                    for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+                }
+                report["settings"] = effective
+                if settings.SQLITE_WAL and str(effective["journal_mode"]).lower() != "wal":
+                    report["warnings"] = [f"WAL requested but journal_mode is {effective['journal_mode']}"]
+            elif bind.dialect.name == "postgresql":
+                report["settings"] = {
+                    "server_version": conn.exec_driver_sql("SHOW server_version").scalar(),
+                    "statement_timeout": conn.exec_driver_sql("SHOW statement_timeout").scalar()
+                }
+        report["ok"] = True
+    except Exception as e:
+        report["ok"] = False
+        report["error"] = str(e)
+    return report
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+apply_sqlite_pragmas(engine, sqlite_pragmas())
+print(f"DEBUG: Database Engine initialized with URL: {engine.url.render_as_string(hide_password=True)}")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+ASYNC_SQLALCHEMY_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL, **engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, is_async=True)
+)
+apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+
+# expire_on_commit=False: async sessions can't lazy-refresh attributes after a commit
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
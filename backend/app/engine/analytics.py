@@ -0,0 +1,198 @@
+import json
+import math
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.engine.rollups import RollupService, rollup_service
+from app.models.sql.accountability import PerformanceInsight
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+class PerformanceAnalytics:
+    """
+    Period performance over closed trade history, read from the trading-day rows of the
+    account rollups (RollupService keeps them current from its watermarks), so a one-year
+    report reads ~250 rows per account instead of every trade.
+    Equity curve, drawdown, win rate, profit factor, expectancy, Sharpe/Sortino and
+    the per-symbol/per-session breakdowns are all computed from those rows.
+    """
+
+    def __init__(self, rollups: RollupService):
+        self.rollups = rollups
+
+    # --- Metrics ---
+
+    def compute(
+        self,
+        db: Session,
+        user_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        starting_balance: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Performance metrics over the trading days [start, end] (inclusive). An open start
+        begins at the first active day, an open end stops at the last one; an end in the
+        future stops at today.
+        """
+        days = self.rollups.trade_days(db, user_id, start, end)
+        if days:
+            today = self.rollups.ledger.trading_day(datetime.utcnow())
+            start = start or days[0]["day"]
+            end = min(end, today) if end else days[-1]["day"]
+        return self.metrics(days, starting_balance, start, end)
+
+    @staticmethod
+    def metrics(
+        days: List[Dict[str, Any]],
+        starting_balance: Optional[float] = None,
+        first_day: Optional[date] = None,
+        last_day: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Metrics from RollupService.trade_days() rows in day order. Sharpe/Sortino count
+        every weekday of [first_day, last_day] without trades as a 0 P&L day, so quiet
+        days dilute the ratios instead of being left out of them.
+        """
+        daily = np.array([d["net_profit"] for d in days], dtype=np.float64)
+        trades = sum(d["trades"] for d in days)
+        wins = sum(d["wins"] for d in days)
+        losses = sum(d["losses"] for d in days)
+        gross_profit = sum(d["gross_profit"] for d in days)
+        gross_loss = sum(d["gross_loss"] for d in days)
+
+        # 1. Equity curve and drawdown (cumulative P&L on top of the starting balance)
+        base = starting_balance or 0.0
+        equity = base + np.cumsum(daily)
+        peaks = np.maximum.accumulate(np.concatenate([[base], equity]))[1:] if len(equity) else equity
+        drawdowns = peaks - equity
+        max_drawdown = float(drawdowns.max()) if len(drawdowns) else 0.0
+        worst = int(drawdowns.argmax()) if len(drawdowns) else 0
+
+        # 2. Risk-adjusted returns on daily P&L (relative to the balance when one is given),
+        # over active days plus the idle weekdays of the period (weekend trading days count when active)
+        idle = 0
+        if first_day is not None and last_day is not None and last_day >= first_day:
+            active_weekdays = int(np.is_busday(np.array([d["day"] for d in days], dtype="datetime64[D]")).sum())
+            idle = max(int(np.busday_count(first_day, last_day + timedelta(days=1))) - active_weekdays, 0)
+        returns = np.concatenate([daily / base if base else daily, np.zeros(idle)])
+        sharpe = sortino = None
+        if len(returns) > 1:
+            std = returns.std(ddof=1)
+            downside = math.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+            annualize = math.sqrt(TRADING_DAYS_PER_YEAR)
+            sharpe = round(float(returns.mean() / std * annualize), 3) if std > 0 else None
+            sortino = round(float(returns.mean() / downside * annualize), 3) if downside > 0 else None
+
+        avg_win = gross_profit / wins if wins else 0.0
+        avg_loss = gross_loss / losses if losses else 0.0
+        return {
+            "days": len(days),
+            "trading_days": len(returns),
+            "trades": trades,
+            "net_profit": round(gross_profit - gross_loss, 2),
+            "win_rate": round(wins / trades * 100, 2) if trades else 0.0,
+            "profit_factor": round(gross_profit / gross_loss, 3) if gross_loss else None,
+            "avg_win": round(avg_win, 2),
+            "avg_loss": round(avg_loss, 2),
+            "expectancy": round((gross_profit - gross_loss) / trades, 2) if trades else 0.0,
+            "max_drawdown": round(max_drawdown, 2),
+            "max_drawdown_pct": round(max_drawdown / peaks[worst] * 100, 2) if len(peaks) and peaks[worst] > 0 else None,
+            "sharpe": sharpe,
+            "sortino": sortino,
+            "equity_curve": [
+                {"day": d["day"].isoformat(), "net_profit": round(d["net_profit"], 2), "equity": round(float(value), 2)}
+                for d, value in zip(days, equity)
+            ],
+            "by_symbol": PerformanceAnalytics._merge([d["by_symbol"] for d in days]),
+            "by_session": PerformanceAnalytics._merge([d["by_session"] for d in days])
+        }
+
+    @staticmethod
+    def _merge(breakdowns: List[Optional[Dict[str, List]]]) -> Dict[str, Dict[str, Any]]:
+        merged: Dict[str, List] = {}
+        for breakdown in breakdowns:
+            for name, (count, wins, profit) in (breakdown or {}).items():
+                total = merged.setdefault(name, [0, 0, 0.0])
+                total[0] += count
+                total[1] += wins
+                total[2] += profit
+        return {
+            name: {"trades": count, "win_rate": round(wins / count * 100, 2), "net_profit": round(profit, 2)}
+            for name, (count, wins, profit) in merged.items()
+        }
+
+    # --- Insights ---
+
+    def generate_insights(self, db: Session, user_id: int, metrics: Dict[str, Any]) -> List[PerformanceInsight]:
+        """
+        Turns a metrics result into PerformanceInsight rows. Each insight is keyed by its
+        title: a recomputation updates the existing row, and flags it unread again only
+        when what it says has changed.
+        """
+        if not metrics["trades"]:
+            return []
+        candidates = []
+
+        if metrics["profit_factor"] is not None and metrics["profit_factor"] < 1:
+            candidates.append(("anomaly", 5, "Losing edge",
+                f"Profit factor is {metrics['profit_factor']}: losses outweigh wins over {metrics['trades']} trades."))
+        elif metrics["profit_factor"] is not None:
+            candidates.append(("trend", 3, "Profit factor",
+                f"Profit factor {metrics['profit_factor']} with a {metrics['win_rate']}% win rate and "
+                f"{metrics['expectancy']} expectancy per trade."))
+
+        if metrics["max_drawdown_pct"] is not None and metrics["max_drawdown_pct"] >= 10:
+            candidates.append(("anomaly", 4, "Deep drawdown",
+                f"Equity fell {metrics['max_drawdown_pct']}% from its peak ({metrics['max_drawdown']})."))
+
+        sessions = {name: s for name, s in metrics["by_session"].items() if s["trades"] >= 5}
+        if len(sessions) > 1:
+            best = max(sessions, key=lambda name: sessions[name]["net_profit"])
+            worst = min(sessions, key=lambda name: sessions[name]["net_profit"])
+            if sessions[worst]["net_profit"] < 0:
+                candidates.append(("recommendation", 4, "Weakest session",
+                    f"The {worst} session lost {-sessions[worst]['net_profit']} over {sessions[worst]['trades']} trades, "
+                    f"while {best} returned {sessions[best]['net_profit']}."))
+
+        symbols = {name: s for name, s in metrics["by_symbol"].items() if s["trades"] >= 5}
+        if symbols:
+            worst = min(symbols, key=lambda name: symbols[name]["net_profit"])
+            if symbols[worst]["net_profit"] < 0:
+                candidates.append(("correlation", 3, "Costliest symbol",
+                    f"{worst} accounts for {-symbols[worst]['net_profit']} of losses "
+                    f"at a {symbols[worst]['win_rate']}% win rate."))
+
+        existing = {
+            insight.title: insight
+            for insight in db.query(PerformanceInsight).filter(
+                PerformanceInsight.user_id == user_id,
+                PerformanceInsight.title.in_([title for _, _, title, _ in candidates])
+            )
+        }
+        data_points = json.dumps({key: metrics[key] for key in (
+            "days", "trades", "net_profit", "win_rate", "profit_factor", "expectancy", "max_drawdown", "sharpe", "sortino"
+        )})
+        insights = []
+        for insight_type, importance, title, description in candidates:
+            insight = existing.get(title)
+            if insight is None:
+                insight = PerformanceInsight(user_id=user_id, title=title)
+                db.add(insight)
+            if insight.description != description:
+                insight.is_read = False
+            insight.insight_type = insight_type
+            insight.importance = importance
+            insight.description = description
+            insight.data_points = data_points
+            insight.generated_at = datetime.utcnow()
+            insights.append(insight)
+        return insights
+
+
+# Singleton instance
+performance_analytics = PerformanceAnalytics(rollup_service)
@@ -0,0 +1,235 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.models.sql.trade import Trade
+
+# Column layout of the archive; every closed Trade row maps onto it one to one
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("ticket", pa.int64()),
+    ("user_id", pa.int64()),
+    ("rule_snapshot_id", pa.int64()),
+    ("symbol", pa.string()),
+    ("type", pa.string()),
+    ("session", pa.string()),
+    ("volume", pa.float64()),
+    ("open_price", pa.float64()),
+    ("close_price", pa.float64()),
+    ("profit", pa.float64()),
+    ("risk_score", pa.int64()),
+    ("open_time", pa.timestamp("us")),
+    ("close_time", pa.timestamp("us")),
+])
+
+
+def month_start(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, 1)
+
+
+def next_month(ts: datetime) -> datetime:
+    return datetime(ts.year + ts.month // 12, ts.month % 12 + 1, 1)
+
+
+class TradeArchive:
+    """
+    Columnar copy of closed trade history: one Arrow IPC file per user and calendar month
+    (by close_time), written once the month is over. Each file's row count and highest
+    trade id are its high-water mark: a trade closed into an archived month but written
+    after compaction (a late insert, or an open position closed with a past close_time)
+    changes them, and the next compaction rewrites that month.
+    Reads memory-map the files (no parse, no copy) and append the not-yet-archived tail
+    from the trades table, so analytics aggregate over columns instead of ORM objects.
+    The trades table keeps its rows; the archive is a read-optimised mirror.
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, compact_interval: float = 3600.0):
+        self.data_dir = data_dir
+        self.compact_interval = compact_interval
+        self._task: Optional[asyncio.Task] = None
+        # path -> (rows, max trade id) of the archived file
+        self._marks: Dict[str, Tuple[int, int]] = {}
+
+        self.files_written = 0
+        self.files_rewritten = 0
+        self.rows_archived = 0
+        self.errors = 0
+
+    # --- Writes ---
+
+    def compact(self, db, now: Optional[datetime] = None) -> int:
+        """
+        Archives every finished month that has no file yet and rewrites archived months
+        whose rows changed since; returns the files written.
+        """
+        if not self.data_dir:
+            return 0
+        cutoff = month_start(now or datetime.utcnow())
+        # Earliest finished month per user (each user's months are walked from there),
+        # with the row count and highest id of everything the user's files should hold
+        finished = db.query(Trade.user_id, func.min(Trade.close_time), func.count(Trade.id), func.max(Trade.id)).filter(
+            Trade.close_time.isnot(None),
+            Trade.close_time < cutoff
+        ).group_by(Trade.user_id).all()
+
+        written = 0
+        for user_id, first, rows, max_id in finished:
+            marks = [self._mark(self._path(user_id, month)) for month in self.months(user_id) if month < cutoff]
+            # Only a user whose totals moved gets the per-month comparison
+            changed = rows != sum(m[0] for m in marks) or max_id > max((m[1] for m in marks), default=0)
+            month = month_start(first)
+            while month < cutoff:
+                path = self._path(user_id, month)
+                if not os.path.exists(path):
+                    self._write(user_id, month, self._query(db, user_id, month, next_month(month)))
+                    written += 1
+                elif changed and self._month_mark(db, user_id, month) != self._mark(path):
+                    self._write(user_id, month, self._query(db, user_id, month, next_month(month)))
+                    self.files_rewritten += 1
+                    written += 1
+                month = next_month(month)
+        return written
+
+    def _month_mark(self, db, user_id: int, month: datetime) -> Tuple[int, int]:
+        rows, max_id = db.query(func.count(Trade.id), func.max(Trade.id)).filter(
+            Trade.user_id == user_id,
+            Trade.close_time >= month,
+            Trade.close_time < next_month(month)
+        ).one()
+        return rows, max_id or 0
+
+    def _mark(self, path: str) -> Tuple[int, int]:
+        mark = self._marks.get(path)
+        if mark is None:
+            ids = pa.ipc.open_file(pa.memory_map(path)).read_all()["id"]
+            mark = self._marks[path] = (len(ids), pc.max(ids).as_py() or 0)
+        return mark
+
+    def _write(self, user_id: int, month: datetime, table: pa.Table):
+        path = self._path(user_id, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        # Uncompressed IPC so readers can map the buffers straight from the page cache
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, ARCHIVE_SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        self._marks[path] = (table.num_rows, pc.max(table["id"]).as_py() or 0)
+        self.files_written += 1
+        self.rows_archived += table.num_rows
+
+    # --- Reads ---
+
+    def read(
+        self,
+        db,
+        user_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[List[str]] = None
+    ) -> pa.Table:
+        """Closed trades of one user with close_time in [start, end), archive first then the live tail."""
+        parts = []
+        tail_from = None
+        for month in self.months(user_id):
+            tail_from = next_month(month)
+            if (start is not None and next_month(month) <= start) or (end is not None and month >= end):
+                continue
+            parts.append(pa.ipc.open_file(pa.memory_map(self._path(user_id, month))).read_all())
+
+        if end is None or tail_from is None or end > tail_from:
+            lower = max(filter(None, [start, tail_from]), default=None)
+            parts.append(self._query(db, user_id, lower, end))
+
+        table = pa.concat_tables(parts) if parts else ARCHIVE_SCHEMA.empty_table()
+        if start is not None:
+            table = table.filter(pc.greater_equal(table["close_time"], pa.scalar(start, pa.timestamp("us"))))
+        if end is not None:
+            table = table.filter(pc.less(table["close_time"], pa.scalar(end, pa.timestamp("us"))))
+        return table.select(columns) if columns else table
+
+    def months(self, user_id: int) -> List[datetime]:
+        directory = os.path.join(self.data_dir or "", f"user-{user_id}")
+        if not self.data_dir or not os.path.isdir(directory):
+            return []
+        return sorted(
+            datetime.strptime(name[:-len(".arrow")], "%Y-%m")
+            for name in os.listdir(directory) if name.endswith(".arrow")
+        )
+
+    def _query(self, db, user_id: int, start: Optional[datetime], end: Optional[datetime]) -> pa.Table:
+        query = db.query(*[getattr(Trade, field.name) for field in ARCHIVE_SCHEMA]).filter(
+            Trade.user_id == user_id,
+            Trade.close_time.isnot(None)
+        )
+        if start is not None:
+            query = query.filter(Trade.close_time >= start)
+        if end is not None:
+            query = query.filter(Trade.close_time < end)
+        columns = [[] for _ in ARCHIVE_SCHEMA]
+        for row in query.order_by(Trade.close_time, Trade.id).yield_per(5000):
+            for values, value in zip(columns, row):
+                values.append(value)
+        return pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, ARCHIVE_SCHEMA)],
+            schema=ARCHIVE_SCHEMA
+        )
+
+    def _path(self, user_id: int, month: datetime) -> str:
+        return os.path.join(self.data_dir, f"user-{user_id}", f"{month:%Y-%m}.arrow")
+
+    # --- Background compaction ---
+
+    def compact_now(self) -> int:
+        db = db_session.SessionLocal()
+        try:
+            return self.compact(db)
+        finally:
+            db.close()
+
+    def start(self):
+        if not self.data_dir or self.compact_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._compact_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _compact_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.compact_now)
+            except Exception as e:
+                self.errors += 1
+                print(f"Trade Archive Error: {e}")
+            await asyncio.sleep(self.compact_interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "data_dir": self.data_dir,
+            "files_written": self.files_written,
+            "files_rewritten": self.files_rewritten,
+            "rows_archived": self.rows_archived,
+            "errors": self.errors
+        }
+
+
+# Singleton instance
+trade_archive = TradeArchive(
+    data_dir=settings.TRADE_ARCHIVE_DIR or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "archive"
+    ),
+    compact_interval=settings.TRADE_ARCHIVE_INTERVAL_SECONDS
+)
@@ -41,6 +41,29 @@ class BrokerConnector(ABC):
         """
         pass
 
+    # Connectors that can serve closed deals from the broker's history
+    supports_history = False
+
+    async def get_deals(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Returns closed-deal history in [start, end) as standardized deals:
+        {
+            "id": str,           # deal ticket, unique per account
+            "ticket": int,       # position the deal belongs to (None for account-level charges)
+            "symbol": str,
+            "volume": float,
+            "profit": float,     # profit + commission + swap
+            "entry": str,        # 'in', 'out' or 'inout'
+            "time": datetime     # UTC
+        }
+        Raises when the history cannot be read in full instead of returning part of it.
+        """
+        return []
+
+    async def disconnect(self):
+        """Releases broker resources. Connectors without persistent sessions need not override."""
+        pass
+
     @property
     def last_sync(self) -> Optional[datetime]:
         """Timestamp of the last successful data synchronization."""
@@ -1,15 +1,86 @@
 import os
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
 from metaapi_cloud_sdk import MetaApi
 from .base import BrokerConnector
 
+
+# Returned instead of raising so a broker outage degrades the dashboard rather than crashing it
+EMPTY_ACCOUNT_INFO = {
+    "login": 0, "name": "Error", "server": "", "currency": "USD", "leverage": 1,
+    "balance": 0.0, "equity": 0.0, "margin": 0.0, "margin_free": 0.0, "margin_level": 0.0,
+    "profit": 0.0, "platform": "error"
+}
+
+
+def standardize_account_info(account_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a MetaApi account information payload onto BrokerConnector.get_account_info()."""
+    return {
+        "login": int(account_info['login']),
+        "name": account_info['name'],
+        "server": account_info['server'],
+        "currency": account_info['currency'],
+        "leverage": account_info.get('leverage', 100),
+        "balance": float(account_info['balance']),
+        "equity": float(account_info['equity']),
+        "margin": float(account_info['margin']),
+        "margin_free": float(account_info['freeMargin']),
+        "margin_level": float(account_info.get('marginLevel', 0)),
+        "profit": float(account_info.get('profit', 0)), # Note: 'profit' might not be directly in account_info, usually calculated from equity - balance
+        "platform": "mt5" if "mt5" in account_info.get('platform', '').lower() else "mt4"
+    }
+
+
+def standardize_position(pos: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a MetaApi position onto the standardized open trade dict."""
+    return {
+        "ticket": int(pos['id']),
+        "symbol": pos['symbol'],
+        "type": 'buy' if pos['type'] == 'POSITION_TYPE_BUY' else 'sell',
+        "volume": float(pos['volume']),
+        "open_price": float(pos['openPrice']),
+        "close_price": float(pos['currentPrice']), # For open trades, close price is current price
+        "profit": float(pos['profit']),
+        "open_time": pos['time'], # MetaApi returns ISO string usually
+        "status": "open"
+    }
+
+
+# Deal types that are trading results; deposits, credit and bonuses are not P&L
+TRADING_DEAL_TYPES = ("DEAL_TYPE_BUY", "DEAL_TYPE_SELL", "DEAL_TYPE_COMMISSION", "DEAL_TYPE_COMMISSION_DAILY", "DEAL_TYPE_INTEREST")
+DEAL_ENTRIES = {"DEAL_ENTRY_IN": "in", "DEAL_ENTRY_OUT": "out", "DEAL_ENTRY_OUT_BY": "out", "DEAL_ENTRY_INOUT": "inout"}
+
+
+def standardize_deal(deal: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Maps a MetaApi history deal onto BrokerConnector.get_deals(); None for non-trading deals."""
+    if deal.get('type') not in TRADING_DEAL_TYPES:
+        return None
+    deal_time = deal['time']
+    if isinstance(deal_time, str):
+        deal_time = datetime.fromisoformat(deal_time.replace('Z', '+00:00'))
+    if deal_time.tzinfo is not None:
+        deal_time = deal_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "id": str(deal['id']),
+        "ticket": int(deal['positionId']) if deal.get('positionId') else None,
+        "symbol": deal.get('symbol'),
+        "volume": float(deal.get('volume') or 0),
+        "profit": float(deal.get('profit') or 0) + float(deal.get('commission') or 0) + float(deal.get('swap') or 0),
+        "entry": DEAL_ENTRIES.get(deal.get('entryType'), 'in'),
+        "time": deal_time
+    }
+
+
 class MetaApiConnector(BrokerConnector):
+    supports_history = True
+
     def __init__(self, token: str, account_id: str):
         self.token = token
         self.account_id = account_id
-        self.api = MetaApi(token=token)
+        # MetaApi spins up its websocket client on construction, which needs a running loop.
+        # Created lazily in connect() so connectors can be built outside of a request.
+        self.api = None
         self.account = None
         self.connection = None
         self._last_sync = None
@@ -19,10 +90,13 @@ class MetaApiConnector(BrokerConnector):
         """
         Connects to the MetaApi cloud account with timeouts.
         """
-        if self.connection and self.connection.is_connected():
+        if self.connection and self._confidence_status == "LIVE":
             return True
 
         try:
+            if self.api is None:
+                self.api = MetaApi(token=self.token)
+
             self.account = await asyncio.wait_for(
                 self.api.metatrader_account_api.get_account(self.account_id),
                 timeout=10.0
@@ -54,6 +128,22 @@ class MetaApiConnector(BrokerConnector):
             self._confidence_status = "STALE"
             return False
 
+    async def disconnect(self):
+        """
+        Closes the RPC connection and the underlying MetaApi client.
+        """
+        try:
+            if self.connection:
+                await self.connection.close()
+            if self.api:
+                self.api.close()
+        except Exception as e:
+            print(f"MetaApi Close Error for account {self.account_id}: {e}")
+        finally:
+            self.connection = None
+            self.api = None
+            self._confidence_status = "PAUSED"
+
     async def get_account_info(self) -> Dict[str, Any]:
         """
         Fetches account information via RPC.
@@ -66,28 +156,11 @@ class MetaApiConnector(BrokerConnector):
             self._last_sync = datetime.utcnow()
             self._confidence_status = "LIVE"
             
-            return {
-                "login": int(account_info['login']),
-                "name": account_info['name'],
-                "server": account_info['server'],
-                "currency": account_info['currency'],
-                "leverage": account_info.get('leverage', 100),
-                "balance": float(account_info['balance']),
-                "equity": float(account_info['equity']),
-                "margin": float(account_info['margin']),
-                "margin_free": float(account_info['freeMargin']),
-                "margin_level": float(account_info.get('marginLevel', 0)),
-                "profit": float(account_info.get('profit', 0)), # Note: 'profit' might not be directly in account_info, usually calculated from equity - balance
-                "platform": "mt5" if "mt5" in account_info.get('platform', '').lower() else "mt4"
-            }
+            return standardize_account_info(account_info)
         except Exception as e:
             print(f"Error fetching account info: {e}")
             # Return fallback/empty structure to prevent crash
-            return {
-                "login": 0, "name": "Error", "server": "", "currency": "USD", "leverage": 1,
-                "balance": 0.0, "equity": 0.0, "margin": 0.0, "margin_free": 0.0, "margin_level": 0.0,
-                "profit": 0.0, "platform": "error"
-            }
+            return dict(EMPTY_ACCOUNT_INFO)
 
     async def get_trades(self) -> List[Dict[str, Any]]:
         """
@@ -101,20 +174,28 @@ class MetaApiConnector(BrokerConnector):
             self._last_sync = datetime.utcnow()
             self._confidence_status = "LIVE"
             
-            standardized_trades = []
-            for pos in positions:
-                standardized_trades.append({
-                    "ticket": int(pos['id']),
-                    "symbol": pos['symbol'],
-                    "type": 'buy' if pos['type'] == 'POSITION_TYPE_BUY' else 'sell',
-                    "volume": float(pos['volume']),
-                    "open_price": float(pos['openPrice']),
-                    "close_price": float(pos['currentPrice']), # For open trades, close price is current price
-                    "profit": float(pos['profit']),
-                    "open_time": pos['time'], # MetaApi returns ISO string usually
-                    "status": "open"
-                })
-            return standardized_trades
+            return [standardize_position(pos) for pos in positions]
         except Exception as e:
             print(f"Error fetching trades: {e}")
             return []
+
+    async def get_deals(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Fetches closed deals in [start, end), following MetaApi's 1000-deal pages.
+        Unlike the snapshot reads this raises on failure: a partial history would let
+        the ledger move its sync cursor past deals it never received.
+        """
+        if not self.connection:
+            await self.connect()
+
+        deals = []
+        offset = 0
+        while True:
+            page = await self.connection.get_deals_by_time_range(start, end, offset, 1000)
+            batch = page.get('deals', [])
+            deals.extend(d for d in map(standardize_deal, batch) if d)
+            if len(batch) < 1000:
+                break
+            offset += len(batch)
+        self._last_sync = datetime.utcnow()
+        return deals
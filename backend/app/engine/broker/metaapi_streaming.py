@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from metaapi_cloud_sdk import MetaApi, SynchronizationListener
+
+from .base import BrokerConnector
+from .metaapi import EMPTY_ACCOUNT_INFO, standardize_account_info, standardize_deal, standardize_position
+
+
+class _MirrorListener(SynchronizationListener):
+    """Forwards MetaApi synchronization callbacks to the owning connector."""
+
+    def __init__(self, connector: "MetaApiStreamingConnector"):
+        super().__init__()
+        self.connector = connector
+
+    async def on_account_information_updated(self, instance_index, account_information):
+        self.connector._apply_account(account_information)
+
+    async def on_positions_replaced(self, instance_index, positions):
+        self.connector._replace_positions(positions)
+
+    async def on_positions_updated(self, instance_index, positions, removed_positions_ids):
+        for position in positions:
+            self.connector._apply_position(position)
+        for position_id in removed_positions_ids:
+            self.connector._remove_position(position_id)
+
+    async def on_position_updated(self, instance_index, position):
+        self.connector._apply_position(position)
+
+    async def on_position_removed(self, instance_index, position_id):
+        self.connector._remove_position(position_id)
+
+    async def on_deal_added(self, instance_index, deal):
+        deal = standardize_deal(deal)
+        if deal:
+            self.connector._emit("deal_added", deal=deal)
+
+    async def on_positions_synchronized(self, instance_index, synchronization_id):
+        self.connector._confidence_status = "LIVE"
+
+    async def on_disconnected(self, instance_index):
+        self.connector._confidence_status = "DEGRADED"
+
+    async def on_broker_connection_status_changed(self, instance_index, connected):
+        self.connector._confidence_status = "LIVE" if connected else "DEGRADED"
+
+
+class MetaApiStreamingConnector(BrokerConnector):
+    """
+    MetaApi connector backed by a streaming connection instead of RPC polling.
+    A synchronization listener keeps a local mirror of the terminal state (account
+    information + open positions), so get_account_info()/get_trades() are memory reads,
+    and every change is published to subscribers of events().
+
+    `connection_factory` returns a connected-to-be streaming connection; it defaults to
+    MetaApi's and is the seam used to replay recorded events in tests.
+    """
+
+    EVENT_QUEUE_SIZE = 1000
+    supports_history = True
+
+    def __init__(
+        self,
+        token: str,
+        account_id: str,
+        connection_factory: Optional[Callable[[], Awaitable[Any]]] = None
+    ):
+        self.token = token
+        self.account_id = account_id
+        self.api = None
+        self.connection = None
+        self._connection_factory = connection_factory or self._open_streaming_connection
+        self._listener = _MirrorListener(self)
+        self._account: Optional[Dict[str, Any]] = None
+        self._positions: Dict[int, Dict[str, Any]] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._last_sync = None
+        self._confidence_status = "PAUSED"
+        self.dropped_events = 0
+
+    async def connect(self) -> bool:
+        if self.connection and self._confidence_status == "LIVE":
+            return True
+
+        try:
+            if self.connection is None:
+                self.connection = await self._connection_factory()
+                self.connection.add_synchronization_listener(self._listener)
+                await asyncio.wait_for(self.connection.connect(), timeout=10.0)
+            await asyncio.wait_for(self.connection.wait_synchronized(), timeout=30.0)
+
+            self._confidence_status = "LIVE"
+            self._last_sync = datetime.utcnow()
+            return True
+        except asyncio.TimeoutError:
+            print(f"MetaApi Streaming Timeout for account {self.account_id}")
+            self._confidence_status = "DEGRADED"
+            return False
+        except Exception as e:
+            print(f"MetaApi Streaming Error for account {self.account_id}: {e}")
+            self._confidence_status = "STALE"
+            return False
+
+    async def _open_streaming_connection(self):
+        if self.api is None:
+            self.api = MetaApi(token=self.token)
+        account = await asyncio.wait_for(
+            self.api.metatrader_account_api.get_account(self.account_id),
+            timeout=10.0
+        )
+        if account.state != 'DEPLOYED':
+            await asyncio.wait_for(account.deploy(), timeout=30.0)
+        await asyncio.wait_for(account.wait_connected(), timeout=20.0)
+        return account.get_streaming_connection()
+
+    async def disconnect(self):
+        """Closes the stream and ends every events() iterator."""
+        try:
+            if self.connection:
+                self.connection.remove_synchronization_listener(self._listener)
+                await self.connection.close()
+            if self.api:
+                self.api.close()
+        except Exception as e:
+            print(f"MetaApi Close Error for account {self.account_id}: {e}")
+        finally:
+            self.connection = None
+            self.api = None
+            self._confidence_status = "PAUSED"
+            for queue in self._subscribers:
+                self._offer(queue, None)
+
+    async def get_account_info(self) -> Dict[str, Any]:
+        """Account information from the local mirror (no broker round-trip)."""
+        if not self.connection:
+            await self.connect()
+        return dict(self._account) if self._account else dict(EMPTY_ACCOUNT_INFO)
+
+    async def get_trades(self) -> List[Dict[str, Any]]:
+        """Open positions from the local mirror (no broker round-trip)."""
+        if not self.connection:
+            await self.connect()
+        return [dict(trade) for trade in self._positions.values()]
+
+    async def get_deals(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Closed deals from the history the streaming connection keeps synchronized."""
+        if not self.connection:
+            await self.connect()
+        storage = getattr(self.connection, "history_storage", None)
+        if storage is None:
+            raise ConnectionError(f"MetaApi account {self.account_id} has no synchronized history")
+        return [d for d in map(standardize_deal, storage.get_deals_by_time_range(start, end)) if d]
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async iterator of mirror changes:
+        {"type": "account_updated" | "position_opened" | "position_updated" | "position_closed"
+                 | "positions_replaced" | "deal_added", "at": datetime, ...payload}
+        Ends when the connector disconnects. A consumer that falls behind loses its oldest events.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.EVENT_QUEUE_SIZE)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.remove(queue)
+
+    # --- Mirror updates (called by the listener) ---
+
+    def _apply_account(self, account_information: Dict[str, Any]):
+        account = standardize_account_info(account_information)
+        if account != self._account:
+            self._account = account
+            self._emit("account_updated", account=dict(account))
+
+    def _apply_position(self, position: Dict[str, Any]):
+        trade = standardize_position(position)
+        previous = self._positions.get(trade["ticket"])
+        # Several replicas may deliver the same update; only real changes are published
+        if trade == previous:
+            return
+        self._positions[trade["ticket"]] = trade
+        self._emit("position_opened" if previous is None else "position_updated", ticket=trade["ticket"], trade=dict(trade))
+
+    def _remove_position(self, position_id: Any):
+        trade = self._positions.pop(int(position_id), None)
+        if trade is not None:
+            self._emit("position_closed", ticket=trade["ticket"], trade=trade)
+
+    def _replace_positions(self, positions: List[Dict[str, Any]]):
+        self._positions = {trade["ticket"]: trade for trade in map(standardize_position, positions)}
+        self._emit("positions_replaced", trades=[dict(t) for t in self._positions.values()])
+
+    def _emit(self, event_type: str, **payload):
+        self._last_sync = datetime.utcnow()
+        event = {"type": event_type, "at": self._last_sync, **payload}
+        for queue in self._subscribers:
+            self._offer(queue, event)
+
+    def _offer(self, queue: asyncio.Queue, event: Optional[Dict[str, Any]]):
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_events += 1
+        queue.put_nowait(event)
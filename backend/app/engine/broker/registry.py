@@ -0,0 +1,263 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core import crypto
+from app.core.config import settings
+from .base import BrokerConnector
+from .metaapi import MetaApiConnector
+from .metaapi_streaming import MetaApiStreamingConnector
+
+
+class _PoolEntry:
+    __slots__ = ("connector", "fingerprint", "last_used", "last_reconnect")
+
+    def __init__(self, connector: BrokerConnector, fingerprint: Any):
+        self.connector = connector
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+        self.last_reconnect = 0.0
+
+
+class ConnectorRegistry:
+    """
+    Process-wide pool of broker connectors keyed by BrokerAccount.id.
+    Keeps synchronized connections warm across requests, evicts idle ones (LRU + TTL)
+    and swaps in a fresh connection in the background when one degrades.
+    """
+
+    DEGRADED_STATES = ("DEGRADED", "STALE")
+
+    def __init__(
+        self,
+        max_size: int = 100,
+        idle_ttl: float = 900.0,
+        sweep_interval: float = 60.0,
+        reconnect_backoff: float = 30.0
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.reconnect_backoff = reconnect_backoff
+
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._reconnects: Dict[Hashable, asyncio.Task] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reconnects = 0
+        self.reconnect_failures = 0
+
+    async def acquire(
+        self,
+        key: Hashable,
+        fingerprint: Any,
+        factory: Callable[[], BrokerConnector]
+    ) -> BrokerConnector:
+        """
+        Returns the pooled connector for `key`, creating and connecting one on a miss.
+        `fingerprint` identifies the credentials; a change (e.g. rotated token) replaces the entry.
+        """
+        entry = self._entries.get(key)
+        if entry and entry.fingerprint == fingerprint:
+            self.hits += 1
+        else:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = self._entries.get(key)
+                if entry and entry.fingerprint == fingerprint:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    if entry:
+                        self._entries.pop(key, None)
+                        await self._close(entry)
+
+                    connector = factory()
+                    # A failed connect is still pooled: the entry reports DEGRADED/STALE
+                    # and gets reconnected in the background instead of on the next request.
+                    await connector.connect()
+                    entry = _PoolEntry(connector, fingerprint)
+                    self._entries[key] = entry
+                    await self._evict_over_capacity()
+
+        entry.last_used = time.monotonic()
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+        if entry.connector.confidence_status in self.DEGRADED_STATES:
+            self._schedule_reconnect(key, entry, factory)
+
+        return entry.connector
+
+    async def release(self, key: Hashable):
+        """Drops a connector from the pool (e.g. when the broker account is removed)."""
+        entry = self._entries.pop(key, None)
+        self._locks.pop(key, None)
+        if entry:
+            await self._close(entry)
+
+    async def evict_idle(self) -> int:
+        """Closes connectors unused for longer than `idle_ttl`. Returns the eviction count."""
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = []
+        # Entries are kept in LRU order, so the idle ones are all at the front.
+        for key, entry in self._entries.items():
+            if entry.last_used > cutoff:
+                break
+            expired.append(key)
+
+        for key in expired:
+            entry = self._entries.pop(key)
+            self._drop_lock(key)
+            self.evictions += 1
+            await self._close(entry)
+        return len(expired)
+
+    def start(self):
+        """Starts the idle sweeper. Must be called from a running event loop."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def shutdown(self):
+        """Stops background tasks and closes every pooled connection."""
+        tasks = list(self._reconnects.values())
+        if self._sweeper:
+            tasks.append(self._sweeper)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._sweeper = None
+        self._reconnects.clear()
+
+        entries = list(self._entries.values())
+        self._entries.clear()
+        self._locks.clear()
+        for entry in entries:
+            await self._close(entry)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool statistics for the admin system endpoint."""
+        now = time.monotonic()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "pooled_connections": len(self._entries),
+            "live_connections": sum(
+                1 for e in self._entries.values() if e.connector.confidence_status == "LIVE"
+            ),
+            "evictions": self.evictions,
+            "reconnects": self.reconnects,
+            "reconnect_failures": self.reconnect_failures,
+            "reconnects_in_flight": sum(1 for t in self._reconnects.values() if not t.done()),
+            "max_size": self.max_size,
+            "idle_ttl_seconds": self.idle_ttl,
+            "connections": [
+                {
+                    "key": str(key),
+                    "status": entry.connector.confidence_status,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "last_sync": entry.connector.last_sync.isoformat() if entry.connector.last_sync else None
+                }
+                for key, entry in self._entries.items()
+            ]
+        }
+
+    # --- Internals ---
+
+    def _schedule_reconnect(self, key: Hashable, entry: _PoolEntry, factory: Callable[[], BrokerConnector]):
+        task = self._reconnects.get(key)
+        if task and not task.done():
+            return
+        if time.monotonic() - entry.last_reconnect < self.reconnect_backoff:
+            return
+        entry.last_reconnect = time.monotonic()
+        self._reconnects[key] = asyncio.create_task(self._reconnect(key, entry, factory))
+
+    async def _reconnect(self, key: Hashable, stale: _PoolEntry, factory: Callable[[], BrokerConnector]):
+        """
+        Builds a fresh connector next to the degraded one and swaps it in once it is LIVE,
+        so requests keep being served by the old connector in the meantime.
+        """
+        self.reconnects += 1
+        fresh = factory()
+        try:
+            ok = await fresh.connect()
+        except Exception as e:
+            print(f"Broker Pool Reconnect Error for {key}: {e}")
+            ok = False
+
+        if not ok or fresh.confidence_status != "LIVE":
+            self.reconnect_failures += 1
+            await fresh.disconnect()
+            return
+
+        if self._entries.get(key) is stale:
+            entry = _PoolEntry(fresh, stale.fingerprint)
+            entry.last_used = stale.last_used
+            entry.last_reconnect = stale.last_reconnect
+            self._entries[key] = entry
+            await self._close(stale)
+        else:
+            # Entry was evicted or replaced while we were reconnecting
+            await fresh.disconnect()
+
+    async def _evict_over_capacity(self):
+        while len(self._entries) > self.max_size:
+            key, entry = self._entries.popitem(last=False)
+            self._drop_lock(key)
+            self.evictions += 1
+            await self._close(entry)
+
+    def _drop_lock(self, key: Hashable):
+        lock = self._locks.get(key)
+        if lock and not lock.locked():
+            del self._locks[key]
+
+    async def _close(self, entry: _PoolEntry):
+        try:
+            await entry.connector.disconnect()
+        except Exception as e:
+            print(f"Broker Pool Close Error: {e}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"Broker Pool Sweep Error: {e}")
+
+
+# Singleton instance
+broker_registry = ConnectorRegistry(
+    max_size=settings.BROKER_POOL_MAX_SIZE,
+    idle_ttl=settings.BROKER_POOL_IDLE_TTL_SECONDS
+)
+
+
+def new_metaapi_connector(token: str, account_id: str) -> BrokerConnector:
+    """RPC or streaming MetaApi connector, depending on METAAPI_STREAMING."""
+    if settings.METAAPI_STREAMING:
+        return MetaApiStreamingConnector(token, account_id)
+    return MetaApiConnector(token, account_id)
+
+
+async def connector_for_account(account: Any) -> BrokerConnector:
+    """
+    Pooled MetaApi connector for a BrokerAccount row.
+    Only plain values are captured, so the factory stays valid after the DB session closes
+    and the token is only decrypted when a new connection has to be built.
+    """
+    token_encrypted, meta_account_id = account.token_encrypted, account.account_id
+    return await broker_registry.acquire(
+        account.id,
+        (meta_account_id, token_encrypted, settings.METAAPI_STREAMING),
+        lambda: new_metaapi_connector(crypto.decrypt_token(token_encrypted), meta_account_id)
+    )
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import os
+import re
+import struct
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.engine.ledger import daily_ledger
+
+# One sample on disk: unix timestamp, balance, equity (little-endian doubles)
+RECORD = struct.Struct("<ddd")
+RECORD_DTYPE = np.dtype([("ts", "<f8"), ("balance", "<f8"), ("equity", "<f8")])
+
+
+class _AccountEquity:
+    __slots__ = (
+        "ring", "pending", "initial_balance", "peak_equity", "trading_day", "day_start_balance",
+        "intraday_peak", "last_balance", "last_equity", "last_ts", "samples", "segment", "segment_bytes"
+    )
+
+    def __init__(self, ring_size: int):
+        self.ring: deque = deque(maxlen=ring_size)
+        self.pending: List[Tuple[float, float, float]] = []
+        self.initial_balance: Optional[float] = None
+        self.peak_equity: Optional[float] = None
+        self.trading_day: Optional[date] = None
+        self.day_start_balance: Optional[float] = None
+        self.intraday_peak: Optional[float] = None
+        self.last_balance: Optional[float] = None
+        self.last_equity: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.samples = 0
+        self.segment = 1
+        self.segment_bytes = 0
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {
+            "initial_balance": self.initial_balance,
+            "peak_equity": self.peak_equity,
+            "trading_day": self.trading_day.isoformat() if self.trading_day else None,
+            "day_start_balance": self.day_start_balance,
+            "intraday_peak": self.intraday_peak,
+            "last_balance": self.last_balance,
+            "last_equity": self.last_equity,
+            "last_ts": self.last_ts,
+            "samples": self.samples,
+            "segment": self.segment,
+            "segment_bytes": self.segment_bytes
+        }
+
+
+class EquityTracker:
+    """
+    Per-account equity time series with incrementally maintained high-water marks.
+    Every sample updates the all-time peak equity, the intraday peak and the start-of-day
+    balance in O(1), so static and trailing drawdown can be evaluated per tick without
+    replaying history. Recent samples live in a ring buffer; all samples are appended to
+    fixed-width binary segment files with a JSON checkpoint of the running figures, so a
+    restart resumes from the checkpoint instead of rescanning the segments.
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        ring_size: int = 2048,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        flush_interval: float = 5.0,
+        trading_day: Optional[Callable[[datetime], date]] = None
+    ):
+        self.data_dir = data_dir
+        self.ring_size = ring_size
+        self.segment_max_bytes = segment_max_bytes
+        self.flush_interval = flush_interval
+        self.trading_day = trading_day or (lambda ts: ts.date())
+        self._accounts: Dict[Hashable, _AccountEquity] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.samples_recorded = 0
+        self.samples_flushed = 0
+        self.errors = 0
+
+    # --- Ingestion ---
+
+    def record(self, key: Hashable, balance: float, equity: float, ts: Optional[datetime] = None) -> _AccountEquity:
+        """Adds one balance/equity sample; unchanged values are not stored again."""
+        acc = self._account(key)
+        if balance == acc.last_balance and equity == acc.last_equity:
+            return acc
+
+        ts = ts or datetime.utcnow()
+        stamp = ts.replace(tzinfo=timezone.utc).timestamp() if ts.tzinfo is None else ts.timestamp()
+        day = self.trading_day(ts)
+
+        if acc.initial_balance is None:
+            acc.initial_balance = balance
+            acc.peak_equity = max(balance, equity)
+        if day != acc.trading_day:
+            # The day opens on the balance carried over from the last sample of the previous day
+            acc.trading_day = day
+            acc.day_start_balance = acc.last_balance if acc.last_balance is not None else balance
+            acc.intraday_peak = equity
+        acc.peak_equity = max(acc.peak_equity, equity)
+        acc.intraday_peak = max(acc.intraday_peak, equity)
+
+        sample = (stamp, balance, equity)
+        acc.ring.append(sample)
+        if self.data_dir:
+            acc.pending.append(sample)
+        acc.last_balance, acc.last_equity, acc.last_ts = balance, equity, stamp
+        acc.samples += 1
+        self.samples_recorded += 1
+        return acc
+
+    def on_snapshot(self, key: Hashable, snapshot: Dict[str, Any]):
+        account = snapshot["account"]
+        # The broker error fallback reports zeros; that is not a real equity reading
+        if account.get("platform") == "error":
+            return
+        self.record(key, account.get("balance", 0.0), account.get("equity", 0.0))
+
+    # --- Queries ---
+
+    def state(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        acc = self._accounts.get(key)
+        if acc is None or acc.initial_balance is None:
+            return None
+        return {
+            "initial_balance": acc.initial_balance,
+            "peak_equity": acc.peak_equity,
+            "intraday_peak": acc.intraday_peak,
+            "day_start_balance": acc.day_start_balance,
+            "trading_day": acc.trading_day.isoformat(),
+            "equity": acc.last_equity,
+            "balance": acc.last_balance,
+            "samples": acc.samples
+        }
+
+    def drawdown_basis(
+        self, key: Hashable, drawdown_type: Optional[str] = "static", initial_balance: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reference points for RulePlan.limits():
+        - static:   drawdown = initial balance - equity
+        - trailing: drawdown = peak equity (high-water mark) - equity
+        Both limits are sized on the initial balance; the daily limit on the start-of-day balance.
+        `initial_balance` is the account's configured starting balance: an account connected
+        mid-challenge is measured from it, not from the first balance the tracker happened to see.
+        """
+        state = self.state(key)
+        if state is None:
+            return None
+        trailing = drawdown_type == "trailing"
+        base = initial_balance or state["initial_balance"]
+        peak = max(state["peak_equity"], base)
+        return {
+            "drawdown_type": "trailing" if trailing else "static",
+            "reference": peak if trailing else base,
+            "limit_base": base,
+            "day_start_balance": state["day_start_balance"],
+            "peak_equity": peak,
+            "intraday_peak": state["intraday_peak"]
+        }
+
+    def recent(self, key: Hashable) -> List[Tuple[float, float, float]]:
+        acc = self._accounts.get(key)
+        return list(acc.ring) if acc else []
+
+    def read_series(self, key: Hashable, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """Full (ts, balance, equity) history from the segments plus unflushed samples."""
+        acc = self._account(key)
+        parts = []
+        directory = self._dir(key)
+        if directory and os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".bin"):
+                    parts.append(np.fromfile(os.path.join(directory, name), dtype=RECORD_DTYPE))
+        if acc.pending:
+            parts.append(np.array(acc.pending, dtype=RECORD_DTYPE))
+        if not parts:
+            # In-memory only: the ring buffer is all there is
+            parts.append(np.array(list(acc.ring), dtype=RECORD_DTYPE))
+        series = np.concatenate(parts)
+        if start is not None:
+            series = series[series["ts"] >= start.replace(tzinfo=timezone.utc).timestamp()]
+        if end is not None:
+            series = series[series["ts"] < end.replace(tzinfo=timezone.utc).timestamp()]
+        return series
+
+    # --- Persistence ---
+
+    def flush(self) -> int:
+        """Appends pending samples to the current segments and rewrites the checkpoints."""
+        return self._write(self._take_pending())
+
+    def _take_pending(self) -> List[Tuple[Hashable, List[Tuple[float, float, float]], Dict[str, Any]]]:
+        batches = []
+        for key, acc in self._accounts.items():
+            if not acc.pending:
+                continue
+            samples, acc.pending = acc.pending, []
+            # Segment bookkeeping is decided here so the writer never races record()
+            written = len(samples) * RECORD.size
+            if acc.segment_bytes and acc.segment_bytes + written > self.segment_max_bytes:
+                acc.segment += 1
+                acc.segment_bytes = 0
+            acc.segment_bytes += written
+            batches.append((key, samples, acc.checkpoint()))
+        return batches
+
+    def _write(self, batches) -> int:
+        written = 0
+        for key, samples, checkpoint in batches:
+            directory = self._dir(key)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, f"segment-{checkpoint['segment']:06d}.bin"), "ab") as f:
+                    f.write(b"".join(RECORD.pack(*sample) for sample in samples))
+                tmp = os.path.join(directory, "state.json.tmp")
+                with open(tmp, "w") as f:
+                    json.dump(checkpoint, f)
+                os.replace(tmp, os.path.join(directory, "state.json"))
+                written += len(samples)
+            except OSError as e:
+                self.errors += 1
+                print(f"Equity Tracker Write Error for {key}: {e}")
+        self.samples_flushed += written
+        return written
+
+    def start(self):
+        if not self.data_dir or self.flush_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.data_dir:
+            await asyncio.to_thread(self._write, self._take_pending())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self._write, self._take_pending())
+            except Exception as e:
+                print(f"Equity Tracker Error: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "data_dir": self.data_dir,
+            "accounts": len(self._accounts),
+            "samples_recorded": self.samples_recorded,
+            "samples_flushed": self.samples_flushed,
+            "pending": sum(len(acc.pending) for acc in self._accounts.values()),
+            "errors": self.errors
+        }
+
+    # --- Internals ---
+
+    def _dir(self, key: Hashable) -> Optional[str]:
+        if not self.data_dir:
+            return None
+        return os.path.join(self.data_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", str(key)))
+
+    def _account(self, key: Hashable) -> _AccountEquity:
+        acc = self._accounts.get(key)
+        if acc is None:
+            acc = self._accounts[key] = _AccountEquity(self.ring_size)
+            self._load(key, acc)
+        return acc
+
+    def _load(self, key: Hashable, acc: _AccountEquity):
+        """Resumes from the last checkpoint and refills the ring from the newest segment."""
+        directory = self._dir(key)
+        if not directory:
+            return
+        path = os.path.join(directory, "state.json")
+        try:
+            with open(path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return
+        for field, value in checkpoint.items():
+            setattr(acc, field, value)
+        if acc.trading_day:
+            acc.trading_day = date.fromisoformat(acc.trading_day)
+
+        segment = os.path.join(directory, f"segment-{acc.segment:06d}.bin")
+        if os.path.exists(segment):
+            tail = np.fromfile(segment, dtype=RECORD_DTYPE)[-self.ring_size:]
+            acc.ring.extend(tuple(float(v) for v in row) for row in tail)
+
+
+# Singleton instance
+equity_tracker = EquityTracker(
+    data_dir=settings.EQUITY_DATA_DIR or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "equity"
+    ),
+    ring_size=settings.EQUITY_RING_SIZE,
+    flush_interval=settings.EQUITY_FLUSH_INTERVAL_SECONDS,
+    trading_day=daily_ledger.trading_day
+)
@@ -1,6 +1,10 @@
+import bisect
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Hashable, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
 from sqlalchemy.orm import Session
 from ..models.sql.trade import Trade
 
@@ -29,7 +33,7 @@ class IntelligenceEngine:
         return t
 
     @staticmethod
-    def analyze_behavior(trades: List[Any]) -> Dict[str, Any]:
+    def analyze_behavior(trades: List[Any], now: Optional[datetime] = None) -> Dict[str, Any]:
         if not trades:
             return {
                 "flags": [],
@@ -40,7 +44,7 @@ class IntelligenceEngine:
         flags = []
         
         # 1. Overtrading Detection (Trades in last 60 mins)
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
         recent_trades_count = 0
         for t in trades:
             open_time = IntelligenceEngine._parse_time(IntelligenceEngine._get_val(t, 'open_time'))
@@ -111,3 +115,207 @@ class IntelligenceEngine:
             "session_performance": session_performance,
             "score": max(0, 100 - (len(flags) * 20))
         }
+
+    @staticmethod
+    def session_performance_columnar(table: pa.Table) -> Dict[str, Dict[str, Any]]:
+        """
+        analyze_behavior's session_performance over a TradeArchive table: one hash
+        aggregate over the session/profit columns instead of a loop over trade objects.
+        """
+        table = table.filter(pc.is_valid(table["session"]))
+        grouped = table.group_by("session").aggregate([("profit", "sum"), ("session", "count")])
+        return {
+            session: {"count": count, "profit": round(profit or 0.0, 2)}
+            for session, profit, count in zip(
+                grouped["session"].to_pylist(), grouped["profit_sum"].to_pylist(), grouped["session_count"].to_pylist()
+            )
+        }
+
+
+class _StreamTrade:
+    __slots__ = ("open_time", "volume", "session", "profit", "close_time", "successor")
+
+    def __init__(self, open_time: datetime, volume: float, session: Optional[str]):
+        self.open_time = open_time
+        self.volume = volume
+        self.session = session
+        self.profit = None
+        self.close_time = None
+        self.successor = None  # (open_time, volume) of the next trade opened
+
+
+class BehaviorStream:
+    """
+    Incremental equivalent of IntelligenceEngine.analyze_behavior for one account.
+    Ingests open/update/close events and keeps only what the flags need: the open times
+    inside the one-hour overtrading window, the open trades plus the most recent one
+    (for loss -> bigger re-entry detection) and running per-session aggregates.
+    Events are expected in open-time order, as they arrive from the broker. Each ticket
+    counts once: a position that drops out of one snapshot and comes back is not a new trade.
+    """
+
+    SESSIONS = ("London", "NY", "Asia")
+    # Tickets remembered for deduplication, newest kept
+    MAX_TICKETS = 10000
+
+    def __init__(self):
+        self._window: List[datetime] = []  # sorted open times, pruned to the last hour
+        self._tickets: "OrderedDict[Any, None]" = OrderedDict()
+        self._trades: Dict[Any, _StreamTrade] = {}
+        self._last_ticket = None
+        self._revenge = False
+        self._sessions = {name: {"total": 0, "profit": 0.0} for name in self.SESSIONS}
+        self._seen = 0
+
+    def on_open(self, ticket: Any, open_time: Any, volume: float = 0, session: Optional[str] = None, profit: Optional[float] = None):
+        open_time = IntelligenceEngine._parse_time(open_time)
+        if open_time is None or ticket in self._trades or ticket in self._tickets:
+            return
+        self._tickets[ticket] = None
+        if len(self._tickets) > self.MAX_TICKETS:
+            self._tickets.popitem(last=False)
+        open_time = open_time.replace(tzinfo=None)
+        trade = _StreamTrade(open_time, volume or 0, session)
+        self._seen += 1
+        bisect.insort(self._window, open_time)
+
+        previous = self._trades.get(self._last_ticket)
+        if previous is not None:
+            previous.successor = (open_time, trade.volume)
+            self._check_revenge(previous)
+            self._release(self._last_ticket)
+        self._trades[ticket] = trade
+        self._last_ticket = ticket
+
+        if session in self._sessions:
+            self._sessions[session]["total"] += 1
+        self.on_update(ticket, profit)
+
+    def on_update(self, ticket: Any, profit: Optional[float]):
+        """Floating P&L change of an open trade."""
+        trade = self._trades.get(ticket)
+        if trade is None or profit is None:
+            return
+        if trade.session in self._sessions:
+            self._sessions[trade.session]["profit"] += profit - (trade.profit or 0)
+        trade.profit = profit
+
+    def on_close(self, ticket: Any, close_time: Any, profit: Optional[float] = None):
+        trade = self._trades.get(ticket)
+        if trade is None:
+            return
+        self.on_update(ticket, profit)
+        trade.close_time = IntelligenceEngine._parse_time(close_time)
+        self._check_revenge(trade)
+        self._release(ticket)
+
+    def ingest(self, t: Any):
+        """Replays one historical trade (dict or ORM row) as open (+ close) events."""
+        get = IntelligenceEngine._get_val
+        ticket = get(t, 'ticket') or id(t)
+        self.on_open(ticket, get(t, 'open_time'), get(t, 'volume', 0), get(t, 'session'), get(t, 'profit'))
+        if get(t, 'close_time'):
+            self.on_close(ticket, get(t, 'close_time'))
+
+    def observe(self, open_trades: List[Any], now: Optional[datetime] = None) -> "BehaviorStream":
+        """
+        Diffs a broker snapshot of open positions against the tracked state:
+        new tickets open, known ones update, vanished ones close at `now`.
+        """
+        get = IntelligenceEngine._get_val
+        now = now or datetime.utcnow()
+        current = set()
+        for t in open_trades:
+            ticket = get(t, 'ticket')
+            current.add(ticket)
+            if ticket in self._trades:
+                self.on_update(ticket, get(t, 'profit'))
+            else:
+                self.on_open(ticket, get(t, 'open_time'), get(t, 'volume', 0), get(t, 'session'), get(t, 'profit'))
+        for ticket in [k for k, tr in self._trades.items() if tr.close_time is None and k not in current]:
+            self.on_close(ticket, now)
+        # Polled accounts may never be analyzed; keep the window to the last hour here too
+        self._prune(now)
+        return self
+
+    def analyze(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        if not self._seen:
+            return {"flags": [], "session_performance": {}, "score": 100}
+
+        now = now or datetime.utcnow()
+        flags = []
+
+        # 1. Overtrading: drop open times that left the one-hour window
+        self._prune(now)
+        recent_trades_count = len(self._window)
+        if recent_trades_count >= 5:
+            flags.append({
+                "type": "overtrading",
+                "severity": "warning" if recent_trades_count < 10 else "critical",
+                "message": f"High frequency detected: {recent_trades_count} trades in the last hour."
+            })
+
+        # 2. Revenge trading (sticky once observed, as in the batch scan over full history)
+        if self._revenge:
+            flags.append({
+                "type": "revenge_trading",
+                "severity": "critical",
+                "message": "Revenge trading pattern: Aggressive re-entry with increased volume after a loss."
+            })
+
+        # 3. Session performance
+        session_performance = {
+            name: {"count": data["total"], "profit": round(data["profit"], 2)}
+            for name, data in self._sessions.items() if data["total"] > 0
+        }
+
+        return {
+            "flags": flags,
+            "session_performance": session_performance,
+            "score": max(0, 100 - (len(flags) * 20))
+        }
+
+    def _prune(self, now: datetime):
+        cutoff = bisect.bisect_right(self._window, now - timedelta(hours=1))
+        if cutoff:
+            del self._window[:cutoff]
+
+    def _check_revenge(self, previous: _StreamTrade):
+        # Pattern: Loss followed by a larger volume trade within 10 minutes
+        if self._revenge or previous.successor is None:
+            return
+        if previous.profit and previous.profit < 0 and previous.close_time:
+            c_open, c_vol = previous.successor
+            time_diff = c_open - previous.close_time.replace(tzinfo=None)
+            if time_diff < timedelta(minutes=10) and c_vol > previous.volume:
+                self._revenge = True
+
+    def _release(self, ticket: Any):
+        """Forgets a trade once it can no longer affect any flag."""
+        trade = self._trades.get(ticket)
+        if trade and trade.close_time is not None and ticket != self._last_ticket:
+            del self._trades[ticket]
+
+
+class BehaviorStreamRegistry:
+    """Bounded per-account map of BehaviorStreams, fed by poller snapshots."""
+
+    def __init__(self, max_accounts: int = 1000):
+        self.max_accounts = max_accounts
+        self._streams: "OrderedDict[Hashable, BehaviorStream]" = OrderedDict()
+
+    def get(self, key: Hashable) -> BehaviorStream:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = BehaviorStream()
+            while len(self._streams) > self.max_accounts:
+                self._streams.popitem(last=False)
+        else:
+            self._streams.move_to_end(key)
+        return stream
+
+    def on_snapshot(self, key: Hashable, snapshot: Dict[str, Any]):
+        self.get(key).observe(snapshot["trades"])
+
+
+behavior_streams = BehaviorStreamRegistry()
@@ -0,0 +1,393 @@
+import asyncio
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.engine.broker.base import BrokerConnector
+
+
+class _DayTotals:
+    __slots__ = ("realized", "closed_count", "closed_volume", "opened", "provisional", "provisional_total", "deal_ids")
+
+    def __init__(self):
+        self.realized = 0.0
+        self.closed_count = 0
+        self.closed_volume = 0.0
+        # Tickets of the positions opened this trading day (max daily trades counts these)
+        self.opened = set()
+        # Positions that vanished from the terminal before their closing deal was synced,
+        # as ticket -> (last floating profit, volume)
+        self.provisional: Dict[int, tuple] = {}
+        self.provisional_total = 0.0
+        self.deal_ids = set()
+
+
+class _AccountLedger:
+    __slots__ = ("days", "floating", "open_count", "open_volume", "open_profits", "deal_backed", "deal_cursor")
+
+    def __init__(self):
+        self.days: "OrderedDict[date, _DayTotals]" = OrderedDict()
+        self.floating = 0.0
+        self.open_count = 0
+        self.open_volume = 0.0
+        self.open_profits: Dict[int, tuple] = {}
+        self.deal_backed = False
+        self.deal_cursor: Optional[datetime] = None
+
+
+class DailyLedger:
+    """
+    Per-account, per-trading-day P&L ledger.
+    Realized P&L comes from closed deals (broker history or Trade rows); floating P&L from
+    the latest open positions. Trading days roll over at `rollover_hour` in the broker's
+    timezone, so "today" matches the day the prop firm resets its daily loss limit.
+    daily_stats() is a dictionary lookup, cheap enough for every check_risk call.
+    """
+
+    def __init__(
+        self,
+        broker_timezone: str = "UTC",
+        rollover_hour: int = 0,
+        history_days: int = 400,
+        sync_interval: float = 30.0,
+        sync_overlap: float = 300.0
+    ):
+        self.tz = ZoneInfo(broker_timezone)
+        self.rollover_hour = rollover_hour
+        self.history_days = history_days
+        self.sync_interval = sync_interval
+        # Re-read a few minutes behind the cursor: deals can land on the broker late
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._accounts: Dict[Hashable, _AccountLedger] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.deals_recorded = 0
+        self.syncs = 0
+        self.errors = 0
+
+    # --- Trading day ---
+
+    def trading_day(self, ts: datetime) -> date:
+        """Broker trading day of a UTC timestamp (naive timestamps are UTC)."""
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return (ts.astimezone(self.tz) - timedelta(hours=self.rollover_hour)).date()
+
+    def day_start(self, day: date) -> datetime:
+        """Naive UTC start of a trading day."""
+        local = datetime.combine(day, time(self.rollover_hour), tzinfo=self.tz)
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # --- Ingestion ---
+
+    def record_deal(self, key: Hashable, deal: Dict[str, Any]) -> bool:
+        """Adds one closed deal to its trading day. Returns False for a deal already recorded."""
+        ledger = self._ledger(key)
+        day = self._day(ledger, self.trading_day(deal["time"]))
+        if deal["id"] in day.deal_ids:
+            return False
+        day.deal_ids.add(deal["id"])
+        day.realized += deal["profit"]
+        self._record_open(day, deal)
+
+        if deal.get("entry", "out") != "in":
+            ticket = deal.get("ticket")
+            if ticket in day.provisional:
+                # The estimate taken when the position vanished is replaced by the real deal
+                profit, _ = day.provisional.pop(ticket)
+                day.provisional_total -= profit
+            else:
+                day.closed_count += 1
+                day.closed_volume += deal.get("volume", 0.0)
+        self.deals_recorded += 1
+        return True
+
+    def record_deals(self, key: Hashable, deals: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for deal in deals if self.record_deal(key, deal))
+
+    def observe(self, key: Hashable, open_trades: List[Dict[str, Any]], now: Optional[datetime] = None):
+        """
+        Refreshes floating P&L from the broker's open positions. For accounts with a deal
+        history source, a position that disappears is carried at its last floating profit
+        until its closing deal is synced, so the daily figure never dips in between.
+        """
+        ledger = self._ledger(key)
+        current = {t["ticket"]: (t.get("profit", 0.0) or 0.0, t.get("volume", 0.0) or 0.0) for t in open_trades}
+        trading_day = self.trading_day(now or datetime.utcnow())
+        today = None
+        for t in open_trades:
+            opened = self._parse_time(t.get("open_time"))
+            # Without an open time, a position counts as opened the day it first shows up
+            if opened is None and t["ticket"] in ledger.open_profits:
+                continue
+            if opened is None or self.trading_day(opened) == trading_day:
+                today = today or self._day(ledger, trading_day)
+                today.opened.add(t["ticket"])
+        if ledger.deal_backed:
+            today = today or self._day(ledger, trading_day)
+            for ticket, (profit, volume) in ledger.open_profits.items():
+                if ticket not in current and ticket not in today.provisional:
+                    today.provisional[ticket] = (profit, volume)
+                    today.provisional_total += profit
+                    today.closed_count += 1
+                    today.closed_volume += volume
+            # A position that shows up again was only missing from one read, not closed
+            for ticket in today.provisional.keys() & current.keys():
+                profit, volume = today.provisional.pop(ticket)
+                today.provisional_total -= profit
+                today.closed_count -= 1
+                today.closed_volume -= volume
+        ledger.open_profits = current
+        ledger.floating = sum(profit for profit, _ in current.values())
+        ledger.open_volume = sum(volume for _, volume in current.values())
+        ledger.open_count = len(current)
+
+    def on_snapshot(self, key: Hashable, snapshot: Dict[str, Any]):
+        # The broker error fallback reports no positions; that is not a real reading
+        if snapshot["account"].get("platform") == "error":
+            return
+        self.observe(key, snapshot["trades"])
+
+    # --- Queries ---
+
+    def daily_stats(self, key: Hashable, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Realized + floating P&L for the current trading day, in RiskEngine.get_daily_stats()
+        shape: {"daily_profit", "daily_volume", "trades_count"} plus the breakdown.
+        trades_count covers every position touching today (open or closed today);
+        opened_count only those opened today, which is what max daily trades limits.
+        """
+        today = self.trading_day(now or datetime.utcnow())
+        ledger = self._accounts.get(key)
+        if ledger is None:
+            return {
+                "date": today.isoformat(), "daily_profit": 0.0, "realized_profit": 0.0, "floating_profit": 0.0,
+                "daily_volume": 0.0, "trades_count": 0, "opened_count": 0
+            }
+        day = ledger.days.get(today)
+        realized = (day.realized + day.provisional_total) if day else 0.0
+        return {
+            "date": today.isoformat(),
+            "daily_profit": realized + ledger.floating,
+            "realized_profit": realized,
+            "floating_profit": ledger.floating,
+            "daily_volume": ledger.open_volume + (day.closed_volume if day else 0.0),
+            "trades_count": ledger.open_count + (day.closed_count if day else 0),
+            "opened_count": len(day.opened) if day else 0
+        }
+
+    def history(self, key: Hashable) -> Dict[str, Dict[str, Any]]:
+        """Realized P&L per trading day, oldest first."""
+        ledger = self._accounts.get(key)
+        if ledger is None:
+            return {}
+        return {
+            day.isoformat(): {
+                "realized_profit": round(totals.realized + totals.provisional_total, 2),
+                "closed_trades": totals.closed_count,
+                "volume": round(totals.closed_volume, 2)
+            }
+            for day, totals in ledger.days.items()
+        }
+
+    # --- Backfill ---
+
+    def backfill(self, key: Hashable, deals: Iterable[Dict[str, Any]]) -> int:
+        """
+        Rebuilds the days covered by `deals` from scratch in one pass (idempotent, so it can be
+        re-run over months of history). Days outside the batch are left untouched; the live
+        state of a rebuilt day (positions opened or vanished since the batch) is kept.
+        """
+        fresh: Dict[date, _DayTotals] = {}
+        closing: Dict[date, set] = {}
+        count = 0
+        for deal in deals:
+            trading_day = self.trading_day(deal["time"])
+            day = fresh.get(trading_day)
+            if day is None:
+                day = fresh[trading_day] = _DayTotals()
+            if deal["id"] in day.deal_ids:
+                continue
+            day.deal_ids.add(deal["id"])
+            day.realized += deal["profit"]
+            self._record_open(day, deal, trading_day)
+            if deal.get("entry", "out") != "in":
+                day.closed_count += 1
+                day.closed_volume += deal.get("volume", 0.0)
+                closing.setdefault(trading_day, set()).add(deal.get("ticket"))
+            count += 1
+
+        ledger = self._ledger(key)
+        for day, totals in fresh.items():
+            previous = ledger.days.get(day)
+            if previous is not None:
+                totals.opened |= previous.opened
+                for ticket, (profit, volume) in previous.provisional.items():
+                    if ticket not in closing.get(day, ()):
+                        totals.provisional[ticket] = (profit, volume)
+                        totals.provisional_total += profit
+                        totals.closed_count += 1
+                        totals.closed_volume += volume
+            ledger.days[day] = totals
+        ledger.days = OrderedDict(sorted(ledger.days.items())[-self.history_days:])
+        self.deals_recorded += count
+        return count
+
+    def backfill_from_trades(self, db: Session, key: Hashable, user_id: int, since: datetime, chunk_size: int = 5000) -> int:
+        """Backfills from closed Trade rows, streamed in chunks instead of loading every row."""
+        from app.models.sql.trade import Trade
+
+        rows = db.query(Trade.ticket, Trade.open_time, Trade.close_time, Trade.profit, Trade.volume).filter(
+            Trade.user_id == user_id,
+            Trade.close_time.isnot(None),
+            Trade.close_time >= since
+        ).yield_per(chunk_size)
+        return self.backfill(key, (
+            {
+                "id": f"trade:{ticket}",
+                "ticket": ticket,
+                "profit": profit or 0.0,
+                "volume": volume or 0.0,
+                "entry": "out",
+                "time": close_time,
+                "open_time": open_time
+            }
+            for ticket, open_time, close_time, profit, volume in rows
+        ))
+
+    async def backfill_from_connector(self, key: Hashable, connector: BrokerConnector, since: datetime, window_days: int = 7) -> int:
+        """Backfills from broker history, one `window_days` request at a time."""
+        deals = []
+        start, end = since, datetime.utcnow()
+        while start < end:
+            stop = min(end, start + timedelta(days=window_days))
+            deals.extend(await connector.get_deals(start, stop))
+            start = stop
+        count = self.backfill(key, deals)
+        ledger = self._ledger(key)
+        ledger.deal_backed = True
+        ledger.deal_cursor = end
+        return count
+
+    # --- Broker sync ---
+
+    async def sync(self, key: Hashable, connector: BrokerConnector, now: Optional[datetime] = None) -> int:
+        """
+        Pulls deals closed since the last sync (or since the start of the trading day).
+        The cursor only moves once the whole range was fetched; a failed fetch raises and
+        the next sync retries from the same point.
+        """
+        if not connector.supports_history:
+            return 0
+        now = now or datetime.utcnow()
+        ledger = self._ledger(key)
+        start = ledger.deal_cursor - self.sync_overlap if ledger.deal_cursor else self.day_start(self.trading_day(now))
+        deals = await connector.get_deals(start, now)
+        ledger.deal_backed = True
+        ledger.deal_cursor = now
+        self.syncs += 1
+        return self.record_deals(key, deals)
+
+    def start(self, load_accounts: Callable[[], List[Any]], connector_for: Callable[[Any], Awaitable[BrokerConnector]]):
+        if self.sync_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop(load_accounts, connector_for))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync_loop(self, load_accounts, connector_for):
+        while True:
+            try:
+                accounts = await asyncio.to_thread(load_accounts)
+                results = await asyncio.gather(
+                    *[self._sync_account(acc, connector_for) for acc in accounts],
+                    return_exceptions=True
+                )
+                self.errors += sum(1 for r in results if isinstance(r, Exception))
+            except Exception as e:
+                print(f"Daily Ledger Error: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def _sync_account(self, account: Any, connector_for):
+        connector = await connector_for(account)
+        ledger = self._accounts.get(account.id)
+        if connector.supports_history and (ledger is None or ledger.deal_cursor is None):
+            # First pass since startup: the ledger lives in memory, so rebuild today from history
+            since = self.day_start(self.trading_day(datetime.utcnow()))
+            return await self.backfill_from_connector(account.id, connector, since)
+        return await self.sync(account.id, connector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "timezone": str(self.tz),
+            "rollover_hour": self.rollover_hour,
+            "accounts": len(self._accounts),
+            "deals_recorded": self.deals_recorded,
+            "syncs": self.syncs,
+            "errors": self.errors
+        }
+
+    # --- Internals ---
+
+    def _ledger(self, key: Hashable) -> _AccountLedger:
+        ledger = self._accounts.get(key)
+        if ledger is None:
+            ledger = self._accounts[key] = _AccountLedger()
+        return ledger
+
+    def _record_open(self, day: _DayTotals, deal: Dict[str, Any], trading_day: Optional[date] = None):
+        """
+        Opening deals (in/inout) open their position on the deal's day. A closing deal that
+        carries its position's open time (Trade rows) opened it that day too if both fall on it.
+        """
+        if deal.get("ticket") is None:
+            return
+        entry = deal.get("entry", "out")
+        if entry in ("in", "inout"):
+            day.opened.add(deal["ticket"])
+        elif deal.get("open_time") is not None:
+            trading_day = trading_day or self.trading_day(deal["time"])
+            if self.trading_day(deal["open_time"]) == trading_day:
+                day.opened.add(deal["ticket"])
+
+    @staticmethod
+    def _parse_time(value: Any) -> Optional[datetime]:
+        """Open times arrive as datetimes or ISO strings (MetaApi); naive results are UTC."""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+        return None
+
+    def _day(self, ledger: _AccountLedger, day: date) -> _DayTotals:
+        totals = ledger.days.get(day)
+        if totals is None:
+            latest = next(reversed(ledger.days), None)
+            totals = ledger.days[day] = _DayTotals()
+            # Days normally arrive in order; a late deal for an older day is the rare case
+            if latest is not None and day < latest:
+                ledger.days = OrderedDict(sorted(ledger.days.items()))
+            while len(ledger.days) > self.history_days:
+                ledger.days.popitem(last=False)
+        return totals
+
+
+# Singleton instance
+daily_ledger = DailyLedger(
+    broker_timezone=settings.BROKER_TIMEZONE,
+    rollover_hour=settings.TRADING_DAY_ROLLOVER_HOUR,
+    sync_interval=settings.LEDGER_SYNC_INTERVAL_SECONDS
+)
@@ -0,0 +1,233 @@
+import asyncio
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.session import AsyncSessionLocal
+
+
+class RiskWritePipeline:
+    """
+    Write-behind pipeline for RiskEngine side effects.
+    Requests enqueue trade snapshots and alerts; a background worker drains the queue,
+    coalesces jobs per account, persists them in one transaction and dispatches alerts
+    with its own session, so nothing on the request path waits on a DB write.
+    """
+
+    def __init__(self, max_queue: int = 1000, max_batch: int = 200, flush_interval: float = 0.25):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.batches = 0
+        self.jobs_written = 0
+        self.alerts_dispatched = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def submit(
+        self,
+        trades: List[Dict],
+        max_lot_size: float,
+        report: Dict,
+        account_model: Any = None,
+        db: Session = None,
+        complete: bool = False
+    ):
+        """
+        Queues persistence for one evaluation. Without a running worker (scripts, tests)
+        the write happens inline on the caller's session instead. `complete` marks `trades`
+        as the account's full list of open positions, so the ones missing from it get closed.
+        """
+        job = self._build_job(trades, max_lot_size, report, account_model)
+        job["complete"] = complete
+
+        if not self.running:
+            if db:
+                self._write(db, [job], savepoint=True)
+                self._dispatch(job)
+            return
+
+        try:
+            self._queue.put_nowait(job)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            # Positions are state, not events: the next refresh re-submits the same tickets
+            self.dropped += 1
+
+    def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flushes whatever is still queued, then stops the worker."""
+        if not self.running:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        self._stopping = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "jobs_written": self.jobs_written,
+            "alerts_dispatched": self.alerts_dispatched,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+    # --- Internals ---
+
+    @staticmethod
+    def _build_job(trades: List[Dict], max_lot_size: float, report: Dict, account_model: Any) -> Dict:
+        # Capture plain values: the request's ORM objects are gone by the time the worker runs
+        account = None
+        alert = None
+        if account_model:
+            account = SimpleNamespace(
+                id=account_model.id,
+                user_id=account_model.user_id,
+                daily_loss_limit_pct=account_model.daily_loss_limit_pct,
+                max_drawdown_limit_pct=account_model.max_drawdown_limit_pct,
+                max_daily_trades=account_model.max_daily_trades,
+                max_lot_size=account_model.max_lot_size,
+                news_trading_allowed=account_model.news_trading_allowed
+            )
+            if report["status"] in ['critical', 'breach']:
+                # Tier Gating for Telegram
+                owner = account_model.owner
+                is_pro = getattr(owner, 'subscription_tier', 'free') == 'pro'
+                # Everything the notification workers need, so they don't query for it
+                alert = {
+                    "status": report["status"],
+                    "violations": list(report["violations"]),
+                    "only_email": not is_pro,
+                    "account_id": account_model.id,
+                    "user_id": account_model.user_id,
+                    "email": getattr(owner, 'email', None),
+                    "email_enabled": account_model.email_alerts_enabled,
+                    "telegram_chat_id": account_model.telegram_chat_id if account_model.telegram_alerts_enabled else None,
+                    "last_notification_at": account_model.last_notification_at
+                }
+        breach = list(report["violations"]) if report["status"] == "breach" else None
+        return {
+            "trades": trades, "max_lot_size": max_lot_size, "account": account, "alert": alert,
+            "status": report["status"], "breach": breach
+        }
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            batch = []
+            if job is not None:
+                batch.append(job)
+                # Give bursts a moment to accumulate so they share one transaction
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                job = self._queue.get_nowait()
+                if job is not None:
+                    batch.append(job)
+            if batch:
+                await self._flush(batch)
+            if self._stopping and self._queue.empty():
+                return
+
+    async def _flush(self, batch: List[Dict]):
+        started = time.perf_counter()
+        try:
+            jobs = self._coalesce(batch)
+            # The batch goes through the async engine; requests keep being served while it commits
+            async with AsyncSessionLocal() as session:
+                await session.run_sync(self._write, jobs)
+            for job in jobs:
+                self._dispatch(job)
+        except Exception as e:
+            self.errors += 1
+            print(f"Risk Pipeline Error: {e}")
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _coalesce(batch: List[Dict]) -> List[Dict]:
+        """
+        Merges jobs per account: latest state per ticket wins, latest alert and status win,
+        and a breach seen anywhere in the batch is kept so the transition still counts.
+        Positions are only closed when every merged job saw the complete list.
+        """
+        merged: Dict[Any, Dict] = {}
+        for job in batch:
+            key = job["account"].id if job["account"] else None
+            current = merged.get(key)
+            if current is None:
+                merged[key] = {**job, "trades": {t["ticket"]: t for t in job["trades"]}}
+                continue
+            current["trades"].update({t["ticket"]: t for t in job["trades"]})
+            current["max_lot_size"] = job["max_lot_size"]
+            current["account"] = job["account"]
+            current["alert"] = job["alert"] or current["alert"]
+            current["status"] = job["status"]
+            current["breach"] = job["breach"] if job["breach"] is not None else current["breach"]
+            current["complete"] = current["complete"] and job["complete"]
+        return [{**job, "trades": list(job["trades"].values())} for job in merged.values()]
+
+    def _write(self, db: Session, jobs: List[Dict], savepoint: bool = False):
+        """
+        Persists and commits the jobs. Inline writes share the caller's session, so they run
+        in a savepoint: a failure rolls back only the savepoint instead of expiring every
+        object the request has loaded (which an AsyncSession can't lazily reload).
+        """
+        from app.engine.risk import risk_engine
+        try:
+            with db.begin_nested() if savepoint else nullcontext():
+                for job in jobs:
+                    risk_engine.persist_trades(
+                        db, job["trades"], job["max_lot_size"], job["account"], complete=job["complete"]
+                    )
+                    if job["account"]:
+                        risk_engine.record_status(db, job["account"], job["status"], job["breach"])
+        except Exception as e:
+            if not savepoint:
+                db.rollback()
+            self.errors += 1
+            print(f"Risk Engine DB Error: {e}")
+            return
+        try:
+            db.commit()
+            self.jobs_written += len(jobs)
+        except Exception as e:
+            db.rollback()
+            self.errors += 1
+            print(f"Risk Engine DB Error: {e}")
+
+    def _dispatch(self, job: Dict):
+        """Hands the alert to the notification queue; delivery never blocks the pipeline."""
+        if not job["alert"]:
+            return
+        from app.services.notifications import notification_service
+
+        if notification_service.submit(job["alert"]):
+            self.alerts_dispatched += 1
+
+
+# Singleton instance
+risk_write_pipeline = RiskWritePipeline()
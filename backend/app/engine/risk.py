@@ -1,23 +1,23 @@
-from typing import Dict, List, Any
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.sql.audit import AuditLog
+from ..models.sql.broker import BrokerAccount
 from ..models.sql.trade import Trade
-from ..models.sql.user import User
+from ..models.sql.risk_snapshot import RiskRuleSnapshot
+from .rules import rule_plans
 
 class RiskEngine:
-    def __init__(self):
-        # Default Prop Firm Rules
-        self.rules = {
-            "max_daily_loss": 5000.0,  # $5,000
-            "max_overall_loss": 10000.0, # $10,000
-            "max_lot_size": 10.0,
-            "prohibited_news_trading": True
-        }
+    # Tickets per IN (...) lookup, kept well under SQLite's bound-parameter limit
+    PERSIST_CHUNK_SIZE = 500
 
     def get_daily_stats(self, trades: List[Dict]) -> Dict:
         """
         Calculates daily statistics from the provided trades list.
         NOTE: This only considers Open Trades provided in the list.
-        Realized P&L for the day requires history, which is not passed here yet.
+        Realized P&L lives in the DailyLedger (app.engine.ledger); prefer daily_ledger.daily_stats().
         """
         daily_profit = 0.0
         daily_volume = 0.0
@@ -32,157 +32,200 @@ class RiskEngine:
             "trades_count": len(trades)
         }
         
-    def check_risk(self, account_data: Dict, daily_stats: Dict, trades: List[Dict], db: Session = None, account_model: Any = None) -> Dict:
+    @staticmethod
+    def _session_tag(now: datetime) -> str:
+        if 8 <= now.hour < 16: return "London"
+        elif 14 <= now.hour < 22: return "New York"
+        return "Asia"
+
+    def persist_trades(
+        self,
+        db: Session,
+        trades: List[Dict],
+        max_lot_size: Optional[float],
+        account_model: Any = None,
+        complete: bool = False
+    ) -> Dict:
+        """
+        Upserts the broker's open positions in bulk: one IN (...) lookup per chunk of tickets,
+        a single executemany INSERT for unseen tickets and a bulk UPDATE of profit/risk_score
+        by primary key for known ones. The caller owns the transaction (commit/rollback).
+        When `trades` is the account's `complete` list of open positions, the account's
+        open rows missing from it are closed at their last floating profit.
+        """
+        now = datetime.utcnow()
+        closed = self._close_vanished(db, trades, account_model, now) if complete and account_model else 0
+        if not trades:
+            return {"inserted": 0, "updated": 0, "closed": closed}
+
+        tickets = list({t["ticket"] for t in trades})
+        existing = {}
+        for i in range(0, len(tickets), self.PERSIST_CHUNK_SIZE):
+            chunk = tickets[i:i + self.PERSIST_CHUNK_SIZE]
+            for trade_id, ticket, close_time in db.query(Trade.id, Trade.ticket, Trade.close_time).filter(Trade.ticket.in_(chunk)):
+                existing[ticket] = (trade_id, close_time)
+
+        session_tag = self._session_tag(now)
+        new_rows = {}
+        updates = []
+        for t_data in trades:
+            ticket = t_data["ticket"]
+            trade_id, close_time = existing.get(ticket, (None, None))
+            if trade_id is None:
+                # Duplicate tickets in one payload would violate the unique constraint
+                new_rows.setdefault(ticket, {
+                    "ticket": ticket,
+                    "user_id": account_model.user_id if account_model else 1,
+                    "symbol": t_data["symbol"],
+                    "type": t_data["type"],
+                    "volume": t_data["volume"],
+                    "open_price": t_data["open_price"],
+                    "profit": t_data.get("profit", 0.0),
+                    "status": "OPEN",
+                    "session": session_tag,
+                    "risk_score": 75, # Default base score
+                })
+            else:
+                row = {
+                    "id": trade_id,
+                    "profit": t_data.get("profit", 0.0),
+                    # Deduct score if excessive volume
+                    "risk_score": 30 if max_lot_size is not None and t_data.get("volume", 0) > max_lot_size else 90,
+                    "updated_at": now
+                }
+                if close_time is not None:
+                    # Closed on a read that missed it; the broker still reports it open
+                    row.update(status="OPEN", close_time=None)
+                updates.append(row)
+
+        if new_rows:
+            # One snapshot of the rules in force for every trade first seen in this run
+            rule_snapshot_id = None
+            if account_model:
+                rule_snapshot = RiskRuleSnapshot(
+                    broker_account_id=account_model.id,
+                    daily_loss_limit_pct=account_model.daily_loss_limit_pct,
+                    max_drawdown_limit_pct=account_model.max_drawdown_limit_pct,
+                    max_daily_trades=account_model.max_daily_trades,
+                    max_lot_size=account_model.max_lot_size,
+                    news_trading_allowed=account_model.news_trading_allowed
+                )
+                db.add(rule_snapshot)
+                db.flush() # Get ID
+                rule_snapshot_id = rule_snapshot.id
+
+            rows = list(new_rows.values())
+            for row in rows:
+                row["rule_snapshot_id"] = rule_snapshot_id
+            db.execute(insert(Trade), rows)
+
+        if updates:
+            db.execute(update(Trade), updates)
+
+        return {"inserted": len(new_rows), "updated": len(updates), "closed": closed}
+
+    def _close_vanished(self, db: Session, trades: List[Dict], account_model: Any, now: datetime) -> int:
+        """
+        Marks the account's open Trade rows that are no longer among its positions as closed.
+        Trades belong to a user; the rule snapshot taken when they were first seen ties them
+        to the broker account.
+        """
+        current = {t["ticket"] for t in trades}
+        open_rows = db.query(Trade.id, Trade.ticket).join(
+            RiskRuleSnapshot, Trade.rule_snapshot_id == RiskRuleSnapshot.id
+        ).filter(
+            Trade.user_id == account_model.user_id,
+            Trade.close_time.is_(None),
+            RiskRuleSnapshot.broker_account_id == account_model.id
+        )
+        closes = [
+            {"id": trade_id, "status": "CLOSED", "close_time": now, "updated_at": now}
+            for trade_id, ticket in open_rows if ticket not in current
+        ]
+        if closes:
+            db.execute(update(Trade), closes)
+        return len(closes)
+
+    def record_status(self, db: Session, account: Any, status: str, breach_violations: List[str] = None) -> bool:
+        """
+        Stores the account's latest risk status and, when it enters breach, writes the
+        risk/breach audit row the account rollups count as one violation. The conditional
+        UPDATE makes the transition count once even with several workers evaluating.
+        The caller owns the transaction. Returns True when a violation was recorded.
+        """
+        recorded = False
+        if breach_violations is not None:
+            entered = db.execute(
+                update(BrokerAccount)
+                .where(BrokerAccount.id == account.id)
+                .where((BrokerAccount.risk_status.is_(None)) | (BrokerAccount.risk_status != "breach"))
+                .values(risk_status="breach")
+                .execution_options(synchronize_session=False)
+            )
+            if entered.rowcount:
+                db.execute(insert(AuditLog), [{
+                    "user_id": account.user_id,
+                    "broker_account_id": account.id,
+                    "action": "breach",
+                    "category": "risk",
+                    "details": {"status": "breach", "violations": breach_violations}
+                }])
+                recorded = True
+        if status != "breach" or breach_violations is None:
+            db.execute(
+                update(BrokerAccount)
+                .where(BrokerAccount.id == account.id)
+                .where((BrokerAccount.risk_status.is_(None)) | (BrokerAccount.risk_status != status))
+                .values(risk_status=status)
+                .execution_options(synchronize_session=False)
+            )
+        return recorded
+
+    def check_risk(
+        self,
+        account_data: Dict,
+        daily_stats: Dict,
+        trades: List[Dict],
+        db: Session = None,
+        account_model: Any = None,
+        equity_state: Dict = None
+    ) -> Dict:
         """
         Evaluates the current account state against risk rules.
         Returns a Risk Report including connection status and dynamic limits.
+        Trade persistence and alerts are handed to the write-behind pipeline.
         """
-        # --- 1. Dynamic Threshold Resolution ---
-        # If no account model provided, we use hardcoded defaults
-        if account_model:
-            balance = account_data.get("balance", 0.0)
-            daily_loss_limit = balance * (account_model.daily_loss_limit_pct / 100.0)
-            overall_limit = balance * (account_model.max_drawdown_limit_pct / 100.0)
-            max_lot_size = account_model.max_lot_size
-        else:
-            daily_loss_limit = self.rules["max_daily_loss"]
-            overall_limit = self.rules["max_overall_loss"]
-            max_lot_size = self.rules["max_lot_size"]
-
-        violations = []
-        status = "safe" # safe, warning, critical, breach
-        
-        # --- 2. Trade Persistence and Validation ---
-        if db:
-            rule_snapshot = None
-            
-            for t_data in trades:
-                # Basic lot size check
-                if t_data.get("volume", 0) > max_lot_size:
-                    violations.append(f"Excessive Lot Size: {t_data['volume']} > {max_lot_size}")
-                    status = "warning"
-
-                # 2.2 Advanced Tagging
-                from datetime import datetime
-                now_hour = datetime.utcnow().hour
-                if 8 <= now_hour < 16: session_tag = "London"
-                elif 14 <= now_hour < 22: session_tag = "New York"
-                else: session_tag = "Asia"
-
-                # Persist trade
-                from ..models.sql.trade import Trade
-                trade = db.query(Trade).filter(Trade.ticket == t_data["ticket"]).first()
-                
-                if not trade:
-                    # New trade found! Create one snapshot for this run if needed
-                    if not rule_snapshot and account_model:
-                        from ..models.sql.risk_snapshot import RiskRuleSnapshot
-                        rule_snapshot = RiskRuleSnapshot(
-                            broker_account_id=account_model.id,
-                            daily_loss_limit_pct=account_model.daily_loss_limit_pct,
-                            max_drawdown_limit_pct=account_model.max_drawdown_limit_pct,
-                            max_daily_trades=account_model.max_daily_trades,
-                            max_lot_size=account_model.max_lot_size,
-                            news_trading_allowed=account_model.news_trading_allowed
-                        )
-                        db.add(rule_snapshot)
-                        db.flush() # Get ID
-                        
-                    trade = Trade(
-                        ticket=t_data["ticket"],
-                        user_id=account_model.user_id if account_model else 1,
-                        symbol=t_data["symbol"],
-                        type=t_data["type"],
-                        volume=t_data["volume"],
-                        open_price=t_data["open_price"],
-                        status="OPEN",
-                        session=session_tag,
-                        risk_score=75, # Default base score
-                        rule_snapshot_id=rule_snapshot.id if rule_snapshot else None
-                    )
-                    db.add(trade)
-                else:
-                    trade.profit = t_data.get("profit", 0.0)
-                    # Deduct score if excessive volume
-                    if t_data.get("volume", 0) > max_lot_size:
-                        trade.risk_score = 30
-                    else:
-                        trade.risk_score = 90
-            
-            try:
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                print(f"Risk Engine DB Error: {e}")
-
-        # --- 3. Evaluate Daily Loss ---
-        current_daily_loss = -daily_stats.get("daily_profit", 0)
-        daily_loss_threshold = daily_loss_limit * 0.8 # Warn at 80%
-        daily_loss_critical = daily_loss_limit * 0.95 # Critical at 95%
-        
-        if current_daily_loss >= daily_loss_limit:
-            violations.append(f"Daily Loss Limit Breached: -${current_daily_loss:.2f} (Limit: ${daily_loss_limit:.2f})")
-            status = "breach"
-        elif current_daily_loss >= daily_loss_critical:
-            violations.append(f"CRITICAL: Near Daily Loss Limit")
-            status = "critical"
-        elif current_daily_loss >= daily_loss_threshold:
-            violations.append(f"Warning: Approaching Daily Loss Limit")
-            status = "warning"
-                
-        # --- 4. Evaluate Overall Drawdown ---
-        # Drawdown is usually measured from starting balance or equity peak.
-        # For this MVP, we use the account balance as proxy for start of day/peak.
-        current_equity = account_data.get("equity", 0.0)
-        current_balance = account_data.get("balance", 0.0)
-        total_drawdown = max(0.0, current_balance - current_equity)
-        
-        if total_drawdown >= overall_limit:
-             violations.append(f"Max Overall Loss Breached: -${total_drawdown:.2f}")
-             status = "breach"
-        elif total_drawdown >= overall_limit * 0.9:
-             if status != "breach": status = "critical"
-             
-        # --- 5. Predictive Estimates ---
-        # Time to breach estimate based on daily loss velocity (per trade)
-        # Simplified: if losing $X per trade and buffer is $Y, you have Y/X trades left.
-        trades_count = daily_stats.get("trades_count", 0)
-        avg_loss_per_trade = current_daily_loss / trades_count if trades_count > 0 and current_daily_loss > 0 else 0
-        
-        buffer = max(0.0, daily_loss_limit - current_daily_loss)
-        trades_to_breach = int(buffer / avg_loss_per_trade) if avg_loss_per_trade > 0 else 99
-        
-        # --- 6. Trigger Notifications ---
-        if db and account_model and status in ['critical', 'breach']:
-            try:
-                # Tier Gating for Telegram
-                is_pro = getattr(account_model.owner, 'subscription_tier', 'free') == 'pro'
-                
-                from ..services.notifications import notification_service
-                import asyncio
-                # Run notification task in background
-                asyncio.create_task(notification_service.send_risk_alert(
-                    db, 
-                    account_model, 
-                    status, 
-                    violations,
-                    only_email=(not is_pro) # Add flag to only send email if not pro
-                ))
-            except Exception as e:
-                print(f"Notification Error: {e}")
+        # Compiled once per rule set (the engine defaults without an account model)
+        plan = rule_plans.for_limits(account_model)
+        report = plan.evaluate(account_data, daily_stats, trades, equity_state)
 
-        return {
-            "status": status,
-            "violations": violations,
-            "metrics": {
-                "daily_loss": current_daily_loss,
-                "daily_limit": daily_loss_limit,
-                "overall_drawdown": total_drawdown,
-                "overall_limit": overall_limit,
-                "buffer": buffer,
-                "buffer_pct": (buffer / daily_loss_limit) * 100 if daily_loss_limit > 0 else 0,
-                "trades_to_breach": min(99, trades_to_breach)
-            }
-        }
+        if db or account_model:
+            from .pipeline import risk_write_pipeline
+            # The broker error fallback carries no positions; it must not close the open ones
+            risk_write_pipeline.submit(
+                trades, plan.max_lot, report, account_model=account_model, db=db,
+                complete=account_data.get("platform") != "error"
+            )
+
+        return report
+
+    async def check_risk_async(
+        self,
+        account_data: Dict,
+        daily_stats: Dict,
+        trades: List[Dict],
+        db: AsyncSession,
+        account_model: Any = None,
+        equity_state: Dict = None
+    ) -> Dict:
+        """
+        check_risk for routers on an AsyncSession: inline persistence and relationship
+        loads run on the session's sync facade through run_sync.
+        """
+        return await db.run_sync(
+            lambda session: self.check_risk(
+                account_data, daily_stats, trades, session, account_model=account_model, equity_state=equity_state
+            )
+        )
 
 risk_engine = RiskEngine()
@@ -0,0 +1,174 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .rules import RulePlan, rule_plans
+
+STATUS_LABELS = np.array(["safe", "warning", "critical", "breach"])
+SAFE, WARNING, CRITICAL, BREACH = range(4)
+
+
+def evaluate_batch(
+    balance: np.ndarray,
+    equity: np.ndarray,
+    daily_profit: np.ndarray,
+    trades_count: np.ndarray,
+    daily_loss_limit_pct: Optional[np.ndarray] = None,
+    max_drawdown_limit_pct: Optional[np.ndarray] = None,
+    max_lot_size: Optional[np.ndarray] = None,
+    max_trade_volume: Optional[np.ndarray] = None,
+    drawdown_reference: Optional[np.ndarray] = None,
+    daily_limit_base: Optional[np.ndarray] = None,
+    overall_limit_base: Optional[np.ndarray] = None,
+    plans: Optional[Sequence[RulePlan]] = None,
+    opened_count: Optional[np.ndarray] = None,
+    news_flagged: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized RulePlan.evaluate over columnar inputs, one row per account.
+    NaN limit percentages (or omitted columns) fall back to the default plan's
+    dollar limits, matching check_risk without an account model.
+    `max_trade_volume` is the largest open position per account (0 when flat).
+    `drawdown_reference` and the limit bases mirror an EquityTracker.drawdown_basis per
+    account (initial balance / equity peak, start-of-day balance); NaN falls back to balance.
+    With `plans` (one RulePlan per account) the limit percentage and lot columns are
+    ignored: limits, thresholds, the daily trade check on `opened_count` (default
+    trades_count) and the news check on `news_flagged` (RulePlan.news_positions) come
+    from each plan, matching RulePlan.evaluate.
+    Returns status labels and the report metrics as arrays, identical to the scalar path.
+    """
+    balance = np.asarray(balance, dtype=np.float64)
+    equity = np.asarray(equity, dtype=np.float64)
+    daily_profit = np.asarray(daily_profit, dtype=np.float64)
+    trades_count = np.asarray(trades_count, dtype=np.int64)
+    n = balance.shape[0]
+
+    daily_base = _or_balance(daily_limit_base, balance)
+    overall_base = _or_balance(overall_limit_base, balance)
+    if plans is not None:
+        columns = _plan_columns(plans)
+        daily_loss_limit = np.where(np.isnan(columns["daily_pct"]), columns["daily_limit"], daily_base * columns["daily_pct"])
+        overall_limit = np.where(
+            np.isnan(columns["overall_pct"]), columns["overall_limit"], overall_base * columns["overall_pct"]
+        )
+        max_lot_size = columns["max_lot"]
+    else:
+        default = rule_plans.for_limits(None)
+        columns = {
+            "daily_warn": default.daily_warn, "daily_critical": default.daily_critical,
+            "overall_critical": default.overall_critical, "max_trades": np.zeros(n)
+        }
+        daily_loss_limit = _limit(daily_base, daily_loss_limit_pct, default.daily_limit, n)
+        overall_limit = _limit(overall_base, max_drawdown_limit_pct, default.overall_limit, n)
+        if max_lot_size is None:
+            max_lot_size = np.full(n, default.max_lot)
+        else:
+            max_lot_size = np.where(np.isnan(max_lot_size), default.max_lot, max_lot_size)
+    if max_trade_volume is None:
+        max_trade_volume = np.zeros(n)
+
+    # --- 1. Lot Size ---
+    status = np.where(np.asarray(max_trade_volume) > max_lot_size, WARNING, SAFE)
+
+    # --- 2. Daily Loss ---
+    current_daily_loss = -daily_profit
+    daily_level = np.select(
+        [
+            current_daily_loss >= daily_loss_limit,
+            current_daily_loss >= daily_loss_limit * columns["daily_critical"],
+            current_daily_loss >= daily_loss_limit * columns["daily_warn"]
+        ],
+        [BREACH, CRITICAL, WARNING],
+        default=SAFE
+    )
+    # Every rule only ever escalates the status, so combining is a max
+    status = np.maximum(status, daily_level)
+
+    # --- 3. Overall Drawdown ---
+    total_drawdown = np.maximum(0.0, _or_balance(drawdown_reference, balance) - equity)
+    overall_level = np.select(
+        [total_drawdown >= overall_limit, total_drawdown >= overall_limit * columns["overall_critical"]],
+        [BREACH, CRITICAL],
+        default=SAFE
+    )
+    status = np.maximum(status, overall_level)
+
+    # --- 4. Daily Trade Count (0: no limit) ---
+    max_trades = columns["max_trades"]
+    opened = trades_count if opened_count is None else np.asarray(opened_count, dtype=np.int64)
+    limited = max_trades > 0
+    trades_level = np.select(
+        [
+            limited & (opened > max_trades),
+            limited & (opened == max_trades),
+            limited & (opened >= max_trades * columns.get("trades_warn", 0.8))
+        ],
+        [BREACH, CRITICAL, WARNING],
+        default=SAFE
+    )
+    status = np.maximum(status, trades_level)
+
+    # --- 5. News Trading ---
+    if news_flagged is not None:
+        status = np.maximum(status, np.where(np.asarray(news_flagged, dtype=bool), CRITICAL, SAFE))
+
+    # --- 6. Predictive Estimates ---
+    with np.errstate(divide="ignore", invalid="ignore"):
+        losing = (trades_count > 0) & (current_daily_loss > 0)
+        avg_loss_per_trade = np.where(losing, current_daily_loss / np.where(trades_count > 0, trades_count, 1), 0.0)
+        buffer = np.maximum(0.0, daily_loss_limit - current_daily_loss)
+        trades_to_breach = np.where(
+            avg_loss_per_trade > 0,
+            np.minimum(99.0, np.floor(buffer / np.where(avg_loss_per_trade > 0, avg_loss_per_trade, 1.0))),
+            99.0
+        ).astype(np.int64)
+        buffer_pct = np.where(
+            daily_loss_limit > 0,
+            (buffer / np.where(daily_loss_limit > 0, daily_loss_limit, 1.0)) * 100,
+            0.0
+        )
+
+    return {
+        "status_code": status,
+        "status": STATUS_LABELS[status],
+        "daily_loss": current_daily_loss,
+        "daily_limit": daily_loss_limit,
+        "overall_drawdown": total_drawdown,
+        "overall_limit": overall_limit,
+        "buffer": buffer,
+        "buffer_pct": buffer_pct,
+        "trades_to_breach": trades_to_breach
+    }
+
+
+def _plan_columns(plans: Sequence[RulePlan]) -> Dict[str, np.ndarray]:
+    """Per-account limits and thresholds of compiled plans (NaN percentage: fixed dollar limit)."""
+    def column(values):
+        return np.array(list(values), dtype=np.float64)
+
+    return {
+        "daily_pct": column(np.nan if p.daily_pct is None else p.daily_pct for p in plans),
+        "daily_limit": column(p.daily_limit or 0.0 for p in plans),
+        "daily_warn": column(p.daily_warn for p in plans),
+        "daily_critical": column(p.daily_critical for p in plans),
+        "overall_pct": column(np.nan if p.overall_pct is None else p.overall_pct for p in plans),
+        "overall_limit": column(p.overall_limit or 0.0 for p in plans),
+        "overall_critical": column(p.overall_critical for p in plans),
+        "max_lot": column(np.inf if p.max_lot is None else p.max_lot for p in plans),
+        "max_trades": column(p.max_trades or 0 for p in plans),
+        "trades_warn": column(p.trades_warn for p in plans)
+    }
+
+
+def _limit(balance: np.ndarray, pct: Optional[np.ndarray], default: float, n: int) -> np.ndarray:
+    if pct is None:
+        return np.full(n, default)
+    pct = np.asarray(pct, dtype=np.float64)
+    return np.where(np.isnan(pct), default, balance * (pct / 100.0))
+
+
+def _or_balance(values: Optional[np.ndarray], balance: np.ndarray) -> np.ndarray:
+    if values is None:
+        return balance
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), balance, values)
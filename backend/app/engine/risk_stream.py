@@ -0,0 +1,327 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from app.core.config import settings
+from app.engine.equity import equity_tracker
+from app.engine.ledger import daily_ledger
+from app.engine.pipeline import risk_write_pipeline
+from app.engine.rules import rule_plans
+
+# Sections whose fields are diffed one by one; "risk" is replaced whole, positions per ticket
+FIELD_SECTIONS = ("account", "daily_stats", "sync")
+
+# Evicted subscribers are closed with 1013 (try again later), like the support chat hub
+EVICT_CODE = 1013
+
+
+class _Client:
+    __slots__ = ("sink", "interval", "version", "view", "dirty", "last_sent", "task")
+
+    def __init__(self, sink: Any, interval: float):
+        self.sink = sink
+        self.interval = interval
+        # Last version/view this client was sent (None: it still needs the full snapshot)
+        self.version: Optional[int] = None
+        self.view: Optional[Dict[str, Any]] = None
+        self.dirty = asyncio.Event()
+        self.last_sent = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+
+class _Channel:
+    __slots__ = ("key", "limits", "refresh", "snapshot", "view", "version", "messages", "clients")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.limits: Any = None
+        self.refresh: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.view: Optional[Dict[str, Any]] = None
+        self.version = 0
+        # Encoded messages for the current version, by the version the client is at
+        self.messages: Dict[Optional[int], Optional[str]] = {}
+        self.clients: List[_Client] = []
+
+
+class RiskStream:
+    """
+    Server push of live risk state, replacing dashboard polling.
+    Runs as a poller listener: a snapshot for an account nobody watches returns at once;
+    otherwise the risk view is rebuilt and compared with the last one, and only a real
+    change bumps the version and wakes that account's subscribers. Each subscriber gets
+    the full snapshot once, then deltas, at most once per its throttle interval (changes
+    in between merge into one delta). A delta is encoded once per starting version and
+    shared by every subscriber at that version.
+    A watched account's report also goes to the risk write pipeline, as check_risk does
+    for /overview, so trades persist and alerts fire while dashboards only stream.
+    """
+
+    def __init__(self, min_interval: float = 1.0, send_timeout: float = 5.0, refresh_interval: float = 5.0):
+        self.min_interval = min_interval
+        self.send_timeout = send_timeout
+        self.refresh_interval = refresh_interval
+        self._channels: Dict[Hashable, _Channel] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.snapshots_seen = 0
+        self.snapshots_unwatched = 0
+        self.snapshots_unchanged = 0
+        self.updates = 0
+        self.reports_submitted = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.encodes = 0
+        self.evicted = 0
+
+    # --- Subscriptions ---
+
+    def subscribe(
+        self,
+        key: Hashable,
+        sink: Any,
+        limits: Any = None,
+        refresh: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+        interval: Optional[float] = None
+    ) -> _Client:
+        """
+        Registers `sink` (anything with async send_text() and close(code)) for an account.
+        `limits` is the account's BrokerAccount (detached) for its rule plan; `refresh`
+        fetches a snapshot for accounts the poller doesn't cover (mock/env accounts).
+        """
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(key)
+        if limits is not None:
+            channel.limits = limits
+        if refresh is not None:
+            channel.refresh = refresh
+        client = _Client(sink, max(self.min_interval, interval or 0.0))
+        channel.clients.append(client)
+        client.task = asyncio.create_task(self._sender(channel, client))
+        if channel.view is not None:
+            client.dirty.set()
+        return client
+
+    def unsubscribe(self, key: Hashable, client: _Client):
+        channel = self._channels.get(key)
+        if channel is None or client not in channel.clients:
+            return
+        channel.clients.remove(client)
+        if not channel.clients:
+            del self._channels[key]
+        if client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    async def refresh(self, key: Hashable):
+        """Fetches (or reads from the poller cache) the account's snapshot and pushes it."""
+        channel = self._channels.get(key)
+        if channel is None or channel.refresh is None:
+            return
+        try:
+            snapshot = await channel.refresh()
+        except Exception as e:
+            print(f"Risk Stream Refresh Error ({key}): {e}")
+            return
+        # Polled accounts already went through on_snapshot() as a listener
+        if snapshot is not channel.snapshot:
+            self.on_snapshot(key, snapshot)
+
+    # --- Snapshot listener ---
+
+    def on_snapshot(self, key: Hashable, snapshot: Dict[str, Any]):
+        self.snapshots_seen += 1
+        channel = self._channels.get(key)
+        if channel is None:
+            self.snapshots_unwatched += 1
+            return
+        channel.snapshot = snapshot
+        view = self.build_view(key, snapshot, channel.limits)
+        changed = view != channel.view
+        # Unchanged critical/breach reports are resubmitted so alert cooldowns can expire
+        if changed or view["risk"]["status"] in ("critical", "breach"):
+            self._submit(channel, snapshot, view["risk"])
+        if not changed:
+            self.snapshots_unchanged += 1
+            return
+        channel.view = view
+        channel.version += 1
+        channel.messages = {}
+        self.updates += 1
+        for client in channel.clients:
+            client.dirty.set()
+
+    @staticmethod
+    def build_view(key: Hashable, snapshot: Dict[str, Any], limits: Any = None) -> Dict[str, Any]:
+        """Everything the dashboard shows live: account, open positions, risk report, daily P&L."""
+        account, trades = snapshot["account"], snapshot["trades"]
+        daily_stats = daily_ledger.daily_stats(key)
+        equity_state = equity_tracker.drawdown_basis(
+            key, limits.drawdown_type if limits else "static", limits.initial_balance if limits else None
+        )
+        return {
+            "account": dict(account),
+            "positions": {str(t.get("ticket")): t for t in trades},
+            "risk": rule_plans.for_limits(limits).evaluate(account, daily_stats, trades, equity_state),
+            "daily_stats": daily_stats,
+            # last_sync moves on every poll; only a change of confidence is news
+            "sync": {"status": snapshot["status"]}
+        }
+
+    def _submit(self, channel: _Channel, snapshot: Dict[str, Any], report: Dict[str, Any]):
+        """Hands the report to the write pipeline; accounts without a model (mock/env) have nothing to persist."""
+        if channel.limits is None:
+            return
+        risk_write_pipeline.submit(
+            snapshot["trades"], rule_plans.for_limits(channel.limits).max_lot, report, account_model=channel.limits,
+            complete=snapshot["account"].get("platform") != "error"
+        )
+        self.reports_submitted += 1
+
+    @staticmethod
+    def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        changes = {}
+        for section in FIELD_SECTIONS:
+            before = old[section]
+            fields = {k: v for k, v in new[section].items() if k not in before or before[k] != v}
+            if fields:
+                changes[section] = fields
+        if new["risk"] != old["risk"]:
+            changes["risk"] = new["risk"]
+        upserted = [p for ticket, p in new["positions"].items() if old["positions"].get(ticket) != p]
+        removed = [ticket for ticket in old["positions"] if ticket not in new["positions"]]
+        if upserted or removed:
+            changes["positions"] = {"upserted": upserted, "removed": removed}
+        return changes
+
+    def _message(self, channel: _Channel, client: _Client) -> Optional[str]:
+        """Encoded snapshot/delta from the client's version to the current one (None if nothing changed)."""
+        if client.version in channel.messages:
+            return channel.messages[client.version]
+        if client.view is None:
+            message = {"type": "snapshot", "version": channel.version, "data": channel.view}
+        else:
+            changes = self.diff(client.view, channel.view)
+            message = {"type": "delta", "version": channel.version, "changes": changes} if changes else None
+        text = json.dumps(message, default=str) if message is not None else None
+        self.encodes += 1
+        channel.messages[client.version] = text
+        return text
+
+    # --- Per-subscriber sender ---
+
+    async def _sender(self, channel: _Channel, client: _Client):
+        loop = asyncio.get_running_loop()
+        while True:
+            await client.dirty.wait()
+            # Throttle: changes arriving while we wait are merged into one message
+            wait = client.last_sent + client.interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            client.dirty.clear()
+            if channel.view is None or client.version == channel.version:
+                continue
+            text = self._message(channel, client)
+            client.version, client.view = channel.version, channel.view
+            if text is None:
+                continue
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await client.sink.send_text(text)
+            except Exception:
+                # Gone or too slow to keep up: drop it, the client reconnects for a fresh snapshot
+                self.evicted += 1
+                self.unsubscribe(channel.key, client)
+                try:
+                    await client.sink.close(code=EVICT_CODE)
+                except Exception:
+                    pass
+                return
+            client.last_sent = loop.time()
+            self.messages_sent += 1
+            self.bytes_sent += len(text)
+
+    # --- Refresh loop for accounts outside the poller ---
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = [client.task for channel in self._channels.values() for client in channel.clients if client.task]
+        self._channels.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            # Cheap for polled accounts: the poller cache answers and the snapshot is already seen
+            for key in [key for key, channel in self._channels.items() if channel.refresh is not None]:
+                await self.refresh(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "accounts": len(self._channels),
+            "subscribers": sum(len(channel.clients) for channel in self._channels.values()),
+            "min_interval": self.min_interval,
+            "snapshots_seen": self.snapshots_seen,
+            "snapshots_unwatched": self.snapshots_unwatched,
+            "snapshots_unchanged": self.snapshots_unchanged,
+            "updates": self.updates,
+            "reports_submitted": self.reports_submitted,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "encodes": self.encodes,
+            "evicted": self.evicted
+        }
+
+
+class EventStreamSink:
+    """Adapts a subscription to Server-Sent Events: send_text() hands frames to the response body."""
+
+    def __init__(self, heartbeat: float = 15.0):
+        self.heartbeat = heartbeat
+        # One frame in flight: a client that stops reading blocks its sender, which then times out
+        self._frames: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.closed: Optional[int] = None
+
+    async def send_text(self, text: str):
+        await self._frames.put(f"data: {text}\n\n")
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+        # Whatever is still pending is stale; the end-of-stream marker replaces it
+        while not self._frames.empty():
+            self._frames.get_nowait()
+        self._frames.put_nowait(None)
+
+    async def frames(self):
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(self._frames.get(), timeout=self.heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": ping\n\n"
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+# Singleton instance
+risk_stream = RiskStream(
+    min_interval=settings.RISK_STREAM_MIN_INTERVAL_SECONDS,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+    refresh_interval=settings.ACCOUNT_POLL_INTERVAL_SECONDS
+)
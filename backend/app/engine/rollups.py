@@ -0,0 +1,494 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.engine.ledger import DailyLedger, daily_ledger
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.audit import AuditLog
+from app.models.sql.risk_snapshot import RiskRuleSnapshot
+from app.models.sql.rollup import AccountRollup, EmployeeActivityRollup, RollupWatermark
+from app.models.sql.trade import Trade
+
+ACCOUNT_FIELDS = (
+    "trades_opened", "volume", "trades_closed", "realized_pnl", "max_adverse", "violations",
+    "wins", "losses", "gross_profit", "gross_loss"
+)
+# Day rows only: {label: [trades, wins, net_profit]} of the trades closed that day
+BREAKDOWNS = ("by_symbol", "by_session")
+
+# (user_id, broker_account_id, granularity, bucket) -> totals
+AccountKey = Tuple[int, Optional[int], str, datetime]
+# (employee_id, day, module, action) -> count
+ActivityKey = Tuple[int, date, Optional[str], Optional[str]]
+
+
+def _utc(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def hour_start(ts: datetime) -> datetime:
+    return _utc(ts).replace(minute=0, second=0, microsecond=0)
+
+
+class RollupService:
+    """
+    Pre-aggregated history for charts and reports, so they never scan the raw tables:
+    per-account hourly and trading-day totals (trades opened, volume, closed trades,
+    realized P&L, wins/losses, worst closed trade, risk breaches), per-symbol/per-session
+    breakdowns on the day rows, and per-employee daily activity counts.
+
+    sync() is incremental: it reads only rows past each source's watermark, marks the
+    buckets they touch dirty and recomputes just those from the raw rows. backfill()
+    rebuilds a whole range, and check() recomputes a range and reports every bucket whose
+    stored totals disagree with the raw tables.
+    """
+
+    # Closed trades are picked up by updated_at; re-read a little behind for clock skew between writers
+    UPDATE_OVERLAP = timedelta(minutes=5)
+
+    def __init__(self, ledger: DailyLedger, sync_interval: float = 60.0):
+        self.ledger = ledger
+        self.sync_interval = sync_interval
+        self._task: Optional[asyncio.Task] = None
+
+        self.syncs = 0
+        self.buckets_rebuilt = 0
+        self.errors = 0
+        self.last_sync_ms = 0.0
+
+    # --- Buckets ---
+
+    def day_bucket(self, ts: datetime) -> datetime:
+        return self.ledger.day_start(self.ledger.trading_day(_utc(ts)))
+
+    def _day_window(self, start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+        """Widens [start, end) to whole trading days, so day buckets are always rebuilt complete."""
+        last = self.ledger.trading_day(_utc(end) - timedelta(microseconds=1))
+        return self.day_bucket(start), self.ledger.day_start(last + timedelta(days=1))
+
+    # --- Aggregation from the raw tables ---
+
+    def aggregate_accounts(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        user_ids: Optional[Iterable[int]] = None
+    ) -> Dict[AccountKey, Dict[str, float]]:
+        """Hour and day totals of every account with activity in [start, end) (whole trading days)."""
+        # Rows accumulate into hour buckets only; day buckets are folded from the hours afterwards.
+        # Totals are lists in ACCOUNT_FIELDS order: opened, volume, closed, pnl, max_adverse, violations,
+        # wins, losses, gross_profit, gross_loss
+        hours: Dict[Tuple[int, Optional[int], datetime], List[float]] = {}
+        # (user_id, account_id, day) -> {"by_symbol": {...}, "by_session": {...}}
+        breakdowns: Dict[Tuple[int, Optional[int], datetime], Dict[str, Dict[str, List]]] = {}
+        day_of: Dict[datetime, datetime] = {}
+
+        def bucket(user_id, account_id, ts):
+            key = (user_id, account_id, hour_start(ts))
+            totals = hours.get(key)
+            if totals is None:
+                totals = hours[key] = [0, 0.0, 0, 0.0, 0.0, 0, 0, 0, 0.0, 0.0]
+            return totals
+
+        def day(hour):
+            # Trading days start on the hour, so each hour bucket lies within exactly one day
+            found = day_of.get(hour)
+            if found is None:
+                found = day_of[hour] = self.day_bucket(hour)
+            return found
+
+        def trades(column):
+            # Trades reach their broker account through the rule snapshot taken when first seen
+            query = db.query(
+                Trade.user_id, RiskRuleSnapshot.broker_account_id, column, Trade.volume, Trade.profit,
+                Trade.symbol, Trade.session
+            ).outerjoin(RiskRuleSnapshot, Trade.rule_snapshot_id == RiskRuleSnapshot.id).filter(
+                column >= start, column < end
+            )
+            if user_ids is not None:
+                query = query.filter(Trade.user_id.in_(list(user_ids)))
+            return query.yield_per(5000)
+
+        for user_id, account_id, opened, volume, *_ in trades(Trade.open_time):
+            totals = bucket(user_id, account_id, opened)
+            totals[0] += 1
+            totals[1] += volume or 0.0
+        for user_id, account_id, closed, _, profit, symbol, session in trades(Trade.close_time):
+            profit = profit or 0.0
+            totals = bucket(user_id, account_id, closed)
+            totals[2] += 1
+            totals[3] += profit
+            totals[4] = min(totals[4], profit)
+            if profit > 0:
+                totals[6] += 1
+                totals[8] += profit
+            elif profit < 0:
+                totals[7] += 1
+                totals[9] -= profit
+            split = breakdowns.setdefault((user_id, account_id, day(hour_start(closed))), {name: {} for name in BREAKDOWNS})
+            for name, label in (("by_symbol", symbol), ("by_session", session)):
+                cell = split[name].setdefault(label or "Unknown", [0, 0, 0.0])
+                cell[0] += 1
+                cell[1] += profit > 0
+                cell[2] += profit
+
+        breaches = db.query(AuditLog.user_id, AuditLog.broker_account_id, AuditLog.timestamp).filter(
+            AuditLog.category == "risk",
+            AuditLog.action == "breach",
+            AuditLog.timestamp >= start,
+            AuditLog.timestamp < end
+        )
+        if user_ids is not None:
+            breaches = breaches.filter(AuditLog.user_id.in_(list(user_ids)))
+        for user_id, account_id, ts in breaches:
+            bucket(user_id, account_id, ts)[5] += 1
+
+        result: Dict[AccountKey, Dict[str, Any]] = {}
+        for (user_id, account_id, hour), totals in hours.items():
+            result[(user_id, account_id, "hour", hour)] = {**dict(zip(ACCOUNT_FIELDS, totals)), **dict.fromkeys(BREAKDOWNS)}
+            key = (user_id, account_id, "day", day(hour))
+            daily = result.get(key)
+            if daily is None:
+                daily = result[key] = {**dict.fromkeys(ACCOUNT_FIELDS, 0), **dict.fromkeys(BREAKDOWNS)}
+            for field, value in zip(ACCOUNT_FIELDS, totals):
+                daily[field] = min(daily[field], value) if field == "max_adverse" else daily[field] + value
+        for (user_id, account_id, day_start), split in breakdowns.items():
+            result[(user_id, account_id, "day", day_start)].update({
+                name: {label: [count, wins, round(profit, 2)] for label, (count, wins, profit) in cells.items()}
+                for name, cells in split.items()
+            })
+        return result
+
+    def aggregate_activity(
+        self,
+        db: Session,
+        first_day: date,
+        last_day: date,
+        employee_ids: Optional[Iterable[int]] = None
+    ) -> Dict[ActivityKey, int]:
+        """EmployeeActivity counts per employee, UTC day, module and action over [first_day, last_day]."""
+        query = db.query(
+            EmployeeActivity.employee_id, EmployeeActivity.timestamp, EmployeeActivity.module, EmployeeActivity.action
+        ).filter(
+            EmployeeActivity.timestamp >= datetime.combine(first_day, datetime.min.time()),
+            EmployeeActivity.timestamp < datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        )
+        if employee_ids is not None:
+            query = query.filter(EmployeeActivity.employee_id.in_(list(employee_ids)))
+        counts: Dict[ActivityKey, int] = {}
+        for employee_id, ts, module, action in query.yield_per(5000):
+            key = (employee_id, _utc(ts).date(), module, action)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    # --- Rebuilds ---
+
+    def rebuild_accounts(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        user_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """Replaces the account rollups of the trading days covering [start, end). Caller commits."""
+        start, end = self._day_window(start, end)
+        user_ids = None if user_ids is None else list(user_ids)
+        totals = self.aggregate_accounts(db, start, end, user_ids)
+
+        stale = db.query(AccountRollup).filter(AccountRollup.bucket >= start, AccountRollup.bucket < end)
+        if user_ids is not None:
+            stale = stale.filter(AccountRollup.user_id.in_(user_ids))
+        stale.delete(synchronize_session=False)
+        if totals:
+            db.execute(insert(AccountRollup), [
+                {"user_id": user_id, "broker_account_id": account_id, "granularity": granularity, "bucket": bucket,
+                 "updated_at": datetime.utcnow(), **values}
+                for (user_id, account_id, granularity, bucket), values in totals.items()
+            ])
+        self.buckets_rebuilt += len(totals)
+        return len(totals)
+
+    def rebuild_activity(
+        self,
+        db: Session,
+        first_day: date,
+        last_day: date,
+        employee_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """Replaces the employee activity rollups of [first_day, last_day]. Caller commits."""
+        employee_ids = None if employee_ids is None else list(employee_ids)
+        counts = self.aggregate_activity(db, first_day, last_day, employee_ids)
+
+        stale = db.query(EmployeeActivityRollup).filter(
+            EmployeeActivityRollup.day >= first_day,
+            EmployeeActivityRollup.day <= last_day
+        )
+        if employee_ids is not None:
+            stale = stale.filter(EmployeeActivityRollup.employee_id.in_(employee_ids))
+        stale.delete(synchronize_session=False)
+        if counts:
+            db.execute(insert(EmployeeActivityRollup), [
+                {"employee_id": employee_id, "day": day, "module": module, "action": action, "count": count}
+                for (employee_id, day, module, action), count in counts.items()
+            ])
+        self.buckets_rebuilt += len(counts)
+        return len(counts)
+
+    def backfill(self, db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Rebuilds every rollup in [start, end) (default: all history up to now) from the raw
+        tables and moves the watermarks to the present, so sync() carries on from here.
+        """
+        now = datetime.utcnow()
+        end = end or now + timedelta(hours=1)
+        start = start or self._earliest(db) or now
+        marks = self._watermarks(db)
+        for source, model in (("trades", Trade), ("audit_logs", AuditLog), ("employee_activities", EmployeeActivity)):
+            marks[source].last_id = db.query(func.max(model.id)).scalar() or 0
+        marks["trades_updated"].last_ts = now
+
+        result = {
+            "account_buckets": self.rebuild_accounts(db, start, end),
+            "activity_days": self.rebuild_activity(db, _utc(start).date(), _utc(end).date())
+        }
+        db.commit()
+        return result
+
+    def _earliest(self, db: Session) -> Optional[datetime]:
+        candidates = [
+            db.query(func.min(Trade.open_time)).scalar(),
+            db.query(func.min(AuditLog.timestamp)).filter(AuditLog.category == "risk", AuditLog.action == "breach").scalar(),
+            db.query(func.min(EmployeeActivity.timestamp)).scalar()
+        ]
+        candidates = [_utc(ts) for ts in candidates if ts is not None]
+        return min(candidates) if candidates else None
+
+    # --- Incremental sync ---
+
+    def sync(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Rolls up every row written since the last sync and commits."""
+        now = now or datetime.utcnow()
+        marks = self._watermarks(db)
+        dirty_hours: Dict[int, Set[datetime]] = {}
+        dirty_days: Dict[int, Set[date]] = {}
+
+        def touch(user_id, *timestamps):
+            for ts in timestamps:
+                if ts is not None:
+                    dirty_hours.setdefault(user_id, set()).add(hour_start(ts))
+
+        # 1. New trades (their open hour, and close hour if they arrive closed)
+        mark = marks["trades"]
+        for trade_id, user_id, opened, closed in db.query(Trade.id, Trade.user_id, Trade.open_time, Trade.close_time).filter(
+            Trade.id > mark.last_id
+        ):
+            touch(user_id, opened, closed)
+            mark.last_id = max(mark.last_id, trade_id)
+
+        # 2. Closed trades written since the last sync: closes, and late edits to past days.
+        # Open positions are rewritten on every poll but only their open hour counts them.
+        mark = marks["trades_updated"]
+        since = (mark.last_ts or now) - self.UPDATE_OVERLAP
+        for user_id, opened, closed in db.query(Trade.user_id, Trade.open_time, Trade.close_time).filter(
+            Trade.updated_at >= since, Trade.updated_at <= now, Trade.close_time.isnot(None)
+        ):
+            touch(user_id, opened, closed)
+        mark.last_ts = now
+
+        # 3. Risk breaches
+        mark = marks["audit_logs"]
+        for log_id, user_id, ts, category, action in db.query(
+            AuditLog.id, AuditLog.user_id, AuditLog.timestamp, AuditLog.category, AuditLog.action
+        ).filter(AuditLog.id > mark.last_id):
+            if category == "risk" and action == "breach":
+                touch(user_id, ts)
+            mark.last_id = max(mark.last_id, log_id)
+
+        # 4. Employee activity
+        mark = marks["employee_activities"]
+        for activity_id, employee_id, ts in db.query(
+            EmployeeActivity.id, EmployeeActivity.employee_id, EmployeeActivity.timestamp
+        ).filter(EmployeeActivity.id > mark.last_id):
+            if ts is not None:
+                dirty_days.setdefault(employee_id, set()).add(_utc(ts).date())
+            mark.last_id = max(mark.last_id, activity_id)
+
+        # 5. Recompute only what was touched, one window per user
+        buckets = 0
+        for user_id, hours in dirty_hours.items():
+            buckets += self.rebuild_accounts(db, min(hours), max(hours) + timedelta(hours=1), [user_id])
+        for employee_id, days in dirty_days.items():
+            buckets += self.rebuild_activity(db, min(days), max(days), [employee_id])
+        db.commit()
+        self.syncs += 1
+        return {"users": len(dirty_hours), "employees": len(dirty_days), "buckets": buckets}
+
+    def _watermarks(self, db: Session) -> Dict[str, RollupWatermark]:
+        marks = {mark.source: mark for mark in db.query(RollupWatermark)}
+        for source in ("trades", "trades_updated", "audit_logs", "employee_activities"):
+            if source not in marks:
+                marks[source] = RollupWatermark(source=source, last_id=0)
+                db.add(marks[source])
+        return marks
+
+    # --- Consistency ---
+
+    def check(self, db: Session, start: datetime, end: datetime, repair: bool = False) -> List[Dict[str, Any]]:
+        """
+        Recomputes [start, end) from the raw tables and lists every bucket whose stored
+        totals differ (missing, extra or wrong). With `repair` the range is rebuilt.
+        """
+        start, end = self._day_window(start, end)
+        expected = self.aggregate_accounts(db, start, end)
+        stored = {
+            (r.user_id, r.broker_account_id, r.granularity, r.bucket): {
+                field: getattr(r, field) for field in ACCOUNT_FIELDS + BREAKDOWNS
+            }
+            for r in db.query(AccountRollup).filter(AccountRollup.bucket >= start, AccountRollup.bucket < end)
+        }
+        mismatches = []
+        for key in expected.keys() | stored.keys():
+            want, have = expected.get(key), stored.get(key)
+            if (want is None or have is None or any(abs(want[f] - have[f]) > 1e-6 for f in ACCOUNT_FIELDS)
+                    or any(want[f] != have[f] for f in BREAKDOWNS)):
+                mismatches.append({"table": "account_rollups", "key": [str(part) for part in key], "expected": want, "stored": have})
+
+        first_day, last_day = _utc(start).date(), _utc(end).date()
+        expected_counts = self.aggregate_activity(db, first_day, last_day)
+        stored_counts = {
+            (r.employee_id, r.day, r.module, r.action): r.count
+            for r in db.query(EmployeeActivityRollup).filter(
+                EmployeeActivityRollup.day >= first_day, EmployeeActivityRollup.day <= last_day
+            )
+        }
+        for key in expected_counts.keys() | stored_counts.keys():
+            if expected_counts.get(key) != stored_counts.get(key):
+                mismatches.append({
+                    "table": "employee_activity_rollups", "key": [str(part) for part in key],
+                    "expected": expected_counts.get(key), "stored": stored_counts.get(key)
+                })
+
+        if repair and mismatches:
+            self.rebuild_accounts(db, start, end)
+            self.rebuild_activity(db, first_day, last_day)
+            db.commit()
+        return mismatches
+
+    # --- Reads ---
+
+    def account_series(
+        self,
+        db: Session,
+        user_id: int,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        broker_account_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        columns = ("bucket", "broker_account_id") + ACCOUNT_FIELDS
+        query = db.query(*[getattr(AccountRollup, c) for c in columns]).filter(
+            AccountRollup.user_id == user_id,
+            AccountRollup.granularity == granularity,
+            AccountRollup.bucket >= start,
+            AccountRollup.bucket < end
+        )
+        if broker_account_id is not None:
+            query = query.filter(AccountRollup.broker_account_id == broker_account_id)
+        return [dict(zip(columns, row)) for row in query.order_by(AccountRollup.bucket, AccountRollup.broker_account_id)]
+
+    def trade_days(
+        self,
+        db: Session,
+        user_id: int,
+        first_day: Optional[date] = None,
+        last_day: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        The user's closed-trade totals per trading day in [first_day, last_day], all
+        accounts merged, in day order. Days without closed trades are left out.
+        """
+        query = db.query(AccountRollup).filter(
+            AccountRollup.user_id == user_id,
+            AccountRollup.granularity == "day",
+            AccountRollup.trades_closed > 0
+        )
+        if first_day is not None:
+            query = query.filter(AccountRollup.bucket >= self.ledger.day_start(first_day))
+        if last_day is not None:
+            query = query.filter(AccountRollup.bucket < self.ledger.day_start(last_day + timedelta(days=1)))
+
+        days: Dict[datetime, Dict[str, Any]] = {}
+        for r in query.order_by(AccountRollup.bucket):
+            merged = days.get(r.bucket)
+            if merged is None:
+                merged = days[r.bucket] = {
+                    "day": self.ledger.trading_day(r.bucket), "trades": 0, "wins": 0, "losses": 0,
+                    "gross_profit": 0.0, "gross_loss": 0.0, "net_profit": 0.0, "by_symbol": {}, "by_session": {}
+                }
+            merged["trades"] += r.trades_closed
+            merged["wins"] += r.wins
+            merged["losses"] += r.losses
+            merged["gross_profit"] += r.gross_profit
+            merged["gross_loss"] += r.gross_loss
+            merged["net_profit"] += r.realized_pnl
+            for name in BREAKDOWNS:
+                for label, (count, wins, profit) in (getattr(r, name) or {}).items():
+                    cell = merged[name].setdefault(label, [0, 0, 0.0])
+                    cell[0] += count
+                    cell[1] += wins
+                    cell[2] += profit
+        return list(days.values())
+
+    # --- Background sync ---
+
+    def sync_now(self) -> Dict[str, int]:
+        db = db_session.SessionLocal()
+        try:
+            return self.sync(db)
+        finally:
+            db.close()
+
+    def start(self):
+        if self.sync_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                await asyncio.to_thread(self.sync_now)
+            except Exception as e:
+                self.errors += 1
+                print(f"Rollup Sync Error: {e}")
+            self.last_sync_ms = (asyncio.get_running_loop().time() - started) * 1000
+            await asyncio.sleep(self.sync_interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.sync_interval,
+            "syncs": self.syncs,
+            "buckets_rebuilt": self.buckets_rebuilt,
+            "errors": self.errors,
+            "last_sync_ms": round(self.last_sync_ms, 2)
+        }
+
+
+# Singleton instance
+rollup_service = RollupService(daily_ledger, sync_interval=settings.ROLLUP_SYNC_INTERVAL_SECONDS)
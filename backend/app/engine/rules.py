@@ -0,0 +1,377 @@
+import json
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+PRESETS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "presets.json")
+
+# Preset keys copied onto a BrokerAccount when a preset is applied
+PRESET_FIELDS = (
+    "daily_loss_limit_pct", "max_drawdown_limit_pct", "max_daily_trades",
+    "max_lot_size", "news_trading_allowed", "drawdown_type"
+)
+# What a RiskRuleSnapshot records; together with the preset name, what a plan depends on
+RULE_FIELDS = ("daily_loss_limit_pct", "max_drawdown_limit_pct", "max_daily_trades", "max_lot_size", "news_trading_allowed")
+
+SEVERITY = {"safe": 0, "warning": 1, "critical": 2, "breach": 3}
+STATUSES = ("safe", "warning", "critical", "breach")
+
+# Used when the account has no rule set at all: the engine's hardcoded prop firm defaults
+DEFAULT_RULE_SET = [
+    {"check": "lot_size", "max": 10.0},
+    {"check": "daily_loss", "limit": 5000.0},
+    {"check": "overall_drawdown", "limit": 10000.0},
+]
+
+
+@lru_cache(maxsize=1)
+def load_presets() -> Dict[str, Dict[str, Any]]:
+    """core/presets.json, read once per process."""
+    with open(PRESETS_PATH, "r") as f:
+        return json.load(f)
+
+
+def rule_set(limits: Any = None, preset: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    The declarative rule set for an account: a list of checks, e.g.
+        {"check": "daily_loss", "limit_pct": 5.0, "warn_at": 0.8, "critical_at": 0.95}
+        {"check": "overall_drawdown", "limit_pct": 10.0, "critical_at": 0.9}
+        {"check": "lot_size", "max": 10.0}
+        {"check": "daily_trades", "max": 5, "warn_at": 0.8}
+        {"check": "news_trading"}
+    `limits` is anything carrying the rule fields (BrokerAccount, RiskRuleSnapshot, a preset
+    dict). A preset's optional "rules" list overrides checks of the same name, so a custom
+    rule set can tune thresholds beyond the flat fields.
+    """
+    if limits is None:
+        rules = [dict(rule) for rule in DEFAULT_RULE_SET]
+    else:
+        get = limits.get if isinstance(limits, dict) else lambda field: getattr(limits, field, None)
+        rules = [
+            {"check": "lot_size", "max": get("max_lot_size")},
+            {"check": "daily_loss", "limit_pct": get("daily_loss_limit_pct")},
+            {"check": "overall_drawdown", "limit_pct": get("max_drawdown_limit_pct")},
+        ]
+        if get("max_daily_trades"):
+            rules.append({"check": "daily_trades", "max": get("max_daily_trades")})
+        if get("news_trading_allowed") is False:
+            rules.append({"check": "news_trading"})
+
+    overrides = load_presets().get(preset, {}).get("rules", []) if preset else []
+    if isinstance(limits, dict):
+        overrides = overrides + limits.get("rules", [])
+    for override in overrides:
+        for rule in rules:
+            if rule["check"] == override["check"]:
+                rule.update(override)
+                break
+        else:
+            rules.append(dict(override))
+    return rules
+
+
+class NewsCalendar:
+    """
+    High-impact release times. Under a no-news rule, positions opened within `window`
+    of a release are flagged. Loaded from NEWS_CALENDAR_FILE (a JSON list of ISO UTC
+    timestamps); empty means no releases are known and the check never fires.
+    """
+
+    # Answers per open time, kept between ticks: positions are re-checked on every evaluation
+    MAX_CACHED = 10000
+
+    def __init__(self, window_minutes: float = 2.0):
+        self.window = timedelta(minutes=window_minutes)
+        self._times: List[datetime] = []
+        self._near: Dict[Any, bool] = {}
+
+    def load(self, times: Iterable[Any]):
+        self._times = sorted(_as_datetime(t) for t in times)
+        self._near = {}
+
+    def load_file(self, path: str):
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                self.load(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def near(self, when: Any) -> bool:
+        if not self._times or when is None:
+            return False
+        near = self._near.get(when)
+        if near is None:
+            if len(self._near) >= self.MAX_CACHED:
+                self._near = {}
+            moment = _as_datetime(when)
+            i = bisect_left(self._times, moment - self.window)
+            near = self._near[when] = i < len(self._times) and self._times[i] <= moment + self.window
+        return near
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    # MetaApi and the calendar file use ISO strings, sometimes with a Z suffix
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+class RulePlan:
+    """
+    A rule set compiled for evaluation: thresholds resolved to numbers, absent or
+    disabled checks dropped. evaluate() builds the risk report check_risk and the live
+    stream serve; status() gives the same status but stops at the first breach.
+    """
+
+    __slots__ = (
+        "max_lot", "daily_limit", "daily_pct", "daily_warn", "daily_critical",
+        "overall_limit", "overall_pct", "overall_critical", "max_trades", "trades_warn", "news"
+    )
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.max_lot = None
+        self.daily_limit = self.daily_pct = None
+        self.daily_warn, self.daily_critical = 0.8, 0.95
+        self.overall_limit = self.overall_pct = None
+        self.overall_critical = 0.9
+        self.max_trades = None
+        self.trades_warn = 0.8
+        self.news = False
+        for rule in rules:
+            check = rule["check"]
+            if check == "lot_size":
+                self.max_lot = rule.get("max")
+            elif check == "daily_loss":
+                self.daily_limit = rule.get("limit")
+                self.daily_pct = rule["limit_pct"] / 100.0 if rule.get("limit_pct") is not None else None
+                self.daily_warn = rule.get("warn_at", self.daily_warn)
+                self.daily_critical = rule.get("critical_at", self.daily_critical)
+            elif check == "overall_drawdown":
+                self.overall_limit = rule.get("limit")
+                self.overall_pct = rule["limit_pct"] / 100.0 if rule.get("limit_pct") is not None else None
+                self.overall_critical = rule.get("critical_at", self.overall_critical)
+            elif check == "daily_trades":
+                self.max_trades = rule.get("max")
+                self.trades_warn = rule.get("warn_at", self.trades_warn)
+            elif check == "news_trading":
+                self.news = not rule.get("allowed", False)
+            else:
+                raise ValueError(f"Unknown risk rule: {check}")
+
+    def limits(self, account_data: Dict, equity_state: Optional[Dict] = None) -> Tuple[float, float, float]:
+        """Dollar daily limit, dollar overall limit and drawdown reference for this tick."""
+        balance = account_data.get("balance", 0.0)
+        daily_base = overall_base = reference = balance
+        if equity_state:
+            if equity_state.get("day_start_balance") is not None:
+                daily_base = equity_state["day_start_balance"]
+            if equity_state.get("limit_base") is not None:
+                overall_base = equity_state["limit_base"]
+            reference = equity_state["reference"]
+        daily_limit = daily_base * self.daily_pct if self.daily_pct is not None else (self.daily_limit or 0.0)
+        overall_limit = overall_base * self.overall_pct if self.overall_pct is not None else (self.overall_limit or 0.0)
+        return daily_limit, overall_limit, reference
+
+    def status(
+        self,
+        account_data: Dict,
+        daily_stats: Dict,
+        trades: List[Dict],
+        equity_state: Optional[Dict] = None,
+        news: Optional[NewsCalendar] = None
+    ) -> str:
+        """Status only: scalar checks first, per-trade checks last, done at the first breach."""
+        daily_limit, overall_limit, reference = self.limits(account_data, equity_state)
+        level = 0
+
+        daily_loss = -daily_stats.get("daily_profit", 0)
+        if daily_loss >= daily_limit:
+            return "breach"
+        if daily_loss >= daily_limit * self.daily_critical:
+            level = 2
+        elif daily_loss >= daily_limit * self.daily_warn:
+            level = 1
+
+        drawdown = max(0.0, reference - account_data.get("equity", 0.0))
+        if drawdown >= overall_limit:
+            return "breach"
+        if drawdown >= overall_limit * self.overall_critical:
+            level = 2
+
+        if self.max_trades:
+            count = self._opened_today(daily_stats)
+            if count > self.max_trades:
+                return "breach"
+            if count == self.max_trades:
+                level = max(level, 2)
+            elif count >= self.max_trades * self.trades_warn:
+                level = max(level, 1)
+
+        if level < 2 and self.news_positions(trades, news):
+            level = 2
+        if level < 1 and self.max_lot is not None and any(t.get("volume", 0) > self.max_lot for t in trades):
+            level = 1
+        return STATUSES[level]
+
+    def evaluate(
+        self,
+        account_data: Dict,
+        daily_stats: Dict,
+        trades: List[Dict],
+        equity_state: Optional[Dict] = None,
+        news: Optional[NewsCalendar] = None
+    ) -> Dict:
+        daily_loss_limit, overall_limit, reference = self.limits(account_data, equity_state)
+        violations = []
+        level = 0
+
+        # --- 1. Lot Size Validation ---
+        if self.max_lot is not None:
+            for t_data in trades:
+                if t_data.get("volume", 0) > self.max_lot:
+                    violations.append(f"Excessive Lot Size: {t_data['volume']} > {self.max_lot}")
+                    level = max(level, 1)
+
+        # --- 2. Daily Loss ---
+        current_daily_loss = -daily_stats.get("daily_profit", 0)
+        if current_daily_loss >= daily_loss_limit:
+            violations.append(f"Daily Loss Limit Breached: -${current_daily_loss:.2f} (Limit: ${daily_loss_limit:.2f})")
+            level = 3
+        elif current_daily_loss >= daily_loss_limit * self.daily_critical:
+            violations.append("CRITICAL: Near Daily Loss Limit")
+            level = max(level, 2)
+        elif current_daily_loss >= daily_loss_limit * self.daily_warn:
+            violations.append("Warning: Approaching Daily Loss Limit")
+            level = max(level, 1)
+
+        # --- 3. Overall Drawdown ---
+        total_drawdown = max(0.0, reference - account_data.get("equity", 0.0))
+        if total_drawdown >= overall_limit:
+            violations.append(f"Max Overall Loss Breached: -${total_drawdown:.2f}")
+            level = 3
+        elif total_drawdown >= overall_limit * self.overall_critical:
+            level = max(level, 2)
+
+        # --- 4. Daily Trade Count (positions opened today; overnight holds don't count) ---
+        trades_count = daily_stats.get("trades_count", 0)
+        if self.max_trades:
+            opened = self._opened_today(daily_stats)
+            if opened > self.max_trades:
+                violations.append(f"Max Daily Trades Exceeded: {opened} > {self.max_trades}")
+                level = 3
+            elif opened == self.max_trades:
+                violations.append(f"Max Daily Trades Reached: {opened}")
+                level = max(level, 2)
+            elif opened >= self.max_trades * self.trades_warn:
+                violations.append(f"Warning: {opened} of {self.max_trades} daily trades used")
+                level = max(level, 1)
+
+        # --- 5. News Trading ---
+        for ticket in self.news_positions(trades, news):
+            violations.append(f"News Trading: position {ticket} opened around a high-impact release")
+            level = max(level, 2)
+
+        # --- 6. Predictive Estimates ---
+        avg_loss_per_trade = current_daily_loss / trades_count if trades_count > 0 and current_daily_loss > 0 else 0
+        buffer = max(0.0, daily_loss_limit - current_daily_loss)
+        trades_to_breach = int(buffer / avg_loss_per_trade) if avg_loss_per_trade > 0 else 99
+
+        return {
+            "status": STATUSES[level],
+            "violations": violations,
+            "metrics": {
+                "daily_loss": current_daily_loss,
+                "daily_limit": daily_loss_limit,
+                "overall_drawdown": total_drawdown,
+                "overall_limit": overall_limit,
+                "drawdown_type": equity_state["drawdown_type"] if equity_state else "balance",
+                "buffer": buffer,
+                "buffer_pct": (buffer / daily_loss_limit) * 100 if daily_loss_limit > 0 else 0,
+                "trades_to_breach": min(99, trades_to_breach)
+            }
+        }
+
+    def news_positions(self, trades: List[Dict], news: Optional[NewsCalendar] = None) -> List[Any]:
+        """Tickets opened around a high-impact release, when this rule set forbids news trading."""
+        if not self.news or not trades:
+            return []
+        return self._news_trades(trades, news)
+
+    @staticmethod
+    def _opened_today(daily_stats: Dict) -> int:
+        # The ledger reports positions opened today; other sources only have trades_count
+        opened = daily_stats.get("opened_count")
+        return daily_stats.get("trades_count", 0) if opened is None else opened
+
+    @staticmethod
+    def _news_trades(trades: List[Dict], news: Optional[NewsCalendar]) -> List[Any]:
+        calendar = news if news is not None else news_calendar
+        if not len(calendar):
+            return []
+        return [t.get("ticket") for t in trades if calendar.near(t.get("open_time"))]
+
+
+class RulePlanCache:
+    """
+    Compiled plans keyed by the rule values a RiskRuleSnapshot records (plus the preset
+    name). Accounts sharing a rule set share a plan; changing a limit is a new key, so
+    nothing needs invalidating.
+    """
+
+    _attributes = attrgetter(*RULE_FIELDS, "preset_name")
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[Tuple, RulePlan]" = OrderedDict()
+        self.hits = 0
+        self.compiles = 0
+
+    @staticmethod
+    def signature(limits: Any) -> Tuple:
+        if limits is None:
+            return (None,)
+        if isinstance(limits, dict):
+            return tuple(limits.get(field) for field in RULE_FIELDS) + (limits.get("preset_name"),)
+        try:
+            return RulePlanCache._attributes(limits)
+        except AttributeError:
+            # Partial stand-ins (no preset_name, no trade limits): missing fields read as None
+            return tuple(getattr(limits, field, None) for field in RULE_FIELDS) + (getattr(limits, "preset_name", None),)
+
+    def for_limits(self, limits: Any = None) -> RulePlan:
+        """Plan for a BrokerAccount, RiskRuleSnapshot or detached copy (None: engine defaults)."""
+        key = self.signature(limits)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+        preset = key[-1] if limits is not None else None
+        plan = self.compile(rule_set(limits, preset=preset))
+        self._plans[key] = plan
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+    def for_preset(self, name: str) -> RulePlan:
+        return self.for_limits({**load_presets()[name], "preset_name": name})
+
+    def compile(self, rules: List[Dict[str, Any]]) -> RulePlan:
+        self.compiles += 1
+        return RulePlan(rules)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"plans": len(self._plans), "hits": self.hits, "compiles": self.compiles}
+
+
+# Singleton instances
+news_calendar = NewsCalendar(window_minutes=settings.NEWS_BLACKOUT_MINUTES)
+news_calendar.load_file(settings.NEWS_CALENDAR_FILE)
+rule_plans = RulePlanCache()
@@ -0,0 +1,306 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.engine.broker.base import BrokerConnector
+
+
+class SnapshotCache:
+    """
+    Bounded LRU of the latest account/trade snapshot per account.
+    Lookups are O(1); the least recently read account is dropped when full.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        snapshot = self._entries.get(key)
+        if snapshot is not None:
+            self._entries.move_to_end(key)
+        return snapshot
+
+    def put(self, key: Hashable, snapshot: Dict[str, Any]):
+        self._entries[key] = snapshot
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def age_seconds(snapshot: Dict[str, Any]) -> float:
+        return time.monotonic() - snapshot["fetched_at"]
+
+
+class RateLimiter:
+    """Token bucket shared by every fetch against the same provider."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: float = 1.0):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class AccountPoller:
+    """
+    Polls every active BrokerAccount on a fixed cadence and keeps the latest
+    snapshot in a SnapshotCache, so dashboard requests never wait on the broker.
+    Concurrent fetches for the same account are coalesced into one in-flight call.
+    """
+
+    # Each fetch is two RPCs: account information + positions
+    FETCH_COST = 2.0
+
+    def __init__(
+        self,
+        cache: SnapshotCache,
+        interval: float = 5.0,
+        fetch_timeout: float = 15.0,
+        rate_limits: Optional[Dict[str, float]] = None
+    ):
+        self.cache = cache
+        self.interval = interval
+        self.fetch_timeout = fetch_timeout
+        self._limiters = {
+            provider: RateLimiter(rate) for provider, rate in (rate_limits or {}).items()
+        }
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._listeners: List[Callable[[Hashable, Dict[str, Any]], None]] = []
+        self._watchers: Dict[Hashable, Tuple[BrokerConnector, asyncio.Task]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.polls = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.pushed = 0
+
+    def add_listener(self, listener: Callable[[Hashable, Dict[str, Any]], None]):
+        """Registers a callback run with (key, snapshot) after every successful fetch; error fallbacks are not passed on."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    async def get(
+        self,
+        key: Hashable,
+        provider: str,
+        connector_factory: Callable[[], Awaitable[BrokerConnector]],
+        max_age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Serves the cached snapshot if it is younger than `max_age`, otherwise fetches
+        (joining any fetch already in flight for the same account).
+        """
+        max_age = self.interval * 2 if max_age is None else max_age
+        snapshot = self.cache.get(key)
+        if snapshot is not None and SnapshotCache.age_seconds(snapshot) <= max_age:
+            return snapshot
+        return await self.fetch(key, provider, connector_factory)
+
+    async def fetch(
+        self,
+        key: Hashable,
+        provider: str,
+        connector_factory: Callable[[], Awaitable[BrokerConnector]]
+    ) -> Dict[str, Any]:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._fetch(key, provider, connector_factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_fetch_done(key, t))
+        # shield: one cancelled request must not cancel the fetch other requests are waiting on
+        return await asyncio.shield(task)
+
+    def _on_fetch_done(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark the error as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        provider: str,
+        connector_factory: Callable[[], Awaitable[BrokerConnector]]
+    ) -> Dict[str, Any]:
+        limiter = self._limiters.get(provider)
+        if limiter:
+            await limiter.acquire(self.FETCH_COST)
+
+        self.fetches += 1
+        started = time.monotonic()
+        try:
+            connector = await connector_factory()
+            await connector.connect()
+            account_data, trades = await asyncio.gather(
+                asyncio.wait_for(connector.get_account_info(), timeout=self.fetch_timeout),
+                asyncio.wait_for(connector.get_trades(), timeout=self.fetch_timeout)
+            )
+        except Exception:
+            self.errors += 1
+            raise
+
+        if hasattr(connector, "events"):
+            self._watch(key, connector)
+        return self._store(key, connector, account_data, trades, started)
+
+    def _store(
+        self,
+        key: Hashable,
+        connector: BrokerConnector,
+        account_data: Dict[str, Any],
+        trades: List[Dict[str, Any]],
+        started: float
+    ) -> Dict[str, Any]:
+        fetched_at = time.monotonic()
+        snapshot = {
+            "key": key,
+            "account": account_data,
+            "trades": trades,
+            "status": connector.confidence_status,
+            "last_sync": connector.last_sync or datetime.utcnow(),
+            "fetched_at": fetched_at,
+            "latency_ms": int((fetched_at - started) * 1000)
+        }
+        if account_data.get("platform") == "error":
+            # The connector's fallback after a failed read: not a snapshot of the account.
+            # Keep serving the last good one and leave listeners alone.
+            self.errors += 1
+            return self.cache.get(key) or snapshot
+        self.cache.put(key, snapshot)
+        for listener in self._listeners:
+            try:
+                listener(key, snapshot)
+            except Exception as e:
+                print(f"Snapshot Listener Error: {e}")
+        return snapshot
+
+    def _watch(self, key: Hashable, connector: BrokerConnector):
+        """
+        Streaming connectors push their changes: every event refreshes the cached snapshot
+        from the connector's local mirror, so listeners react without waiting for the next poll.
+        """
+        current = self._watchers.get(key)
+        if current is not None:
+            if current[0] is connector and not current[1].done():
+                return
+            current[1].cancel()
+        self._watchers[key] = (connector, asyncio.create_task(self._consume(key, connector)))
+
+    async def _consume(self, key: Hashable, connector: BrokerConnector):
+        try:
+            async for _event in connector.events():
+                started = time.monotonic()
+                account_data, trades = await asyncio.gather(connector.get_account_info(), connector.get_trades())
+                self._store(key, connector, account_data, trades, started)
+                self.pushed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Account Stream Error: {e}")
+        finally:
+            # Only clear our own entry; a replacement watcher may already be registered
+            if self._watchers.get(key, (None,))[0] is connector:
+                self._watchers.pop(key, None)
+
+    def start(self, load_accounts: Callable[[], List[Any]], connector_for: Callable[[Any], Awaitable[BrokerConnector]]):
+        """
+        Starts the polling loop. `load_accounts` returns the accounts to poll on each tick
+        and `connector_for` resolves a pooled connector for one of them.
+        """
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop(load_accounts, connector_for))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        watchers = [task for _, task in self._watchers.values()]
+        for task in watchers:
+            task.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+        self._watchers.clear()
+
+    async def _poll_loop(self, load_accounts, connector_for):
+        while True:
+            try:
+                # The account query is a blocking DB call; keep it off the event loop
+                accounts = await asyncio.to_thread(load_accounts)
+                self.polls += 1
+                await asyncio.gather(
+                    *[
+                        self.fetch(acc.id, acc.provider, lambda acc=acc: connector_for(acc))
+                        for acc in accounts
+                    ],
+                    return_exceptions=True
+                )
+            except Exception as e:
+                print(f"Account Poller Error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Scheduler statistics for the admin system endpoint."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "polls": self.polls,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "pushed": self.pushed,
+            "streaming_accounts": len(self._watchers),
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+            "cached_accounts": len(self.cache),
+            "max_cached_accounts": self.cache.max_entries
+        }
+
+
+def load_active_accounts() -> List[Any]:
+    """Active BrokerAccounts, detached from the session so the poller can hold on to them."""
+    from app.db.session import SessionLocal
+    from app.models.sql.broker import BrokerAccount
+
+    db = SessionLocal()
+    try:
+        accounts = db.query(BrokerAccount).filter(
+            BrokerAccount.is_active == True,
+            BrokerAccount.provider == "metaapi"
+        ).all()
+        db.expunge_all()
+        return accounts
+    finally:
+        db.close()
+
+
+# Singleton instances
+snapshot_cache = SnapshotCache(max_entries=settings.SNAPSHOT_CACHE_MAX_ENTRIES)
+account_poller = AccountPoller(
+    snapshot_cache,
+    interval=settings.ACCOUNT_POLL_INTERVAL_SECONDS,
+    rate_limits={"metaapi": settings.METAAPI_MAX_REQUESTS_PER_SECOND}
+)
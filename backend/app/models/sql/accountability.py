@@ -2,10 +2,10 @@
 Trading Insights & Goals System
 Provides data-driven awareness and pattern detection - NO execution control
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from app.models.sql.base import Base
+from app.db.session import Base
 
 
 class TradingGoal(Base):
@@ -56,6 +56,10 @@ class RiskAlert(Base):
     user = relationship("User")
     goal = relationship("TradingGoal")
 
+    __table_args__ = (
+        Index("ix_risk_alerts_user_id_alert_timestamp", "user_id", "alert_timestamp"),
+    )
+
 
 class BehaviorPattern(Base):
     """Detected trading patterns - for awareness and learning"""
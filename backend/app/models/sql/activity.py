@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -19,3 +19,7 @@ class EmployeeActivity(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
     employee = relationship("User", foreign_keys=[employee_id])
+
+    __table_args__ = (
+        Index("ix_employee_activities_employee_id_timestamp", "employee_id", "timestamp"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -37,6 +37,14 @@ class BrokerAccount(Base):
     max_lot_size = Column(Float, default=10.0)
     news_trading_allowed = Column(Boolean, default=True)
     preset_name = Column(String, nullable=True) # FTMO, E8, etc.
+    drawdown_type = Column(String, default="static") # static (from initial balance), trailing (from equity peak)
+    initial_balance = Column(Float, nullable=True) # Challenge starting balance; unset: first balance observed
+    risk_status = Column(String, nullable=True) # Last evaluated status; entering breach records a violation
 
     # Relationship
     owner = relationship("User", backref="broker_accounts")
+
+    __table_args__ = (
+        # Dashboard/poller lookup of a user's active account
+        Index("ix_broker_accounts_user_id_is_active", "user_id", "is_active"),
+    )
@@ -0,0 +1,64 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, Index
+from app.db.session import Base
+
+class AccountRollup(Base):
+    """
+    Per-account activity in one hour (UTC) or one broker trading day. Trades without a
+    rule snapshot have no known account and roll up under broker_account_id NULL.
+    Day rows also carry the per-symbol/per-session breakdowns performance analytics reads.
+    """
+    __tablename__ = "account_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    broker_account_id = Column(Integer, ForeignKey("broker_accounts.id"), nullable=True)
+    granularity = Column(String(8), nullable=False)  # hour, day
+    bucket = Column(DateTime, nullable=False)  # naive UTC start of the hour / trading day
+
+    trades_opened = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0.0)
+    trades_closed = Column(Integer, nullable=False, default=0)
+    realized_pnl = Column(Float, nullable=False, default=0.0)
+    max_adverse = Column(Float, nullable=False, default=0.0)  # worst closed-trade P&L, <= 0
+    violations = Column(Integer, nullable=False, default=0)  # risk breach audit entries
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    gross_profit = Column(Float, nullable=False, default=0.0)
+    gross_loss = Column(Float, nullable=False, default=0.0)  # positive
+
+    # Day rows only: {symbol: [trades, wins, net_profit]}, {session: [trades, wins, net_profit]}
+    by_symbol = Column(JSON, nullable=True)
+    by_session = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_account_rollups_user_id_granularity_bucket", "user_id", "granularity", "bucket"),
+    )
+
+
+class EmployeeActivityRollup(Base):
+    """EmployeeActivity counts per employee, UTC day, module and action."""
+    __tablename__ = "employee_activity_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    module = Column(String, nullable=True)
+    action = Column(String, nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_employee_activity_rollups_employee_id_day", "employee_id", "day"),
+    )
+
+
+class RollupWatermark(Base):
+    """How far the rollup sync has read each source table (last row id / last close time)."""
+    __tablename__ = "rollup_watermarks"
+
+    source = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    last_ts = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -38,3 +38,8 @@ class SupportMessage(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     chat = relationship("SupportChat", back_populates="messages")
+
+    __table_args__ = (
+        # Chat transcripts are always read in order
+        Index("ix_support_messages_chat_id_created_at", "chat_id", "created_at"),
+    )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -30,7 +31,17 @@ class Trade(Base):
     risk_score = Column(Integer, nullable=True) # 1-100 safety score
 
     rule_snapshot_id = Column(Integer, ForeignKey("risk_rule_snapshots.id"), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Rollup sync watermark
 
     # Relationships
     owner = relationship("User", backref="trades")
     rule_snapshot = relationship("RiskRuleSnapshot", backref="trades")
+
+    __table_args__ = (
+        # Journals, reports and ledger backfill scan a user's trades by time
+        Index("ix_trades_user_id_open_time", "user_id", "open_time"),
+        # Archive tail, analytics rollups and ledger backfill read closed trades by close time
+        Index("ix_trades_user_id_close_time", "user_id", "close_time"),
+        # Rollup sync re-reads trades changed since its last pass
+        Index("ix_trades_updated_at", "updated_at"),
+    )
@@ -2,16 +2,22 @@
 Insights & Goals Router
 Provides risk awareness and performance insights - NO trade execution or blocking
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel
 
-from app.database import get_db
-from app.dependencies import get_current_user
+from app.db import session as db_session
+from app.db.session import get_async_db
+from app.routers.auth import get_current_user_async
 from app.models.sql.user import User
 from app.models.sql.accountability import TradingGoal, RiskAlert, BehaviorPattern, PerformanceInsight
+from app.engine.analytics import performance_analytics
+from app.engine.rollups import rollup_service
 
 router = APIRouter(prefix="/insights", tags=["insights"])
 
@@ -62,8 +68,8 @@ class RiskAlertResponse(BaseModel):
 @router.post("/goals", response_model=TradingGoalResponse)
 async def create_trading_goal(
     goal: TradingGoalCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a trading goal for tracking
@@ -89,30 +95,33 @@ async def create_trading_goal(
     )
     
     db.add(new_goal)
-    db.commit()
-    db.refresh(new_goal)
+    await db.commit()
+    await db.refresh(new_goal)
     
     return new_goal
 
 
 @router.get("/goals", response_model=List[TradingGoalResponse])
 async def get_trading_goals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all active trading goals"""
-    goals = db.query(TradingGoal).filter(
-        TradingGoal.user_id == current_user.id,
-        TradingGoal.is_active == True
-    ).all()
+    result = await db.execute(
+        select(TradingGoal).where(
+            TradingGoal.user_id == current_user.id,
+            TradingGoal.is_active == True
+        )
+    )
+    goals = result.scalars().all()
     
     return goals
 
 
 @router.get("/risk-proximity", response_model=RiskProximityResponse)
 async def get_risk_proximity(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current risk proximity state
@@ -121,10 +130,13 @@ async def get_risk_proximity(
     """
     
     # Get active goals
-    goals = db.query(TradingGoal).filter(
-        TradingGoal.user_id == current_user.id,
-        TradingGoal.is_active == True
-    ).all()
+    result = await db.execute(
+        select(TradingGoal).where(
+            TradingGoal.user_id == current_user.id,
+            TradingGoal.is_active == True
+        )
+    )
+    goals = result.scalars().all()
     
     # TODO: Calculate actual proximity based on real trading data
     # For now, return structure showing what this endpoint provides
@@ -161,19 +173,20 @@ async def get_risk_proximity(
 @router.get("/alerts", response_model=List[RiskAlertResponse])
 async def get_risk_alerts(
     unacknowledged_only: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get risk alerts for the user
     These are informational notifications, not restrictions
     """
-    query = db.query(RiskAlert).filter(RiskAlert.user_id == current_user.id)
+    query = select(RiskAlert).where(RiskAlert.user_id == current_user.id)
     
     if unacknowledged_only:
-        query = query.filter(RiskAlert.is_acknowledged == False)
+        query = query.where(RiskAlert.is_acknowledged == False)
     
-    alerts = query.order_by(RiskAlert.alert_timestamp.desc()).limit(50).all()
+    result = await db.execute(query.order_by(RiskAlert.alert_timestamp.desc()).limit(50))
+    alerts = result.scalars().all()
     
     return alerts
 
@@ -181,73 +194,130 @@ async def get_risk_alerts(
 @router.post("/alerts/{alert_id}/acknowledge")
 async def acknowledge_alert(
     alert_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark an alert as acknowledged"""
-    alert = db.query(RiskAlert).filter(
-        RiskAlert.id == alert_id,
-        RiskAlert.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(RiskAlert).where(
+            RiskAlert.id == alert_id,
+            RiskAlert.user_id == current_user.id
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     alert.is_acknowledged = True
     alert.acknowledged_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {"message": "Alert acknowledged"}
 
 
 @router.get("/patterns")
 async def get_behavior_patterns(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detected behavioral patterns
     Educational insights to help trader understand their habits
     """
-    patterns = db.query(BehaviorPattern).filter(
-        BehaviorPattern.user_id == current_user.id
-    ).order_by(BehaviorPattern.detection_timestamp.desc()).limit(10).all()
+    result = await db.execute(
+        select(BehaviorPattern).where(
+            BehaviorPattern.user_id == current_user.id
+        ).order_by(BehaviorPattern.detection_timestamp.desc()).limit(10)
+    )
+    patterns = result.scalars().all()
     
     return patterns
 
 
 @router.get("/performance-insights")
 async def get_performance_insights(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-generated performance insights
     Data-driven recommendations and observations
     """
-    insights = db.query(PerformanceInsight).filter(
-        PerformanceInsight.user_id == current_user.id
-    ).order_by(PerformanceInsight.generated_at.desc()).limit(20).all()
+    result = await db.execute(
+        select(PerformanceInsight).where(
+            PerformanceInsight.user_id == current_user.id
+        ).order_by(PerformanceInsight.generated_at.desc()).limit(20)
+    )
+    insights = result.scalars().all()
     
     return insights
 
 
+@router.get("/performance-analytics")
+async def get_performance_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    starting_balance: Optional[float] = None,
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Equity curve, drawdown, win rate, profit factor, expectancy, Sharpe/Sortino and
+    per-symbol/per-session breakdowns over the trading days [start, end].
+    Reads the trading-day account rollups and refreshes the user's PerformanceInsight rows,
+    on a worker thread with its own session so the event loop keeps serving.
+    """
+    def analyze():
+        db = db_session.SessionLocal()
+        try:
+            metrics = performance_analytics.compute(db, current_user.id, start, end, starting_balance)
+            performance_analytics.generate_insights(db, current_user.id, metrics)
+            db.commit()
+            return metrics
+        finally:
+            db.close()
+
+    return await asyncio.to_thread(analyze)
+
+
+@router.get("/rollups")
+async def get_account_rollups(
+    start: datetime,
+    end: datetime,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    account_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Hourly or trading-day totals (trades opened, volume, closed trades, realized P&L,
+    worst closed trade, risk breaches) with bucket start in [start, end), read from the
+    pre-aggregated rollups rather than the trades table.
+    """
+    return await db.run_sync(lambda session: rollup_service.account_series(
+        session, current_user.id, granularity, start, end, broker_account_id=account_id
+    ))
+
+
 @router.delete("/goals/{goal_id}")
 async def delete_trading_goal(
     goal_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deactivate a trading goal"""
-    goal = db.query(TradingGoal).filter(
-        TradingGoal.id == goal_id,
-        TradingGoal.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(TradingGoal).where(
+            TradingGoal.id == goal_id,
+            TradingGoal.user_id == current_user.id
+        )
+    )
+    goal = result.scalars().first()
     
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     
     goal.is_active = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Goal deactivated"}
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.session import get_db
+from app.db.pagination import Keyset, keyset_page, ndjson_stream, paged
 from app.routers import auth
 from app.models.sql.user import User
 from app.models.sql.audit import AuditLog
@@ -23,11 +24,30 @@ class AuditLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+AUDIT_ORDER = Keyset(AuditLog.timestamp, AuditLog.id, descending=True)
+
 @router.get("/", response_model=List[AuditLogResponse])
 def get_audit_logs(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_user)
 ):
-    """Retrieve immutable logs for the current user."""
-    logs = db.query(AuditLog).filter(AuditLog.user_id == current_user.id).order_by(AuditLog.timestamp.desc()).limit(100).all()
-    return logs
+    """
+    Retrieve immutable logs for the current user, newest first.
+    Pages are keyset-paginated: pass the X-Next-Cursor header back as `cursor`.
+    `format=ndjson` streams every log after `cursor` for export.
+    """
+    user_id = current_user.id
+    if format == "ndjson":
+        # Checked up front: the stream has already sent its status line when it runs the query
+        AUDIT_ORDER.check_cursor(db, cursor)
+        return ndjson_stream(
+            lambda session: AUDIT_ORDER.apply(session.query(AuditLog).filter(AuditLog.user_id == user_id), cursor),
+            lambda log: AuditLogResponse.model_validate(log).model_dump()
+        )
+
+    logs, next_cursor = keyset_page(db.query(AuditLog).filter(AuditLog.user_id == user_id), AUDIT_ORDER, cursor, limit)
+    return paged(response, logs, next_cursor)
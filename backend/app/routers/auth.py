@@ -1,14 +1,16 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from jose import JWTError, jwt
 from sqlalchemy.sql import func
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.models.sql.user import User
 from app.core import security
+from app.core.principals import principal_cache, activity_tracker
 
 router = APIRouter(
     prefix="/api/auth",
@@ -110,12 +112,24 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 # --- Dependency ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _authenticate(token: str, db: Session) -> User:
+    """
+    Token decode, principal cache, suspension/re-auth checks and activity touch,
+    shared by both session flavours (the async one runs it through run_sync).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    # 1. Recently validated token: attach the cached principal without a SELECT
+    cached = principal_cache.get(token)
+    if cached is not None:
+        user = db.merge(cached, load=False)
+        activity_tracker.touch(user)
+        return user
+
     try:
         payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
         email: str = payload.get("sub")
@@ -140,18 +154,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Update last_login, last_active, and session_start
-    try:
-        user.last_login = func.now()
-        user.last_active = func.now()
-        user.session_start = func.now()
-        db.commit()
-    except Exception as e:
-        print(f"DEBUG: Failed to update user activity timestamps: {e}")
-        db.rollback()
-        
+    # 2. Cache a detached copy; last_login/last_active/session_start are batched by the activity tracker
+    db.expunge(user)
+    principal_cache.put(token, user, token_exp=payload.get("exp"))
+    user = db.merge(user, load=False)
+    activity_tracker.touch(user)
     return user
 
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _authenticate(token, db)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """get_current_user for routers on the async session; same cache, checks and activity batching."""
+    return await db.run_sync(lambda session: _authenticate(token, session))
+
 def check_permission(permission: str):
     def dependency(user: User = Depends(get_current_user)):
         if user.role == "FOUNDER":
@@ -1,16 +1,18 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
 from datetime import datetime
 from app.models.sql.audit import AuditLog
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.routers import auth
 from app.models.sql.user import User
 from app.models.sql.broker import BrokerAccount
 from app.core import crypto
 from app.engine.broker.metaapi import MetaApiConnector
+from app.engine.rules import load_presets, PRESET_FIELDS
 
 router = APIRouter(
     prefix="/api/brokers",
@@ -27,6 +29,7 @@ class BrokerConnectRequest(BaseModel):
     # Default risk settings on connect
     daily_loss_limit_pct: float = 5.0
     max_drawdown_limit_pct: float = 10.0
+    initial_balance: Optional[float] = Field(None, gt=0) # Challenge starting balance
 
 class RiskSettingsUpdate(BaseModel):
     preset_name: Optional[str] = None
@@ -35,6 +38,8 @@ class RiskSettingsUpdate(BaseModel):
     max_daily_trades: Optional[int] = None
     max_lot_size: Optional[float] = None
     news_trading_allowed: Optional[bool] = None
+    drawdown_type: Optional[str] = Field(None, pattern="^(static|trailing)$")
+    initial_balance: Optional[float] = Field(None, gt=0)
 
 class BrokerResponse(BaseModel):
     id: int
@@ -54,6 +59,8 @@ class BrokerResponse(BaseModel):
     max_lot_size: float
     news_trading_allowed: bool
     preset_name: Optional[str] = None
+    drawdown_type: Optional[str] = "static"
+    initial_balance: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -63,19 +70,18 @@ class BrokerResponse(BaseModel):
 @router.get("/presets")
 def get_presets():
     """Get list of standardized rule presets."""
-    import json
-    import os
-    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "presets.json")
-    with open(path, "r") as f:
-        return json.load(f)
+    return load_presets()
 
 @router.get("/", response_model=List[BrokerResponse])
-def get_brokers(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+async def get_brokers(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     """List all connected broker accounts with tier enforcement."""
-    accounts = db.query(BrokerAccount).filter(BrokerAccount.user_id == current_user.id).order_by(BrokerAccount.created_at.asc()).all()
+    result = await db.execute(
+        select(BrokerAccount).where(BrokerAccount.user_id == current_user.id).order_by(BrokerAccount.created_at.asc())
+    )
+    accounts = result.scalars().all()
     
     limit = current_user.max_accounts_limit
     for i, acc in enumerate(accounts):
@@ -86,15 +92,17 @@ def get_brokers(
 @router.post("/connect", response_model=BrokerResponse)
 async def connect_broker(
     request: BrokerConnectRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     """
     Connect a new broker account.
     Verifies credentials with MetaApi before saving.
     """
     # 0. Enforce Subscription Limits
-    account_count = db.query(BrokerAccount).filter(BrokerAccount.user_id == current_user.id).count()
+    account_count = await db.scalar(
+        select(func.count()).select_from(BrokerAccount).where(BrokerAccount.user_id == current_user.id)
+    )
     if account_count >= current_user.max_accounts_limit:
         raise HTTPException(
             status_code=403, 
@@ -132,7 +140,7 @@ async def connect_broker(
     # Deactivate other accounts if we want single-active enforcement,
     # or just set this one as active.
     # implementing single-active for now for simplicity in Dashboard.
-    db.query(BrokerAccount).filter(BrokerAccount.user_id == current_user.id).update({"is_active": False})
+    await db.execute(update(BrokerAccount).where(BrokerAccount.user_id == current_user.id).values(is_active=False))
     
     new_account = BrokerAccount(
         user_id=current_user.id,
@@ -144,12 +152,13 @@ async def connect_broker(
         is_active=True,
         connection_status="connected",
         daily_loss_limit_pct=request.daily_loss_limit_pct,
-        max_drawdown_limit_pct=request.max_drawdown_limit_pct
+        max_drawdown_limit_pct=request.max_drawdown_limit_pct,
+        initial_balance=request.initial_balance
     )
     
     db.add(new_account)
-    db.commit()
-    db.refresh(new_account)
+    await db.commit()
+    await db.refresh(new_account)
     
     return new_account
 
@@ -157,14 +166,17 @@ async def connect_broker(
 async def update_risk_settings(
     broker_id: int,
     request: RiskSettingsUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     """Update risk thresholds for a specific broker account."""
-    account = db.query(BrokerAccount).filter(
-        BrokerAccount.id == broker_id,
-        BrokerAccount.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(BrokerAccount).where(
+            BrokerAccount.id == broker_id,
+            BrokerAccount.user_id == current_user.id
+        )
+    )
+    account = result.scalars().first()
     
     if not account:
         raise HTTPException(status_code=404, detail="Broker account not found")
@@ -175,18 +187,14 @@ async def update_risk_settings(
     if "preset_name" in update_data:
         p_name = update_data.pop("preset_name")
         if p_name:
-            import json
-            import os
-            path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "presets.json")
-            with open(path, "r") as f:
-                presets = json.load(f)
+            presets = load_presets()
             
             if p_name in presets:
                 p_data = presets[p_name]
                 account.preset_name = p_name
-                # Application of preset values
-                for k, v in p_data.items():
-                    if k == "description": continue
+                # Application of preset values (description and rule overrides stay in the preset)
+                for k in PRESET_FIELDS:
+                    v = p_data.get(k)
                     if v is not None: # Only apply non-null preset values
                         setattr(account, k, v)
             else:
@@ -212,7 +220,7 @@ async def update_risk_settings(
             details=changes
         )
         db.add(log)
-        db.commit()
-        db.refresh(account)
+        await db.commit()
+        await db.refresh(account)
 
     return account
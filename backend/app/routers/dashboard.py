@@ -1,17 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 import asyncio
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+import numpy as np
+from typing import List, Dict, Any, Hashable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal, get_async_db
 from app.engine.broker.base import BrokerConnector
-from app.engine.broker.metaapi import MetaApiConnector
+from app.engine.broker.registry import broker_registry, connector_for_account, new_metaapi_connector
 from app.engine.mt5_bridge import MT5Bridge 
+from app.engine.scheduler import account_poller, SnapshotCache
+from app.engine.ledger import daily_ledger
+from app.engine.equity import equity_tracker
 from app.engine.risk import RiskEngine
+from app.engine.risk_batch import evaluate_batch
+from app.engine.rules import rule_plans
+from app.engine.risk_stream import risk_stream, EventStreamSink
 from app.core.config import settings
 from app.routers import auth
 from app.models.sql.user import User
 from app.models.sql.broker import BrokerAccount
-from app.core import crypto
 
 router = APIRouter(
     prefix="/api/dashboard",
@@ -22,20 +30,24 @@ router = APIRouter(
 risk_engine = RiskEngine()
 
 # Factory for Broker Connector
-async def get_broker_service(db: Session, user: User, account_model: Optional[BrokerAccount] = None) -> BrokerConnector:
-    # 1. Use provided account or look for active one
-    account = account_model
-    if not account:
-        account = db.query(BrokerAccount).filter(
+async def get_active_account(db: AsyncSession, user: User) -> Optional[BrokerAccount]:
+    result = await db.execute(
+        select(BrokerAccount).where(
             BrokerAccount.user_id == user.id,
             BrokerAccount.is_active == True
-        ).first()
+        )
+    )
+    return result.scalars().first()
+
+async def get_broker_service(db: AsyncSession, user: User, account_model: Optional[BrokerAccount] = None) -> BrokerConnector:
+    # 1. Use provided account or look for active one
+    account = account_model
+    if not account and db is not None:
+        account = await get_active_account(db, user)
     
     if account and account.provider == "metaapi":
         try:
-            # Decrypt token
-            token = crypto.decrypt_token(account.token_encrypted)
-            return MetaApiConnector(token, account.account_id)
+            return await connector_for_account(account)
         except Exception as e:
             print(f"Failed to decrypt/initialize MetaApi for account {account.id}: {e}")
             # Fallback to mock on error
@@ -43,31 +55,59 @@ async def get_broker_service(db: Session, user: User, account_model: Optional[Br
             
     # 2. Fallback to Env Vars (legacy support/easy testing)
     if settings.META_API_TOKEN and settings.META_ACCOUNT_ID:
-        return MetaApiConnector(settings.META_API_TOKEN, settings.META_ACCOUNT_ID)
+        return await broker_registry.acquire(
+            "env",
+            (settings.META_ACCOUNT_ID, settings.META_API_TOKEN, settings.METAAPI_STREAMING),
+            lambda: new_metaapi_connector(settings.META_API_TOKEN, settings.META_ACCOUNT_ID)
+        )
     
     # 3. Default to Mock
     return MT5Bridge()
 
+async def get_account_snapshot(db: AsyncSession, user: User, account_model: Optional[BrokerAccount] = None) -> Dict[str, Any]:
+    """
+    Latest account/trades snapshot from the poller cache.
+    Falls back to a single-flight broker fetch when the cache is cold or stale.
+    """
+    account = account_model
+    if not account:
+        account = await get_active_account(db, user)
+
+    key, provider = account_source(user, account)
+    # Resolved here, on the request's session: the fetch task is shared with other requests
+    # and may outlive this one, so it only gets the pooled connector, never the session
+    connector = await get_broker_service(db, user, account_model=account)
+
+    async def resolved() -> BrokerConnector:
+        return connector
+
+    return await account_poller.get(key, provider, resolved)
+
+def account_source(user: User, account: Optional[BrokerAccount]) -> Tuple[Hashable, str]:
+    """Poller cache key and rate-limit provider for the account the dashboard shows."""
+    if account and account.provider == "metaapi":
+        return account.id, "metaapi"
+    if settings.META_API_TOKEN and settings.META_ACCOUNT_ID:
+        return "env", "metaapi"
+    return f"mock:{user.id}", "mock"
+
+def _sync_status(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": snapshot["status"],
+        "last_sync": snapshot["last_sync"].isoformat() if snapshot["last_sync"] else None,
+        "age_seconds": round(SnapshotCache.age_seconds(snapshot), 2),
+        "latency_ms": snapshot["latency_ms"]
+    }
+
 @router.get("/overview")
 async def get_dashboard_overview(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     try:
-        broker_service = await get_broker_service(db, current_user)
-        
-        # Connect if supported
-        if hasattr(broker_service, 'connect'): 
-             await broker_service.connect()
-             
-        # Fetch data in parallel
-        info_task = asyncio.create_task(broker_service.get_account_info())
-        trades_task = asyncio.create_task(broker_service.get_trades())
-        
-        account_data, trades = await asyncio.gather(
-            asyncio.wait_for(info_task, timeout=15.0),
-            asyncio.wait_for(trades_task, timeout=15.0)
-        )
+        # Served from the poller cache; only a cold/stale cache touches the broker
+        snapshot = await get_account_snapshot(db, current_user)
+        account_data, trades = snapshot["account"], snapshot["trades"]
 
         # Risk Engine might need sync data
         # Check risk engine signature -> it takes (account_info, daily_stats, trades, db)?
@@ -80,19 +120,25 @@ async def get_dashboard_overview(
         # Let's check RiskEngine.get_daily_stats calculation.
         
         # 3. Dynamic Thresholds from DB
-        account_model = db.query(BrokerAccount).filter(
-            BrokerAccount.user_id == current_user.id,
-            BrokerAccount.is_active == True
-        ).first()
+        account_model = await get_active_account(db, current_user)
+
+        # Realized (closed deals) + floating P&L for the broker's trading day
+        daily_ledger.on_snapshot(snapshot["key"], snapshot)
+        daily_stats = daily_ledger.daily_stats(snapshot["key"])
 
-        daily_stats = risk_engine.get_daily_stats(trades)
-        risk_report = risk_engine.check_risk(
-            account_data, daily_stats, trades, db, account_model=account_model
+        # Static/trailing drawdown reference from the equity high-water-mark tracker
+        equity_tracker.on_snapshot(snapshot["key"], snapshot)
+        equity_state = equity_tracker.drawdown_basis(
+            snapshot["key"], account_model.drawdown_type if account_model else "static",
+            account_model.initial_balance if account_model else None
+        )
+        risk_report = await risk_engine.check_risk_async(
+            account_data, daily_stats, trades, db, account_model=account_model, equity_state=equity_state
         )
 
-        # 4. Intelligence Insights
-        from app.engine.intelligence import IntelligenceEngine
-        insights = IntelligenceEngine.analyze_behavior(trades)
+        # 4. Intelligence Insights (incremental per-account stream, fed by snapshot diffs)
+        from app.engine.intelligence import behavior_streams
+        insights = behavior_streams.get(snapshot["key"]).observe(trades).analyze()
         
         # Tier Gating for Intelligence
         if current_user.subscription_tier == "free":
@@ -108,12 +154,8 @@ async def get_dashboard_overview(
             "risk": risk_report,
             "daily_stats": daily_stats,
             "intelligence": insights,
-            "connection_status": getattr(broker_service, 'connection_status', 'connected') if hasattr(broker_service, 'connection_status') else 'connected',
-            "sync_status": {
-                "status": broker_service.confidence_status,
-                "last_sync": broker_service.last_sync.isoformat() if broker_service.last_sync else None,
-                "latency_ms": 150 
-            },
+            "connection_status": 'connected',
+            "sync_status": _sync_status(snapshot),
             "onboarding": {
                 "has_account": account_model is not None,
                 "has_preset": account_model.rule_preset is not None if account_model else False,
@@ -127,14 +169,15 @@ async def get_dashboard_overview(
 
 @router.get("/portfolio")
 async def get_portfolio_overview(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     """
     Aggregates metrics across all connected broker accounts for the user.
     Calculates total equity, total balance, total drawdown, and correlation risks.
     """
-    accounts = db.query(BrokerAccount).filter(BrokerAccount.user_id == current_user.id).all()
+    result = await db.execute(select(BrokerAccount).where(BrokerAccount.user_id == current_user.id))
+    accounts = result.scalars().all()
     
     total_balance = 0.0
     total_equity = 0.0
@@ -145,16 +188,8 @@ async def get_portfolio_overview(
 
     async def fetch_account_stats(acc):
         try:
-            broker_service = await get_broker_service(db, current_user, account_model=acc)
-            await broker_service.connect()
-            info_task = asyncio.create_task(broker_service.get_account_info())
-            trades_task = asyncio.create_task(broker_service.get_trades())
-            
-            info, trades = await asyncio.gather(
-                asyncio.wait_for(info_task, timeout=15.0),
-                asyncio.wait_for(trades_task, timeout=15.0)
-            )
-            return {"info": info, "trades": trades, "acc": acc}
+            snapshot = await get_account_snapshot(db, current_user, account_model=acc)
+            return {"info": snapshot["account"], "trades": snapshot["trades"], "acc": acc, "snapshot": snapshot}
         except Exception as e:
             print(f"Error fetching portfolio stats for account {acc.id}: {e}")
             return None
@@ -188,9 +223,45 @@ async def get_portfolio_overview(
             "name": acc.name,
             "balance": info.get('balance', 0),
             "equity": info.get('equity', 0),
-            "status": "active" if acc.is_active else "inactive"
+            "status": "active" if acc.is_active else "inactive",
+            "last_sync": _sync_status(res["snapshot"])
         })
 
+    # Risk status for every account in one vectorized pass, on the same rule plans check_risk uses
+    if results:
+        for res in results:
+            daily_ledger.on_snapshot(res["snapshot"]["key"], res["snapshot"])
+        daily = [daily_ledger.daily_stats(res["snapshot"]["key"]) for res in results]
+        basis = []
+        for res in results:
+            equity_tracker.on_snapshot(res["snapshot"]["key"], res["snapshot"])
+            basis.append(equity_tracker.drawdown_basis(
+                res["snapshot"]["key"], res["acc"].drawdown_type, res["acc"].initial_balance
+            ) or {})
+        plans = [rule_plans.for_limits(res["acc"]) for res in results]
+        batch = evaluate_batch(
+            balance=np.array([res["info"].get('balance', 0.0) for res in results]),
+            equity=np.array([res["info"].get('equity', 0.0) for res in results]),
+            daily_profit=np.array([d["daily_profit"] for d in daily]),
+            trades_count=np.array([d["trades_count"] for d in daily]),
+            plans=plans,
+            opened_count=np.array([d.get("opened_count", d["trades_count"]) for d in daily]),
+            news_flagged=np.array([bool(plan.news_positions(res["trades"])) for plan, res in zip(plans, results)]),
+            max_trade_volume=np.array([max((t.get('volume', 0) for t in res["trades"]), default=0.0) for res in results]),
+            drawdown_reference=np.array([b.get("reference", np.nan) for b in basis], dtype=float),
+            daily_limit_base=np.array([b.get("day_start_balance", np.nan) for b in basis], dtype=float),
+            overall_limit_base=np.array([b.get("limit_base", np.nan) for b in basis], dtype=float)
+        )
+        for i, summary in enumerate(account_summaries):
+            summary["risk"] = {
+                "status": str(batch["status"][i]),
+                "buffer": float(batch["buffer"][i]),
+                "buffer_pct": float(batch["buffer_pct"][i]),
+                "overall_drawdown": float(batch["overall_drawdown"][i]),
+                "drawdown_type": basis[i].get("drawdown_type", "balance"),
+                "trades_to_breach": int(batch["trades_to_breach"][i])
+            }
+
     # Identify Correlation Risks
     correlation_warnings = []
     for sym, vols in symbol_exposure.items():
@@ -211,13 +282,12 @@ async def get_portfolio_overview(
 
 @router.get("/trades")
 async def get_open_trades(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     try:
-        broker_service = await get_broker_service(db, current_user)
-        
-        return await broker_service.get_trades()
+        snapshot = await get_account_snapshot(db, current_user)
+        return snapshot["trades"]
     except Exception as e:
         print(f"Trades Error: {e}")
         # Return empty list on error instead of 500 crash
@@ -226,9 +296,81 @@ async def get_open_trades(
 @router.post("/toggle-demo")
 async def toggle_demo_mode(
     enabled: bool,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     # Only allow for mock/demo accounts
     from app.engine.mt5_bridge import mt5_service
     return await mt5_service.toggle_demo_mode(enabled)
+
+# --- Live risk stream (replaces polling /overview) ---
+
+async def _stream_principal(token: str) -> Tuple[User, Optional[BrokerAccount]]:
+    """
+    Token auth for long-lived streams (browsers can't set headers on WebSocket/EventSource).
+    The session is closed before streaming starts; user and account stay loaded, detached.
+    """
+    async with AsyncSessionLocal() as db:
+        user = await auth.get_current_user_async(token=token, db=db)
+        account = await get_active_account(db, user)
+        if account is not None:
+            # The stream's pipeline submissions build alerts from the owner after the session is gone
+            await db.refresh(account, ["owner"])
+    return user, account
+
+async def _subscribe_stream(user: User, account: Optional[BrokerAccount], sink: Any, interval: Optional[float]):
+    key, provider = account_source(user, account)
+    refresh = lambda: account_poller.get(
+        key, provider, lambda: get_broker_service(None, user, account_model=account)
+    )
+    client = risk_stream.subscribe(key, sink, limits=account, refresh=refresh, interval=interval)
+    # Initial snapshot: from the poller cache, or one fetch if it is cold
+    await risk_stream.refresh(key)
+    return key, client
+
+@router.websocket("/ws")
+async def risk_stream_websocket(
+    websocket: WebSocket,
+    token: str = Query(...),
+    interval: Optional[float] = Query(None, ge=0)
+):
+    """Pushes {"type": "snapshot"} once, then {"type": "delta"} messages as the account changes."""
+    try:
+        user, account = await _stream_principal(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    key, client = await _subscribe_stream(user, account, websocket, interval)
+    try:
+        # Nothing is expected from the client; this just notices the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        risk_stream.unsubscribe(key, client)
+
+@router.get("/stream")
+async def risk_stream_events(
+    token: str = Query(...),
+    interval: Optional[float] = Query(None, ge=0)
+):
+    """Same messages as /ws, as Server-Sent Events (EventSource)."""
+    user, account = await _stream_principal(token)
+    sink = EventStreamSink(heartbeat=settings.RISK_STREAM_HEARTBEAT_SECONDS)
+
+    async def events():
+        # Subscribed only once the body is streaming, so the finally below always runs
+        key, client = await _subscribe_stream(user, account, sink, interval)
+        try:
+            async for frame in sink.frames():
+                yield frame
+        finally:
+            risk_stream.unsubscribe(key, client)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
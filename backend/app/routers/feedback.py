@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
 from app.db.session import get_db
+from app.db.pagination import Keyset, keyset_page, ndjson_stream, paged
 from app.models.sql.user import User
 from app.models.sql.feedback import Feedback
 from app.models.sql.activity import EmployeeActivity
@@ -70,15 +71,29 @@ def get_user_feedback(
 ):
     return db.query(Feedback).filter(Feedback.user_id == current_user.id).all()
 
+FEEDBACK_ORDER = Keyset(Feedback.id, Feedback.id, descending=True)
+
 @router.get("/admin/all", response_model=List[FeedbackResponse])
 def get_all_feedback(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_user)
 ):
+    """Newest first, keyset-paginated (X-Next-Cursor); `format=ndjson` streams the full export."""
     if current_user.role not in ["FOUNDER", "SUPPORT", "MODERATOR"]:
         raise HTTPException(status_code=403, detail="Not authorized")
-    
-    return db.query(Feedback).all()
+
+    if format == "ndjson":
+        return ndjson_stream(
+            lambda session: FEEDBACK_ORDER.apply(session.query(Feedback), cursor),
+            lambda item: FeedbackResponse.model_validate(item).model_dump()
+        )
+
+    items, next_cursor = keyset_page(db.query(Feedback), FEEDBACK_ORDER, cursor, limit)
+    return paged(response, items, next_cursor)
 
 @router.patch("/admin/{feedback_id}", response_model=FeedbackResponse)
 def update_feedback_status(
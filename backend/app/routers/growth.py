@@ -4,6 +4,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from app.db.session import get_db
 from app.routers.auth import get_current_user
+from app.core.principals import principal_cache
 from app.models.sql.user import User
 from app.models.sql.growth import UserOnboarding, VisitorLog, ReferralCode, ReferralConversion
 import secrets
@@ -82,6 +83,7 @@ def submit_onboarding(data: OnboardingSchema, db: Session = Depends(get_db), cur
         db.add(ref_code)
 
     db.commit()
+    principal_cache.invalidate_user(current_user.id)
     
     # Generate new token with updated permissions/branding
     from app.core import security
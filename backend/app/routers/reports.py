@@ -1,87 +1,299 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Optional
-import io
+from typing import Any, Dict, Optional, Tuple
+import asyncio
 
-from ..db.session import get_db
+from ..db.session import get_async_db
+from ..db import session as db_session
+from ..db.pagination import stream_query
 from ..routers import auth
-from ..routers.dashboard import get_broker_service
+from ..routers.dashboard import get_account_snapshot
 from ..models.sql.user import User
 from ..models.sql.broker import BrokerAccount
+from ..models.sql.trade import Trade
+from ..models.sql.risk_snapshot import RiskRuleSnapshot
 from ..engine.risk import risk_engine
+from ..engine.rules import rule_plans
+from ..engine.ledger import daily_ledger
 from ..engine.intelligence import IntelligenceEngine
-from ..services.reporting import reporting_service
+from ..engine.archive import trade_archive
+from ..services.report_jobs import report_digest, report_jobs
+from ..services.reporting import CSV_COLUMNS, ReportingService, gzip_chunks, iter_csv
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# How long /generate and ?wait downloads hold the request open for a render
+RENDER_WAIT_SECONDS = 60.0
+# Reports are per-user and must be revalidated: the ETag is the content digest, so an
+# unchanged account answers 304 without rendering or sending the file again
+CACHE_CONTROL = "private, no-cache"
+
 def founder_only(user: User = Depends(auth.get_current_user)):
     if user.role != "FOUNDER":
         raise HTTPException(status_code=403, detail="Founder privilege required")
     return user
 
+async def get_report_account(db: AsyncSession, current_user: User, account_id: int) -> BrokerAccount:
+    result = await db.execute(
+        select(BrokerAccount).where(
+            BrokerAccount.id == account_id,
+            BrokerAccount.user_id == current_user.id
+        )
+    )
+    account_model = result.scalars().first()
+    if not account_model:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account_model
+
+async def collect_report_inputs(db: AsyncSession, current_user: User, account_model: BrokerAccount) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Broker data, risk report and (tier-gated) intelligence for one report, as plain dicts,
+    plus the daily stats they were evaluated on. Side-effect free, so the digest of a
+    cached or 304 download costs no writes; see record_report_risk for the render path.
+    """
+    # Poller snapshot: repeat downloads reuse the cached broker state instead of refetching.
+    # The poller's listeners have already fed it to the daily ledger.
+    snapshot = await get_account_snapshot(db, current_user, account_model=account_model)
+    account_data, trades = snapshot["account"], snapshot["trades"]
+
+    daily_stats = daily_ledger.daily_stats(account_model.id)
+    risk_report = rule_plans.for_limits(account_model).evaluate(account_data, daily_stats, trades)
+    insights = IntelligenceEngine.analyze_behavior(trades)
+
+    # Tier Gating for Reports
+    if current_user.subscription_tier == "free":
+        insights["score"] = "Upgrade to Pro"
+        insights["session_performance"] = {}
+
+    inputs = {
+        "user_email": current_user.email,
+        "tier": current_user.subscription_tier,
+        "account_id": account_model.account_id,
+        "account_info": account_data,
+        "trades": trades,
+        "risk_status": risk_report,
+        "intelligence": insights
+    }
+    return inputs, daily_stats
+
+async def record_report_risk(db: AsyncSession, account_model: BrokerAccount, inputs: Dict[str, Any], daily_stats: Dict[str, Any]):
+    """Runs the full risk check (trade persistence and alerts) for a report that is actually rendered."""
+    try:
+        await risk_engine.check_risk_async(
+            inputs["account_info"], daily_stats, inputs["trades"], db, account_model=account_model
+        )
+    except Exception as e:
+        # The report already has its risk state; a failed write must not fail the download
+        print(f"Report Risk Check Error: {e}")
+
+def report_filename(account_model: BrokerAccount, format: str) -> str:
+    if format == "pdf":
+        return f"RiskLock_Report_{account_model.account_id}.pdf"
+    return f"RiskLock_Trades_{account_model.account_id}.csv"
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "format": job["format"],
+        "size": job["size"],
+        "etag": etag(job),
+        "error": job["error"],
+        "status_url": f"/reports/jobs/{job['id']}",
+        "download_url": f"/reports/jobs/{job['id']}/download"
+    }
+
+def get_owned_job(job_id: str, current_user: User) -> Dict[str, Any]:
+    job = report_jobs.get(job_id)
+    if not job or job["owner_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+def etag(job: Dict[str, Any]) -> str:
+    return f'"{job["key"]}"'
+
+def is_not_modified(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or tag in [value.strip().removeprefix("W/") for value in header.split(",")]
+
+def not_modified(tag: str) -> Response:
+    report_jobs.record_not_modified()
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+
+def job_file_response(job: Dict[str, Any]) -> FileResponse:
+    path = report_jobs.path(job["id"])
+    if not path:
+        raise HTTPException(status_code=410, detail="Report expired from cache, please generate it again")
+    return FileResponse(
+        path,
+        media_type=job["media_type"],
+        headers={
+            "Content-Disposition": f"attachment; filename={job['filename']}",
+            "ETag": etag(job),
+            "Cache-Control": CACHE_CONTROL
+        }
+    )
+
 @router.get("/generate")
 async def generate_report(
+    request: Request,
     account_id: int,
     format: str = Query("pdf", pattern="^(pdf|csv)$"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
 ):
     """
     Generates a PDF or CSV report for a specific broker account.
+    Reports are cached by a digest of their inputs: an unchanged account is served from
+    the cache (or 304 on a matching If-None-Match); new ones render in the worker pool.
     """
-    account_model = db.query(BrokerAccount).filter(
-        BrokerAccount.id == account_id,
-        BrokerAccount.user_id == current_user.id
-    ).first()
-    
-    if not account_model:
-        raise HTTPException(status_code=404, detail="Account not found")
+    account_model = await get_report_account(db, current_user, account_id)
 
     try:
-        broker_service = await get_broker_service(db, current_user, account_model=account_model)
-        
-        # Parallel fetch for report data
-        import asyncio
-        info_task = asyncio.create_task(broker_service.get_account_info())
-        trades_task = asyncio.create_task(broker_service.get_trades())
-        
-        account_data, trades = await asyncio.gather(info_task, trades_task)
-        
-        daily_stats = risk_engine.get_daily_stats(trades)
-        risk_report = risk_engine.check_risk(
-            account_data, daily_stats, trades, db, account_model=account_model
-        )
-        insights = IntelligenceEngine.analyze_behavior(trades)
-
-        # Tier Gating for Reports
-        if current_user.subscription_tier == "free":
-            insights["score"] = "Upgrade to Pro"
-            insights["session_performance"] = {}
-
-        if format == "pdf":
-            pdf_buffer = reporting_service.generate_pdf_report(
-                current_user.email,
-                account_model.account_id,
-                account_data,
-                trades,
-                risk_report,
-                insights
-            )
-            return StreamingResponse(
-                pdf_buffer,
-                media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename=RiskLock_Report_{account_model.account_id}.pdf"}
-            )
-        else:
-            csv_output = reporting_service.generate_csv_report(trades)
-            return StreamingResponse(
-                io.BytesIO(csv_output.getvalue().encode()),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename=RiskLock_Trades_{account_model.account_id}.csv"}
-            )
+        inputs, daily_stats = await collect_report_inputs(db, current_user, account_model)
+        key = report_digest(format, inputs)
+        if is_not_modified(request, f'"{key}"'):
+            return not_modified(f'"{key}"')
 
+        rendering = report_jobs.will_render(key)
+        job = report_jobs.submit(current_user.id, format, inputs, report_filename(account_model, format), key=key)
+        if job is None:
+            raise HTTPException(status_code=429, detail="Report queue is full, please retry shortly")
+        if rendering:
+            await record_report_risk(db, account_model, inputs, daily_stats)
+        job = await report_jobs.wait(job["id"], timeout=RENDER_WAIT_SECONDS)
+        if job["status"] != "done":
+            raise HTTPException(status_code=500, detail=job["error"] or "Report rendering timed out")
+        return job_file_response(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Report Generation Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", status_code=202)
+async def submit_report_job(
+    account_id: int,
+    format: str = Query("pdf", pattern="^(pdf|csv)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
+):
+    """Queues a report render and returns its job id; poll the status URL, then download."""
+    account_model = await get_report_account(db, current_user, account_id)
+    try:
+        inputs, daily_stats = await collect_report_inputs(db, current_user, account_model)
     except Exception as e:
         print(f"Report Generation Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+    key = report_digest(format, inputs)
+    rendering = report_jobs.will_render(key)
+    job = report_jobs.submit(current_user.id, format, inputs, report_filename(account_model, format), key=key)
+    if job is None:
+        raise HTTPException(status_code=429, detail="Report queue is full, please retry shortly")
+    if rendering:
+        await record_report_risk(db, account_model, inputs, daily_stats)
+    return job_status(job)
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(job_id: str, current_user: User = Depends(auth.get_current_user_async)):
+    return job_status(get_owned_job(job_id, current_user))
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(
+    request: Request,
+    job_id: str,
+    wait: bool = False,
+    current_user: User = Depends(auth.get_current_user_async)
+):
+    """
+    Streams the finished file. With `wait=true` the request is held until the render
+    completes (up to a minute) instead of answering 202 while it is still running.
+    """
+    job = get_owned_job(job_id, current_user)
+    if wait and job["status"] in ("queued", "running"):
+        job = await report_jobs.wait(job_id, timeout=RENDER_WAIT_SECONDS)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "done":
+        return Response(status_code=202, headers={"Retry-After": "1"})
+    if is_not_modified(request, etag(job)):
+        return not_modified(etag(job))
+    return job_file_response(job)
+
+@router.get("/trades/export")
+async def export_trades_csv(
+    account_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    compress: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth.get_current_user_async)
+):
+    """
+    Full trade history as CSV, streamed from a database cursor so memory stays flat
+    however many trades match. Filters: broker account, and open_time in [start, end).
+    `compress=true` sends the same CSV gzipped as a .csv.gz download.
+    """
+    account_model = await get_report_account(db, current_user, account_id) if account_id is not None else None
+    user_id = current_user.id
+
+    def build_query(session):
+        query = session.query(*[getattr(Trade, column) for column in CSV_COLUMNS]).filter(Trade.user_id == user_id)
+        if account_model is not None:
+            # Trades are linked to their broker account through the rule snapshot taken when first seen
+            query = query.filter(Trade.rule_snapshot_id.in_(
+                select(RiskRuleSnapshot.id).where(RiskRuleSnapshot.broker_account_id == account_model.id)
+            ))
+        if start is not None:
+            query = query.filter(Trade.open_time >= start)
+        if end is not None:
+            query = query.filter(Trade.open_time < end)
+        return query.order_by(Trade.open_time, Trade.id)
+
+    filename = f"RiskLock_Trades_{account_model.account_id if account_model else 'all'}.csv"
+    chunks = iter_csv(stream_query(build_query))
+    if compress:
+        return StreamingResponse(
+            gzip_chunks(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"}
+        )
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/performance")
+async def get_performance(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(auth.get_current_user_async)
+):
+    """
+    Performance and session breakdown of the user's closed trades, closed in [start, end).
+    Aggregated over the columnar trade archive plus the not-yet-archived tail.
+    """
+    def aggregate():
+        db = db_session.SessionLocal()
+        try:
+            table = trade_archive.read(
+                db, current_user.id, start, end, columns=["symbol", "session", "profit", "close_time"]
+            )
+        finally:
+            db.close()
+        return {
+            "start": start,
+            "end": end,
+            "summary": ReportingService.performance_summary(table),
+            "session_performance": IntelligenceEngine.session_performance_columnar(table)
+        }
+
+    return await asyncio.to_thread(aggregate)
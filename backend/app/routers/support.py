@@ -1,38 +1,22 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import Optional, Set
 import json
 import asyncio
 
-from app.db.session import get_db
+from app.core.fanout import fanout_hub
+from app.db.session import AsyncSessionLocal, get_db
+from app.db.pagination import Keyset, keyset_page, ndjson_stream, paged
 from app.models.sql.support import SupportChat, SupportMessage
-from app.models.sql.activity import EmployeeActivity
 from app.models.sql.user import User
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, get_current_user_async
+from app.services.support_writes import support_write_queue
 
 router = APIRouter(prefix="/api/support", tags=["support"])
 
-# Connection Manager for WebSockets
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
-
-    async def connect(self, chat_id: int, websocket: WebSocket):
-        await websocket.accept()
-        if chat_id not in self.active_connections:
-            self.active_connections[chat_id] = []
-        self.active_connections[chat_id].append(websocket)
-
-    def disconnect(self, chat_id: int, websocket: WebSocket):
-        if chat_id in self.active_connections:
-            self.active_connections[chat_id].remove(websocket)
-
-    async def broadcast(self, chat_id: int, message: dict):
-        if chat_id in self.active_connections:
-            for connection in self.active_connections[chat_id]:
-                await connection.send_text(json.dumps(message))
-
-manager = ConnectionManager()
+# Chat rooms are fan-out hub topics; broadcasts reach sockets on every server process
+def chat_topic(chat_id: int) -> str:
+    return f"support:{chat_id}"
 
 # Bot Logic (Simple Keyword Engine)
 def get_bot_response(text: str) -> str:
@@ -45,78 +29,116 @@ def get_bot_response(text: str) -> str:
         return "Understood. I'm notifying a support specialist to join this chat. One moment..."
     return "I'm the RiskLock AI. I can help with pricing, setup, or technical FAQs. Would you like to speak with a human agent?"
 
+async def reply_as_bot(chat_id: int, content: str):
+    bot_reply = get_bot_response(content)
+
+    # Check for escalation
+    if "notifying a support specialist" in bot_reply:
+        await support_write_queue.set_status(chat_id, "ACTIVE")
+
+    # Simulate small delay for natural feeling (off the socket's receive loop)
+    await asyncio.sleep(1)
+
+    # Broadcast & Save Bot Message
+    bot_msg = await support_write_queue.add_message(chat_id, bot_reply, "BOT")
+    await fanout_hub.publish(chat_topic(chat_id), {
+        "content": bot_reply,
+        "sender_type": "BOT",
+        "created_at": str(bot_msg["created_at"])
+    })
+
+# Bot replies run off the socket's receive loop; held until done so none is garbage-collected
+# mid-reply, failures get logged and shutdown can let them finish before the write queue stops
+_bot_replies: Set[asyncio.Task] = set()
+
+def schedule_bot_reply(chat_id: int, content: str):
+    task = asyncio.create_task(reply_as_bot(chat_id, content))
+    _bot_replies.add(task)
+    task.add_done_callback(_bot_reply_done)
+
+def _bot_reply_done(task: asyncio.Task):
+    _bot_replies.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Support Bot Error: {task.exception()}")
+
+async def drain_bot_replies():
+    if _bot_replies:
+        await asyncio.gather(*_bot_replies, return_exceptions=True)
+
+async def is_staff_token(token: Optional[str]) -> bool:
+    """Whether a socket's token belongs to support staff (browsers can't set headers on WebSocket)."""
+    if not token:
+        return False
+    try:
+        async with AsyncSessionLocal() as db:
+            user = await get_current_user_async(token=token, db=db)
+    except HTTPException:
+        return False
+    return user.role in ["FOUNDER", "SUPPORT"]
+
 @router.websocket("/ws/{chat_id}")
-async def websocket_endpoint(websocket: WebSocket, chat_id: int, db: Session = Depends(get_db)):
-    await manager.connect(chat_id, websocket)
+async def websocket_endpoint(websocket: WebSocket, chat_id: int, role: str = "USER", token: Optional[str] = None):
+    role = role.upper()
+    # Staff sockets count as staff online and may reply as STAFF: the claim needs a staff token
+    if role == "STAFF" and not await is_staff_token(token):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    subscriber = fanout_hub.join(chat_topic(chat_id), websocket, role=role)
     try:
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
-            
-            # Save User Message
-            new_msg = SupportMessage(
-                chat_id=chat_id,
-                content=message_data["content"],
-                sender_type=message_data.get("sender_type", "USER"),
-                sender_id=message_data.get("sender_id")
-            )
-            db.add(new_msg)
-            db.commit()
-
-            # Log activity if STAFF
-            if message_data.get("sender_type") == "STAFF":
-                activity = EmployeeActivity(
-                    employee_id=message_data.get("sender_id"),
-                    action="REPLIED_TO_CHAT",
-                    module="SUPPORT",
-                    description=f"Replied to chat #{chat_id}"
-                )
-                db.add(activity)
-                db.commit()
+            sender_type = message_data.get("sender_type", "USER")
+            if sender_type == "STAFF" and role != "STAFF":
+                sender_type = "USER"
 
-            # Broadcast to all in the same chat (Staff + User)
-            await manager.broadcast(chat_id, {
+            # Queue the User Message (written behind, in batches) and broadcast it right away
+            new_msg = await support_write_queue.add_message(
+                chat_id, message_data["content"], sender_type, message_data.get("sender_id")
+            )
+            await fanout_hub.publish(chat_topic(chat_id), {
                 "content": message_data["content"],
-                "sender_type": message_data["sender_type"],
-                "created_at": str(new_msg.created_at)
+                "sender_type": sender_type,
+                "created_at": str(new_msg["created_at"])
             })
 
-            # Bot Processing if chat is in BOT state
-            chat = db.query(SupportChat).filter(SupportChat.id == chat_id).first()
-            if chat and chat.status == "BOT":
-                bot_reply = get_bot_response(message_data["content"])
-                
-                # Check for escalation
-                if "notifying a support specialist" in bot_reply:
-                    chat.status = "ACTIVE"
-                    db.commit()
-                
-                # Save & Broadcast Bot Message
-                bot_msg = SupportMessage(
-                    chat_id=chat_id,
-                    content=bot_reply,
-                    sender_type="BOT"
+            # Log activity if STAFF
+            if sender_type == "STAFF":
+                await support_write_queue.add_activity(
+                    message_data.get("sender_id"), "REPLIED_TO_CHAT", "SUPPORT", f"Replied to chat #{chat_id}"
                 )
-                db.add(bot_msg)
-                db.commit()
-                
-                # Simulate small delay for natural feeling
-                await asyncio.sleep(1)
-                
-                await manager.broadcast(chat_id, {
-                    "content": bot_reply,
-                    "sender_type": "BOT",
-                    "created_at": str(bot_msg.created_at)
-                })
+
+            # Bot Processing if chat is in BOT state (status is cached in memory)
+            if await support_write_queue.chat_status(chat_id) == "BOT":
+                schedule_bot_reply(chat_id, message_data["content"])
 
     except WebSocketDisconnect:
-        manager.disconnect(chat_id, websocket)
+        pass
+    finally:
+        fanout_hub.leave(subscriber)
+
+CHAT_ORDER = Keyset(SupportChat.id, SupportChat.id, descending=True)
+# Transcript exports read oldest first; history pages walk back from the newest message.
+# Both are served by the (chat_id, created_at) index
+MESSAGE_ORDER = Keyset(SupportMessage.created_at, SupportMessage.id, descending=False)
+RECENT_MESSAGES = Keyset(SupportMessage.created_at, SupportMessage.id, descending=True)
 
 @router.get("/chats")
-def get_chats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_chats(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role not in ["FOUNDER", "SUPPORT"]:
         raise HTTPException(status_code=403, detail="Not authorized")
-    return db.query(SupportChat).all()
+    if format == "ndjson":
+        return ndjson_stream(lambda session: CHAT_ORDER.apply(session.query(SupportChat), cursor))
+    chats, next_cursor = keyset_page(db.query(SupportChat), CHAT_ORDER, cursor, limit)
+    return paged(response, chats, next_cursor)
 
 @router.post("/chats/init")
 def init_chat(data: dict, db: Session = Depends(get_db)):
@@ -130,6 +152,7 @@ def init_chat(data: dict, db: Session = Depends(get_db)):
     db.add(new_chat)
     db.commit()
     db.refresh(new_chat)
+    support_write_queue.remember_chat(new_chat.id, new_chat.status)
 
     # Initial Bot Greeting
     greeting = SupportMessage(
@@ -139,9 +162,8 @@ def init_chat(data: dict, db: Session = Depends(get_db)):
     )
     db.add(greeting)
     
-    # Check if staff online (Simplified for now)
-    # In a real app, we'd check current connections in manager
-    if not any(conn for conn in manager.active_connections.values() if any(c.get("role") == "STAFF" for c in conn)):
+    # Check if staff online (authenticated STAFF sockets on any server process)
+    if not fanout_hub.online("STAFF"):
         fallback = SupportMessage(
             chat_id=new_chat.id,
             content="NOTE: Our technical team is currently handling high volume. A Human Agent will join this thread as soon as possible. Please describe your issue in detail.",
@@ -152,5 +174,25 @@ def init_chat(data: dict, db: Session = Depends(get_db)):
     db.commit()
 
 @router.get("/history/{chat_id}")
-def get_history(chat_id: int, db: Session = Depends(get_db)):
-    return db.query(SupportMessage).filter(SupportMessage.chat_id == chat_id).all()
+def get_history(
+    chat_id: int,
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    The latest `limit` messages in reading order; X-Next-Cursor fetches the ones before them,
+    so a client that never pages still sees where the conversation is now.
+    `format=ndjson` streams the whole transcript oldest first (after `cursor`, if given).
+    """
+    if format == "ndjson":
+        MESSAGE_ORDER.check_cursor(db, cursor)
+        return ndjson_stream(
+            lambda session: MESSAGE_ORDER.apply(session.query(SupportMessage).filter(SupportMessage.chat_id == chat_id), cursor)
+        )
+    messages, next_cursor = keyset_page(
+        db.query(SupportMessage).filter(SupportMessage.chat_id == chat_id), RECENT_MESSAGES, cursor, limit
+    )
+    return paged(response, messages[::-1], next_cursor)
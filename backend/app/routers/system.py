@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.routers.auth import get_current_user
+from app.models.sql.user import User
+from app.engine.broker.registry import broker_registry
+from app.engine.scheduler import account_poller
+from app.engine.pipeline import risk_write_pipeline
+from app.engine.ledger import daily_ledger
+from app.engine.equity import equity_tracker
+from app.engine.archive import trade_archive
+from app.engine.rollups import rollup_service
+from app.engine.rules import rule_plans, news_calendar
+from app.core.principals import principal_cache, activity_tracker
+from app.core.fanout import fanout_hub
+from app.engine.risk_stream import risk_stream
+from app.db.session import async_engine, database_self_check, get_db
+from app.services.report_jobs import report_jobs
+from app.services.support_writes import support_write_queue
+from app.services.notifications import notification_service
+
+router = APIRouter(prefix="/api/admin/system", tags=["system"])
+
+def founder_only(user: User = Depends(get_current_user)):
+    if user.role != "FOUNDER":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return user
+
+@router.get("/broker-pool")
+def get_broker_pool_stats(current_user: User = Depends(founder_only)):
+    """Connection pool statistics: hits, misses, live connections and reconnects."""
+    return broker_registry.snapshot()
+
+@router.get("/scheduler")
+def get_scheduler_stats(current_user: User = Depends(founder_only)):
+    """Account poller statistics: fetches, coalesced requests and snapshot cache size."""
+    return account_poller.snapshot()
+
+@router.get("/risk-pipeline")
+def get_risk_pipeline_stats(current_user: User = Depends(founder_only)):
+    """Write-behind queue depth, batch counts and last flush latency."""
+    return risk_write_pipeline.snapshot()
+
+@router.get("/alerts")
+def get_alert_stats(current_user: User = Depends(founder_only)):
+    """Risk alert queue: depth by priority, coalesced/suppressed/dropped alerts, retries and dispatch latency."""
+    return notification_service.snapshot()
+
+@router.get("/support-writes")
+def get_support_write_stats(current_user: User = Depends(founder_only)):
+    """Support chat write-behind queue: depth, batches, rows written, flush latency and status cache."""
+    return support_write_queue.snapshot()
+
+@router.get("/ledger")
+def get_ledger_stats(current_user: User = Depends(founder_only)):
+    """Daily P&L ledger: trading-day timezone, tracked accounts and deal sync counters."""
+    return daily_ledger.snapshot()
+
+@router.get("/equity-tracker")
+def get_equity_tracker_stats(current_user: User = Depends(founder_only)):
+    """Equity high-water-mark tracker: tracked accounts, recorded/flushed samples."""
+    return equity_tracker.snapshot()
+
+@router.get("/trade-archive")
+def get_trade_archive_stats(current_user: User = Depends(founder_only)):
+    """Columnar trade archive: files written and rows compacted into it."""
+    return trade_archive.snapshot()
+
+@router.get("/rollups")
+def get_rollup_stats(check_days: int = 0, db: Session = Depends(get_db), current_user: User = Depends(founder_only)):
+    """Rollup sync counters; `check_days` also compares the last N days against the raw tables."""
+    stats = rollup_service.snapshot()
+    if check_days > 0:
+        now = datetime.utcnow()
+        mismatches = rollup_service.check(db, now - timedelta(days=check_days), now)
+        stats["check"] = {"days": check_days, "mismatches": len(mismatches), "sample": mismatches[:20]}
+    return stats
+
+@router.get("/auth-cache")
+def get_auth_cache_stats(current_user: User = Depends(founder_only)):
+    """Principal cache hit rate and pending activity-timestamp writes."""
+    return {"principals": principal_cache.snapshot(), "activity": activity_tracker.snapshot()}
+
+@router.get("/database")
+def get_database_stats(current_user: User = Depends(founder_only)):
+    """Effective database settings (SQLite PRAGMAs / Postgres server settings) and pool usage."""
+    return {**database_self_check(), "async_pool": async_engine.pool.status()}
+
+@router.get("/report-jobs")
+def get_report_job_stats(current_user: User = Depends(founder_only)):
+    """Report worker pool: queued/running renders, completions and on-disk cache usage."""
+    return report_jobs.snapshot()
+
+@router.get("/fanout")
+def get_fanout_stats(current_user: User = Depends(founder_only)):
+    """Websocket fan-out: connected sockets, deliveries, slow-consumer evictions and pub/sub relay."""
+    return fanout_hub.snapshot()
+
+@router.get("/risk-stream")
+def get_risk_stream_stats(current_user: User = Depends(founder_only)):
+    """Live risk push: watched accounts, subscribers, snapshots skipped as unchanged and messages sent."""
+    return risk_stream.snapshot()
+
+@router.get("/rule-plans")
+def get_rule_plan_stats(current_user: User = Depends(founder_only)):
+    """Compiled risk rule plans: cached rule sets, cache hits, compiles and known news releases."""
+    return {**rule_plans.snapshot(), "news_releases": len(news_calendar)}
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 from app.db.session import get_db
+from app.db.pagination import Keyset, keyset_page, ndjson_stream, paged
 from app.models.sql.user import User
 from app.models.sql.activity import EmployeeActivity
+from app.models.sql.rollup import EmployeeActivityRollup
 from app.routers.auth import get_current_user
 from app.core import security
+from app.core.principals import principal_cache, activity_tracker
 
 router = APIRouter(prefix="/api/admin/team", tags=["team"])
 
@@ -62,6 +67,7 @@ def force_logout(employee_id: int, db: Session = Depends(get_db), current_user:
     
     staff.requires_reauth = True
     db.commit()
+    principal_cache.invalidate_user(staff.id)
     return {"status": "Force logout initiated"}
 
 @router.post("/employees/{employee_id}/reset-password")
@@ -80,30 +86,38 @@ def reset_password(employee_id: int, data: dict, db: Session = Depends(get_db),
     staff.hashed_password = security.get_password_hash(new_password)
     staff.requires_reauth = True # Force logout after password change
     db.commit()
+    principal_cache.invalidate_user(staff.id)
     return {"status": "Password reset successfully"}
 
+ACTIVITY_ORDER = Keyset(EmployeeActivity.timestamp, EmployeeActivity.id, descending=True)
+
 @router.get("/insights/{employee_id}")
 def get_employee_insights(employee_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user.role != "FOUNDER":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Calculate performance metrics
-    activities = db.query(EmployeeActivity).filter(EmployeeActivity.employee_id == employee_id).all()
-    
-    total_actions = len(activities)
-    
-    module_counts = {}
-    for act in activities:
-        module_counts[act.module] = module_counts.get(act.module, 0) + 1
-        
+    # Calculate performance metrics in the database instead of loading every activity row
+    module_counts = dict(
+        db.query(EmployeeActivity.module, func.count(EmployeeActivity.id))
+        .filter(EmployeeActivity.employee_id == employee_id)
+        .group_by(EmployeeActivity.module)
+        .all()
+    )
+    total_actions = sum(module_counts.values())
     most_active_module = max(module_counts, key=module_counts.get) if module_counts else "None"
+
+    now = datetime.utcnow()
+    recent_activity_count = db.query(func.count(EmployeeActivity.id)).filter(
+        EmployeeActivity.employee_id == employee_id,
+        EmployeeActivity.timestamp >= now - timedelta(hours=24)
+    ).scalar()
     
     # Calculate time spent for current session
     time_spent_str = "0m"
     staff = db.query(User).filter(User.id == employee_id).first()
     if staff and staff.session_start and staff.last_active:
         # If last active was recent (within 30 mins), consider them online/active session
-        if (func.now() - staff.last_active).total_seconds() < 1800:
+        if (now - staff.last_active.replace(tzinfo=None)).total_seconds() < 1800:
              duration = staff.last_active - staff.session_start
              hours = duration.seconds // 3600
              minutes = (duration.seconds % 3600) // 60
@@ -112,10 +126,62 @@ def get_employee_insights(employee_id: int, db: Session = Depends(get_db), curre
     return {
         "total_actions": total_actions,
         "most_active_module": most_active_module,
-        "recent_activity_count": len([a for a in activities if (func.now() - a.timestamp).total_seconds() < 86400]), # Last 24h
+        "recent_activity_count": recent_activity_count, # Last 24h
         "time_spent": time_spent_str
     }
 
+@router.get("/insights/{employee_id}/activity")
+def get_employee_activity(
+    employee_id: int,
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Employee activity log, newest first; keyset-paginated (X-Next-Cursor) or streamed as NDJSON."""
+    if current_user.role != "FOUNDER":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if format == "ndjson":
+        ACTIVITY_ORDER.check_cursor(db, cursor)
+        return ndjson_stream(
+            lambda session: ACTIVITY_ORDER.apply(
+                session.query(EmployeeActivity).filter(EmployeeActivity.employee_id == employee_id), cursor
+            )
+        )
+    activities, next_cursor = keyset_page(
+        db.query(EmployeeActivity).filter(EmployeeActivity.employee_id == employee_id), ACTIVITY_ORDER, cursor, limit
+    )
+    return paged(response, activities, next_cursor)
+
+@router.get("/insights/{employee_id}/daily")
+def get_employee_daily_activity(
+    employee_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Per-day action counts by module for the last `days` UTC days, from the activity rollups."""
+    if current_user.role != "FOUNDER":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    rows = db.query(
+        EmployeeActivityRollup.day, EmployeeActivityRollup.module, func.sum(EmployeeActivityRollup.count)
+    ).filter(
+        EmployeeActivityRollup.employee_id == employee_id,
+        EmployeeActivityRollup.day >= since
+    ).group_by(EmployeeActivityRollup.day, EmployeeActivityRollup.module).order_by(EmployeeActivityRollup.day).all()
+
+    series = {}
+    for day, module, count in rows:
+        entry = series.setdefault(day, {"day": day, "total": 0, "modules": {}})
+        entry["modules"][module or "OTHER"] = int(count)
+        entry["total"] += int(count)
+    return list(series.values())
+
 @router.patch("/employees/{employee_id}")
 def update_employee(employee_id: int, data: EmployeeUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user.role != "FOUNDER":
@@ -133,6 +199,8 @@ def update_employee(employee_id: int, data: EmployeeUpdate, db: Session = Depend
         staff.permissions = data.permissions
         
     db.commit()
+    # Role, suspension and permissions are read from the cached principal
+    principal_cache.invalidate_user(staff.id)
     return staff
 
 @router.delete("/employees/{employee_id}")
@@ -146,6 +214,8 @@ def delete_employee(employee_id: int, db: Session = Depends(get_db), current_use
         
     db.delete(staff)
     db.commit()
+    principal_cache.invalidate_user(employee_id)
+    activity_tracker.forget(employee_id)
     return {"status": "Staff account deleted successfully"}
 
 @router.get("/activity")
@@ -1,72 +1,392 @@
+import asyncio
 import logging
+import smtplib
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Optional, List
+from email.message import EmailMessage
+from typing import Any, Callable, Awaitable, Deque, Dict, List, Optional, Set, Tuple
+
+import requests
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
 from ..models.sql.broker import BrokerAccount
-from ..models.sql.user import User
+from ..models.sql.audit import AuditLog
 
 logger = logging.getLogger(__name__)
 
+# Lower goes first; anything else is not alert-worthy
+PRIORITY = {"breach": 0, "critical": 1}
+
+
 class NotificationService:
     """
     Handles multi-channel alerts (Email, Telegram) for risk events.
-    Includes cooldown logic to prevent notification fatigue.
+    submit() never waits: alerts queue by priority (breach before critical) in a bounded
+    queue, a second alert for an account still waiting is merged into the same message,
+    and worker tasks deliver with retry and backoff. Cooldowns are kept in memory; the
+    last_notification_at stamps and alert_sent audit rows are written in batches.
     """
-    
+
     COOLDOWN_MINUTES = 60 # Default cooldown to prevent spam
 
-    @staticmethod
-    async def send_risk_alert(
-        db: Session, 
-        account: BrokerAccount, 
-        status: str, 
-        violations: List[str]
+    def __init__(
+        self,
+        max_pending: int = 1000,
+        workers: int = 4,
+        max_attempts: int = 3,
+        retry_backoff: float = 1.0,
+        send_timeout: float = 10.0,
+        flush_interval: float = 1.0
     ):
-        if status not in ['critical', 'breach']:
+        self.max_pending = max_pending
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.send_timeout = send_timeout
+        self.flush_interval = flush_interval
+
+        # account id -> merged alert waiting for a worker; one FIFO per priority holds the order
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._order: Dict[str, Deque[int]] = {status: deque() for status in PRIORITY}
+        self._ready: Optional[asyncio.Event] = None
+        # account id -> (last sent, status sent)
+        self._cooldowns: Dict[int, Tuple[datetime, str]] = {}
+        self._writes: List[Dict[str, Any]] = []
+        self._tasks: List[asyncio.Task] = []
+        # Deliveries started without workers; held so they can't be garbage-collected mid-send
+        self._inline: Set[asyncio.Task] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.suppressed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.alerts_sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.sent = {"email": 0, "telegram": 0}
+        self.channel_failures = {"email": 0, "telegram": 0}
+        self.rows_written = 0
+        self.write_errors = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    # --- Queue ---
+
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        """
+        Queues an alert built by the risk pipeline: status, violations, only_email,
+        account_id, user_id, email, email_enabled, telegram_chat_id, last_notification_at.
+        Returns False if it was suppressed (cooldown) or dropped (queue full).
+        """
+        status = alert["status"]
+        if status not in PRIORITY:
+            return False
+        self.submitted += 1
+        account_id = alert["account_id"]
+
+        # 1. Cooldown
+        if self._in_cooldown(account_id, status, alert.get("last_notification_at")):
+            self.suppressed += 1
+            logger.info(f"Notification suppressed for account {account_id} (Cooldown active)")
+            return False
+
+        # 2. Coalesce with the alert already waiting for this account
+        pending = self._pending.get(account_id)
+        if pending is not None:
+            self.coalesced += 1
+            pending["violations"] += [v for v in alert["violations"] if v not in pending["violations"]]
+            pending.update({k: alert[k] for k in ("only_email", "email", "email_enabled", "telegram_chat_id")})
+            if PRIORITY[status] < PRIORITY[pending["status"]]:
+                # Escalated: moves to the breach line; the stale critical entry is skipped
+                pending["status"] = status
+                self._order[status].append(account_id)
+            return True
+
+        # 3. Backpressure: a breach may take a critical warning's place, nothing else gets in
+        if len(self._pending) >= self.max_pending and not (status == "breach" and self._evict("critical")):
+            self.dropped += 1
+            logger.warning(f"Alert queue full, dropped {status} alert for account {account_id}")
+            return False
+
+        item = {**alert, "violations": list(alert["violations"]), "queued_at": time.monotonic()}
+        if not self.running:
+            # No workers (scripts, tests): deliver now if there is a loop to do it on
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.dropped += 1
+                return False
+            task = loop.create_task(self._deliver_inline(item))
+            self._inline.add(task)
+            task.add_done_callback(self._inline_done)
+            return True
+        self._pending[account_id] = item
+        self._order[status].append(account_id)
+        self._ready.set()
+        return True
+
+    def _in_cooldown(self, account_id: int, status: str, last_notification_at: Optional[datetime]) -> bool:
+        last = self._cooldowns.get(account_id)
+        if last is None and last_notification_at is not None:
+            # First alert since startup: the persisted stamp, status unknown so assume the worst
+            last = (last_notification_at.replace(tzinfo=None), "breach")
+        if last is None:
+            return False
+        sent_at, sent_status = last
+        if datetime.utcnow() - sent_at >= timedelta(minutes=self.COOLDOWN_MINUTES):
+            return False
+        # A breach after a critical warning is news, not a repeat
+        return PRIORITY[status] >= PRIORITY[sent_status]
+
+    def _next(self, status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Takes the oldest live alert, breaches first (or only `status`)."""
+        for line in ([status] if status else PRIORITY):
+            order = self._order[line]
+            while order:
+                account_id = order.popleft()
+                item = self._pending.get(account_id)
+                if item is not None and item["status"] == line:
+                    del self._pending[account_id]
+                    return item
+        return None
+
+    def _evict(self, status: str) -> bool:
+        item = self._next(status)
+        if item is None:
+            return False
+        self.dropped += 1
+        logger.warning(f"Alert queue full, evicted {status} alert for account {item['account_id']}")
+        return True
+
+    # --- Workers ---
+
+    def start(self):
+        if self.running:
+            return
+        self._ready = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Delivers what is still queued, writes the last stamps, then stops."""
+        if self._inline:
+            await asyncio.gather(*self._inline, return_exceptions=True)
+        if not self._tasks:
             return
+        self._stopping = True
+        self._ready.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self._flush_writes()
+        self._stopping = False
+
+    async def _work(self):
+        while True:
+            item = self._next()
+            if item is None:
+                if self._stopping:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            await self._deliver(item)
+
+    async def _deliver_inline(self, item: Dict[str, Any]):
+        await self._deliver(item)
+        await self._flush_writes()
+
+    def _inline_done(self, task: asyncio.Task):
+        self._inline.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+            logger.error(f"Inline alert delivery failed: {task.exception()}")
+
+    async def _deliver(self, item: Dict[str, Any]):
+        account_id, status, violations = item["account_id"], item["status"], item["violations"]
+        # Claim the cooldown before sending so alerts arriving meanwhile are not repeats
+        previous = self._cooldowns.get(account_id)
+        sent_at = datetime.utcnow()
+        self._cooldowns[account_id] = (sent_at, status)
+
+        sends = []
+        if item.get("email_enabled") and item.get("email"):
+            subject, body = self.format_email(status, violations)
+            sends.append(self._with_retry("email", lambda: self._send_email(item["email"], subject, body)))
+        # Telegram is for paid tiers only
+        if not item.get("only_email") and item.get("telegram_chat_id"):
+            message = self.format_telegram(status, violations)
+            sends.append(self._with_retry("telegram", lambda: self._send_telegram(item["telegram_chat_id"], message)))
+        results = await asyncio.gather(*sends)
 
-        # 1. Check Cooldown
-        if account.last_notification_at:
-            elapsed = datetime.utcnow() - account.last_notification_at.replace(tzinfo=None)
-            if elapsed < timedelta(minutes=NotificationService.COOLDOWN_MINUTES):
-                logger.info(f"Notification suppressed for account {account.id} (Cooldown active)")
-                return
-
-        # 2. Identify User
-        user = db.query(User).filter(User.id == account.user_id).first()
-        if not user:
-            logger.error(f"User not found for account {account.id}")
+        if sends and not any(results):
+            self.failed += 1
+            # Nothing reached the trader: let the next alert through
+            if previous is None:
+                self._cooldowns.pop(account_id, None)
+            else:
+                self._cooldowns[account_id] = previous
             return
 
-        # 3. Dispatch Email (Mock for now)
-        if account.email_alerts_enabled:
-            await NotificationService._dispatch_email(user.email, status, violations)
+        self.alerts_sent += 1
+        latency_ms = (time.monotonic() - item["queued_at"]) * 1000
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._latency_total_ms += latency_ms
+        # Delivery log only; violations are counted from the pipeline's status transitions
+        self._writes.append({
+            "account_id": account_id,
+            "user_id": item["user_id"],
+            "sent_at": sent_at,
+            "status": status,
+            "violations": violations
+        })
 
-        # 4. Dispatch Telegram (Mock for now)
-        if account.telegram_alerts_enabled and account.telegram_chat_id:
-            await NotificationService._dispatch_telegram(account.telegram_chat_id, status, violations)
+    async def _with_retry(self, channel: str, send: Callable[[], Awaitable[None]]) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await send()
+                self.sent[channel] += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.channel_failures[channel] += 1
+                    logger.error(f"{channel} alert failed after {attempt} attempts: {e}")
+                    return False
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+        return False
 
-        # 5. Update last notification timestamp
-        account.last_notification_at = datetime.utcnow()
+    # --- Batched persistence ---
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_writes()
+
+    async def _flush_writes(self):
+        if not self._writes:
+            return
+        writes, self._writes = self._writes, []
         try:
-            db.commit()
+            async with AsyncSessionLocal() as session:
+                await session.run_sync(self._write, writes)
         except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Failed to record {len(writes)} sent alerts: {e}")
+
+    def _write(self, db: Session, writes: List[Dict[str, Any]]):
+        # Only the latest stamp per account matters
+        stamps = {w["account_id"]: w["sent_at"] for w in writes}
+        try:
+            db.execute(update(BrokerAccount), [{"id": a, "last_notification_at": t} for a, t in stamps.items()])
+            db.execute(insert(AuditLog), [{
+                "user_id": w["user_id"],
+                "broker_account_id": w["account_id"],
+                "action": "alert_sent",
+                "category": "risk",
+                "details": {"status": w["status"], "violations": w["violations"]},
+                "timestamp": w["sent_at"]
+            } for w in writes])
+            db.commit()
+        except Exception:
             db.rollback()
-            logger.error(f"Failed to update last_notification_at: {e}")
+            raise
+        self.rows_written += len(writes)
+
+    # --- Channels ---
 
     @staticmethod
-    async def _dispatch_email(email: str, status: str, violations: List[str]):
+    def format_email(status: str, violations: List[str]) -> Tuple[str, str]:
         subject = f"RISKLOCK ALERT: Account {status.upper()}"
         body = f"RiskLock has detected a {status} state.\n\nViolations:\n" + "\n".join([f"- {v}" for v in violations])
-        
-        # In production, use SMTP or SendGrid/AWS SES
-        logger.warning(f"SIMULATED EMAIL to {email}:\nSubject: {subject}\n{body}")
+        return subject, body
 
     @staticmethod
-    async def _dispatch_telegram(chat_id: str, status: str, violations: List[str]):
-        message = f"🚨 *RISKLOCK ALERT*\n\nStatus: *{status.upper()}*\n\n" + "\n".join([f"• {v}" for v in violations])
-        
-        # In production, use a library like python-telegram-bot or direct HTTP request to Telegram Bot API
-        logger.warning(f"SIMULATED TELEGRAM to {chat_id}:\n{message}")
+    def format_telegram(status: str, violations: List[str]) -> str:
+        return f"🚨 *RISKLOCK ALERT*\n\nStatus: *{status.upper()}*\n\n" + "\n".join([f"• {v}" for v in violations])
+
+    async def _send_email(self, email: str, subject: str, body: str):
+        if not settings.SMTP_HOST:
+            logger.warning(f"SIMULATED EMAIL to {email}:\nSubject: {subject}\n{body}")
+            return
+        message = EmailMessage()
+        message["From"] = settings.SMTP_FROM
+        message["To"] = email
+        message["Subject"] = subject
+        message.set_content(body)
+        # smtplib blocks; keep it off the event loop
+        await asyncio.to_thread(self._smtp_send, message)
+
+    def _smtp_send(self, message: EmailMessage):
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=self.send_timeout) as smtp:
+            if settings.SMTP_STARTTLS:
+                smtp.starttls()
+            if settings.SMTP_USER:
+                smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+            smtp.send_message(message)
+
+    async def _send_telegram(self, chat_id: str, message: str):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            logger.warning(f"SIMULATED TELEGRAM to {chat_id}:\n{message}")
+            return
+        url = f"{settings.TELEGRAM_API_URL}/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+        response = await asyncio.to_thread(
+            requests.post, url, json={"chat_id": chat_id, "text": message, "parse_mode": "Markdown"},
+            timeout=self.send_timeout
+        )
+        response.raise_for_status()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": len(self._tasks),
+            "inline_deliveries": len(self._inline),
+            "queue_depth": len(self._pending),
+            "queue_by_status": {
+                status: sum(1 for item in self._pending.values() if item["status"] == status) for status in PRIORITY
+            },
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "suppressed": self.suppressed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "alerts_sent": self.alerts_sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "sent": dict(self.sent),
+            "channel_failures": dict(self.channel_failures),
+            "rows_written": self.rows_written,
+            "write_errors": self.write_errors,
+            "pending_writes": len(self._writes),
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "avg_latency_ms": round(self._latency_total_ms / self.alerts_sent, 2) if self.alerts_sent else 0.0
+        }
+
 
-notification_service = NotificationService()
+# Singleton instance
+notification_service = NotificationService(
+    max_pending=settings.ALERT_MAX_PENDING,
+    workers=settings.ALERT_WORKERS,
+    max_attempts=settings.ALERT_MAX_ATTEMPTS,
+    retry_backoff=settings.ALERT_RETRY_BACKOFF_SECONDS
+)
@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.services.reporting import render_report
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"pdf": "application/pdf", "csv": "text/csv"}
+
+
+def report_digest(format: str, payload: Dict[str, Any]) -> str:
+    """
+    Content address of a report: sha256 over the format and the canonical JSON of
+    everything rendered into it. Unchanged account state gives the same digest.
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{format}:{body}".encode()).hexdigest()
+
+
+class ReportFileCache:
+    """
+    Size-bounded on-disk store for rendered reports. Files are evicted least recently
+    used first once their total size exceeds `max_bytes`; existing files are picked up
+    again (oldest first) when the process restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (path, size)
+        self.total_bytes = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def put(self, key: str, data: bytes, suffix: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{key}.{suffix}")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        # Readers never see a half-written report
+        os.replace(tmp, path)
+        self._drop(key)
+        self._entries[key] = (path, len(data))
+        self.total_bytes += len(data)
+        self._evict()
+        return path
+
+    def path(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def lookup(self, key: str) -> Optional[str]:
+        """path() that also counts towards the hit rate; use it where a hit saves a render."""
+        path = self.path(key)
+        if path is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return path
+
+    def record_hit(self):
+        self.hits += 1
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry[1]
+        try:
+            os.remove(entry[0])
+        except OSError:
+            pass
+
+    def _load(self):
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name.rsplit(".", 1)[0], path, stat.st_size))
+        for _, key, path, size in sorted(files):
+            self._entries[key] = (path, size)
+            self.total_bytes += size
+        self._evict()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "files": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / max(1, self.hits + self.misses), 4)
+        }
+
+
+class ReportJobQueue:
+    """
+    Asynchronous report rendering. submit() returns a job id immediately; rendering
+    (ReportLab is CPU-bound and holds the GIL) runs in a bounded process pool so the event
+    loop keeps serving requests, and finished files land in a ReportFileCache.
+    """
+
+    def __init__(
+        self,
+        cache: ReportFileCache,
+        max_workers: int = 2,
+        max_pending: int = 100,
+        max_jobs: int = 1000,
+        renderer: Callable[[str, Dict[str, Any]], bytes] = render_report,
+        executor_factory: Optional[Callable[[int], Executor]] = None
+    ):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.renderer = renderer
+        # spawn, not fork: the server process runs threads (DB drivers, executors) that fork would copy mid-lock
+        self.executor_factory = executor_factory or (
+            lambda workers: ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        )
+        self._executor: Optional[Executor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._rendering: Dict[str, Dict[str, Any]] = {}  # content key -> job rendering it
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.shared = 0
+        self.not_modified = 0
+        self.render_seconds = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def submit(
+        self,
+        owner_id: int,
+        format: str,
+        payload: Dict[str, Any],
+        filename: str,
+        key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Queues a render; returns the job, or None when the queue is full.
+        With a content `key` (see report_digest) a cached file completes the job at once,
+        and a render already running for the same key is shared instead of repeated.
+        """
+        job_id = uuid.uuid4().hex
+        key = key or job_id
+        cached = self.cache.lookup(key) if key != job_id else None
+        if cached is None and key not in self._rendering and self.pending >= self.max_pending:
+            self.rejected += 1
+            return None
+        job = {
+            "id": job_id,
+            "key": key,
+            "owner_id": owner_id,
+            "format": format,
+            "filename": filename,
+            "media_type": MEDIA_TYPES[format],
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "size": None,
+            "error": None
+        }
+        self._jobs[job["id"]] = job
+        self._trim()
+        self.submitted += 1
+        if cached is not None:
+            job["status"] = "done"
+            job["size"] = os.path.getsize(cached)
+            job["finished_at"] = job["created_at"]
+        elif key in self._rendering:
+            self.shared += 1
+            self._tasks[job["id"]] = asyncio.create_task(self._follow(job, self._rendering[key]))
+        else:
+            self._tasks[job["id"]] = asyncio.create_task(self._run(job, payload))
+            self._rendering[key] = job
+        return job
+
+    def will_render(self, key: str) -> bool:
+        """True when submit() with this content key would start a new render (no cached file, none in flight)."""
+        return key not in self.cache and key not in self._rendering
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def record_not_modified(self):
+        """A client revalidated its copy (304): a cache hit that skipped the render and the transfer."""
+        self.not_modified += 1
+        self.cache.record_hit()
+
+    def path(self, job_id: str) -> Optional[str]:
+        job = self._jobs.get(job_id)
+        return self.cache.path(job["key"]) if job else None
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Waits for a job to finish (or `timeout` seconds) and returns its record."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.wait({task}, timeout=timeout)
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Dict[str, Any], payload: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        job["status"] = "running"
+        try:
+            data = await loop.run_in_executor(self._pool(), self.renderer, job["format"], payload)
+            self.cache.put(job["key"], data, job["format"])
+            job["size"] = len(data)
+            job["status"] = "done"
+            self.completed += 1
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            self.failed += 1
+            logger.error(f"Report job {job['id']} failed: {e}")
+        finally:
+            job["finished_at"] = time.time()
+            self.render_seconds += time.perf_counter() - started
+            self._tasks.pop(job["id"], None)
+            self._rendering.pop(job["key"], None)
+
+    async def _follow(self, job: Dict[str, Any], leader: Dict[str, Any]):
+        job["status"] = "running"
+        try:
+            await self.wait(leader["id"])
+            for field in ("status", "size", "error", "finished_at"):
+                job[field] = leader[field]
+        finally:
+            self._tasks.pop(job["id"], None)
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = self.executor_factory(self.max_workers)
+        return self._executor
+
+    def _trim(self):
+        # Forget the oldest finished jobs; their files age out of the cache on their own
+        while len(self._jobs) > self.max_jobs:
+            oldest = next((key for key, job in self._jobs.items() if job["status"] in ("done", "failed")), None)
+            if oldest is None:
+                break
+            self._jobs.pop(oldest)
+
+    async def stop(self):
+        """Lets running renders finish, then shuts the worker processes down."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "shared": self.shared,
+            "not_modified": self.not_modified,
+            "avg_render_ms": round(self.render_seconds / max(1, self.completed + self.failed) * 1000, 2),
+            "cache": self.cache.snapshot()
+        }
+
+
+# Singleton instances
+report_cache = ReportFileCache(
+    settings.REPORT_CACHE_DIR or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "reports"
+    ),
+    max_bytes=settings.REPORT_CACHE_MAX_MB * 1024 * 1024
+)
+report_jobs = ReportJobQueue(
+    report_cache,
+    max_workers=settings.REPORT_WORKERS,
+    max_pending=settings.REPORT_MAX_PENDING_JOBS
+)
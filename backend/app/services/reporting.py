@@ -1,14 +1,19 @@
+import csv
 import io
-import pandas as pd
+import zlib
+import pyarrow as pa
+import pyarrow.compute as pc
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.units import inch
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
 import hashlib
 
+CSV_COLUMNS = ["ticket", "open_time", "close_time", "symbol", "volume", "type", "profit", "session"]
+
 class ReportingService:
     """
     Service for generating PDF and CSV reports for trading accounts.
@@ -33,14 +38,14 @@ class ReportingService:
             'TitleStyle',
             parent=styles['Heading1'],
             fontSize=24,
-            textColor=colors.hexColor("#0F172A"),
+            textColor=colors.HexColor("#0F172A"),
             spaceAfter=20
         )
         subtitle_style = ParagraphStyle(
             'SubtitleStyle',
             parent=styles['Heading2'],
             fontSize=14,
-            textColor=colors.hexColor("#64748B"),
+            textColor=colors.HexColor("#64748B"),
             spaceAfter=10
         )
         footer_style = ParagraphStyle(
@@ -69,8 +74,8 @@ class ReportingService:
         
         t = Table(summary_data, colWidths=[2.5*inch, 3*inch])
         t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.hexColor("#F1F5F9")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.hexColor("#475569")),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#F1F5F9")),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#475569")),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
@@ -90,8 +95,8 @@ class ReportingService:
             
             bt = Table(breach_data, colWidths=[4*inch, 1.5*inch])
             bt.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.hexColor("#FEE2E2")),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.hexColor("#991B1B")),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#FEE2E2")),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#991B1B")),
                 ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
             ]))
             elements.append(bt)
@@ -109,7 +114,7 @@ class ReportingService:
             
             ft = Table(flag_data, colWidths=[1.2*inch, 1*inch, 3.3*inch])
             ft.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.hexColor("#FEF3C7")),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#FEF3C7")),
                 ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
             ]))
             elements.append(ft)
@@ -131,29 +136,88 @@ class ReportingService:
 
     @staticmethod
     def generate_csv_report(trades: List[Any]) -> io.StringIO:
-        # Convert trade objects/dicts to a standard flat format for CSV
-        flat_trades = []
-        for t in trades:
-            # Handle both object and dict
-            def get_val(key):
-                if isinstance(t, dict): return t.get(key)
-                return getattr(t, key, None)
-            
-            flat_trades.append({
-                "ticket": get_val('ticket'),
-                "open_time": get_val('open_time'),
-                "close_time": get_val('close_time'),
-                "symbol": get_val('symbol'),
-                "volume": get_val('volume'),
-                "type": get_val('type'),
-                "profit": get_val('profit'),
-                "session": get_val('session')
-            })
-        
-        df = pd.DataFrame(flat_trades)
         output = io.StringIO()
-        df.to_csv(output, index=False)
+        for chunk in iter_csv(trades):
+            output.write(chunk.decode())
         output.seek(0)
         return output
 
+    @staticmethod
+    def performance_summary(table: pa.Table) -> Dict[str, Any]:
+        """Win/loss and P&L totals plus a per-symbol breakdown over a TradeArchive table."""
+        profit = pc.fill_null(table["profit"], 0.0)
+        wins = pc.greater(profit, 0.0)
+        losses = pc.less(profit, 0.0)
+        gross_profit = pc.sum(pc.filter(profit, wins)).as_py() or 0.0
+        gross_loss = -(pc.sum(pc.filter(profit, losses)).as_py() or 0.0)
+        win_count = pc.sum(wins).as_py() or 0
+        loss_count = pc.sum(losses).as_py() or 0
+
+        by_symbol = table.group_by("symbol").aggregate([("profit", "sum"), ("symbol", "count")])
+        return {
+            "trades": table.num_rows,
+            "wins": win_count,
+            "losses": loss_count,
+            "win_rate": round(win_count / table.num_rows * 100, 2) if table.num_rows else 0.0,
+            "net_profit": round(gross_profit - gross_loss, 2),
+            "gross_profit": round(gross_profit, 2),
+            "gross_loss": round(gross_loss, 2),
+            "profit_factor": round(gross_profit / gross_loss, 2) if gross_loss else None,
+            "by_symbol": {
+                symbol: {"count": count, "profit": round(total or 0.0, 2)}
+                for symbol, total, count in zip(
+                    by_symbol["symbol"].to_pylist(), by_symbol["profit_sum"].to_pylist(), by_symbol["symbol_count"].to_pylist()
+                )
+            }
+        }
+
+def iter_csv(rows: Iterable[Any], columns: List[str] = CSV_COLUMNS, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """
+    Encodes trades (dicts, ORM objects or result rows) as CSV, yielding one encoded chunk
+    per `chunk_rows` rows so a streamed export never holds more than one chunk in memory.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        if isinstance(row, dict):
+            writer.writerow([row.get(column) for column in columns])
+        else:
+            writer.writerow([getattr(row, column, None) for column in columns])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    # Header-only output for an empty export
+    if buffer.tell() or pending:
+        yield buffer.getvalue().encode()
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compresses a byte stream incrementally (wbits=31 writes the gzip header/trailer)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def render_report(format: str, payload: Dict[str, Any]) -> bytes:
+    """
+    Renders a report to bytes. Module-level and fed plain dicts so it can run in a
+    report worker process (see app.services.report_jobs).
+    """
+    if format == "pdf":
+        return ReportingService.generate_pdf_report(
+            payload["user_email"],
+            payload["account_id"],
+            payload["account_info"],
+            payload["trades"],
+            payload["risk_status"],
+            payload["intelligence"]
+        ).getvalue()
+    return ReportingService.generate_csv_report(payload["trades"]).getvalue().encode()
+
 reporting_service = ReportingService()
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.fanout import fanout_hub
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.support import SupportChat, SupportMessage
+
+logger = logging.getLogger(__name__)
+
+# Fan-out topic carrying chat status changes to the other server processes' caches
+CHAT_STATUS_TOPIC = "support-status"
+
+
+class SupportWriteQueue:
+    """
+    Write-behind persistence for live support chat.
+    The websocket handler stamps a message, broadcasts it and queues the insert; a
+    background worker drains the queue and writes messages, staff activity and chat
+    status changes in one transaction per batch. Chat status is cached in memory so
+    the bot check on every message needs no query; changes are published over the fan-out
+    backend to the other processes' caches, and entries older than `status_ttl` seconds
+    are reloaded in case a change was lost on the relay.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        max_batch: int = 500,
+        flush_interval: float = 0.1,
+        max_cached_chats: int = 10000,
+        status_ttl: float = 30.0
+    ):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_cached_chats = max_cached_chats
+        self.status_ttl = status_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        # chat id -> (status, time.monotonic() when it was cached)
+        self._status: "OrderedDict[int, Tuple[Optional[str], float]]" = OrderedDict()
+
+        self.enqueued = 0
+        self.batches = 0
+        self.messages_written = 0
+        self.activities_written = 0
+        self.status_updates = 0
+        self.errors = 0
+        self.status_hits = 0
+        self.status_misses = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    # --- Writes ---
+
+    async def add_message(
+        self,
+        chat_id: int,
+        content: str,
+        sender_type: str,
+        sender_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Queues a SupportMessage insert; returns the row as it will be stored."""
+        row = {
+            "chat_id": chat_id,
+            "content": content,
+            "sender_type": sender_type,
+            "sender_id": sender_id,
+            "created_at": datetime.utcnow()
+        }
+        await self._submit(("message", row))
+        return row
+
+    async def add_activity(self, employee_id: Optional[int], action: str, module: str, description: str):
+        await self._submit(("activity", {
+            "employee_id": employee_id,
+            "action": action,
+            "module": module,
+            "description": description,
+            "timestamp": datetime.utcnow()
+        }))
+
+    async def set_status(self, chat_id: int, status: str):
+        """Updates the cached status at once (here and on the other processes); the row follows with the next batch."""
+        self._remember(chat_id, status)
+        await fanout_hub.publish(CHAT_STATUS_TOPIC, {"chat_id": chat_id, "status": status})
+        await self._submit(("status", {"chat_id": chat_id, "status": status}))
+
+    async def _submit(self, item):
+        if not self.running:
+            # No worker (scripts, tests): write inline, off the event loop
+            await asyncio.to_thread(self._write_now, [item])
+            return
+        # Chat history is not droppable: a full queue makes the sender wait instead
+        await self._queue.put(item)
+        self.enqueued += 1
+
+    # --- Chat status cache ---
+
+    async def chat_status(self, chat_id: int) -> Optional[str]:
+        """Status of a chat (None if it doesn't exist), loaded from the DB once per chat and TTL."""
+        cached = self._status.get(chat_id)
+        if cached is not None and time.monotonic() - cached[1] < self.status_ttl:
+            self.status_hits += 1
+            self._status.move_to_end(chat_id)
+            return cached[0]
+        self.status_misses += 1
+        async with AsyncSessionLocal() as session:
+            status = (await session.execute(select(SupportChat.status).where(SupportChat.id == chat_id))).scalar()
+        self._remember(chat_id, status)
+        return status
+
+    def remember_chat(self, chat_id: int, status: str):
+        """Primes the cache for a chat created or changed outside the queue."""
+        self._remember(chat_id, status)
+
+    def on_status_change(self, message: Dict[str, Any]):
+        """Fan-out listener: a status set on any server process (this one included)."""
+        self._remember(message["chat_id"], message["status"])
+
+    def _remember(self, chat_id: int, status: Optional[str]):
+        self._status[chat_id] = (status, time.monotonic())
+        self._status.move_to_end(chat_id)
+        while len(self._status) > self.max_cached_chats:
+            self._status.popitem(last=False)
+
+    # --- Worker ---
+
+    def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flushes whatever is still queued, then stops the worker."""
+        if not self.running:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        self._stopping = False
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            batch = []
+            if item is not None:
+                batch.append(item)
+                # Give bursts a moment to accumulate so they share one transaction
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            if batch:
+                await self._flush(batch)
+            if self._stopping and self._queue.empty():
+                return
+
+    async def _flush(self, batch: List[Any]):
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.run_sync(self._write, batch)
+        except Exception as e:
+            logger.error(f"Support write batch of {len(batch)} failed, retrying row by row: {e}")
+            # One bad row (e.g. a deleted chat) must not take the rest of the batch with it
+            async with AsyncSessionLocal() as session:
+                for item in batch:
+                    try:
+                        await session.run_sync(self._write, [item])
+                    except Exception as e:
+                        self.errors += 1
+                        logger.error(f"Support write dropped ({item[0]}): {e}")
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+    def _write_now(self, batch: List[Any]):
+        db = SessionLocal()
+        try:
+            self._write(db, batch)
+        finally:
+            db.close()
+
+    def _write(self, db: Session, batch: List[Any]):
+        messages = [row for kind, row in batch if kind == "message"]
+        activities = [row for kind, row in batch if kind == "activity"]
+        # Only the latest status per chat matters
+        statuses = {row["chat_id"]: row["status"] for kind, row in batch if kind == "status"}
+        try:
+            if messages:
+                db.execute(insert(SupportMessage), messages)
+            if activities:
+                db.execute(insert(EmployeeActivity), activities)
+            for chat_id, status in statuses.items():
+                db.execute(update(SupportChat).where(SupportChat.id == chat_id).values(status=status))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self.messages_written += len(messages)
+        self.activities_written += len(activities)
+        self.status_updates += len(statuses)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "batches": self.batches,
+            "messages_written": self.messages_written,
+            "activities_written": self.activities_written,
+            "status_updates": self.status_updates,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "status_cache": {
+                "chats": len(self._status),
+                "hits": self.status_hits,
+                "misses": self.status_misses
+            }
+        }
+
+
+# Singleton instance
+support_write_queue = SupportWriteQueue(status_ttl=settings.SUPPORT_STATUS_TTL_SECONDS)
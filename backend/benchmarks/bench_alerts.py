@@ -0,0 +1,142 @@
+"""
+Risk alert burst: 500 accounts go critical together, a fifth of them breach moments later,
+and every account's next risk check (4 per account) re-raises its alert.
+Channels are stand-ins taking 20ms per send (email and Telegram).
+
+Compares the previous dispatch (one alert at a time on the pipeline's flush: cooldown read,
+both sends awaited, one commit per alert) with the NotificationService queue.
+Reports wall time, messages delivered, commits and when the last breach went out.
+
+Run from backend/:  python benchmarks/bench_alerts.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, async_database_url
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup  # noqa: F401
+from app.models.sql.audit import AuditLog
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.user import User
+from app.services import notifications as notifications_module
+from app.services.notifications import NotificationService
+
+ACCOUNTS = 500
+BREACH_SHARE = 5
+REPEATS = 4
+SEND_SECONDS = 0.02
+
+
+class StandInChannels(NotificationService):
+    sends = 0
+
+    async def _send_email(self, email, subject, body):
+        await asyncio.sleep(SEND_SECONDS)
+        StandInChannels.sends += 1
+
+    async def _send_telegram(self, chat_id, message):
+        await asyncio.sleep(SEND_SECONDS)
+        StandInChannels.sends += 1
+
+
+def setup(path: str):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        owner = User(email="trader@example.com", hashed_password="x")
+        db.add(owner)
+        db.flush()
+        db.add_all([BrokerAccount(user_id=owner.id, provider="metaapi", account_id=f"acc{i}",
+                                  telegram_alerts_enabled=True, telegram_chat_id=f"chat{i}") for i in range(ACCOUNTS)])
+        db.commit()
+        ids = [a.id for a in db.query(BrokerAccount).order_by(BrokerAccount.id)]
+        user_id = owner.id
+    commits = [0]
+    async_engine = create_async_engine(async_database_url(url))
+    for e in (engine, async_engine.sync_engine):
+        event.listen(e, "commit", lambda conn: commits.__setitem__(0, commits[0] + 1))
+    return Session, async_sessionmaker(async_engine, expire_on_commit=False), ids, user_id, commits
+
+
+def alerts(ids, user_id):
+    """Critical for everyone, then breaches for every fifth account, then the repeats."""
+    def make(account_id, status):
+        return {"status": status, "violations": [f"{status} on {account_id}"], "only_email": False,
+                "account_id": account_id, "user_id": user_id, "email": "trader@example.com", "email_enabled": True,
+                "telegram_chat_id": f"chat{account_id}", "last_notification_at": None}
+    burst = [make(i, "critical") for i in ids] + [make(i, "breach") for i in ids[::BREACH_SHARE]]
+    return burst + [make(i, "critical") for _ in range(REPEATS - 1) for i in ids]
+
+
+async def previous(Session, batch):
+    """The old send_risk_alert, awaited per alert from the pipeline's flush."""
+    last_breach = None
+    started = time.perf_counter()
+    db = Session()
+    for item in batch:
+        account = db.get(BrokerAccount, item["account_id"])
+        if account.last_notification_at and datetime.utcnow() - account.last_notification_at < timedelta(minutes=60):
+            continue
+        db.get(User, item["user_id"])
+        await StandInChannels._send_email(None, item["email"], "", "")
+        await StandInChannels._send_telegram(None, item["telegram_chat_id"], "")
+        account.last_notification_at = datetime.utcnow()
+        db.add(AuditLog(user_id=item["user_id"], broker_account_id=account.id, action="breach", category="risk",
+                        details={"status": item["status"], "violations": item["violations"]}))
+        db.commit()
+        if item["status"] == "breach":
+            last_breach = time.perf_counter() - started
+    db.close()
+    return time.perf_counter() - started, last_breach
+
+
+async def queued(batch):
+    service = StandInChannels(workers=8)
+    service.start()
+    started = time.perf_counter()
+    for item in batch:
+        service.submit(item)
+    while service.snapshot()["queue_by_status"]["breach"]:
+        await asyncio.sleep(0.001)
+    # The last breach has been taken by a worker; wait for its sends
+    while service.alerts_sent < ACCOUNTS // BREACH_SHARE:
+        await asyncio.sleep(0.001)
+    last_breach = time.perf_counter() - started
+    await service.stop()
+    return time.perf_counter() - started, last_breach, service.snapshot()
+
+
+async def main():
+    print(f"=== Benchmark: alert burst, {ACCOUNTS} accounts x {REPEATS} checks, {SEND_SECONDS * 1000:.0f}ms per send ===\n")
+    print(f"{'dispatch':<26} | {'wall (s)':>8} | {'sends':>6} | {'commits':>7} | {'last breach out (s)':>19}")
+    print("-" * 80)
+
+    Session, _, ids, user_id, commits = setup(os.path.join(tempfile.mkdtemp(), "old.db"))
+    commits[0] = 0
+    StandInChannels.sends = 0
+    elapsed, last_breach = await previous(Session, alerts(ids, user_id))
+    print(f"{'inline (previous)':<26} | {elapsed:>8.2f} | {StandInChannels.sends:>6,} | {commits[0]:>7,} | {'never (cooldown)' if last_breach is None else f'{last_breach:.2f}':>19}")
+
+    Session, AsyncSession, ids, user_id, commits = setup(os.path.join(tempfile.mkdtemp(), "new.db"))
+    notifications_module.AsyncSessionLocal = AsyncSession
+    commits[0] = 0
+    StandInChannels.sends = 0
+    elapsed, last_breach, stats = await queued(alerts(ids, user_id))
+    print(f"{'priority queue, 8 workers':<26} | {elapsed:>8.2f} | {StandInChannels.sends:>6,} | {commits[0]:>7,} | {last_breach:>19.2f}")
+    print(f"\nqueue: {stats['coalesced']} coalesced, {stats['suppressed']} suppressed, "
+          f"avg dispatch latency {stats['avg_latency_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+One-year performance analytics over 500k closed trades: the rollup backfill that builds
+the hour and trading-day account rollups, warm calls (an incremental sync with nothing new,
+then metrics over the ~250 day rows), and the same daily P&L computed from ORM Trade objects.
+
+Run from backend/:  python benchmarks/bench_analytics.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup  # noqa: F401
+from app.models.sql.trade import Trade
+from app.engine.analytics import PerformanceAnalytics
+from app.engine.ledger import DailyLedger
+from app.engine.rollups import RollupService
+
+TRADES = 500_000
+START = datetime(2025, 1, 1)
+NOW = datetime(2025, 12, 31, 12)
+
+
+def seed(Session):
+    step = (NOW - START).total_seconds() / TRADES
+    with Session() as db:
+        for chunk in range(0, TRADES, 50_000):
+            db.execute(insert(Trade), [
+                {"user_id": 1, "ticket": i, "symbol": ("EURUSD", "XAUUSD", "US30")[i % 3], "volume": 1.0, "type": "buy",
+                 "profit": (i % 200 - 95) * 0.5, "session": ("London", "New York", "Asia")[i % 3], "status": "CLOSED",
+                 "open_time": START + timedelta(seconds=i * step), "close_time": START + timedelta(seconds=i * step + 60),
+                 "updated_at": START + timedelta(seconds=i * step + 60)}
+                for i in range(chunk, min(chunk + 50_000, TRADES))
+            ])
+        db.commit()
+
+
+def orm_metrics(db, ledger):
+    days = {}
+    for t in db.query(Trade).filter(Trade.user_id == 1, Trade.close_time.isnot(None)).order_by(Trade.close_time):
+        days[ledger.trading_day(t.close_time)] = days.get(ledger.trading_day(t.close_time), 0.0) + (t.profit or 0.0)
+    db.expunge_all()
+    return len(days)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/bench.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session)
+    ledger = DailyLedger()
+    rollups = RollupService(ledger)
+    analytics = PerformanceAnalytics(rollups)
+
+    print(f"=== Benchmark: one-year analytics over {TRADES:,} closed trades ===\n")
+    print(f"{'path':<40} | {'time (ms)':>10} | {'rows read':>10}")
+    print("-" * 68)
+    with Session() as db:
+        started = time.perf_counter()
+        rollups.backfill(db)
+        metrics = analytics.compute(db, 1)
+        print(f"{'cold: backfill rollups + metrics':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {TRADES:>10,}")
+
+        runs = 5
+        started = time.perf_counter()
+        for _ in range(runs):
+            rollups.sync(db)
+            analytics.compute(db, 1)
+        print(f"{'warm: sync + metrics':<40} | {(time.perf_counter() - started) * 1000 / runs:>10.1f} | {metrics['days']:>10,}")
+
+        started = time.perf_counter()
+        orm_metrics(db, ledger)
+        print(f"{'ORM Trade objects, daily P&L only':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {TRADES:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Authenticated-request throughput: the legacy get_current_user (JWT decode + SELECT +
+COMMIT of activity timestamps on every request) vs. the principal cache with batched
+activity writes. Runs an in-process FastAPI app on a temporary SQLite file.
+
+Run from backend/:  python benchmarks/bench_auth.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import func
+
+from app.core import security
+from app.core.principals import activity_tracker, principal_cache
+from app.db.session import Base, get_db
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability  # noqa: F401
+from app.models.sql.user import User
+from app.routers.auth import get_current_user, oauth2_scheme
+
+REQUESTS = 2000
+# Above the default QueuePool size (5 + 10 overflow) the legacy path stalls on connection checkout
+CONCURRENCY = [1, 10]
+
+
+async def legacy_get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """get_current_user as it was: decode, SELECT, then COMMIT three timestamps per request."""
+    try:
+        email = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM]).get("sub")
+    except Exception:
+        raise HTTPException(status_code=401)
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        raise HTTPException(status_code=401)
+    user.last_login = func.now()
+    user.last_active = func.now()
+    user.session_start = func.now()
+    db.commit()
+    return user
+
+
+def build_app(dependency, session_factory):
+    app = FastAPI()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/me")
+    async def me(current_user: User = Depends(dependency)):
+        return {"id": current_user.id, "tier": current_user.subscription_tier}
+
+    return app
+
+
+async def drive(app, token, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    per_client = REQUESTS // concurrency
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(per_client):
+                response = await client.get("/me", headers=headers)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return per_client * concurrency / (time.perf_counter() - started)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/bench.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    db.add(User(email="bench@example.com", hashed_password="x", full_name="Bench"))
+    db.commit()
+    db.close()
+    token = security.create_access_token({"sub": "bench@example.com"}, timedelta(minutes=30))
+
+    print("=== Benchmark: authenticated request throughput ===\n")
+    print(f"{'clients':>7} | {'legacy (req/s)':>15} | {'cached (req/s)':>15} | {'speedup':>8}")
+    print("-" * 56)
+    for concurrency in CONCURRENCY:
+        legacy = asyncio.run(drive(build_app(legacy_get_current_user, session_factory), token, concurrency))
+        principal_cache.clear()
+        cached = asyncio.run(drive(build_app(get_current_user, session_factory), token, concurrency))
+        print(f"{concurrency:>7} | {legacy:>15,.0f} | {cached:>15,.0f} | {cached / legacy:>7.1f}x")
+
+    # What the background flusher would have written instead of one commit per request
+    db = session_factory()
+    print(f"\nactivity rows flushed in one batch: {activity_tracker.flush(db)}; cache: {principal_cache.snapshot()}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
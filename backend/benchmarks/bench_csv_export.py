@@ -0,0 +1,99 @@
+"""
+Peak memory of exporting 1M trades as CSV: the previous pipeline (ORM rows -> list of
+dicts -> pandas DataFrame -> StringIO -> BytesIO) vs. the streaming export behind
+/reports/trades/export (server-side cursor -> csv chunks, optionally gzipped).
+Each mode runs in a fresh process; memory is peak RSS above the post-import baseline.
+
+Run from backend/:  python benchmarks/bench_csv_export.py
+"""
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session
+from app.db.session import Base
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability  # noqa: F401
+from app.models.sql.trade import Trade
+
+TRADES = 1_000_000
+MODES = ["pandas (previous)", "streaming", "streaming + gzip"]
+
+
+def seed(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(0, TRADES, 50_000):
+            conn.execute(insert(Trade), [
+                {"user_id": 1, "ticket": i, "symbol": "EURUSD", "volume": 1.0, "type": "buy",
+                 "open_price": 1.1, "profit": (i % 200 - 100) * 0.5, "session": "London", "status": "CLOSED"}
+                for i in range(start, min(start + 50_000, TRADES))
+            ])
+    engine.dispose()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, path):
+    from app.db.pagination import stream_query
+    from app.services.reporting import CSV_COLUMNS, gzip_chunks, iter_csv
+
+    Session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))
+    db_session.SessionLocal = Session
+
+    def build_query(db):
+        return db.query(*[getattr(Trade, column) for column in CSV_COLUMNS]).filter(Trade.user_id == 1).order_by(Trade.open_time, Trade.id)
+
+    if mode == "pandas (previous)":
+        import pandas as pd
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    size = 0
+    if mode == "pandas (previous)":
+        with Session() as db:
+            trades = db.query(Trade).filter(Trade.user_id == 1).order_by(Trade.open_time, Trade.id).all()
+            flat = [{column: getattr(t, column) for column in CSV_COLUMNS} for t in trades]
+            output = io.StringIO()
+            pd.DataFrame(flat).to_csv(output, index=False)
+            body = io.BytesIO(output.getvalue().encode())
+            size = len(body.getvalue())
+    else:
+        chunks = iter_csv(stream_query(build_query))
+        if mode == "streaming + gzip":
+            chunks = gzip_chunks(chunks)
+        for chunk in chunks:
+            size += len(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{peak_rss_mb():.1f} {peak_rss_mb() - baseline:.1f} {elapsed:.2f} {size}")
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "export.db")
+    seed(path)
+    print(f"=== Benchmark: CSV export of {TRADES:,} trades ===\n")
+    print(f"{'mode':<18} | {'peak RSS':>10} | {'above base':>10} | {'time (s)':>8} | {'rows/s':>9} | {'output':>9}")
+    print("-" * 79)
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), mode, path], capture_output=True, text=True, check=True
+        ).stdout.split()
+        peak, memory, elapsed, size = float(out[-4]), float(out[-3]), float(out[-2]), int(out[-1])
+        print(f"{mode:<18} | {peak:>7.1f} MB | {memory:>7.1f} MB | {elapsed:>8.2f} | {TRADES / elapsed:>9,.0f} | {size / 1e6:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        run_mode(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,126 @@
+"""
+Support chat fan-out at 1k and 10k connected sockets: the previous per-process
+ConnectionManager (json.dumps and an awaited send per socket, in turn), the FanoutHub
+in one process, and two hubs relaying through the local Redis-compatible server.
+
+Rooms of 10 sockets (one customer, agents, observers) and one room holding every socket
+(an announcement); the last column adds a single client that takes 50ms per send.
+Sockets are in-memory stand-ins, so the numbers are the server's fan-out overhead.
+
+Run from backend/:  python benchmarks/bench_fanout.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.fanout import FanoutHub, LocalPubSubServer, RespPubSub
+
+MESSAGE = {"content": "Thanks, an agent will look at your account now.", "sender_type": "STAFF",
+           "created_at": "2026-03-02 10:15:00.123456"}
+
+
+class Socket:
+    __slots__ = ("delay",)
+    # Sends completed by fast sockets, across all of them
+    received = 0
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            Socket.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class ConnectionManager:
+    """The support router's previous broadcast."""
+
+    def __init__(self):
+        self.active_connections = {}
+
+    async def broadcast(self, chat_id, message):
+        for connection in self.active_connections.get(chat_id, []):
+            await connection.send_text(json.dumps(message))
+
+
+def rooms_for(sockets: int, room_size: int):
+    return [f"support:{room}" for room in range(max(1, sockets // room_size))]
+
+
+async def run_legacy(sockets: int, room_size: int, messages: int, slow: bool) -> float:
+    manager = ConnectionManager()
+    rooms = rooms_for(sockets, room_size)
+    for i in range(sockets):
+        manager.active_connections.setdefault(rooms[i % len(rooms)], []).append(Socket())
+    if slow:
+        manager.active_connections[rooms[0]].append(Socket(delay=0.05))
+    started = time.perf_counter()
+    for i in range(messages):
+        await manager.broadcast(rooms[i % len(rooms)], MESSAGE)
+    return time.perf_counter() - started
+
+
+async def run_hub(sockets: int, room_size: int, messages: int, slow: bool, workers: int = 1) -> float:
+    server = None
+    if workers > 1:
+        server = LocalPubSubServer(port=0)
+        await server.start()
+        hubs = [FanoutHub(RespPubSub(f"redis://127.0.0.1:{server.port}"), queue_size=1024) for _ in range(workers)]
+    else:
+        hubs = [FanoutHub(queue_size=1024)]
+    rooms = rooms_for(sockets, room_size)
+    for i in range(sockets):
+        hubs[i % workers].join(rooms[i % len(rooms)], Socket())
+    if slow:
+        hubs[0].join(rooms[0], Socket(delay=0.05))
+    if server is not None:
+        while sum(len(s) for s in server._patterns.values()) < workers:
+            await asyncio.sleep(0.01)
+
+    Socket.received = 0
+    expected = messages * sockets // len(rooms)
+    started = time.perf_counter()
+    for i in range(messages):
+        # Messages come from different workers' clients
+        await hubs[i % workers].publish(rooms[i % len(rooms)], MESSAGE)
+        if i % 100 == 99:
+            await asyncio.sleep(0)
+    while Socket.received < expected:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    for hub in hubs:
+        await hub.stop()
+    if server is not None:
+        await server.stop()
+    return elapsed
+
+
+async def main():
+    print("=== Benchmark: support chat fan-out ===\n")
+    print(f"{'sockets':>7} | {'room':>6} | {'path':<22} | {'msgs/s':>9} | {'sends/s':>10} | {'msgs/s, 1 slow client':>22}")
+    print("-" * 92)
+    for sockets in (1_000, 10_000):
+        # (room size, messages, messages in the slow-client run: the old loop waits 50ms per slow send)
+        for room_size, messages, slow_messages in ((10, 20_000, 400), (sockets, 200, 40)):
+            for name, run in (
+                ("ConnectionManager", lambda count, slow: run_legacy(sockets, room_size, count, slow)),
+                ("FanoutHub", lambda count, slow: run_hub(sockets, room_size, count, slow)),
+                ("FanoutHub x2 via RESP", lambda count, slow: run_hub(sockets, room_size, count, slow, workers=2)),
+            ):
+                elapsed = await run(messages, False)
+                slow_elapsed = await run(slow_messages, True)
+                print(f"{sockets:>7,} | {'all' if room_size == sockets else room_size:>6} | {name:<22} | "
+                      f"{messages / elapsed:>9,.0f} | {messages * room_size / elapsed:>10,.0f} | {slow_messages / slow_elapsed:>22,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Daily ledger: bulk backfill of months of closed trades and the per-request cost of
+reading today's realized P&L from the ledger vs. re-aggregating Trade rows.
+
+Run from backend/:  python benchmarks/bench_ledger.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+import app.models.sql.user  # noqa: F401  (mapper registry)
+import app.models.sql.broker  # noqa: F401
+import app.models.sql.trade  # noqa: F401
+import app.models.sql.risk_snapshot  # noqa: F401
+import app.models.sql.accountability  # noqa: F401
+from app.engine.ledger import DailyLedger
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+MONTHS = [1, 3, 6, 12]
+TRADES_PER_DAY = 200
+QUERIES = 1000
+
+
+def seeded_session(months):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    rng = random.Random(1)
+    end = datetime(2026, 1, 1)
+    start = end - timedelta(days=30 * months)
+    seconds = int((end - start).total_seconds())
+    rows = [
+        {
+            "user_id": 1, "ticket": i, "symbol": "EURUSD", "volume": 0.1, "type": "buy", "open_price": 1.0,
+            "profit": rng.uniform(-100, 100), "status": "CLOSED",
+            "close_time": start + timedelta(seconds=rng.randrange(seconds))
+        }
+        for i in range(30 * months * TRADES_PER_DAY)
+    ]
+    db.execute(insert(Trade), rows)
+    db.commit()
+    return db, start, end
+
+
+def main():
+    print("=== Benchmark: daily ledger backfill + daily P&L lookup ===\n")
+    print(f"{'months':>6} | {'trades':>8} | {'backfill':>10} | {'trades/s':>10} | {'ledger lookup':>14} | {'SQL re-aggregate':>17}")
+    print("-" * 80)
+    for months in MONTHS:
+        db, start, end = seeded_session(months)
+        ledger = DailyLedger()
+
+        started = time.perf_counter()
+        count = ledger.backfill_from_trades(db, 1, user_id=1, since=start)
+        backfill_ms = (time.perf_counter() - started) * 1000
+
+        now = end - timedelta(hours=1)
+        started = time.perf_counter()
+        for _ in range(QUERIES):
+            ledger.daily_stats(1, now=now)
+        lookup_us = (time.perf_counter() - started) / QUERIES * 1e6
+
+        day_start = ledger.day_start(ledger.trading_day(now))
+        started = time.perf_counter()
+        for _ in range(QUERIES // 10):
+            db.query(func.sum(Trade.profit), func.count(Trade.id)).filter(
+                Trade.user_id == 1, Trade.close_time >= day_start, Trade.close_time < now
+            ).one()
+        sql_us = (time.perf_counter() - started) / (QUERIES // 10) * 1e6
+
+        print(f"{months:>6} | {count:>8,} | {backfill_ms:>7.0f} ms | {count / backfill_ms * 1000:>10,.0f} | {lookup_us:>11.1f} us | {sql_us:>14.0f} us")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Latency of /api/dashboard/overview under 200 concurrent clients on the async session
+(aiosqlite). Risk persistence runs either inline on the request's AsyncSession via
+run_sync, or through the write-behind pipeline. Broker data comes from the mock bridge,
+whose tickets are shared by every user: concurrent inline inserts collide and roll back
+their savepoint, which also exercises the failure path.
+
+Run from backend/:  python benchmarks/bench_overview_latency.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import security
+from app.db.session import Base, async_database_url, get_async_db
+from app.engine import pipeline as pipeline_module
+from app.engine.pipeline import risk_write_pipeline
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability  # noqa: F401
+from app.models.sql.user import User
+from app.routers import dashboard
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 10
+
+
+def build_app(async_session):
+    app = FastAPI()
+    app.include_router(dashboard.router)
+
+    async def override_get_async_db():
+        async with async_session() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+async def drive(url, tokens, use_pipeline):
+    # One engine per event loop: asyncio pools can't be shared across asyncio.run calls
+    async_engine = create_async_engine(async_database_url(url))
+    async_session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    pipeline_module.AsyncSessionLocal = async_session
+    app = build_app(async_session)
+    if use_pipeline:
+        risk_write_pipeline.start()
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def worker(token):
+            headers = {"Authorization": f"Bearer {token}"}
+            for _ in range(REQUESTS_PER_CLIENT):
+                started = time.perf_counter()
+                response = await client.get("/api/dashboard/overview", headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(token) for token in tokens])
+        elapsed = time.perf_counter() - started
+    if use_pipeline:
+        await risk_write_pipeline.stop()
+    await async_engine.dispose()
+    return latencies, elapsed
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{directory}/bench.db"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    db.add_all([User(email=f"trader{i}@example.com", hashed_password="x") for i in range(CLIENTS)])
+    db.commit()
+    db.close()
+    tokens = [
+        security.create_access_token({"sub": f"trader{i}@example.com"}, timedelta(minutes=30)) for i in range(CLIENTS)
+    ]
+
+    print(f"=== Benchmark: /overview latency, {CLIENTS} concurrent clients x {REQUESTS_PER_CLIENT} requests ===\n")
+    print(f"{'risk persistence':<22} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'req/s':>8}")
+    print("-" * 58)
+    for label, use_pipeline in [("inline (run_sync)", False), ("write-behind pipeline", True)]:
+        latencies, elapsed = asyncio.run(drive(url, tokens, use_pipeline))
+        latencies.sort()
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{label:<22} | {p50:>9.1f} | {p99:>9.1f} | {len(latencies) / elapsed:>8,.0f}")
+
+
+if __name__ == "__main__":
+    main()
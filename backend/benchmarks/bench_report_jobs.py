@@ -0,0 +1,95 @@
+"""
+50 concurrent PDF report requests: rendering inline on the event loop (the old
+/reports/generate path) vs. the ReportJobQueue process pool. Alongside throughput it
+measures how late a 10ms heartbeat task runs during the burst, i.e. how long every
+other request on the same worker would have been stalled.
+
+Run from backend/:  python benchmarks/bench_report_jobs.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.report_jobs import ReportFileCache, ReportJobQueue
+from app.services.reporting import render_report
+
+REQUESTS = 50
+TRADES_PER_REPORT = 200
+WORKERS = [2, 4]
+
+PAYLOAD = {
+    "user_email": "trader@example.com",
+    "account_id": "bench-1",
+    "account_info": {"balance": 100000.0, "equity": 98750.0, "profit": -1250.0},
+    "trades": [
+        {"ticket": i, "symbol": "EURUSD", "volume": 1.0, "type": "buy" if i % 2 else "sell", "profit": (i % 7 - 3) * 12.5}
+        for i in range(TRADES_PER_REPORT)
+    ],
+    "risk_status": {"status": "warning", "violations": ["Daily loss at 80% of limit"], "metrics": {"daily_limit": 5000.0}},
+    "intelligence": {"score": 72, "flags": [{"type": "overtrading", "severity": "medium", "message": "High trade frequency"}]}
+}
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - started - 0.01) * 1000)
+
+
+async def measure(burst):
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    started = time.perf_counter()
+    await burst()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return elapsed, max(lags or [0.0]), statistics.median(lags or [0.0])
+
+
+async def inline():
+    async def one():
+        await asyncio.sleep(0)
+        render_report("pdf", PAYLOAD)
+    await asyncio.gather(*[one() for _ in range(REQUESTS)])
+
+
+def pooled(queue):
+    async def burst():
+        jobs = [queue.submit(1, "pdf", PAYLOAD, "report.pdf") for _ in range(REQUESTS)]
+        await asyncio.gather(*[queue.wait(job["id"]) for job in jobs])
+    return burst
+
+
+async def main():
+    print(f"=== Benchmark: {REQUESTS} concurrent PDF reports ({TRADES_PER_REPORT} trades each) ===\n")
+    print(f"{'mode':<20} | {'total (s)':>9} | {'reports/s':>9} | {'loop lag p50':>12} | {'loop lag max':>12}")
+    print("-" * 74)
+
+    elapsed, lag_max, lag_p50 = await measure(inline)
+    print(f"{'inline':<20} | {elapsed:>9.2f} | {REQUESTS / elapsed:>9.1f} | {lag_p50:>10.1f}ms | {lag_max:>10.1f}ms")
+
+    for workers in WORKERS:
+        queue = ReportJobQueue(ReportFileCache(tempfile.mkdtemp(), 512 * 1024 * 1024), max_workers=workers, max_pending=REQUESTS)
+        # Spawn the workers before timing, as a running server would have them warm
+        await pooled_warmup(queue, workers)
+        elapsed, lag_max, lag_p50 = await measure(pooled(queue))
+        await queue.stop()
+        label = f"process pool x{workers}"
+        print(f"{label:<20} | {elapsed:>9.2f} | {REQUESTS / elapsed:>9.1f} | {lag_p50:>10.1f}ms | {lag_max:>10.1f}ms")
+
+
+async def pooled_warmup(queue, workers):
+    jobs = [queue.submit(0, "pdf", PAYLOAD, "warmup.pdf") for _ in range(workers)]
+    await asyncio.gather(*[queue.wait(job["id"]) for job in jobs])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
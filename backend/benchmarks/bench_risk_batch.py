@@ -0,0 +1,71 @@
+"""
+Fleet-wide risk evaluation: scalar RulePlan.evaluate per account vs. one
+vectorized evaluate_batch pass over columnar arrays.
+
+Run from backend/:  python benchmarks/bench_risk_batch.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.engine.rules import rule_plans
+from app.engine.risk_batch import evaluate_batch
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def columns(n):
+    rng = np.random.default_rng(42)
+    balance = rng.choice([10000.0, 50000.0, 100000.0], n)
+    return {
+        "balance": balance,
+        "equity": balance - rng.uniform(-2000, 12000, n),
+        "daily_profit": rng.uniform(-8000, 3000, n),
+        "trades_count": rng.integers(0, 12, n),
+        "daily_loss_limit_pct": rng.choice([3.0, 5.0], n),
+        "max_drawdown_limit_pct": rng.choice([5.0, 8.0, 10.0], n),
+        "max_lot_size": rng.choice([1.0, 5.0, 10.0], n),
+        "max_trade_volume": rng.choice([0.0, 0.5, 2.0, 15.0], n),
+    }
+
+
+def scalar_pass(cols):
+    for i in range(len(cols["balance"])):
+        limits = SimpleNamespace(
+            daily_loss_limit_pct=float(cols["daily_loss_limit_pct"][i]),
+            max_drawdown_limit_pct=float(cols["max_drawdown_limit_pct"][i]),
+            max_lot_size=float(cols["max_lot_size"][i])
+        )
+        vol = cols["max_trade_volume"][i]
+        rule_plans.for_limits(limits).evaluate(
+            {"balance": float(cols["balance"][i]), "equity": float(cols["equity"][i])},
+            {"daily_profit": float(cols["daily_profit"][i]), "trades_count": int(cols["trades_count"][i])},
+            [{"volume": vol}] if vol > 0 else []
+        )
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    print("=== Benchmark: fleet risk evaluation ===\n")
+    print(f"{'accounts':>9} | {'scalar loop':>12} | {'vectorized':>11} | {'speedup':>8} | {'accounts/s (vec)':>17}")
+    print("-" * 70)
+    for n in SIZES:
+        cols = columns(n)
+        scalar_ms = timed(scalar_pass, cols)
+        vector_ms = min(timed(lambda: evaluate_batch(**cols)) for _ in range(5))
+        print(f"{n:>9} | {scalar_ms:>9.1f} ms | {vector_ms:>8.2f} ms | {scalar_ms / vector_ms:>7.0f}x | {n / vector_ms * 1000:>17,.0f}")
+
+
+if __name__ == "__main__":
+    main()
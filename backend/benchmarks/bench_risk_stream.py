@@ -0,0 +1,135 @@
+"""
+Live risk push load test: thousands of dashboard clients on one worker (one event loop).
+Compares a polling tick (every client re-requests the overview: risk evaluation and a full
+JSON body per client) with the push stream for the same tick, where a share of the accounts
+changed. Also reports what idle and unwatched accounts cost per poll.
+Sockets are in-memory stand-ins, so the numbers are the server's own overhead.
+
+Run from backend/:  python benchmarks/bench_risk_stream.py
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.engine.risk_stream import RiskStream
+from app.engine.rules import rule_plans
+from app.engine.ledger import daily_ledger
+from app.engine.equity import equity_tracker
+
+POSITIONS = 5
+CHANGED_SHARE = 0.1
+
+
+class Socket:
+    __slots__ = ()
+    messages = 0
+    sent_bytes = 0
+
+    async def send_text(self, text: str):
+        Socket.messages += 1
+        Socket.sent_bytes += len(text)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_snapshot(account: int, equity: float):
+    return {
+        "account": {"login": account, "balance": 100000.0, "equity": equity, "profit": equity - 100000.0,
+                    "margin": 1340.0, "currency": "USD", "leverage": 100, "platform": "mt5"},
+        "trades": [{"ticket": account * 100 + i, "symbol": "EURUSD", "type": "buy", "volume": 1.0,
+                    "open_price": 1.085, "profit": 12.5 * i} for i in range(POSITIONS)],
+        "status": "live"
+    }
+
+
+def poll_tick(snapshots, clients_per_account: int) -> int:
+    """The dashboard's 5s refetch: every client gets a freshly evaluated, fully encoded report."""
+    sent = 0
+    for key, snapshot in snapshots.items():
+        for _ in range(clients_per_account):
+            daily = daily_ledger.daily_stats(key)
+            equity_state = equity_tracker.drawdown_basis(key)
+            body = {
+                "account": snapshot["account"],
+                "risk": rule_plans.for_limits(None).evaluate(snapshot["account"], daily, snapshot["trades"], equity_state),
+                "daily_stats": daily,
+                "trades": snapshot["trades"]
+            }
+            sent += len(json.dumps(body, default=str))
+    return sent
+
+
+async def drain(expected: int):
+    while Socket.messages < expected:
+        await asyncio.sleep(0)
+
+
+async def run(accounts: int, clients_per_account: int):
+    clients = accounts * clients_per_account
+    keys = [f"bench:{i}" for i in range(accounts)]
+    snapshots = {key: make_snapshot(i, 100000.0) for i, key in enumerate(keys)}
+
+    # Polling: one tick
+    started = time.process_time()
+    poll_bytes = poll_tick(snapshots, clients_per_account)
+    poll_cpu = time.process_time() - started
+
+    stream = RiskStream(min_interval=0)
+    for key in keys:
+        for _ in range(clients_per_account):
+            stream.subscribe(key, Socket())
+    Socket.messages = Socket.sent_bytes = 0
+    for key in keys:
+        stream.on_snapshot(key, snapshots[key])
+    await drain(clients)
+
+    # Push: a tick where some accounts moved
+    changed = set(random.sample(keys, int(accounts * CHANGED_SHARE)))
+    Socket.messages = Socket.sent_bytes = 0
+    started = time.process_time()
+    for key in keys:
+        equity = 100000.0 + (random.uniform(-500, 500) if key in changed else 0.0)
+        stream.on_snapshot(key, make_snapshot(int(key.split(":")[1]), equity))
+    await drain(len(changed) * clients_per_account)
+    push_cpu = time.process_time() - started
+    push_bytes = Socket.sent_bytes
+
+    # Idle: every account polled again, nothing moved
+    encodes, messages = stream.encodes, Socket.messages
+    started = time.process_time()
+    for key in keys:
+        stream.on_snapshot(key, make_snapshot(int(key.split(":")[1]), stream._channels[key].view["account"]["equity"]))
+    await asyncio.sleep(0)
+    idle_cpu = time.process_time() - started
+    assert stream.encodes == encodes and Socket.messages == messages
+
+    await stream.stop()
+
+    # Unwatched: the listener on accounts nobody has open
+    started = time.process_time()
+    for key in keys:
+        stream.on_snapshot(key, snapshots[key])
+    unwatched_cpu = time.process_time() - started
+
+    print(f"{clients:>7,} | {accounts:>8,} | {'poll (previous)':<16} | {poll_cpu * 1000:>10.1f} | {clients:>8,} | {poll_bytes / 1024:>9,.0f}")
+    print(f"{'':>7} | {'':>8} | {'push, 10% moved':<16} | {push_cpu * 1000:>10.1f} | {len(changed) * clients_per_account:>8,} | {push_bytes / 1024:>9,.0f}")
+    print(f"{'':>7} | {'':>8} | {'push, idle':<16} | {idle_cpu * 1000:>10.1f} | {0:>8} | {0:>9}")
+    print(f"{'':>7} | {'':>8} | {'unwatched':<16} | {unwatched_cpu * 1000:>10.1f} | {0:>8} | {0:>9}")
+
+
+async def main():
+    print("=== Benchmark: live risk stream, one worker ===\n")
+    print(f"{'clients':>7} | {'accounts':>8} | {'tick':<16} | {'cpu (ms)':>10} | {'messages':>8} | {'sent (KB)':>9}")
+    print("-" * 74)
+    for accounts, clients_per_account in ((1_000, 2), (2_000, 5)):
+        await run(accounts, clients_per_account)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
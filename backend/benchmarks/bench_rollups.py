@@ -0,0 +1,78 @@
+"""
+Hourly account chart over a year of trades (200k), read three ways: GROUP BY over the
+raw trades table, from the pre-aggregated hour rollups, and the cost of keeping those
+rollups current (an incremental sync after a burst of 500 new trades, vs a full backfill).
+
+Run from backend/:  python benchmarks/bench_rollups.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup  # noqa: F401
+from app.models.sql.trade import Trade
+from app.engine.ledger import DailyLedger
+from app.engine.rollups import RollupService
+
+TRADES = 200_000
+BURST = 500
+START = datetime(2025, 1, 1)
+NOW = datetime(2025, 12, 31, 12)
+
+
+def rows(first, count, step):
+    return [
+        {"user_id": 1, "ticket": i, "symbol": "EURUSD", "volume": 1.0, "type": "buy", "profit": (i % 200 - 95) * 0.5,
+         "open_time": START + timedelta(seconds=i * step), "close_time": START + timedelta(seconds=i * step + 600)}
+        for i in range(first, first + count)
+    ]
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/bench.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    step = (NOW - START).total_seconds() / (TRADES + BURST)
+    service = RollupService(DailyLedger())
+
+    print(f"=== Benchmark: hourly chart over {TRADES:,} trades ===\n")
+    print(f"{'path':<40} | {'time (ms)':>10} | {'rows':>10}")
+    print("-" * 68)
+    with Session() as db:
+        for chunk in range(0, TRADES, 50_000):
+            db.execute(insert(Trade), rows(chunk, 50_000, step))
+        db.commit()
+
+        started = time.perf_counter()
+        result = service.backfill(db, start=START, end=NOW)
+        print(f"{'backfill (all rollups)':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {result['account_buckets']:>10,}")
+
+        hour = func.strftime("%Y-%m-%d %H:00", Trade.close_time)
+        started = time.perf_counter()
+        raw = db.query(hour, func.count(Trade.id), func.sum(Trade.profit), func.min(Trade.profit)).filter(
+            Trade.user_id == 1, Trade.close_time >= START, Trade.close_time < NOW
+        ).group_by(hour).all()
+        print(f"{'GROUP BY hour over trades':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {len(raw):>10,}")
+
+        started = time.perf_counter()
+        series = service.account_series(db, 1, "hour", START, NOW)
+        print(f"{'hour rollups':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {len(series):>10,}")
+
+        db.execute(insert(Trade), rows(TRADES, BURST, step))
+        db.commit()
+        started = time.perf_counter()
+        result = service.sync(db, now=NOW)
+        print(f"{f'incremental sync (+{BURST} trades)':<40} | {(time.perf_counter() - started) * 1000:>10.1f} | {result['buckets']:>10,}")
+
+
+if __name__ == "__main__":
+    main()
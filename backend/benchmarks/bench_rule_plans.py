@@ -0,0 +1,66 @@
+"""
+Per-tick risk evaluation for one account: evaluations/sec of the compiled rule plans,
+looked up in the plan cache on each tick, held by the caller, and the short-circuit
+status() check. A plan limited to the three basic checks (lot size, daily loss, overall
+drawdown) shows what the daily-trade and news checks add.
+
+Run from backend/:  python benchmarks/bench_rule_plans.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.engine.rules import NewsCalendar, rule_plans, rule_set, load_presets
+
+RUNS = 20_000
+
+
+def scenario(positions: int, daily_profit: float, equity: float):
+    account = {"balance": 100000.0, "equity": equity}
+    opened = datetime(2026, 3, 6, 9, 0)
+    trades = [{"ticket": i, "volume": 0.5, "profit": 1.0, "open_time": (opened + timedelta(minutes=i)).isoformat()}
+              for i in range(positions)]
+    return account, {"daily_profit": daily_profit, "trades_count": positions}, trades
+
+
+def main():
+    # FTMO limits as an account would carry them after the preset is applied
+    ftmo = type("Account", (), {**{k: v for k, v in load_presets()["FTMO"].items() if k != "description"},
+                                "max_daily_trades": 50, "max_lot_size": 10.0, "preset_name": "FTMO"})()
+    equity_state = {"drawdown_type": "static", "reference": 100000.0, "day_start_balance": 100000.0, "limit_base": 100000.0}
+    calendar = NewsCalendar()
+    calendar.load(datetime(2026, 3, d, 13, 30) for d in range(1, 28))
+    plan = rule_plans.for_limits(ftmo)
+    # Without the daily-trade and news checks
+    base_plan = rule_plans.compile([r for r in rule_set(ftmo) if r["check"] not in ("daily_trades", "news_trading")])
+
+    paths = {
+        "plan evaluate, 3 basic checks": lambda a, d, t: base_plan.evaluate(a, d, t, equity_state),
+        "cached plan lookup + evaluate": lambda a, d, t: rule_plans.for_limits(ftmo).evaluate(a, d, t, equity_state, calendar),
+        "held plan evaluate": lambda a, d, t: plan.evaluate(a, d, t, equity_state, calendar),
+        "held plan status()": lambda a, d, t: plan.status(a, d, t, equity_state, calendar),
+    }
+    cases = {
+        "flat, safe": scenario(0, 0.0, 100000.0),
+        "20 positions, safe": scenario(20, -200.0, 99800.0),
+        "20 positions, breached": scenario(20, -6000.0, 94000.0),
+    }
+
+    print(f"=== Benchmark: risk evaluations/sec per account ({RUNS:,} ticks) ===\n")
+    print(f"{'path':<32} | " + " | ".join(f"{name:>22}" for name in cases))
+    print("-" * (35 + 25 * len(cases)))
+    for name, run in paths.items():
+        rates = []
+        for account, daily, trades in cases.values():
+            # Best of 5: the machine is shared, the fastest run is the least disturbed
+            elapsed = min(timeit.repeat(lambda: run(account, daily, trades), number=RUNS // 5, repeat=5))
+            rates.append(RUNS // 5 / elapsed)
+        print(f"{name:<32} | " + " | ".join(f"{rate:>22,.0f}" for rate in rates))
+    print(f"\nplan cache: {rule_plans.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+SQLite write throughput: default rollback journal (journal_mode=DELETE, synchronous=FULL)
+vs. the production pragmas from Settings (WAL, synchronous=NORMAL, mmap, cache).
+Writer threads commit small transactions (one trade insert + one user touch, like
+check_risk and get_current_user) while reader threads keep querying, as the dashboard does.
+
+Run from backend/:  python benchmarks/bench_sqlite_wal.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, apply_sqlite_pragmas, engine_options, sqlite_pragmas
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability  # noqa: F401
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+DURATION_SECONDS = 3.0
+WRITERS = [1, 4, 8]
+READERS = 4
+
+MODES = {
+    "default (DELETE/FULL)": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    "WAL + settings": sqlite_pragmas(),
+}
+
+
+def run(pragmas, writers):
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{directory}/bench.db"
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine, pragmas)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([User(email=f"w{i}@example.com", hashed_password="x") for i in range(writers)])
+        db.commit()
+
+    stop = threading.Event()
+    commits = [0] * writers
+    reads = [0] * READERS
+
+    def writer(index):
+        ticket = index * 10_000_000
+        with Session() as db:
+            while not stop.is_set():
+                ticket += 1
+                db.add(Trade(user_id=index + 1, ticket=ticket, symbol="EURUSD", volume=1.0, type="buy", open_price=1.1))
+                db.execute(update(User).where(User.id == index + 1).values(last_active=func.now()))
+                db.commit()
+                commits[index] += 1
+
+    def reader(index):
+        with Session() as db:
+            while not stop.is_set():
+                db.execute(select(func.count(Trade.id))).scalar()
+                db.rollback()
+                reads[index] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(READERS)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION_SECONDS)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return sum(commits) / DURATION_SECONDS, sum(reads) / DURATION_SECONDS
+
+
+def main():
+    print(f"=== Benchmark: SQLite write throughput, {READERS} concurrent readers ===\n")
+    print(f"{'mode':<22} | {'writers':>7} | {'commits/s':>10} | {'reads/s':>9}")
+    print("-" * 58)
+    for writers in WRITERS:
+        for label, pragmas in MODES.items():
+            commits, reads = run(pragmas, writers)
+            print(f"{label:<22} | {writers:>7} | {commits:>10,.0f} | {reads:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Support chat persistence under load: 200 chats sending 20 staff messages each,
+concurrently. Compares the previous handler body (sync add/commit of the message and the
+staff activity plus a SupportChat query, on the event loop) with the write-behind queue.
+Reports messages/sec, event-loop stall (max lag of a 5ms ticker) and commits issued.
+
+Run from backend/:  python benchmarks/bench_support_writes.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, async_database_url
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup  # noqa: F401
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.support import SupportChat, SupportMessage
+from app.services import support_writes as support_writes_module
+from app.services.support_writes import SupportWriteQueue
+
+CHATS = 200
+MESSAGES = 20
+
+
+def setup(path: str):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    commits = [0]
+    event.listen(engine, "commit", lambda conn: commits.__setitem__(0, commits[0] + 1))
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([SupportChat(guest_name=f"g{i}", status="ACTIVE") for i in range(CHATS)])
+        db.commit()
+    async_engine = create_async_engine(async_database_url(url))
+    async_commits = [0]
+    event.listen(async_engine.sync_engine, "commit", lambda conn: async_commits.__setitem__(0, async_commits[0] + 1))
+    commits[0] = 0
+    return Session, async_sessionmaker(async_engine, expire_on_commit=False), commits, async_commits
+
+
+async def ticker(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(0.005)
+        lags.append(loop.time() - started - 0.005)
+
+
+async def old_chat(db, chat_id):
+    for i in range(MESSAGES):
+        db.add(SupportMessage(chat_id=chat_id, content=f"m{i}", sender_type="STAFF", sender_id=None))
+        db.commit()
+        db.add(EmployeeActivity(employee_id=None, action="REPLIED_TO_CHAT", module="SUPPORT", description="r"))
+        db.commit()
+        db.query(SupportChat).filter(SupportChat.id == chat_id).first()
+        await asyncio.sleep(0)
+
+
+async def new_chat(queue, chat_id):
+    for i in range(MESSAGES):
+        await queue.add_message(chat_id, f"m{i}", "STAFF")
+        await queue.add_activity(None, "REPLIED_TO_CHAT", "SUPPORT", "r")
+        await queue.chat_status(chat_id)
+        await asyncio.sleep(0)
+
+
+async def measure(body):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    started = time.perf_counter()
+    await body()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    return elapsed, max(lags, default=0.0)
+
+
+async def main():
+    total = CHATS * MESSAGES
+    print(f"=== Benchmark: {CHATS} chats x {MESSAGES} staff messages ===\n")
+    print(f"{'path':<28} | {'msgs/s':>8} | {'max loop lag (ms)':>17} | {'commits':>7}")
+    print("-" * 70)
+
+    Session, _, commits, _ = setup(os.path.join(tempfile.mkdtemp(), "old.db"))
+    db = Session()
+    elapsed, lag = await measure(lambda: asyncio.gather(*[old_chat(db, chat_id) for chat_id in range(1, CHATS + 1)]))
+    db.close()
+    print(f"{'inline commits (previous)':<28} | {total / elapsed:>8,.0f} | {lag * 1000:>17.1f} | {commits[0]:>7,}")
+
+    Session, AsyncSession, _, commits = setup(os.path.join(tempfile.mkdtemp(), "new.db"))
+    support_writes_module.AsyncSessionLocal = AsyncSession
+    queue = SupportWriteQueue()
+    queue.start()
+
+    async def body():
+        await asyncio.gather(*[new_chat(queue, chat_id) for chat_id in range(1, CHATS + 1)])
+        await queue.stop()
+
+    elapsed, lag = await measure(body)
+    with Session() as db:
+        assert db.query(SupportMessage).count() == total
+    print(f"{'write-behind queue':<28} | {total / elapsed:>8,.0f} | {lag * 1000:>17.1f} | {commits[0]:>7,}")
+    print(f"\nqueue: {queue.snapshot()['batches']} batches, max flush {queue.snapshot()['max_flush_ms']} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
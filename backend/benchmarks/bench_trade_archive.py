@@ -0,0 +1,115 @@
+"""
+Performance/session aggregates over 1M closed trades: ORM scan of the trades table
+(Trade objects, Python loops, as the reports did) vs. the columnar TradeArchive
+(memory-mapped monthly Arrow files + Arrow compute kernels).
+
+Run from backend/:  python benchmarks/bench_trade_archive.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability  # noqa: F401
+from app.models.sql.trade import Trade
+from app.engine.archive import TradeArchive
+from app.engine.intelligence import IntelligenceEngine
+from app.services.reporting import ReportingService
+
+TRADES = 1_000_000
+MONTHS = 24
+NOW = datetime(2026, 1, 15)
+SYMBOLS = ["EURUSD", "GBPUSD", "XAUUSD", "US30", "NAS100"]
+SESSIONS = ["London", "New York", "Asia"]
+
+
+def seed(Session):
+    start = datetime(2024, 1, 1)
+    step = (NOW - start).total_seconds() / TRADES
+    with Session() as db:
+        for chunk in range(0, TRADES, 50_000):
+            db.execute(insert(Trade), [
+                {"user_id": 1, "ticket": i, "symbol": SYMBOLS[i % 5], "volume": 1.0, "type": "buy",
+                 "open_price": 1.1, "close_price": 1.2, "profit": (i % 200 - 95) * 0.5, "session": SESSIONS[i % 3],
+                 "status": "CLOSED", "open_time": start + timedelta(seconds=i * step),
+                 "close_time": start + timedelta(seconds=i * step + 60)}
+                for i in range(chunk, min(chunk + 50_000, TRADES))
+            ])
+        db.commit()
+
+
+def orm_scan(db):
+    trades = db.query(Trade).filter(Trade.user_id == 1, Trade.close_time.isnot(None)).all()
+    sessions, symbols = {}, {}
+    wins = losses = 0
+    gross_profit = gross_loss = 0.0
+    for t in trades:
+        profit = t.profit or 0.0
+        if profit > 0:
+            wins += 1
+            gross_profit += profit
+        elif profit < 0:
+            losses += 1
+            gross_loss -= profit
+        entry = sessions.setdefault(t.session, {"count": 0, "profit": 0.0})
+        entry["count"] += 1
+        entry["profit"] += profit
+        entry = symbols.setdefault(t.symbol, {"count": 0, "profit": 0.0})
+        entry["count"] += 1
+        entry["profit"] += profit
+    db.expunge_all()
+    return len(trades), round(gross_profit - gross_loss, 2)
+
+
+def columnar_scan(archive, db):
+    table = archive.read(db, 1, columns=["symbol", "session", "profit", "close_time"])
+    summary = ReportingService.performance_summary(table)
+    IntelligenceEngine.session_performance_columnar(table)
+    return summary["trades"], summary["net_profit"]
+
+
+def timed(fn, *args, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/bench.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session)
+    archive = TradeArchive(data_dir=os.path.join(directory, "archive"))
+
+    print(f"=== Benchmark: aggregates over {TRADES:,} closed trades ({MONTHS} months) ===\n")
+    with Session() as db:
+        started = time.perf_counter()
+        files = archive.compact(db, now=NOW)
+        compact_seconds = time.perf_counter() - started
+        print(f"one-off compaction: {files} monthly files in {compact_seconds:.2f}s\n")
+
+        orm_seconds, orm_result = timed(orm_scan, db, repeat=1)
+        columnar_seconds, columnar_result = timed(columnar_scan, archive, db)
+    assert orm_result == columnar_result, (orm_result, columnar_result)
+
+    print(f"{'scan':<30} | {'time (ms)':>10} | {'rows/s':>13}")
+    print("-" * 60)
+    for label, seconds in [("ORM objects + Python loop", orm_seconds), ("Arrow archive (mmap) + compute", columnar_seconds)]:
+        print(f"{label:<30} | {seconds * 1000:>10.1f} | {TRADES / seconds:>13,.0f}")
+    print(f"\nspeedup: {orm_seconds / columnar_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-call cost of persisting broker positions in RiskEngine.check_risk:
+legacy row-by-row SELECT/add vs. the bulk IN (...) + executemany path.
+
+Run from backend/:  python benchmarks/bench_trade_upsert.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability
+from app.models.sql.trade import Trade
+from app.engine.risk import RiskEngine
+
+SIZES = [10, 100, 1000, 10000]
+
+
+def make_trades(n, profit):
+    return [
+        {"ticket": 1_000_000 + i, "symbol": "EURUSD", "type": "buy", "volume": 1.0,
+         "open_price": 1.1, "profit": profit}
+        for i in range(n)
+    ]
+
+
+def legacy_persist(db, trades, max_lot_size):
+    """The pre-bulk implementation: one SELECT per ticket."""
+    for t_data in trades:
+        row = db.query(Trade).filter(Trade.ticket == t_data["ticket"]).first()
+        if not row:
+            db.add(Trade(
+                ticket=t_data["ticket"], user_id=1, symbol=t_data["symbol"], type=t_data["type"],
+                volume=t_data["volume"], open_price=t_data["open_price"], status="OPEN",
+                session="Asia", risk_score=75
+            ))
+        else:
+            row.profit = t_data.get("profit", 0.0)
+            row.risk_score = 30 if t_data.get("volume", 0) > max_lot_size else 90
+    db.commit()
+
+
+def bulk_persist(db, trades, max_lot_size):
+    RiskEngine().persist_trades(db, trades, max_lot_size)
+    db.commit()
+
+
+def measure(persist, n):
+    """Returns (insert_ms, update_ms): first sight of n positions, then a refresh of the same n."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = Session()
+        started = time.perf_counter()
+        persist(db, make_trades(n, 0.0), 10.0)
+        insert_ms = (time.perf_counter() - started) * 1000
+        db.close()
+
+        db = Session()
+        started = time.perf_counter()
+        persist(db, make_trades(n, -5.0), 10.0)
+        update_ms = (time.perf_counter() - started) * 1000
+        db.close()
+        engine.dispose()
+    return insert_ms, update_ms
+
+
+def main():
+    print("=== Benchmark: check_risk trade persistence (SQLite file DB) ===\n")
+    print(f"{'positions':>10} | {'legacy insert':>14} | {'bulk insert':>12} | {'legacy update':>14} | {'bulk update':>12} | {'update speedup':>14}")
+    print("-" * 92)
+    for n in SIZES:
+        l_ins, l_upd = measure(legacy_persist, n)
+        b_ins, b_upd = measure(bulk_persist, n)
+        print(f"{n:>10} | {l_ins:>11.1f} ms | {b_ins:>9.1f} ms | {l_upd:>11.1f} ms | {b_upd:>9.1f} ms | {l_upd / b_upd:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
-from app.db.session import engine, Base, SessionLocal
-from app.models.sql import user, trade, broker, audit
+from app.db.session import engine, SessionLocal
+from app.db.migrations import run_migrations
 from app.models.sql.user import User
 from app.core import security
 
 # Create tables
 def init_db():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created successfully!")
+    print("Migrating database schema...")
+    revision = run_migrations(engine)
+    print(f"Schema at revision {revision}")
     
     # Seed Data
     db = SessionLocal()
@@ -0,0 +1,64 @@
+"""
+Daily ledger maintenance.
+
+    python ledger.py backfill --account 3 [--since 2026-01-01] [--source broker|trades]
+
+The ledger itself lives in the API process and rebuilds the current trading day on startup;
+this command replays the same backfill for one account and prints the per-day realized P&L,
+to check the ledger's figures against the broker statement.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.engine.broker.registry import broker_registry, connector_for_account
+from app.engine.ledger import daily_ledger
+from app.models.sql.broker import BrokerAccount
+
+
+async def backfill_from_broker(account: BrokerAccount, since: datetime) -> int:
+    try:
+        connector = await connector_for_account(account)
+        if not connector.supports_history:
+            raise SystemExit(f"Account {account.id} ({account.provider}) has no broker history; use --source trades")
+        return await daily_ledger.backfill_from_connector(account.id, connector, since)
+    finally:
+        await broker_registry.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily P&L ledger from trade history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="Replay closed deals for one account")
+    backfill.add_argument("--account", type=int, required=True, help="BrokerAccount id")
+    backfill.add_argument("--since", type=datetime.fromisoformat, help="Start of the backfill (default: 30 days ago)")
+    backfill.add_argument(
+        "--source", choices=("broker", "trades"), default="broker",
+        help="Broker deal history or closed Trade rows (default: broker)"
+    )
+    args = parser.parse_args()
+
+    since = args.since or datetime.utcnow() - timedelta(days=30)
+    db = SessionLocal()
+    try:
+        account = db.get(BrokerAccount, args.account)
+        if account is None:
+            print(f"Account {args.account} not found")
+            return 1
+        if args.source == "trades":
+            count = daily_ledger.backfill_from_trades(db, account.id, account.user_id, since)
+        else:
+            db.expunge(account)
+            count = asyncio.run(backfill_from_broker(account, since))
+    finally:
+        db.close()
+
+    for day, totals in daily_ledger.history(args.account).items():
+        print(f"{day}  {totals['realized_profit']:>12.2f}  {totals['closed_trades']:>5} trades  {totals['volume']:>8.2f} lots")
+    print(f"Replayed {count} deals")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
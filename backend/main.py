@@ -1,7 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.session import engine, Base
+from app.db.session import engine, async_engine, database_self_check
+from app.db.migrations import run_migrations
+from app.engine.broker.registry import broker_registry, connector_for_account
+from app.engine.scheduler import account_poller, load_active_accounts
+from app.engine.pipeline import risk_write_pipeline
+from app.engine.intelligence import behavior_streams
+from app.engine.ledger import daily_ledger
+from app.engine.equity import equity_tracker
+from app.engine.archive import trade_archive
+from app.engine.rollups import rollup_service
+from app.core.principals import activity_tracker
+from app.core.fanout import fanout_hub
+from app.engine.risk_stream import risk_stream
+from app.services.report_jobs import report_jobs
+from app.services.support_writes import CHAT_STATUS_TOPIC, support_write_queue
+from app.services.notifications import notification_service
 
 app = FastAPI(
     title="RiskLock Engine",
@@ -9,10 +24,58 @@ app = FastAPI(
     version="0.1.1" # Bumped to trigger reload
 )
 
-# Ensure tables are created on startup (Permanent Solution for local dev)
+# Bring the schema to the latest migration on startup (alembic upgrade head)
 @app.on_event("startup")
 def startup_event():
-    Base.metadata.create_all(bind=engine)
+    revision = run_migrations(engine)
+    print(f"DEBUG: Database schema at revision {revision}")
+    # Report what the database actually runs with (journal mode, pool, timeouts), not what was asked for
+    check = database_self_check(engine)
+    print(f"DEBUG: Database self-check: {check}")
+
+@app.on_event("startup")
+async def start_background_services():
+    broker_registry.start()
+    risk_write_pipeline.start()
+    support_write_queue.start()
+    notification_service.start()
+    # Behavior, daily P&L and equity peaks follow every poll, not just the accounts someone is looking at
+    account_poller.add_listener(behavior_streams.on_snapshot)
+    account_poller.add_listener(daily_ledger.on_snapshot)
+    account_poller.add_listener(equity_tracker.on_snapshot)
+    # After the ledger and equity listeners: the pushed risk report reads both
+    account_poller.add_listener(risk_stream.on_snapshot)
+    account_poller.start(load_active_accounts, connector_for_account)
+    daily_ledger.start(load_active_accounts, connector_for_account)
+    equity_tracker.start()
+    activity_tracker.start()
+    trade_archive.start()
+    rollup_service.start()
+    # Chat status changes made on other workers reach this one's cache
+    fanout_hub.add_listener(CHAT_STATUS_TOPIC, support_write_queue.on_status_change)
+    fanout_hub.start()
+    risk_stream.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await account_poller.stop()
+    await daily_ledger.stop()
+    await equity_tracker.stop()
+    await activity_tracker.stop()
+    await trade_archive.stop()
+    await rollup_service.stop()
+    await fanout_hub.stop()
+    await risk_stream.stop()
+    await risk_write_pipeline.stop()
+    # After the pipeline: its last batch may still hand over alerts
+    await notification_service.stop()
+    # Bot replies still pending queue their messages; let them in before the last flush
+    await support.drain_bot_replies()
+    await support_write_queue.stop()
+    await report_jobs.stop()
+    # Close pooled broker connections so MetaApi websockets don't leak on reload
+    await broker_registry.shutdown()
+    await async_engine.dispose()
 
 # Configure CORS for frontend connection
 app.add_middleware(
@@ -24,6 +87,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset-paginated listings return the next page's cursor in a header
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.get("/")
@@ -34,7 +99,7 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
-from app.routers import dashboard, auth, brokers, audit, reports, feedback, support, team, growth, accountability as insights
+from app.routers import dashboard, auth, brokers, audit, reports, feedback, support, team, growth, system, accountability as insights
 app.include_router(dashboard.router)
 app.include_router(auth.router)
 app.include_router(brokers.router)
@@ -44,4 +109,5 @@ app.include_router(feedback.router)
 app.include_router(support.router)
 app.include_router(team.router)
 app.include_router(growth.router)
+app.include_router(system.router)
 app.include_router(insights.router)
@@ -0,0 +1,33 @@
+"""broker_accounts.drawdown_type
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases that ran the interim add_missing_columns() on startup already have it
+    columns = {col["name"] for col in sa.inspect(op.get_bind()).get_columns('broker_accounts')}
+    if 'drawdown_type' not in columns:
+        with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('drawdown_type', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+        batch_op.drop_column('drawdown_type')
@@ -0,0 +1,41 @@
+"""composite indexes for the hot query paths
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns): every per-user/per-chat listing filters on the first column
+# and filters or sorts on the second
+INDEXES = [
+    ('ix_broker_accounts_user_id_is_active', 'broker_accounts', ['user_id', 'is_active']),
+    ('ix_audit_logs_user_id_timestamp', 'audit_logs', ['user_id', 'timestamp']),
+    ('ix_risk_alerts_user_id_alert_timestamp', 'risk_alerts', ['user_id', 'alert_timestamp']),
+    ('ix_employee_activities_employee_id_timestamp', 'employee_activities', ['employee_id', 'timestamp']),
+    ('ix_support_messages_chat_id_created_at', 'support_messages', ['chat_id', 'created_at']),
+    ('ix_trades_user_id_open_time', 'trades', ['user_id', 'open_time']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        # Legacy databases adopted at the baseline may already have them from create_all
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,100 @@
+"""account, employee activity rollups, their sync watermarks and trades.updated_at
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Legacy databases adopted at the baseline get every model table and column from create_all
+    tables = set(inspector.get_table_names())
+    if 'account_rollups' not in tables:
+        op.create_table('account_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('broker_account_id', sa.Integer(), nullable=True),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('trades_opened', sa.Integer(), nullable=False),
+        sa.Column('volume', sa.Float(), nullable=False),
+        sa.Column('trades_closed', sa.Integer(), nullable=False),
+        sa.Column('realized_pnl', sa.Float(), nullable=False),
+        sa.Column('max_adverse', sa.Float(), nullable=False),
+        sa.Column('violations', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('losses', sa.Integer(), nullable=False),
+        sa.Column('gross_profit', sa.Float(), nullable=False),
+        sa.Column('gross_loss', sa.Float(), nullable=False),
+        sa.Column('by_symbol', sa.JSON(), nullable=True),
+        sa.Column('by_session', sa.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['broker_account_id'], ['broker_accounts.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('account_rollups', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_account_rollups_id'), ['id'], unique=False)
+            batch_op.create_index('ix_account_rollups_user_id_granularity_bucket', ['user_id', 'granularity', 'bucket'], unique=False)
+
+    if 'employee_activity_rollups' not in tables:
+        op.create_table('employee_activity_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('module', sa.String(), nullable=True),
+        sa.Column('action', sa.String(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('employee_activity_rollups', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_employee_activity_rollups_id'), ['id'], unique=False)
+            batch_op.create_index('ix_employee_activity_rollups_employee_id_day', ['employee_id', 'day'], unique=False)
+
+    if 'rollup_watermarks' not in tables:
+        op.create_table('rollup_watermarks',
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('last_ts', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('source')
+        )
+
+    # The rollup sync re-reads trades changed since its last pass
+    if 'updated_at' not in {col["name"] for col in inspector.get_columns('trades')}:
+        with op.batch_alter_table('trades', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_trades_updated_at', 'trades', ['updated_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trades_updated_at', table_name='trades')
+    with op.batch_alter_table('trades', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+    op.drop_table('rollup_watermarks')
+    with op.batch_alter_table('employee_activity_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_employee_activity_rollups_employee_id_day')
+        batch_op.drop_index(batch_op.f('ix_employee_activity_rollups_id'))
+
+    op.drop_table('employee_activity_rollups')
+    with op.batch_alter_table('account_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_account_rollups_user_id_granularity_bucket')
+        batch_op.drop_index(batch_op.f('ix_account_rollups_id'))
+
+    op.drop_table('account_rollups')
@@ -0,0 +1,33 @@
+"""broker_accounts.initial_balance
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Legacy databases adopted at the baseline get the column from create_all
+    columns = {col["name"] for col in sa.inspect(op.get_bind()).get_columns('broker_accounts')}
+    if 'initial_balance' not in columns:
+        with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('initial_balance', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+        batch_op.drop_column('initial_balance')
@@ -0,0 +1,33 @@
+"""broker_accounts.risk_status
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Legacy databases adopted at the baseline get the column from create_all
+    columns = {col["name"] for col in sa.inspect(op.get_bind()).get_columns('broker_accounts')}
+    if 'risk_status' not in columns:
+        with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('risk_status', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('broker_accounts', schema=None) as batch_op:
+        batch_op.drop_column('risk_status')
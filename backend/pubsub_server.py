@@ -0,0 +1,36 @@
+"""
+Local Redis-compatible pub/sub server for running several uvicorn workers on one machine.
+
+    python pubsub_server.py [--host 127.0.0.1] [--port 6380]
+
+then start the workers with PUBSUB_URL=redis://127.0.0.1:6380
+"""
+import argparse
+import asyncio
+
+from app.core.fanout import LocalPubSubServer
+
+
+async def serve(host: str, port: int):
+    server = LocalPubSubServer(host, port)
+    await server.start()
+    print(f"Pub/sub server listening on {server.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-compatible pub/sub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
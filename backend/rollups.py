@@ -0,0 +1,42 @@
+"""
+Rollup maintenance.
+
+    python rollups.py backfill [--since 2025-01-01]    rebuild rollups from the raw tables
+    python rollups.py check [--since ...] [--repair]   compare rollups with the raw tables
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.engine.rollups import rollup_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the pre-aggregated rollup tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="Rebuild rollups from the raw tables")
+    backfill.add_argument("--since", type=datetime.fromisoformat, help="Start of the rebuild (default: all history)")
+    check = commands.add_parser("check", help="Compare rollups with the raw tables")
+    check.add_argument("--since", type=datetime.fromisoformat, help="Start of the check (default: 7 days ago)")
+    check.add_argument("--repair", action="store_true", help="Rebuild the range if anything differs")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            result = rollup_service.backfill(db, start=args.since)
+            print(f"Rebuilt {result['account_buckets']} account buckets and {result['activity_days']} activity counts")
+            return 0
+
+        now = datetime.utcnow()
+        mismatches = rollup_service.check(db, args.since or now - timedelta(days=7), now, repair=args.repair)
+        for mismatch in mismatches[:50]:
+            print(f"{mismatch['table']} {mismatch['key']}: expected {mismatch['expected']}, stored {mismatch['stored']}")
+        print(f"{len(mismatches)} mismatches" + (" (repaired)" if args.repair and mismatches else ""))
+        return 1 if mismatches and not args.repair else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.db.session import Base, async_database_url
+# Register every model so string relationships (e.g. User.trading_goals) resolve
+from app.models.sql import user, trade, broker, audit, risk_snapshot, activity, feedback, support, growth, accountability, rollup
+
+
+@pytest.fixture
+def db():
+    """Isolated in-memory database; never touches risklock_v2.db."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """
+    Temporary SQLite file reachable from both engines: `session` (sync) and
+    `async_session` (aiosqlite). NullPool keeps async connections off closed event loops.
+    """
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    try:
+        yield SimpleNamespace(
+            session=sessionmaker(autocommit=False, autoflush=False, bind=engine),
+            async_session=async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        )
+    finally:
+        engine.dispose()
@@ -0,0 +1,96 @@
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.engine.analytics import PerformanceAnalytics
+from app.engine.ledger import DailyLedger
+from app.engine.rollups import RollupService
+from app.models.sql.accountability import PerformanceInsight
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.risk_snapshot import RiskRuleSnapshot
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+
+def seed(db):
+    user = User(email="analytics@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    account = BrokerAccount(user_id=user.id, account_id="2002")
+    db.add(account)
+    db.flush()
+    snapshot = RiskRuleSnapshot(broker_account_id=account.id)
+    db.add(snapshot)
+    db.flush()
+    base = datetime(2026, 1, 5, 6)
+    rng = np.random.default_rng(7)
+    profits = rng.normal(5, 40, 400).round(2)
+    pause = 24 * 14  # two weeks without trading halfway through
+    db.add_all([
+        Trade(user_id=user.id, ticket=i, symbol=("EURUSD", "XAUUSD", "US30")[i % 3], volume=1.0, type="buy",
+              profit=float(profits[i]), session=("London", "New York")[i % 2],
+              # Every fourth trade belongs to a known account: days merge across accounts
+              rule_snapshot_id=snapshot.id if i % 4 == 0 else None,
+              open_time=base + timedelta(hours=7 * i + pause * (i >= 200)),
+              close_time=base + timedelta(hours=7 * i + pause * (i >= 200), minutes=30))
+        for i in range(400)
+    ])
+    db.commit()
+    return user.id
+
+
+def test_metrics_from_daily_rollups_match_raw_trades(db):
+    user_id = seed(db)
+    # Day boundaries at 17:00 New York, like most FX prop firms
+    ledger = DailyLedger(broker_timezone="America/New_York", rollover_hour=17)
+    service = RollupService(ledger)
+    analytics = PerformanceAnalytics(service)
+    service.sync(db)
+
+    metrics = analytics.compute(db, user_id, starting_balance=10000.0)
+    trades = db.query(Trade).order_by(Trade.close_time).all()
+
+    days = {}
+    for t in trades:
+        days.setdefault(ledger.trading_day(t.close_time), []).append(t.profit)
+    daily = np.array([sum(days[d]) for d in sorted(days)])
+    assert len(service.trade_days(db, user_id)) == len(days) == metrics["days"]
+
+    profits = np.array([t.profit for t in trades])
+    assert metrics["trades"] == 400
+    assert metrics["net_profit"] == round(profits.sum(), 2)
+    assert metrics["win_rate"] == round((profits > 0).mean() * 100, 2)
+    assert metrics["profit_factor"] == round(profits[profits > 0].sum() / -profits[profits < 0].sum(), 3)
+    assert metrics["expectancy"] == round(profits.mean(), 2)
+
+    equity = 10000.0 + np.cumsum(daily)
+    assert metrics["max_drawdown"] == round(float((np.maximum.accumulate(np.r_[10000.0, equity])[1:] - equity).max()), 2)
+    # Idle weekdays between the first and last active day count as 0 P&L days
+    first, last = min(days), max(days)
+    weekdays = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    filled = [sum(days.get(d, [0.0])) for d in sorted(set(days) | {d for d in weekdays if d.weekday() < 5})]
+    returns = np.array(filled) / 10000.0
+    assert metrics["trading_days"] == len(filled) > metrics["days"]
+    assert metrics["sharpe"] == round(returns.mean() / returns.std(ddof=1) * math.sqrt(252), 3)
+    assert metrics["equity_curve"][-1]["equity"] == round(equity[-1], 2)
+    assert metrics["by_symbol"]["US30"]["trades"] == sum(1 for t in trades if t.symbol == "US30")
+    assert metrics["by_session"]["London"]["net_profit"] == round(sum(t.profit for t in trades if t.session == "London"), 2)
+
+    # A period is the sum of its days
+    feb = analytics.compute(db, user_id, start=date(2026, 2, 1), end=date(2026, 2, 28))
+    assert feb["net_profit"] == round(sum(sum(days[d]) for d in days if date(2026, 2, 1) <= d <= date(2026, 2, 28)), 2)
+
+    # A trade edited on a past day is picked up by the next sync
+    first_trade = trades[0]
+    first_trade.profit += 100.0
+    db.commit()
+    service.sync(db)
+    assert analytics.compute(db, user_id)["net_profit"] == round(profits.sum() + 100.0, 2)
+
+    # Insights are upserted, not duplicated
+    first = analytics.generate_insights(db, user_id, metrics)
+    db.commit()
+    analytics.generate_insights(db, user_id, analytics.compute(db, user_id, starting_balance=10000.0))
+    db.commit()
+    assert first and db.query(PerformanceInsight).count() == len(first)
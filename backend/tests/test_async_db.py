@@ -0,0 +1,88 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+from fastapi import FastAPI
+
+from app.core import security
+from app.core.principals import PrincipalCache
+from app.db.session import get_async_db
+from app.engine.risk import RiskEngine
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+from app.routers import accountability, auth, brokers
+
+
+def seed(file_db):
+    db = file_db.session()
+    owner = User(email="async@example.com", hashed_password="x", max_accounts_limit=1)
+    db.add(owner)
+    db.flush()
+    db.add_all([
+        BrokerAccount(user_id=owner.id, provider="metaapi", platform="mt5", account_id="a", name="A", is_active=True, max_lot_size=5.0),
+        BrokerAccount(user_id=owner.id, provider="metaapi", platform="mt5", account_id="b", name="B", is_active=False)
+    ])
+    db.commit()
+    db.close()
+
+
+def test_async_routers_share_the_request_session(file_db, monkeypatch):
+    seed(file_db)
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache())
+    app = FastAPI()
+    app.include_router(brokers.router)
+    app.include_router(accountability.router)
+
+    async def override_get_async_db():
+        async with file_db.async_session() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    token = security.create_access_token({"sub": "async@example.com"}, timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listed = (await client.get("/api/brokers/", headers=headers)).json()
+            assert [a["is_limited"] for a in listed] == [False, True]
+
+            created = await client.post(
+                "/insights/goals", headers=headers,
+                json={"goal_type": "daily_loss_target", "threshold_value": 250.0}
+            )
+            assert created.status_code == 200, created.text
+            # Second request authenticates from the principal cache on a fresh session
+            goals = (await client.get("/insights/goals", headers=headers)).json()
+            assert [g["threshold_value"] for g in goals] == [250.0]
+
+            updated = await client.patch(
+                f"/api/brokers/{listed[0]['id']}/risk-settings", headers=headers, json={"max_lot_size": 2.0}
+            )
+            assert updated.json()["max_lot_size"] == 2.0
+
+    asyncio.run(scenario())
+
+
+def test_check_risk_async_persists_on_the_async_session(file_db):
+    seed(file_db)
+    trades = [
+        {"ticket": 1 + i, "symbol": "EURUSD", "type": "buy", "volume": 6.0, "open_price": 1.1, "profit": 0.0}
+        for i in range(2)
+    ]
+
+    async def scenario():
+        async with file_db.async_session() as db:
+            account = await db.get(BrokerAccount, 1)
+            engine = RiskEngine()
+            return await engine.check_risk_async(
+                {"balance": 100000.0, "equity": 100000.0}, engine.get_daily_stats(trades), trades, db,
+                account_model=account
+            )
+
+    report = asyncio.run(scenario())
+    assert report["status"] == "warning"
+    db = file_db.session()
+    assert db.query(Trade).count() == 2
+    db.close()
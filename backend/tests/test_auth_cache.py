@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core import security
+from app.core.principals import ActivityTracker, principal_cache, activity_tracker
+from app.models.sql.user import User
+from app.routers.auth import get_current_user, get_current_user_async
+
+
+@pytest.fixture
+def token(db):
+    principal_cache.clear()
+    db.add(User(id=1, email="staff@example.com", hashed_password="x", full_name="Staff"))
+    db.commit()
+    yield security.create_access_token({"sub": "staff@example.com"}, timedelta(minutes=5))
+    principal_cache.clear()
+    activity_tracker.forget(1)
+
+
+def test_cached_principal_skips_lookup_and_writes(db, token):
+    statements = []
+    event.listen(db.bind, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    first = asyncio.run(get_current_user(token, db))
+    second = asyncio.run(get_current_user(token, db))
+    assert first.id == second.id == 1
+    assert principal_cache.hits == 1
+    # One SELECT for the first request, nothing for the cached one, no UPDATE on the request path
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith("SELECT")
+
+
+def test_suspension_takes_effect_after_invalidation(db, token):
+    asyncio.run(get_current_user(token, db))
+    db.query(User).filter(User.id == 1).update({"is_suspended": True})
+    db.commit()
+    principal_cache.invalidate_user(1)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(token, db))
+    assert exc.value.status_code == 403
+
+
+def test_activity_is_flushed_in_one_batch(db):
+    users = [User(id=i, email=f"u{i}@example.com", hashed_password="x") for i in range(1, 51)]
+    db.add_all(users)
+    db.commit()
+
+    tracker = ActivityTracker()
+    start = datetime(2026, 1, 5, 9, 0)
+    for minute in range(3):
+        for user in users:
+            tracker.touch(user, now=start + timedelta(minutes=minute))
+    assert tracker.flush(db) == 50
+
+    row = db.get(User, 7)
+    db.refresh(row)
+    assert row.last_active == start + timedelta(minutes=2)
+    assert row.session_start == start  # same session: started on the first touch
+
+
+def test_async_dependency_shares_the_cache_and_reauth_check(file_db):
+    principal_cache.clear()
+    with file_db.session() as db:
+        db.add(User(id=1, email="staff@example.com", hashed_password="x", full_name="Staff", requires_reauth=True))
+        db.commit()
+    token = security.create_access_token({"sub": "staff@example.com"}, timedelta(minutes=5))
+
+    async def scenario():
+        async with file_db.async_session() as db:
+            with pytest.raises(HTTPException) as exc:
+                await get_current_user_async(token, db)
+            assert exc.value.status_code == 401
+
+            hits = principal_cache.hits
+            first = await get_current_user_async(token, db)
+            second = await get_current_user_async(token, db)
+            assert first is second and first.id == 1
+            assert principal_cache.hits == hits + 1
+
+    try:
+        asyncio.run(scenario())
+        with file_db.session() as db:
+            assert db.get(User, 1).requires_reauth is False
+    finally:
+        principal_cache.clear()
+        activity_tracker.forget(1)
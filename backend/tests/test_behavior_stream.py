@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, timedelta
+from app.engine.intelligence import BehaviorStream, IntelligenceEngine
+
+
+def _history(rng, count, now):
+    trades, t = [], now - timedelta(hours=6)
+    for ticket in range(count):
+        t += timedelta(seconds=rng.randint(30, 900), microseconds=ticket)
+        closed = t < now - timedelta(minutes=20) or rng.random() < 0.5
+        trades.append({
+            "ticket": ticket,
+            "open_time": t.isoformat(),
+            "close_time": (t + timedelta(seconds=rng.randint(10, 1200))).isoformat() if closed else None,
+            "volume": rng.choice([0.1, 0.2, 0.5, 1.0]),
+            "profit": rng.choice([-1, 1]) * rng.uniform(0, 200),
+            "session": rng.choice(["London", "NY", "Asia", "New York", None])
+        })
+    return trades
+
+
+def test_stream_matches_batch_scan_on_replayed_history():
+    rng = random.Random(7)
+    now = datetime(2026, 1, 5, 15, 0)
+    for _ in range(200):
+        trades = _history(rng, rng.randint(1, 60), now)
+        stream = BehaviorStream()
+        for trade in trades:
+            stream.ingest(trade)
+        assert stream.analyze(now) == IntelligenceEngine.analyze_behavior(trades, now=now)
+
+
+def test_observe_closes_vanished_positions():
+    now = datetime(2026, 1, 5, 15, 0)
+    stream = BehaviorStream()
+    losing = {"ticket": 1, "open_time": (now - timedelta(minutes=3)).isoformat(), "volume": 0.1, "profit": -50}
+    stream.observe([losing], now=now - timedelta(minutes=2))
+    stream.observe([], now=now - timedelta(minutes=1))  # position closed at a loss
+    bigger = {"ticket": 2, "open_time": now.isoformat(), "volume": 1.0, "profit": 0}
+    report = stream.observe([bigger], now=now).analyze(now)
+    assert [f["type"] for f in report["flags"]] == ["revenge_trading"]
+    assert report["score"] == 80
+
+
+def test_observe_bounds_the_window_and_counts_each_ticket_once():
+    start = datetime(2026, 1, 5, 9, 0)
+    stream = BehaviorStream()
+    for i in range(300):
+        now = start + timedelta(minutes=i)
+        stream.observe([{"ticket": i, "open_time": now.isoformat(), "volume": 0.1, "profit": 0, "session": "London"}], now=now)
+    assert len(stream._window) <= 61
+
+    # A position missing from one snapshot comes back: still one trade
+    now = start + timedelta(minutes=300)
+    position = {"ticket": 999, "open_time": now.isoformat(), "volume": 0.1, "profit": 5, "session": "London"}
+    stream.observe([position], now=now)
+    stream.observe([], now=now)
+    stream.observe([position], now=now)
+    report = stream.analyze(now)
+    assert report["session_performance"]["London"]["count"] == 301
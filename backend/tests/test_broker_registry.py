@@ -0,0 +1,87 @@
+import asyncio
+from app.engine.broker.base import BrokerConnector
+from app.engine.broker.registry import ConnectorRegistry
+
+
+class FakeConnector(BrokerConnector):
+    def __init__(self, status="LIVE"):
+        self._connect_status = status
+        self._confidence_status = "PAUSED"
+        self.connect_calls = 0
+        self.closed = False
+
+    async def connect(self):
+        self.connect_calls += 1
+        self._confidence_status = self._connect_status
+        return self._connect_status == "LIVE"
+
+    async def disconnect(self):
+        self.closed = True
+
+    async def get_account_info(self):
+        return {}
+
+    async def get_trades(self):
+        return []
+
+
+def test_reuses_connector_across_requests():
+    async def scenario():
+        registry = ConnectorRegistry(max_size=10)
+        first = await registry.acquire(1, "fp", FakeConnector)
+        second = await registry.acquire(1, "fp", FakeConnector)
+        assert first is second
+        assert first.connect_calls == 1
+        assert (registry.hits, registry.misses) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_credentials_change_replaces_connector():
+    async def scenario():
+        registry = ConnectorRegistry(max_size=10)
+        old = await registry.acquire(1, "old-token", FakeConnector)
+        new = await registry.acquire(1, "new-token", FakeConnector)
+        assert old is not new
+        assert old.closed
+
+    asyncio.run(scenario())
+
+
+def test_lru_and_ttl_eviction():
+    async def scenario():
+        registry = ConnectorRegistry(max_size=2, idle_ttl=60)
+        a = await registry.acquire("a", 1, FakeConnector)
+        await registry.acquire("b", 1, FakeConnector)
+        await registry.acquire("a", 1, FakeConnector)  # 'b' is now least recently used
+        await registry.acquire("c", 1, FakeConnector)
+        assert registry.snapshot()["pooled_connections"] == 2
+        assert {c["key"] for c in registry.snapshot()["connections"]} == {"a", "c"}
+
+        registry.idle_ttl = 0
+        assert await registry.evict_idle() == 2
+        assert a.closed
+        assert registry.evictions == 3
+
+    asyncio.run(scenario())
+
+
+def test_degraded_connector_is_swapped_in_background():
+    async def scenario():
+        registry = ConnectorRegistry(max_size=10)
+        statuses = iter(["DEGRADED", "LIVE"])
+        factory = lambda: FakeConnector(next(statuses))
+
+        degraded = await registry.acquire(1, "fp", factory)
+        assert degraded.confidence_status == "DEGRADED"
+        await asyncio.gather(*registry._reconnects.values())
+
+        healed = await registry.acquire(1, "fp", factory)
+        assert healed is not degraded
+        assert healed.confidence_status == "LIVE"
+        assert degraded.closed
+        assert registry.snapshot()["reconnects"] == 1
+        await registry.shutdown()
+        assert healed.closed
+
+    asyncio.run(scenario())
@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.engine.broker.base import BrokerConnector
+from app.engine.ledger import DailyLedger
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+
+def _deal(deal_id, when, profit, ticket=None, entry="out", volume=1.0):
+    return {"id": str(deal_id), "ticket": ticket, "profit": profit, "entry": entry, "volume": volume, "time": when}
+
+
+class HistoryConnector(BrokerConnector):
+    supports_history = True
+
+    def __init__(self, deals):
+        self.deals = deals
+
+    async def connect(self):
+        return True
+
+    async def get_account_info(self):
+        return {}
+
+    async def get_trades(self):
+        return []
+
+    async def get_deals(self, start, end):
+        return [d for d in self.deals if start <= d["time"] < end]
+
+
+def test_daily_profit_combines_realized_and_floating_per_broker_day():
+    # 22:00 UTC is already the next trading day on a UTC+2 server
+    ledger = DailyLedger(broker_timezone="Etc/GMT-2")
+    ledger.record_deals(1, [
+        _deal(1, datetime(2026, 1, 5, 21, 0), -100.0),
+        _deal(2, datetime(2026, 1, 5, 22, 30), -40.0),
+        _deal(2, datetime(2026, 1, 5, 22, 30), -40.0),  # duplicate delivery
+    ])
+    ledger.observe(1, [{"ticket": 7, "profit": -10.0, "volume": 0.5}])
+
+    stats = ledger.daily_stats(1, now=datetime(2026, 1, 5, 23, 0))
+    assert stats["date"] == "2026-01-06"
+    assert stats["realized_profit"] == -40.0
+    assert stats["daily_profit"] == -50.0
+    assert stats["trades_count"] == 2
+    assert ledger.history(1)["2026-01-05"]["realized_profit"] == -100.0
+
+
+def test_vanished_position_is_carried_until_its_deal_syncs():
+    async def scenario():
+        now = datetime(2026, 1, 5, 12, 0)
+        ledger = DailyLedger()
+        connector = HistoryConnector([])
+        await ledger.sync(1, connector, now=now)
+
+        ledger.observe(1, [{"ticket": 7, "profit": -80.0, "volume": 1.0}], now=now)
+        ledger.observe(1, [], now=now)  # closed on the terminal, deal not synced yet
+        assert ledger.daily_stats(1, now=now)["daily_profit"] == -80.0
+
+        connector.deals.append(_deal(70, now, -82.5, ticket=7))
+        await ledger.sync(1, connector, now=now + timedelta(seconds=30))
+        stats = ledger.daily_stats(1, now=now)
+        assert stats["daily_profit"] == -82.5
+        assert stats["trades_count"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_position_missing_from_one_read_is_not_counted_twice():
+    async def scenario():
+        now = datetime(2026, 1, 5, 12, 0)
+        ledger = DailyLedger()
+        await ledger.sync(1, HistoryConnector([]), now=now)
+        position = {"ticket": 7, "profit": -2000.0, "volume": 1.0}
+
+        ledger.observe(1, [position], now=now)
+        ledger.observe(1, [], now=now)  # a failed positions read
+        ledger.observe(1, [position], now=now)
+        stats = ledger.daily_stats(1, now=now)
+        assert stats["daily_profit"] == -2000.0
+        assert stats["trades_count"] == 1
+
+        # The broker error fallback is ignored outright
+        ledger.on_snapshot(1, {"account": {"platform": "error"}, "trades": []})
+        assert ledger.daily_stats(1, now=now)["daily_profit"] == -2000.0
+
+    asyncio.run(scenario())
+
+
+def test_failed_deal_fetch_keeps_the_sync_cursor():
+    class FlakyConnector(HistoryConnector):
+        fail = False
+
+        async def get_deals(self, start, end):
+            if self.fail:
+                raise ConnectionError("history unavailable")
+            return await super().get_deals(start, end)
+
+    async def scenario():
+        now = datetime(2026, 1, 5, 12, 0)
+        ledger = DailyLedger(sync_overlap=0)
+        connector = FlakyConnector([])
+        await ledger.sync(1, connector, now=now)
+
+        connector.deals.append(_deal(70, now + timedelta(minutes=1), -50.0, ticket=7))
+        connector.fail = True
+        with pytest.raises(ConnectionError):
+            await ledger.sync(1, connector, now=now + timedelta(minutes=2))
+        connector.fail = False
+        await ledger.sync(1, connector, now=now + timedelta(minutes=3))
+        assert ledger.daily_stats(1, now=now)["realized_profit"] == -50.0
+
+    asyncio.run(scenario())
+
+
+def test_first_sync_rebuilds_today_and_keeps_live_positions():
+    async def scenario():
+        now = datetime.utcnow()
+        ledger = DailyLedger(sync_overlap=0)
+        connector = HistoryConnector([_deal(1, now - timedelta(seconds=5), -30.0, ticket=5)])
+        account = type("Account", (), {"id": 1})()
+
+        # The poller can observe the account before its first sync
+        ledger.observe(1, [{"ticket": 9, "profit": 12.0, "volume": 1.0, "open_time": now}])
+        await ledger._sync_account(account, lambda acc: asyncio.sleep(0, connector))
+        stats = ledger.daily_stats(1)
+        assert stats["realized_profit"] == -30.0
+        assert stats["daily_profit"] == -18.0
+        assert stats["opened_count"] == 1
+        assert ledger._accounts[1].deal_cursor is not None
+
+    asyncio.run(scenario())
+
+
+def test_backfill_from_trade_rows_is_idempotent(db):
+    db.add(User(id=1, email="t@example.com", hashed_password="x"))
+    start = datetime(2025, 10, 1, 0, 0)
+    db.add_all([
+        Trade(user_id=1, ticket=i, symbol="EURUSD", volume=0.1, type="buy", open_price=1.0,
+              profit=-1.0 if i % 2 else 2.0, status="CLOSED", close_time=start + timedelta(hours=6 * i))
+        for i in range(400)
+    ])
+    db.commit()
+
+    ledger = DailyLedger()
+    assert ledger.backfill_from_trades(db, 1, user_id=1, since=start, chunk_size=50) == 400
+    ledger.backfill_from_trades(db, 1, user_id=1, since=start, chunk_size=50)
+    history = ledger.history(1)
+    assert len(history) == 100
+    assert all(day["realized_profit"] == 2.0 and day["closed_trades"] == 4 for day in history.values())
+
+
+def test_max_daily_trades_counts_positions_opened_today():
+    from app.engine.rules import RulePlanCache
+
+    now = datetime(2026, 1, 6, 12, 0)
+    ledger = DailyLedger()
+    ledger.record_deals(1, [
+        _deal(1, datetime(2026, 1, 6, 9, 0), 0.0, ticket=10, entry="in"),
+        _deal(2, datetime(2026, 1, 6, 10, 0), -5.0, ticket=10),  # opened and closed today
+        _deal(3, datetime(2026, 1, 6, 8, 0), 12.0, ticket=3),  # closes yesterday's position
+    ])
+    ledger.observe(1, [
+        # Held overnight, one as an ISO string the way MetaApi sends it
+        {"ticket": 1, "profit": 4.0, "volume": 1.0, "open_time": datetime(2026, 1, 5, 15, 0)},
+        {"ticket": 2, "profit": 4.0, "volume": 1.0, "open_time": "2026-01-05T16:00:00.000Z"},
+        {"ticket": 11, "profit": -1.0, "volume": 1.0, "open_time": "2026-01-06T11:00:00Z"},
+    ], now=now)
+
+    stats = ledger.daily_stats(1, now=now)
+    assert stats["trades_count"] == 5
+    assert stats["opened_count"] == 2
+    plan = RulePlanCache().for_limits({"daily_loss_limit_pct": 5.0, "max_drawdown_limit_pct": 10.0, "max_daily_trades": 3})
+    # Five positions touch today, but only two were opened today
+    assert plan.evaluate({"balance": 100000.0, "equity": 100000.0}, stats, [])["violations"] == []
+    assert plan.status({"balance": 100000.0, "equity": 100000.0}, {**stats, "opened_count": 4}, []) == "breach"
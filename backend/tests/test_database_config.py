@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine
+
+from app.db.session import apply_sqlite_pragmas, async_database_url, database_self_check, engine_options, sqlite_pragmas
+
+
+def test_engine_options_per_backend():
+    pg = engine_options("postgresql://risk:secret@db/risklock")
+    assert pg["pool_size"] == 5 and pg["pool_pre_ping"]
+    assert "statement_timeout=30000" in pg["connect_args"]["options"]
+    pg_async = engine_options(async_database_url("postgresql://risk:secret@db/risklock"), is_async=True)
+    assert pg_async["connect_args"]["server_settings"] == {"statement_timeout": "30000"}
+
+    # In-memory SQLite has no pool to size
+    assert set(engine_options("sqlite://")) == {"connect_args"}
+    assert engine_options("sqlite:///risk.db")["pool_recycle"] == 1800
+
+
+def test_self_check_reports_effective_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'wal.db'}"
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine, sqlite_pragmas())
+    report = database_self_check(engine)
+    assert report["ok"]
+    assert report["settings"]["journal_mode"] == "wal"
+    assert report["settings"]["synchronous"] == 1  # NORMAL
+    assert report["settings"]["cache_size"] == -64 * 1024
+    assert "warnings" not in report
+    engine.dispose()
+
+    # Memory databases can't use WAL; the self-check says so instead of pretending
+    memory = create_engine("sqlite://")
+    apply_sqlite_pragmas(memory, sqlite_pragmas())
+    assert database_self_check(memory)["warnings"]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from app.engine.equity import EquityTracker
+from app.engine.rules import RulePlanCache
+
+
+class Rules:
+    daily_loss_limit_pct = 5.0
+    max_drawdown_limit_pct = 10.0
+    max_lot_size = 10.0
+
+
+def _feed(tracker, key, samples, start=datetime(2026, 1, 5, 9, 0)):
+    for i, (balance, equity) in enumerate(samples):
+        tracker.record(key, balance, equity, ts=start + timedelta(hours=6 * i))
+
+
+def test_peaks_and_start_of_day_balance():
+    tracker = EquityTracker()
+    # 09:00, 15:00, 21:00 on day one; 03:00 next day
+    _feed(tracker, 1, [(10000, 10000), (10000, 11000), (10500, 10500), (10500, 10300)])
+    state = tracker.state(1)
+    assert state["initial_balance"] == 10000
+    assert state["peak_equity"] == 11000
+    assert state["day_start_balance"] == 10500
+    assert state["intraday_peak"] == 10300
+
+    trailing = tracker.drawdown_basis(1, "trailing")
+    static = tracker.drawdown_basis(1, "static")
+    assert (trailing["reference"], static["reference"]) == (11000, 10000)
+
+
+def test_trailing_drawdown_in_risk_evaluation():
+    tracker = EquityTracker()
+    _feed(tracker, 1, [(10000, 10000), (10000, 11000), (10000, 10050)])
+    account = {"balance": 10000.0, "equity": 10050.0}
+    plan = RulePlanCache().for_limits(Rules())
+
+    static = plan.evaluate(account, {"daily_profit": 0}, [], tracker.drawdown_basis(1, "static"))
+    trailing = plan.evaluate(account, {"daily_profit": 0}, [], tracker.drawdown_basis(1, "trailing"))
+    assert static["metrics"]["overall_drawdown"] == 0
+    assert trailing["metrics"]["overall_drawdown"] == 950
+    assert trailing["status"] == "critical"  # 950 >= 90% of the 1000 limit on the initial balance
+
+
+def test_segments_and_checkpoint_survive_restart(tmp_path):
+    tracker = EquityTracker(data_dir=str(tmp_path), segment_max_bytes=24 * 4)
+    _feed(tracker, "acc:1", [(10000, 10000 + i) for i in range(10)])
+    assert tracker.flush() == 10
+    _feed(tracker, "acc:1", [(10000, 9000)], start=datetime(2026, 1, 8))
+    tracker.flush()
+
+    restarted = EquityTracker(data_dir=str(tmp_path))
+    assert restarted.state("acc:1") is None  # nothing loaded until the account is touched
+    series = restarted.read_series("acc:1")
+    assert len(series) == 11
+    assert restarted.state("acc:1")["peak_equity"] == 10009
+    assert restarted.recent("acc:1")[-1][2] == 9000
+    assert len(list(tmp_path.joinpath("acc_1").glob("segment-*.bin"))) >= 2
+
+
+def test_configured_initial_balance_overrides_first_observation():
+    tracker = EquityTracker()
+    # Connected mid-challenge, already 6% below the 100k starting balance
+    _feed(tracker, 1, [(94000, 94000), (94000, 90500)])
+    assert tracker.drawdown_basis(1, "static")["reference"] == 94000
+
+    static = tracker.drawdown_basis(1, "static", initial_balance=100000)
+    trailing = tracker.drawdown_basis(1, "trailing", initial_balance=100000)
+    assert static["reference"] == static["limit_base"] == 100000
+    assert trailing["reference"] == 100000 and trailing["limit_base"] == 100000
+
+    account = {"balance": 94000.0, "equity": 90500.0}
+    report = RulePlanCache().for_limits(Rules()).evaluate(account, {"daily_profit": 0}, [], static)
+    assert report["metrics"]["overall_drawdown"] == 9500
+    assert report["status"] == "critical"
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from app.core.fanout import FanoutHub, LocalPubSubServer, RespPubSub
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = []
+        self.closed = None
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+
+async def settle(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_slow_consumer_is_evicted_without_stalling_the_room():
+    async def scenario():
+        hub = FanoutHub(queue_size=4, send_timeout=0.2)
+        fast = [FakeSocket() for _ in range(20)]
+        slow = FakeSocket(delay=1.0)
+        for socket in fast + [slow]:
+            hub.join("support:1", socket)
+        hub.join("support:2", FakeSocket(), role="STAFF")
+        stuck = FakeSocket(delay=30.0)
+        hub.join("support:3", stuck)
+        await hub.publish("support:3", {"n": 0})
+
+        for i in range(10):
+            await hub.publish("support:1", {"n": i})
+            await asyncio.sleep(0)
+        await settle(lambda: all(len(s.received) == 10 for s in fast))
+        await settle(lambda: slow.closed is not None and stuck.closed is not None)
+        stats = hub.snapshot()
+        staff = hub.count(role="STAFF")
+        await hub.stop()
+        return fast, slow, stuck, stats, staff
+
+    fast, slow, stuck, stats, staff = asyncio.run(scenario())
+    assert all([m["n"] for m in s.received] == list(range(10)) for s in fast)
+    assert slow.closed == 1013 and len(slow.received) < 10
+    # Queue overflow for the slow client, the send watchdog for the stuck one
+    assert stuck.closed == 1013
+    assert stats["evicted"] == 2 and stats["connections"] == 21
+    assert staff == 1
+
+
+def test_resp_backend_relays_between_hubs():
+    async def scenario():
+        server = LocalPubSubServer(port=0)
+        await server.start()
+        url = f"redis://127.0.0.1:{server.port}"
+        # Two hubs stand in for two uvicorn workers
+        worker_a, worker_b = FanoutHub(RespPubSub(url)), FanoutHub(RespPubSub(url))
+        on_a, on_b = FakeSocket(), FakeSocket()
+        worker_a.join("support:7", on_a)
+        worker_b.join("support:7", on_b)
+        await settle(lambda: sum(len(s) for s in server._patterns.values()) == 2)
+
+        await worker_a.publish("support:7", {"content": "hello"})
+        await worker_b.publish("support:8", {"content": "other room"})
+        await settle(lambda: on_a.received and on_b.received)
+        await asyncio.sleep(0.05)
+        await worker_a.stop()
+        await worker_b.stop()
+        await server.stop()
+        return on_a.received, on_b.received
+
+    on_a, on_b = asyncio.run(scenario())
+    assert on_a == on_b == [{"content": "hello"}]
+
+
+def test_local_delivery_survives_relay_outage_and_presence_spans_workers():
+    async def scenario():
+        # Nothing listens on the relay port: both workers run with the link down
+        server = LocalPubSubServer(port=0)
+        await server.start()
+        port = server.port
+        await server.stop()
+        down = FanoutHub(RespPubSub(f"redis://127.0.0.1:{port}"))
+        local = FakeSocket()
+        down.join("support:1", local)
+        await down.publish("support:1", {"content": "still here"})
+        await settle(lambda: local.received)
+        await down.stop()
+
+        server = LocalPubSubServer(port=0)
+        await server.start()
+        url = f"redis://127.0.0.1:{server.port}"
+        worker_a = FanoutHub(RespPubSub(url), presence_interval=0.05)
+        worker_b = FanoutHub(RespPubSub(url), presence_interval=0.05)
+        worker_a.join("support:1", FakeSocket(), role="STAFF")
+        worker_b.join("support:2", FakeSocket())
+        await settle(lambda: worker_b.online("STAFF") == 1)
+        seen = (worker_a.online("STAFF"), worker_b.online("STAFF"), worker_b.count(role="STAFF"))
+        await worker_a.stop()
+        # A stopped worker stops announcing and drops out
+        await settle(lambda: worker_b.online("STAFF") == 0)
+        gone = worker_b.online("STAFF")
+        await worker_b.stop()
+        await server.stop()
+        return local.received, seen, gone
+
+    received, seen, gone = asyncio.run(scenario())
+    assert received == [{"content": "still here"}]
+    assert seen == (1, 1, 0) and gone == 0
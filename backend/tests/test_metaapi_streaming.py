@@ -0,0 +1,105 @@
+import asyncio
+import json
+from pathlib import Path
+
+from app.engine.broker.metaapi_streaming import MetaApiStreamingConnector
+from app.engine.scheduler import AccountPoller, SnapshotCache
+
+RECORDING = json.loads((Path(__file__).parent / "fixtures" / "metaapi_stream.json").read_text())
+
+
+class FakeStreamingServer:
+    """In-process stand-in for a MetaApi streaming connection that replays recorded packets."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.listeners = []
+        self.closed = False
+
+    # StreamingMetaApiConnection surface used by the connector
+    def add_synchronization_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_synchronization_listener(self, listener):
+        self.listeners.remove(listener)
+
+    async def connect(self):
+        pass
+
+    async def wait_synchronized(self):
+        await self._play(self.recording["synchronization"])
+
+    async def close(self):
+        self.closed = True
+
+    async def replay(self):
+        await self._play(self.recording["live"])
+
+    async def _play(self, packets):
+        for method, payload in packets:
+            for listener in self.listeners:
+                await getattr(listener, method)("0", payload)
+            await asyncio.sleep(0)
+
+
+def _connector(server):
+    async def factory():
+        return server
+    return MetaApiStreamingConnector("token", "account", connection_factory=factory)
+
+
+def test_mirror_and_event_stream_follow_replayed_packets():
+    async def scenario():
+        server = FakeStreamingServer(RECORDING)
+        connector = _connector(server)
+        assert await connector.connect()
+        assert connector.confidence_status == "LIVE"
+        assert (await connector.get_account_info())["login"] == 5012345
+
+        received = []
+
+        async def consume():
+            async for event in connector.events():
+                received.append(event)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        await server.replay()
+        assert await connector.get_trades() == []
+        assert (await connector.get_account_info())["equity"] == 9950.0
+
+        await connector.disconnect()
+        await consumer
+        assert server.closed
+        # The duplicated replica update is not re-published
+        assert [e["type"] for e in received] == [
+            "position_opened", "position_updated", "account_updated", "position_closed", "deal_added"
+        ]
+        assert received[1]["trade"]["profit"] == -50.0
+
+    asyncio.run(scenario())
+
+
+def test_poller_pushes_snapshots_from_stream_events():
+    async def scenario():
+        server = FakeStreamingServer(RECORDING)
+        connector = _connector(server)
+        poller = AccountPoller(SnapshotCache(), interval=60)
+        seen = []
+        poller.add_listener(lambda key, snapshot: seen.append([t["ticket"] for t in snapshot["trades"]]))
+
+        async def factory():
+            return connector
+
+        await poller.get(1, "metaapi", factory)
+        await asyncio.sleep(0)
+        await server.replay()
+        await asyncio.sleep(0.01)
+
+        assert poller.pushed == 5
+        assert [1001] in seen
+        assert poller.cache.get(1)["account"]["equity"] == 9950.0
+        await poller.stop()
+        assert poller.snapshot()["streaming_accounts"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, select, text
+
+from app.db.migrations import run_migrations
+from app.db.session import Base
+from app.models.sql.accountability import RiskAlert
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.audit import AuditLog
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.support import SupportMessage
+from app.models.sql.trade import Trade
+
+HOT_QUERIES = [
+    ("ix_broker_accounts_user_id_is_active",
+     select(BrokerAccount).where(BrokerAccount.user_id == 1, BrokerAccount.is_active == True)),
+    ("ix_audit_logs_user_id_timestamp",
+     select(AuditLog).where(AuditLog.user_id == 1).order_by(AuditLog.timestamp.desc()).limit(50)),
+    ("ix_risk_alerts_user_id_alert_timestamp",
+     select(RiskAlert).where(RiskAlert.user_id == 1).order_by(RiskAlert.alert_timestamp.desc()).limit(50)),
+    ("ix_employee_activities_employee_id_timestamp",
+     select(EmployeeActivity).where(EmployeeActivity.employee_id == 1).order_by(EmployeeActivity.timestamp.desc())),
+    ("ix_support_messages_chat_id_created_at",
+     select(SupportMessage).where(SupportMessage.chat_id == 1).order_by(SupportMessage.created_at.asc())),
+    ("ix_trades_user_id_open_time",
+     select(Trade).where(Trade.user_id == 1).order_by(Trade.open_time)),
+    ("ix_trades_user_id_close_time",
+     select(Trade).where(Trade.user_id == 1, Trade.close_time >= "2026-01-01").order_by(Trade.close_time)),
+]
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    assert run_migrations(engine) == "0007"
+    yield engine
+    engine.dispose()
+
+
+def schema_drift(engine):
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+
+def test_migrations_build_the_model_schema(migrated):
+    assert schema_drift(migrated) == []
+    # Re-running at head is a no-op
+    assert run_migrations(migrated) == "0007"
+
+
+def test_pre_migration_database_is_adopted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Shape of a database from before drawdown_type and the composite indexes
+        conn.execute(text("DROP INDEX ix_trades_user_id_open_time"))
+        conn.execute(text("ALTER TABLE broker_accounts DROP COLUMN drawdown_type"))
+        conn.execute(text("INSERT INTO users (email) VALUES ('legacy@example.com')"))
+
+    assert run_migrations(engine) == "0007"
+    assert schema_drift(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT email FROM users")).scalar() == "legacy@example.com"
+    engine.dispose()
+
+
+@pytest.mark.parametrize("index, query", HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+def test_hot_query_uses_index(migrated, index, query):
+    sql = str(query.compile(migrated, compile_kwargs={"literal_binds": True}))
+    with migrated.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert f"USING INDEX {index}" in plan, plan
+    # The index also serves the ORDER BY: no sort pass
+    assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,220 @@
+import asyncio
+import json
+
+from app.core.config import settings
+from app.models.sql.audit import AuditLog
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.user import User
+from app.services import notifications as notifications_module
+from app.services.notifications import NotificationService
+
+
+class LocalSMTPServer:
+    """Just enough SMTP for smtplib.send_message: keeps each message's DATA."""
+
+    def __init__(self):
+        self.messages = []
+        self.port = None
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        writer.write(b"220 localhost\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = []
+                while (body := await reader.readline()) != b".\r\n":
+                    data.append(body.decode())
+                self.messages.append("".join(data))
+                writer.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+class FakeTelegram:
+    """Bot API stand-in: records sendMessage payloads, fails the first `failures` calls with 500."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.messages = []
+        self.port = None
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        headers = (await reader.readuntil(b"\r\n\r\n")).decode().lower()
+        length = int(headers.split("content-length:")[1].split("\r\n")[0])
+        payload = json.loads(await reader.readexactly(length))
+        self.calls += 1
+        if self.calls <= self.failures:
+            status, body = "500 Internal Server Error", b'{"ok": false}'
+        else:
+            self.messages.append(payload)
+            status, body = "200 OK", b'{"ok": true}'
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+
+def make_accounts(db, n):
+    owner = User(email="trader@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    accounts = [BrokerAccount(user_id=owner.id, provider="metaapi", account_id=f"acc{i}") for i in range(n)]
+    db.add_all(accounts)
+    db.commit()
+    return owner, [account.id for account in accounts]
+
+
+def alert(account_id, user_id, status, violations, telegram=True):
+    return {
+        "status": status, "violations": violations, "only_email": not telegram,
+        "account_id": account_id, "user_id": user_id, "email": "trader@example.com", "email_enabled": True,
+        "telegram_chat_id": f"chat{account_id}" if telegram else None, "last_notification_at": None
+    }
+
+
+def use_stand_ins(monkeypatch, file_db, smtp, telegram):
+    monkeypatch.setattr(notifications_module, "AsyncSessionLocal", file_db.async_session)
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", smtp.port)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", "test-token")
+    monkeypatch.setattr(settings, "TELEGRAM_API_URL", f"http://127.0.0.1:{telegram.port}")
+
+
+def test_breaches_first_coalesced_and_stamped_in_one_batch(file_db, monkeypatch):
+    db = file_db.session()
+    owner, (a, b, c) = make_accounts(db, 3)
+
+    async def scenario():
+        smtp, telegram = LocalSMTPServer(), FakeTelegram(failures=2)
+        await smtp.start()
+        await telegram.start()
+        use_stand_ins(monkeypatch, file_db, smtp, telegram)
+        service = NotificationService(workers=1, retry_backoff=0.01, flush_interval=60)
+        service.start()
+        # Queued before the worker gets to run: delivery order is by priority
+        service.submit(alert(a, owner.id, "critical", ["CRITICAL: Near Daily Loss Limit"]))
+        service.submit(alert(b, owner.id, "critical", ["CRITICAL: Near Daily Loss Limit"]))
+        service.submit(alert(c, owner.id, "breach", ["Max Overall Loss Breached: -$10500.00"]))
+        service.submit(alert(a, owner.id, "critical", ["Excessive Lot Size: 7.0 > 5.0"]))
+        service.submit(alert(b, owner.id, "breach", ["Daily Loss Limit Breached: -$5100.00 (Limit: $5000.00)"]))
+        depth = service.snapshot()["queue_by_status"]
+        await service.stop()
+        # Within the cooldown: nothing new goes out
+        service.start()
+        repeat = service.submit(alert(a, owner.id, "critical", ["CRITICAL: Near Daily Loss Limit"]))
+        await service.stop()
+        await smtp.stop()
+        await telegram.stop()
+        return depth, repeat, service.snapshot(), smtp.messages, telegram.messages
+
+    depth, repeat, stats, emails, telegrams = asyncio.run(scenario())
+    assert depth == {"breach": 2, "critical": 1}
+    assert [m["chat_id"] for m in telegrams] == [f"chat{c}", f"chat{b}", f"chat{a}"]
+    assert "Excessive Lot Size" in telegrams[2]["text"] and "Near Daily Loss Limit" in telegrams[2]["text"]
+    assert len(emails) == 3 and "Subject: RISKLOCK ALERT: Account BREACH" in emails[0]
+    assert repeat is False
+    assert stats["coalesced"] == 2 and stats["suppressed"] == 1 and stats["retries"] == 2
+    assert stats["alerts_sent"] == 3 and stats["rows_written"] == 3 and stats["failed"] == 0
+
+    db.expire_all()
+    assert all(db.get(BrokerAccount, i).last_notification_at is not None for i in (a, b, c))
+    assert sorted(log.details["status"] for log in db.query(AuditLog).filter(AuditLog.action == "alert_sent")) == [
+        "breach", "breach", "critical"
+    ]
+    db.close()
+
+
+def test_full_queue_keeps_breaches_and_failed_delivery_starts_no_cooldown(file_db, monkeypatch):
+    db = file_db.session()
+    owner, (a, b, c, d) = make_accounts(db, 4)
+
+    async def scenario():
+        smtp, telegram = LocalSMTPServer(), FakeTelegram(failures=100)
+        await smtp.start()
+        await telegram.start()
+        use_stand_ins(monkeypatch, file_db, smtp, telegram)
+        service = NotificationService(max_pending=2, workers=1, max_attempts=2, retry_backoff=0.01)
+        service.start()
+        results = [
+            service.submit(alert(a, owner.id, "critical", ["warning a"], telegram=False)),
+            service.submit(alert(b, owner.id, "critical", ["warning b"], telegram=False)),
+            # Full: the breach takes the oldest critical's place, another critical is turned away
+            service.submit(alert(c, owner.id, "breach", ["breach c"], telegram=False)),
+            service.submit(alert(d, owner.id, "critical", ["warning d"], telegram=False)),
+        ]
+        await service.stop()
+        # Telegram is down and the only channel: nothing reached the trader, so no cooldown starts
+        service.start()
+        telegram_only = {**alert(d, owner.id, "breach", ["breach d"]), "email_enabled": False}
+        service.submit(telegram_only)
+        await service.stop()
+        cooling = service._in_cooldown(d, "breach", None)
+        await smtp.stop()
+        await telegram.stop()
+        return results, cooling, service.snapshot(), smtp.messages
+
+    results, cooling, stats, emails = asyncio.run(scenario())
+    assert results == [True, True, True, False]
+    assert stats["dropped"] == 2
+    assert [e for e in emails if "breach c" in e] and [e for e in emails if "warning b" in e]
+    assert not [e for e in emails if "warning a" in e]
+    assert stats["failed"] == 1 and stats["channel_failures"]["telegram"] == 1 and stats["retries"] == 1
+    assert cooling is False and stats["rows_written"] == 2
+    db.close()
+
+
+def test_inline_delivery_is_tracked_and_failures_are_counted(file_db, monkeypatch):
+    db = file_db.session()
+    owner, (a, b) = make_accounts(db, 2)
+
+    async def scenario():
+        smtp, telegram = LocalSMTPServer(), FakeTelegram()
+        await smtp.start()
+        await telegram.start()
+        use_stand_ins(monkeypatch, file_db, smtp, telegram)
+        # No workers started: alerts go out inline, and stop() waits for them
+        service = NotificationService()
+        service.submit(alert(a, owner.id, "breach", ["breach a"], telegram=False))
+        in_flight = service.snapshot()["inline_deliveries"]
+        await service.stop()
+
+        async def broken(item):
+            raise RuntimeError("renderer crashed")
+        monkeypatch.setattr(service, "_deliver", broken)
+        service.submit(alert(b, owner.id, "breach", ["breach b"], telegram=False))
+        await service.stop()
+        await smtp.stop()
+        await telegram.stop()
+        return in_flight, service.snapshot(), smtp.messages
+
+    in_flight, stats, emails = asyncio.run(scenario())
+    assert in_flight == 1 and stats["inline_deliveries"] == 0
+    assert [e for e in emails if "breach a" in e]
+    assert stats["failed"] == 1
+    db.close()
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session
+from app.db.session import get_db
+from app.models.sql.audit import AuditLog
+from app.models.sql.support import SupportChat, SupportMessage
+from app.models.sql.user import User
+from app.routers import audit, auth, support
+
+
+def build_client(db, monkeypatch, user):
+    # Streams open their own session; point it at the test database
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    app = FastAPI()
+    app.include_router(audit.router)
+    app.include_router(support.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    return TestClient(app)
+
+
+def seed(db, n):
+    user = User(email="pager@example.com", hashed_password="x")
+    other = User(email="other@example.com", hashed_password="x")
+    db.add_all([user, other])
+    db.flush()
+    base = datetime(2026, 1, 1)
+    # Timestamps repeat in threes, so the id tie-break decides the order within a group
+    db.add_all([
+        AuditLog(user_id=user.id, action=f"a{i}", category="risk", details={}, timestamp=base + timedelta(minutes=i // 3))
+        for i in range(n)
+    ])
+    db.add(AuditLog(user_id=other.id, action="other", category="risk", details={}, timestamp=base))
+    db.commit()
+    return user
+
+
+def test_keyset_pages_are_stable_and_complete(db, monkeypatch):
+    user = seed(db, 25)
+    client = build_client(db, monkeypatch, user)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7} if cursor is None else {"limit": 7, "cursor": cursor}
+        response = client.get("/api/audit/", params=params)
+        seen.extend(log["id"] for log in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        # A row inserted mid-scan at the top doesn't shift later pages
+        db.add(AuditLog(user_id=user.id, action="late", category="risk", details={}, timestamp=datetime(2027, 1, 1)))
+        db.commit()
+
+    expected = [log.id for log in db.query(AuditLog).filter(AuditLog.user_id == user.id, AuditLog.action != "late")
+                .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())]
+    assert seen == expected
+
+
+def test_ndjson_export_streams_every_row_after_cursor(db, monkeypatch):
+    user = seed(db, 2500)
+    client = build_client(db, monkeypatch, user)
+
+    first = client.get("/api/audit/", params={"limit": 10})
+    cursor = first.headers["X-Next-Cursor"]
+    export = client.get("/api/audit/", params={"format": "ndjson", "cursor": cursor})
+    assert export.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in export.text.splitlines()]
+    assert len(rows) == 2490
+    assert rows[0]["id"] not in {log["id"] for log in first.json()}
+    assert {"id", "action", "category", "details", "timestamp"} == set(rows[0])
+
+
+def test_deleted_cursor_row_is_rejected_not_an_empty_page(db, monkeypatch):
+    user = seed(db, 10)
+    client = build_client(db, monkeypatch, user)
+
+    first = client.get("/api/audit/", params={"limit": 4})
+    cursor = first.headers["X-Next-Cursor"]
+    db.delete(db.get(AuditLog, int(cursor)))
+    db.commit()
+
+    assert client.get("/api/audit/", params={"limit": 4, "cursor": cursor}).status_code == 400
+    assert client.get("/api/audit/", params={"format": "ndjson", "cursor": cursor}).status_code == 400
+
+
+def test_support_history_serves_the_latest_messages_first(db, monkeypatch):
+    user = seed(db, 0)
+    chat = SupportChat(guest_name="guest")
+    db.add(chat)
+    db.flush()
+    base = datetime(2026, 1, 1)
+    db.add_all([
+        SupportMessage(chat_id=chat.id, content=f"m{i}", sender_type="USER", created_at=base + timedelta(seconds=i))
+        for i in range(12)
+    ])
+    db.commit()
+    client = build_client(db, monkeypatch, user)
+
+    # A client that ignores the cursor still sees the end of the conversation, in reading order
+    latest = client.get(f"/api/support/history/{chat.id}", params={"limit": 5})
+    assert [m["content"] for m in latest.json()] == ["m7", "m8", "m9", "m10", "m11"]
+    older = client.get(f"/api/support/history/{chat.id}", params={"limit": 5, "cursor": latest.headers["X-Next-Cursor"]})
+    assert [m["content"] for m in older.json()] == ["m2", "m3", "m4", "m5", "m6"]
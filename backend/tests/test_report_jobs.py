@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.report_jobs import ReportFileCache, ReportJobQueue, report_digest
+
+PAYLOAD = {
+    "user_email": "trader@example.com",
+    "account_id": "acc-1",
+    "account_info": {"balance": 100000.0, "equity": 99500.0, "profit": -500.0},
+    "trades": [{"ticket": 1, "symbol": "EURUSD", "volume": 1.0, "type": "buy", "profit": -500.0}],
+    "risk_status": {"status": "warning", "violations": ["Lot size exceeded"], "metrics": {"daily_limit": 5000.0}},
+    "intelligence": {"score": 80, "flags": [{"type": "revenge", "severity": "high", "message": "Re-entry after loss"}]}
+}
+
+
+def test_file_cache_evicts_by_total_bytes(tmp_path):
+    cache = ReportFileCache(str(tmp_path), max_bytes=25)
+    cache.put("a", b"x" * 10, "pdf")
+    cache.put("b", b"x" * 10, "pdf")
+    assert cache.path("a")  # 'b' is now least recently used
+    cache.put("c", b"x" * 10, "pdf")
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.total_bytes == 20
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf", "c.pdf"]
+
+    # A restarted process picks the files up again
+    assert ReportFileCache(str(tmp_path), max_bytes=25).total_bytes == 20
+
+
+def test_jobs_render_in_worker_process(tmp_path):
+    async def scenario():
+        queue = ReportJobQueue(ReportFileCache(str(tmp_path), max_bytes=10 * 1024 * 1024), max_workers=1, max_pending=2)
+        jobs = [queue.submit(1, fmt, PAYLOAD, f"report.{fmt}") for fmt in ("pdf", "csv")]
+        assert all(job["status"] in ("queued", "running") for job in jobs)
+        # Bounded: a third job is refused while two are pending
+        assert queue.submit(1, "pdf", PAYLOAD, "report.pdf") is None
+
+        done = [await queue.wait(job["id"], timeout=60) for job in jobs]
+        stats = queue.snapshot()
+        await queue.stop()
+        return done, [open(queue.path(job["id"]), "rb").read() for job in done], stats
+
+    done, files, stats = asyncio.run(scenario())
+    assert [job["status"] for job in done] == ["done", "done"]
+    assert files[0].startswith(b"%PDF")
+    assert files[1].splitlines()[0].startswith(b"ticket,")
+    assert (stats["completed"], stats["rejected"], stats["pending"]) == (2, 1, 0)
+
+
+def test_content_key_serves_unchanged_reports_from_cache(tmp_path):
+    renders = []
+
+    def renderer(format, payload):
+        renders.append(format)
+        return b"%PDF-fake"
+
+    async def scenario():
+        queue = ReportJobQueue(
+            ReportFileCache(str(tmp_path), max_bytes=1024), renderer=renderer,
+            executor_factory=lambda workers: ThreadPoolExecutor(workers)
+        )
+        key = report_digest("pdf", PAYLOAD)
+        # Two identical requests in flight share one render
+        first, second = [queue.submit(1, "pdf", PAYLOAD, "report.pdf", key=key) for _ in range(2)]
+        await asyncio.gather(queue.wait(first["id"]), queue.wait(second["id"]))
+        # Later ones are answered from the cache without queueing
+        third = queue.submit(1, "pdf", PAYLOAD, "report.pdf", key=key)
+        changed = queue.submit(1, "pdf", dict(PAYLOAD, tier="pro"), "report.pdf", key=report_digest("pdf", dict(PAYLOAD, tier="pro")))
+        await queue.wait(changed["id"])
+        stats = queue.snapshot()
+        await queue.stop()
+        return [first, second, third], queue, stats
+
+    jobs, queue, stats = asyncio.run(scenario())
+    assert [job["status"] for job in jobs] == ["done"] * 3
+    assert len({queue.path(job["id"]) for job in jobs}) == 1
+    assert renders == ["pdf", "pdf"]
+    assert stats["shared"] == 1
+    assert (stats["cache"]["hits"], stats["cache"]["misses"]) == (1, 3)
+    # Key order in the payload does not matter
+    assert report_digest("pdf", dict(reversed(list(PAYLOAD.items())))) == report_digest("pdf", PAYLOAD)
+
+
+def test_cached_and_revalidated_downloads_skip_the_risk_writes(tmp_path, file_db, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.db.session import get_async_db
+    from app.models.sql.broker import BrokerAccount
+    from app.models.sql.user import User
+    from app.routers import auth, reports
+
+    with file_db.session() as db:
+        user = User(email="reporter@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        account = BrokerAccount(user_id=user.id, account_id="acc-report", provider="mock")
+        db.add(account)
+        db.commit()
+        account_id = account.id
+        db.refresh(user)
+        db.expunge(user)
+
+    async def async_db():
+        async with file_db.async_session() as session:
+            yield session
+
+    checks = []
+
+    async def check_risk_async(*args, **kwargs):
+        checks.append(args)
+
+    monkeypatch.setattr(reports.risk_engine, "check_risk_async", check_risk_async)
+    monkeypatch.setattr(reports, "report_jobs", ReportJobQueue(
+        ReportFileCache(str(tmp_path / "reports"), max_bytes=1024), renderer=lambda format, payload: b"%PDF-fake",
+        executor_factory=lambda workers: ThreadPoolExecutor(workers)
+    ))
+    app = FastAPI()
+    app.include_router(reports.router)
+    app.dependency_overrides[get_async_db] = async_db
+    app.dependency_overrides[auth.get_current_user_async] = lambda: user
+    client = TestClient(app)
+
+    first = client.get("/reports/generate", params={"account_id": account_id})
+    assert first.status_code == 200 and len(checks) == 1
+
+    revalidated = client.get("/reports/generate", params={"account_id": account_id}, headers={"If-None-Match": first.headers["etag"]})
+    cached = client.get("/reports/generate", params={"account_id": account_id})
+    assert revalidated.status_code == 304 and cached.status_code == 200
+    assert cached.headers["etag"] == first.headers["etag"]
+    assert len(checks) == 1
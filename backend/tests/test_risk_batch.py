@@ -0,0 +1,112 @@
+import numpy as np
+from app.engine.rules import RulePlanCache
+from app.engine.risk_batch import evaluate_batch
+
+METRICS = ["daily_loss", "daily_limit", "overall_drawdown", "overall_limit", "buffer", "buffer_pct", "trades_to_breach"]
+
+
+class Rules:
+    def __init__(self, daily, overall, lot):
+        self.daily_loss_limit_pct = daily
+        self.max_drawdown_limit_pct = overall
+        self.max_lot_size = lot
+
+
+def random_accounts(n, seed=7):
+    rng = np.random.default_rng(seed)
+    balance = rng.choice([0.0, 10000.0, 50000.0, 100000.0], n)
+    equity = balance - rng.uniform(-2000, 12000, n)
+    daily_profit = rng.uniform(-8000, 3000, n)
+    daily_profit[::17] = 0.0
+    trades_count = rng.integers(0, 12, n)
+    daily_pct = rng.choice([np.nan, 3.0, 5.0], n)
+    overall_pct = np.where(np.isnan(daily_pct), np.nan, rng.choice([5.0, 8.0, 10.0], n))
+    max_lot = np.where(np.isnan(daily_pct), np.nan, rng.choice([1.0, 5.0, 10.0], n))
+    max_vol = rng.choice([0.0, 0.5, 2.0, 15.0], n)
+    # Equity tracker basis for a third of the accounts (initial balance or equity peak)
+    tracked = rng.random(n) < 0.33
+    reference = np.where(tracked, balance + rng.uniform(-1000, 4000, n), np.nan)
+    day_start = np.where(tracked, balance + rng.uniform(-500, 500, n), np.nan)
+    initial = np.where(tracked, balance + rng.uniform(-2000, 2000, n), np.nan)
+    return balance, equity, daily_profit, trades_count, daily_pct, overall_pct, max_lot, max_vol, reference, day_start, initial
+
+
+def test_batch_matches_scalar_check_risk():
+    plans = RulePlanCache()
+    columns = random_accounts(5000)
+    batch = evaluate_batch(*columns)
+
+    for i, row in enumerate(zip(*columns)):
+        balance, equity, daily_profit, trades_count, daily_pct, overall_pct, max_lot, max_vol, reference, day_start, initial = row
+        account_model = None if np.isnan(daily_pct) else Rules(daily_pct, overall_pct, max_lot)
+        account_data = {"balance": float(balance), "equity": float(equity)}
+        trades = [{"volume": float(max_vol)}] if max_vol > 0 else []
+        daily_stats = {"daily_profit": float(daily_profit), "trades_count": int(trades_count)}
+
+        equity_state = None if np.isnan(reference) else {
+            "drawdown_type": "trailing", "reference": float(reference),
+            "day_start_balance": float(day_start), "limit_base": float(initial)
+        }
+        report = plans.for_limits(account_model).evaluate(account_data, daily_stats, trades, equity_state)
+        assert batch["status"][i] == report["status"], i
+        for key in METRICS:
+            assert batch[key][i] == report["metrics"][key], (i, key)
+
+
+def test_defaults_when_no_rule_columns():
+    batch = evaluate_batch([100000.0], [100000.0], [-4100.0], [2])
+    assert batch["status"][0] == "warning"
+    assert batch["daily_limit"][0] == 5000.0
+    assert batch["trades_to_breach"][0] == 0
+
+
+def test_batch_with_plans_matches_rule_plan_evaluate():
+    from datetime import datetime, timedelta
+    from types import SimpleNamespace
+    from app.engine.rules import NewsCalendar, RulePlanCache
+
+    plans = RulePlanCache()
+    calendar = NewsCalendar(window_minutes=2)
+    release = datetime(2026, 3, 6, 13, 30)
+    calendar.load([release.isoformat()])
+    pool = [
+        plans.for_limits(None),
+        plans.for_preset("FTMO"),
+        plans.for_preset("Instant"),
+        plans.for_limits(SimpleNamespace(daily_loss_limit_pct=5.0, max_drawdown_limit_pct=10.0, max_daily_trades=3,
+                                         max_lot_size=None, news_trading_allowed=False, preset_name=None)),
+        # Preset-style overrides of the warning and critical thresholds
+        plans.compile([{"check": "daily_loss", "limit_pct": 4.0, "warn_at": 0.5, "critical_at": 0.7},
+                       {"check": "overall_drawdown", "limit_pct": 8.0, "critical_at": 0.6},
+                       {"check": "daily_trades", "max": 6, "warn_at": 0.5}]),
+    ]
+    columns = random_accounts(3000, seed=3)
+    balance, equity, daily_profit, trades_count, _, _, _, max_vol, reference, day_start, initial = columns
+    rng = np.random.default_rng(5)
+    account_plans = [pool[i] for i in rng.integers(0, len(pool), len(balance))]
+    opened_count = np.minimum(trades_count, rng.integers(0, 12, len(balance)))
+    trades = [
+        [{"ticket": i, "volume": float(vol), "open_time": release + timedelta(minutes=float(rng.choice([1, 30])))}]
+        if vol > 0 else []
+        for i, vol in enumerate(max_vol)
+    ]
+    batch = evaluate_batch(
+        balance, equity, daily_profit, trades_count, max_trade_volume=max_vol, drawdown_reference=reference,
+        daily_limit_base=day_start, overall_limit_base=initial, plans=account_plans, opened_count=opened_count,
+        news_flagged=[bool(plan.news_positions(t, calendar)) for plan, t in zip(account_plans, trades)]
+    )
+
+    for i, plan in enumerate(account_plans):
+        account_data = {"balance": float(balance[i]), "equity": float(equity[i])}
+        daily_stats = {"daily_profit": float(daily_profit[i]), "trades_count": int(trades_count[i]),
+                       "opened_count": int(opened_count[i])}
+        equity_state = None if np.isnan(reference[i]) else {
+            "drawdown_type": "trailing", "reference": float(reference[i]),
+            "day_start_balance": float(day_start[i]), "limit_base": float(initial[i])
+        }
+        report = plan.evaluate(account_data, daily_stats, trades[i], equity_state, news=calendar)
+        assert batch["status"][i] == report["status"], i
+        for key in METRICS:
+            assert batch[key][i] == report["metrics"][key], (i, key)
+    # Every check fires somewhere in the sample
+    assert set(batch["status"]) == {"safe", "warning", "critical", "breach"}
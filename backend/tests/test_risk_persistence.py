@@ -0,0 +1,166 @@
+from app.engine.risk import RiskEngine
+from app.engine.rules import RulePlanCache
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.risk_snapshot import RiskRuleSnapshot
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+
+def make_trades(n, profit=0.0, volume=1.0):
+    return [
+        {"ticket": 1000 + i, "symbol": "EURUSD", "type": "buy", "volume": volume,
+         "open_price": 1.1, "profit": profit}
+        for i in range(n)
+    ]
+
+
+def make_account(db):
+    owner = User(email="trader@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    account = BrokerAccount(user_id=owner.id, provider="metaapi", account_id="acc", max_lot_size=5.0)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def test_bulk_upsert_inserts_then_updates(db):
+    engine = RiskEngine()
+    account = make_account(db)
+
+    result = engine.persist_trades(db, make_trades(3) + make_trades(1), 5.0, account)
+    db.commit()
+    assert result == {"inserted": 3, "updated": 0, "closed": 0}
+    assert db.query(RiskRuleSnapshot).count() == 1
+    rows = db.query(Trade).order_by(Trade.ticket).all()
+    assert [t.risk_score for t in rows] == [75, 75, 75]
+    assert all(t.rule_snapshot_id is not None and t.user_id == account.user_id for t in rows)
+
+    trades = make_trades(3, profit=-12.5)
+    trades[0]["volume"] = 7.0
+    result = engine.persist_trades(db, trades + make_trades(5)[3:], 5.0, account)
+    db.commit()
+    db.expire_all()
+    assert result == {"inserted": 2, "updated": 3, "closed": 0}
+    rows = db.query(Trade).order_by(Trade.ticket).all()
+    assert [t.risk_score for t in rows] == [30, 90, 90, 75, 75]
+    assert [t.profit for t in rows[:3]] == [-12.5, -12.5, -12.5]
+
+
+def test_vanished_positions_are_closed_for_their_account_only(db):
+    engine = RiskEngine()
+    account = make_account(db)
+    other = BrokerAccount(user_id=account.user_id, provider="metaapi", account_id="acc2", max_lot_size=5.0)
+    db.add(other)
+    db.commit()
+    engine.persist_trades(db, make_trades(3, profit=-40.0), 5.0, account, complete=True)
+    engine.persist_trades(db, [dict(make_trades(4)[3], ticket=2000)], 5.0, other, complete=True)
+    db.commit()
+
+    # Ticket 1001 closed on the broker; the other account's position is not in this list
+    result = engine.persist_trades(db, make_trades(1), 5.0, account, complete=True)
+    db.commit()
+    db.expire_all()
+    assert result["closed"] == 2
+    rows = {t.ticket: t for t in db.query(Trade)}
+    assert [rows[t].status for t in (1000, 1001, 1002, 2000)] == ["OPEN", "CLOSED", "CLOSED", "OPEN"]
+    assert rows[1001].close_time is not None and rows[1001].profit == -40.0
+
+    # A position that shows up again was missing from one read only
+    engine.persist_trades(db, make_trades(2), 5.0, account, complete=True)
+    db.commit()
+    db.expire_all()
+    reopened = db.query(Trade).filter(Trade.ticket == 1001).one()
+    assert reopened.status == "OPEN" and reopened.close_time is None
+
+    # An incomplete list (the broker error fallback) closes nothing
+    assert engine.persist_trades(db, [], 5.0, account)["closed"] == 0
+
+
+def test_check_risk_persists_and_flags_lot_size(db):
+    engine = RiskEngine()
+    account = make_account(db)
+    trades = make_trades(2, volume=6.0)
+
+    report = engine.check_risk(
+        {"balance": 100000.0, "equity": 100000.0}, engine.get_daily_stats(trades), trades, db,
+        account_model=account
+    )
+    assert report["status"] == "warning"
+    assert len(report["violations"]) == 2
+    assert db.query(Trade).count() == 2
+
+
+def test_default_plan_evaluate_is_pure():
+    # No account model: the engine defaults ($5,000 daily, $10,000 overall, 10 lots)
+    report = RulePlanCache().for_limits(None).evaluate(
+        {"balance": 100000.0, "equity": 95500.0}, {"daily_profit": -4800.0, "trades_count": 4}, []
+    )
+    assert report["status"] == "critical"
+    assert report["metrics"]["trades_to_breach"] == 0
+    assert report["metrics"]["buffer"] == 200.0
+
+
+def test_write_pipeline_coalesces_batches(file_db, monkeypatch):
+    import asyncio
+    from app.engine import pipeline as pipeline_module
+    from app.engine.pipeline import RiskWritePipeline
+
+    monkeypatch.setattr(pipeline_module, "AsyncSessionLocal", file_db.async_session)
+    db = file_db.session()
+    account = make_account(db)
+
+    async def scenario():
+        pipeline = RiskWritePipeline(flush_interval=0.01)
+        pipeline.start()
+        safe = {"status": "safe", "violations": []}
+        pipeline.submit(make_trades(3), 5.0, safe, account_model=account)
+        pipeline.submit(make_trades(4, profit=-3.0), 5.0, safe, account_model=account)
+        await pipeline.stop()
+        return pipeline.snapshot()
+
+    stats = asyncio.run(scenario())
+    assert stats["enqueued"] == 2
+    assert stats["batches"] == 1
+    assert stats["errors"] == 0
+    db.expire_all()
+    assert db.query(Trade).count() == 4
+    assert db.query(RiskRuleSnapshot).count() == 1
+    db.close()
+
+
+def test_pipeline_records_one_violation_per_breach_transition(file_db, monkeypatch):
+    import asyncio
+    from app.engine import pipeline as pipeline_module
+    from app.engine.pipeline import RiskWritePipeline
+    from app.models.sql.audit import AuditLog
+    from app.services.notifications import notification_service
+
+    monkeypatch.setattr(pipeline_module, "AsyncSessionLocal", file_db.async_session)
+    # Violations are counted whether or not the alert is ever delivered
+    monkeypatch.setattr(notification_service, "submit", lambda alert: False)
+    db = file_db.session()
+    account = make_account(db)
+    breach = {"status": "breach", "violations": ["Daily Loss Limit Breached"]}
+    safe = {"status": "safe", "violations": []}
+
+    async def run(*reports):
+        pipeline = RiskWritePipeline(flush_interval=0.01)
+        pipeline.start()
+        for report in reports:
+            pipeline.submit(make_trades(1), 5.0, report, account_model=account)
+        await pipeline.stop()
+
+    # Entering breach mid-batch counts even though the batch ends safe
+    asyncio.run(run(safe, breach, safe))
+    asyncio.run(run(breach))
+    asyncio.run(run(breach))
+    asyncio.run(run(safe))
+    asyncio.run(run(breach))
+
+    db.expire_all()
+    rows = db.query(AuditLog).filter(AuditLog.category == "risk", AuditLog.action == "breach").all()
+    assert len(rows) == 3
+    assert rows[0].details == {"status": "breach", "violations": ["Daily Loss Limit Breached"]}
+    assert db.get(BrokerAccount, account.id).risk_status == "breach"
+    db.close()
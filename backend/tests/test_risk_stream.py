@@ -0,0 +1,154 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.engine.risk_stream import RiskStream
+from app.models.sql.user import User
+from app.routers import dashboard
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+        self.closed = None
+
+    async def send_text(self, text: str):
+        self.received.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+
+def snapshot(equity: float, tickets=(1, 2), status: str = "live"):
+    return {
+        "account": {"balance": 100000.0, "equity": equity, "currency": "USD"},
+        "trades": [{"ticket": t, "symbol": "EURUSD", "type": "buy", "volume": 1.0, "open_price": 1.1, "profit": 0.0}
+                   for t in tickets],
+        "status": status
+    }
+
+
+def test_snapshot_then_deltas_only_for_changes():
+    async def scenario():
+        stream = RiskStream(min_interval=0)
+        socket = FakeSocket()
+        client = stream.subscribe("stream:1", socket)
+        stream.on_snapshot("stream:1", snapshot(100000.0))
+        await asyncio.sleep(0.01)
+        # Same content in a fresh dict: an idle account sends nothing
+        stream.on_snapshot("stream:1", snapshot(100000.0))
+        stream.on_snapshot("stream:other", snapshot(1.0))
+        await asyncio.sleep(0.01)
+        stream.on_snapshot("stream:1", snapshot(99500.0, tickets=(2, 3)))
+        await asyncio.sleep(0.01)
+        stats = stream.snapshot()
+        stream.unsubscribe("stream:1", client)
+        await stream.stop()
+        return socket.received, stats
+
+    received, stats = asyncio.run(scenario())
+    first, delta = received
+    assert first["type"] == "snapshot" and sorted(first["data"]["positions"]) == ["1", "2"]
+    assert delta["type"] == "delta" and delta["version"] == 2
+    assert delta["changes"]["account"] == {"equity": 99500.0}
+    assert delta["changes"]["positions"]["removed"] == ["1"]
+    assert [p["ticket"] for p in delta["changes"]["positions"]["upserted"]] == [3]
+    assert "daily_stats" not in delta["changes"] and "sync" not in delta["changes"]
+    assert stats["snapshots_unchanged"] == 1 and stats["snapshots_unwatched"] == 1 and stats["messages_sent"] == 2
+
+
+def test_throttle_merges_changes_and_shares_encoding():
+    async def scenario():
+        stream = RiskStream(min_interval=0.2)
+        sockets = [FakeSocket() for _ in range(3)]
+        for socket in sockets:
+            stream.subscribe("stream:2", socket)
+        stream.on_snapshot("stream:2", snapshot(100000.0))
+        await asyncio.sleep(0.01)
+        for equity in (99900.0, 99800.0, 99700.0):
+            stream.on_snapshot("stream:2", snapshot(equity))
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.3)
+        stats = stream.snapshot()
+        await stream.stop()
+        return sockets, stats
+
+    sockets, stats = asyncio.run(scenario())
+    for socket in sockets:
+        assert [m["type"] for m in socket.received] == ["snapshot", "delta"]
+        assert socket.received[1]["changes"]["account"] == {"equity": 99700.0}
+    # One snapshot and one delta encoding, shared by all three subscribers
+    assert stats["encodes"] == 2 and stats["messages_sent"] == 6
+
+
+def test_websocket_requires_token_and_pushes_initial_snapshot(file_db, monkeypatch):
+    monkeypatch.setattr(dashboard, "AsyncSessionLocal", file_db.async_session)
+    db = file_db.session()
+    db.add(User(email="trader@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+    token = security.create_access_token({"sub": "trader@example.com"}, timedelta(minutes=5))
+    app = FastAPI()
+    app.include_router(dashboard.router)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/dashboard/ws?token={token}") as ws:
+        first = ws.receive_json()
+    assert first["type"] == "snapshot" and first["version"] >= 1
+    assert set(first["data"]) == {"account", "positions", "risk", "daily_stats", "sync"}
+    assert first["data"]["risk"]["status"] in ("safe", "warning", "critical", "breach")
+
+    try:
+        with client.websocket_connect("/api/dashboard/ws?token=not-a-token") as ws:
+            ws.receive_json()
+        rejected = False
+    except Exception:
+        rejected = True
+    assert rejected
+
+
+def test_stream_alone_feeds_the_risk_pipeline(file_db, monkeypatch):
+    from app.engine import pipeline as pipeline_module
+    from app.engine.pipeline import risk_write_pipeline
+    from app.models.sql.audit import AuditLog
+    from app.models.sql.broker import BrokerAccount
+    from app.models.sql.trade import Trade
+    from app.services.notifications import notification_service
+
+    monkeypatch.setattr(dashboard, "AsyncSessionLocal", file_db.async_session)
+    monkeypatch.setattr(pipeline_module, "AsyncSessionLocal", file_db.async_session)
+    alerts = []
+    monkeypatch.setattr(notification_service, "submit", lambda alert: alerts.append(alert) or True)
+    db = file_db.session()
+    owner = User(email="streamer@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    db.add(BrokerAccount(user_id=owner.id, provider="metaapi", account_id="s1", is_active=True, max_lot_size=5.0))
+    db.commit()
+    token = security.create_access_token({"sub": "streamer@example.com"}, timedelta(minutes=5))
+
+    async def scenario():
+        # No /overview call anywhere: only a stream subscriber and the poller's snapshots
+        user, account = await dashboard._stream_principal(token)
+        stream = RiskStream(min_interval=0)
+        risk_write_pipeline.start()
+        client = stream.subscribe(account.id, FakeSocket(), limits=account)
+        stream.on_snapshot(account.id, snapshot(100000.0))
+        stream.on_snapshot(account.id, snapshot(88000.0))
+        await risk_write_pipeline.stop()
+        stream.unsubscribe(account.id, client)
+        await stream.stop()
+        return stream.snapshot()
+
+    stats = asyncio.run(scenario())
+    assert stats["reports_submitted"] == 2
+    assert [alert["status"] for alert in alerts] == ["breach"]
+    assert alerts[0]["email"] == "streamer@example.com"
+    db.expire_all()
+    assert db.query(Trade).count() == 2
+    assert db.query(AuditLog).filter(AuditLog.category == "risk", AuditLog.action == "breach").count() == 1
+    db.close()
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from app.engine.ledger import DailyLedger
+from app.engine.rollups import RollupService
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.audit import AuditLog
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.risk_snapshot import RiskRuleSnapshot
+from app.models.sql.rollup import AccountRollup, EmployeeActivityRollup
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+
+BASE = datetime(2026, 3, 2, 8)
+
+
+def seed(db):
+    user = User(email="rollups@example.com", hashed_password="x")
+    staff = User(email="staff@example.com", hashed_password="x", role="STAFF")
+    db.add_all([user, staff])
+    db.flush()
+    account = BrokerAccount(user_id=user.id, account_id="1001")
+    db.add(account)
+    db.flush()
+    snapshot = RiskRuleSnapshot(broker_account_id=account.id)
+    db.add(snapshot)
+    db.flush()
+    return user.id, staff.id, account.id, snapshot.id
+
+
+def add_trades(db, user_id, snapshot_id, start, count):
+    db.add_all([
+        Trade(user_id=user_id, ticket=start + i, symbol="EURUSD", type="buy", volume=0.5, rule_snapshot_id=snapshot_id,
+              profit=(-1) ** i * (10.0 + i), open_time=BASE + timedelta(hours=5 * (start + i)),
+              close_time=BASE + timedelta(hours=5 * (start + i), minutes=90))
+        for i in range(count)
+    ])
+
+
+def stored(db):
+    return {
+        (r.granularity, r.bucket): (r.trades_opened, r.volume, r.trades_closed, round(r.realized_pnl, 6), r.max_adverse, r.violations)
+        for r in db.query(AccountRollup)
+    }
+
+
+def test_incremental_sync_matches_backfill_and_checker_repairs_drift(db):
+    user_id, staff_id, account_id, snapshot_id = seed(db)
+    service = RollupService(DailyLedger(broker_timezone="America/New_York", rollover_hour=17))
+    now = BASE + timedelta(days=30)
+
+    add_trades(db, user_id, snapshot_id, 0, 40)
+    db.add_all([EmployeeActivity(employee_id=staff_id, module="SUPPORT", action="REPLIED_TO_CHAT",
+                                 timestamp=BASE + timedelta(hours=3 * i)) for i in range(30)])
+    db.commit()
+    service.sync(db, now=now)
+
+    # New rows arrive: only their buckets are recomputed
+    add_trades(db, user_id, snapshot_id, 40, 20)
+    db.add(AuditLog(user_id=user_id, broker_account_id=account_id, action="breach", category="risk",
+                    timestamp=BASE + timedelta(hours=2)))
+    db.add(AuditLog(user_id=user_id, action="login", category="security", timestamp=BASE + timedelta(hours=2)))
+    db.add_all([EmployeeActivity(employee_id=staff_id, module="FEEDBACK", action="RESOLVED_COMPLAINT",
+                                 timestamp=BASE + timedelta(hours=3 * i)) for i in range(5)])
+    db.commit()
+    assert service.sync(db, now=now)["users"] == 1
+    assert service.sync(db, now=now)["buckets"] == 0
+
+    days = [r for r in db.query(AccountRollup).filter(AccountRollup.granularity == "day")]
+    assert all(r.broker_account_id == account_id for r in days)
+    assert sum(r.trades_opened for r in days) == sum(r.trades_closed for r in days) == 60
+    assert round(sum(r.realized_pnl for r in days), 6) == round(sum(t.profit for t in db.query(Trade)), 6)
+    assert min(r.max_adverse for r in days) == min(t.profit for t in db.query(Trade))
+    assert sum(r.violations for r in days) == 1
+    hours = db.query(AccountRollup).filter(AccountRollup.granularity == "hour").all()
+    assert sum(r.volume for r in hours) == sum(r.volume for r in days) == 30.0
+    assert sum(r.count for r in db.query(EmployeeActivityRollup)) == 35
+
+    start, end = BASE - timedelta(days=1), now
+    assert service.check(db, start, end) == []
+    incremental = stored(db)
+    service.backfill(db, start=start, end=end)
+    assert stored(db) == incremental
+
+    # Drift: a rollup row edited by hand and the activity rollups lost
+    db.query(AccountRollup).filter(AccountRollup.granularity == "day").first().realized_pnl += 1000
+    db.query(EmployeeActivityRollup).delete()
+    db.commit()
+    mismatches = service.check(db, start, end, repair=True)
+    assert {m["table"] for m in mismatches} == {"account_rollups", "employee_activity_rollups"}
+    assert service.check(db, start, end) == []
+    assert stored(db) == incremental
@@ -0,0 +1,61 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.engine.rules import NewsCalendar, RulePlanCache
+
+
+def test_status_matches_evaluate_and_plans_are_shared():
+    plans = RulePlanCache()
+    rng = random.Random(11)
+    for _ in range(3000):
+        balance = rng.choice([0.0, 10000.0, 100000.0])
+        limits = rng.choice([None, SimpleNamespace(
+            daily_loss_limit_pct=rng.choice([3.0, 5.0]), max_drawdown_limit_pct=rng.choice([5.0, 10.0]),
+            max_lot_size=rng.choice([1.0, 10.0])
+        )])
+        account_data = {"balance": balance, "equity": balance - rng.uniform(-2000, 12000)}
+        trades = [{"volume": rng.choice([0.5, 2.0, 15.0])}] if rng.random() < 0.5 else []
+        daily_stats = {"daily_profit": rng.choice([0.0, rng.uniform(-8000, 3000)]), "trades_count": rng.randint(0, 12)}
+        equity_state = rng.choice([None, {
+            "drawdown_type": "trailing", "reference": balance + rng.uniform(-1000, 4000),
+            "day_start_balance": balance + rng.uniform(-500, 500), "limit_base": balance
+        }])
+        plan = plans.for_limits(limits)
+        report = plan.evaluate(account_data, daily_stats, trades, equity_state)
+        assert plan.status(account_data, daily_stats, trades, equity_state) == report["status"]
+        if limits is not None:
+            base = equity_state["day_start_balance"] if equity_state else balance
+            assert report["metrics"]["daily_limit"] == base * (limits.daily_loss_limit_pct / 100.0)
+    # One plan per distinct rule set (8 combinations plus the defaults), reused for every tick
+    assert plans.compiles == 9 and plans.hits == 3000 - 9
+
+
+def test_preset_rules_trade_count_and_news():
+    plans = RulePlanCache()
+    calendar = NewsCalendar(window_minutes=2)
+    release = datetime(2026, 3, 6, 13, 30)
+    calendar.load([release.isoformat() + "Z"])
+    account = {"balance": 100000.0, "equity": 100000.0}
+    quiet = {"daily_profit": 0.0, "trades_count": 1}
+    news_trade = [{"ticket": 7, "volume": 0.5, "open_time": (release + timedelta(minutes=1)).isoformat()}]
+
+    instant = plans.for_preset("Instant")
+    assert instant.evaluate(account, {"daily_profit": 0.0, "trades_count": 5}, [], news=calendar)["violations"] == [
+        "Max Daily Trades Reached: 5"
+    ]
+    assert instant.status(account, {"daily_profit": 0.0, "trades_count": 6}, [], news=calendar) == "breach"
+
+    ftmo = plans.for_preset("FTMO").evaluate(account, quiet, news_trade, news=calendar)
+    assert ftmo["status"] == "critical" and ftmo["violations"][0].startswith("News Trading: position 7")
+    assert plans.for_preset("E8").evaluate(account, quiet, news_trade, news=calendar)["status"] == "safe"
+
+    # A custom rule set tunes a threshold the flat fields can't express
+    custom = SimpleNamespace(daily_loss_limit_pct=5.0, max_drawdown_limit_pct=10.0, max_daily_trades=None,
+                             max_lot_size=10.0, news_trading_allowed=True, preset_name=None)
+    tuned = plans.compile([{"check": "daily_loss", "limit_pct": 5.0, "warn_at": 0.5},
+                           {"check": "overall_drawdown", "limit_pct": 10.0}])
+    losing = {"daily_profit": -2600.0, "trades_count": 2}
+    assert plans.for_limits(custom).status(account, losing, []) == "safe"
+    assert tuned.status(account, losing, []) == "warning"
+    assert plans.for_limits(custom) is plans.for_limits(SimpleNamespace(**vars(custom)))
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from app.engine.mt5_bridge import MT5Bridge
+from app.engine.scheduler import AccountPoller, SnapshotCache
+
+
+class SlowBridge(MT5Bridge):
+    def __init__(self):
+        super().__init__()
+        self.info_calls = 0
+
+    async def get_account_info(self):
+        self.info_calls += 1
+        await asyncio.sleep(0.05)
+        return await super().get_account_info()
+
+
+def test_concurrent_requests_share_one_fetch():
+    async def scenario():
+        bridge = SlowBridge()
+        poller = AccountPoller(SnapshotCache(), interval=5.0)
+
+        async def factory():
+            return bridge
+
+        snapshots = await asyncio.gather(*[poller.get(1, "mock", factory) for _ in range(20)])
+        assert bridge.info_calls == 1
+        assert poller.coalesced == 19
+        assert all(s is snapshots[0] for s in snapshots)
+
+        # Fresh snapshot is served from the cache without touching the broker
+        cached = await poller.get(1, "mock", factory)
+        assert cached is snapshots[0]
+        assert bridge.info_calls == 1
+
+        # A stale snapshot triggers a refetch
+        await poller.get(1, "mock", factory, max_age=0)
+        assert bridge.info_calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_snapshot_cache_is_bounded():
+    cache = SnapshotCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"fetched_at": 0})
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+
+class FailingBridge(MT5Bridge):
+    async def get_account_info(self):
+        return {"balance": 0.0, "equity": 0.0, "profit": 0.0, "platform": "error"}
+
+    async def get_trades(self):
+        return []
+
+
+def test_error_fallback_is_not_cached_or_published():
+    async def scenario():
+        poller = AccountPoller(SnapshotCache(), interval=5.0)
+        seen = []
+        poller.add_listener(lambda key, snapshot: seen.append(snapshot))
+
+        async def healthy():
+            return MT5Bridge()
+
+        async def failing():
+            return FailingBridge()
+
+        good = await poller.get(1, "mock", healthy)
+        served = await poller.get(1, "mock", failing, max_age=0)
+        assert served is good
+        assert seen == [good]
+        assert poller.errors == 1
+
+        # No previous snapshot: the caller still gets the fallback, nothing is kept
+        cold = await poller.get(2, "mock", failing)
+        assert cold["account"]["platform"] == "error"
+        assert poller.cache.get(2) is None
+
+    asyncio.run(scenario())
+
+
+def test_poll_loop_loads_accounts_off_the_event_loop():
+
+    async def scenario():
+        poller = AccountPoller(SnapshotCache(), interval=0.01)
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def load_accounts():
+            threads.append(threading.get_ident())
+            return []
+
+        async def connector_for(account):
+            return MT5Bridge()
+
+        poller.start(load_accounts, connector_for)
+        while not threads:
+            await asyncio.sleep(0.01)
+        await poller.stop()
+        assert threads[0] != loop_thread
+
+    asyncio.run(scenario())
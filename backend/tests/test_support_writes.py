@@ -0,0 +1,147 @@
+import asyncio
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core import security
+from app.core.fanout import FanoutHub, LocalPubSubServer, RespPubSub
+from app.models.sql.activity import EmployeeActivity
+from app.models.sql.support import SupportChat, SupportMessage
+from app.models.sql.user import User
+from app.routers import support
+from app.services import support_writes as support_writes_module
+from app.services.support_writes import SupportWriteQueue
+
+
+def make_chats(db, *statuses):
+    chats = [SupportChat(guest_name=f"guest{i}", status=status) for i, status in enumerate(statuses)]
+    db.add_all(chats)
+    db.commit()
+    return [chat.id for chat in chats]
+
+
+def test_queue_batches_inserts_and_caches_status(file_db, monkeypatch):
+    monkeypatch.setattr(support_writes_module, "AsyncSessionLocal", file_db.async_session)
+    db = file_db.session()
+    staff = User(email="agent@example.com", hashed_password="x", role="SUPPORT")
+    db.add(staff)
+    db.commit()
+    bot_chat, active_chat = make_chats(db, "BOT", "ACTIVE")
+
+    async def scenario():
+        queue = SupportWriteQueue(flush_interval=0.01)
+        queue.start()
+        statuses = [await queue.chat_status(bot_chat), await queue.chat_status(active_chat)]
+        for i in range(50):
+            await queue.add_message(bot_chat if i % 2 else active_chat, f"message {i}", "USER")
+        await queue.add_activity(staff.id, "REPLIED_TO_CHAT", "SUPPORT", "Replied")
+        await queue.set_status(bot_chat, "ACTIVE")
+        statuses.append(await queue.chat_status(bot_chat))
+        await queue.stop()
+        return statuses, queue.snapshot()
+
+    statuses, stats = asyncio.run(scenario())
+    assert statuses == ["BOT", "ACTIVE", "ACTIVE"]
+    assert stats["batches"] == 1 and stats["errors"] == 0
+    assert stats["messages_written"] == 50 and stats["status_cache"] == {"chats": 2, "hits": 1, "misses": 2}
+    db.expire_all()
+    assert db.query(SupportMessage).filter(SupportMessage.chat_id == bot_chat).count() == 25
+    assert db.query(EmployeeActivity).count() == 1
+    assert db.get(SupportChat, bot_chat).status == "ACTIVE"
+    db.close()
+
+
+def test_websocket_broadcasts_and_persists_without_a_request_session(file_db, monkeypatch):
+    monkeypatch.setattr(support_writes_module, "SessionLocal", file_db.session)
+    monkeypatch.setattr(support_writes_module, "AsyncSessionLocal", file_db.async_session)
+    monkeypatch.setattr(support, "AsyncSessionLocal", file_db.async_session)
+    db = file_db.session()
+    db.add_all([User(email="agent@example.com", hashed_password="x", role="SUPPORT"),
+                User(email="trader@example.com", hashed_password="x")])
+    db.commit()
+    (chat_id,) = make_chats(db, "ACTIVE")
+    app = FastAPI()
+    app.include_router(support.router)
+    client = TestClient(app)
+
+    # Claiming the STAFF role takes a staff token
+    for token in ("", security.create_access_token({"sub": "trader@example.com"}, timedelta(minutes=5))):
+        try:
+            with client.websocket_connect(f"/api/support/ws/{chat_id}?role=STAFF&token={token}") as ws:
+                ws.receive_json()
+            rejected = False
+        except WebSocketDisconnect as e:
+            rejected = e.code == 1008
+        assert rejected
+
+    token = security.create_access_token({"sub": "agent@example.com"}, timedelta(minutes=5))
+    with client.websocket_connect(f"/api/support/ws/{chat_id}?role=STAFF&token={token}") as ws:
+        ws.send_json({"content": "hello", "sender_type": "STAFF", "sender_id": None})
+        echoed = ws.receive_json()
+
+    assert echoed["content"] == "hello" and echoed["sender_type"] == "STAFF"
+    assert [m.content for m in db.query(SupportMessage).filter(SupportMessage.chat_id == chat_id)] == ["hello"]
+    assert db.query(EmployeeActivity).filter(EmployeeActivity.action == "REPLIED_TO_CHAT").count() == 1
+    db.close()
+
+
+def test_status_change_reaches_the_other_workers_cache(file_db, monkeypatch):
+    monkeypatch.setattr(support_writes_module, "SessionLocal", file_db.session)
+    monkeypatch.setattr(support_writes_module, "AsyncSessionLocal", file_db.async_session)
+    db = file_db.session()
+    (chat_id,) = make_chats(db, "BOT")
+
+    async def scenario():
+        server = LocalPubSubServer(port=0)
+        await server.start()
+        url = f"redis://127.0.0.1:{server.port}"
+        # Two workers, each with its own hub and write queue
+        hub_a, hub_b = FanoutHub(RespPubSub(url)), FanoutHub(RespPubSub(url))
+        queue_a, queue_b = SupportWriteQueue(), SupportWriteQueue(status_ttl=0.2)
+        hub_b.add_listener(support_writes_module.CHAT_STATUS_TOPIC, queue_b.on_status_change)
+        hub_a.start()
+        hub_b.start()
+        while sum(len(s) for s in server._patterns.values()) < 2:
+            await asyncio.sleep(0.01)
+
+        before = await queue_b.chat_status(chat_id)
+        monkeypatch.setattr(support_writes_module, "fanout_hub", hub_a)
+        await queue_a.set_status(chat_id, "ACTIVE")
+        for _ in range(200):
+            if (await queue_b.chat_status(chat_id)) == "ACTIVE":
+                break
+            await asyncio.sleep(0.01)
+        relayed = (await queue_b.chat_status(chat_id), queue_b.status_misses)
+
+        # A change the relay never carried is picked up once the entry expires
+        db.query(SupportChat).filter(SupportChat.id == chat_id).update({"status": "CLOSED"})
+        db.commit()
+        await asyncio.sleep(0.25)
+        expired = await queue_b.chat_status(chat_id)
+        await hub_a.stop()
+        await hub_b.stop()
+        await server.stop()
+        return before, relayed, expired
+
+    before, relayed, expired = asyncio.run(scenario())
+    assert before == "BOT"
+    assert relayed == ("ACTIVE", 1)  # from the relay, not a second query
+    assert expired == "CLOSED"
+    db.close()
+
+
+def test_bot_replies_are_held_until_done_and_failures_logged(monkeypatch, capsys):
+    async def failing(chat_id, content):
+        raise RuntimeError("queue full")
+    monkeypatch.setattr(support, "reply_as_bot", failing)
+
+    async def scenario():
+        support.schedule_bot_reply(1, "pricing?")
+        held = len(support._bot_replies)
+        await support.drain_bot_replies()
+        return held, len(support._bot_replies)
+
+    assert asyncio.run(scenario()) == (1, 0)
+    assert "Support Bot Error: queue full" in capsys.readouterr().out
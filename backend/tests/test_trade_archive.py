@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from app.engine.archive import TradeArchive
+from app.engine.intelligence import IntelligenceEngine
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+from app.services.reporting import ReportingService
+
+
+def seed(db):
+    user = User(email="archive@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    base = datetime(2026, 1, 1)
+    # Jan and Feb are finished months; March is the live tail; one trade is still open
+    db.add_all([
+        Trade(user_id=user.id, ticket=i, symbol=("EURUSD", "XAUUSD")[i % 2], volume=1.0, type="buy",
+              profit=(i % 5 - 2) * 10.0, session=("London", "New York", "Asia")[i % 3],
+              open_time=base + timedelta(hours=10 * i), close_time=base + timedelta(hours=10 * i + 1))
+        for i in range(200)
+    ])
+    db.add(Trade(user_id=user.id, ticket=999, symbol="EURUSD", volume=1.0, type="buy", open_time=base))
+    db.commit()
+    return user.id
+
+
+def test_compacted_months_plus_tail_match_the_trades_table(db, tmp_path):
+    user_id = seed(db)
+    archive = TradeArchive(data_dir=str(tmp_path))
+
+    assert archive.compact(db, now=datetime(2026, 3, 15)) == 2
+    assert archive.compact(db, now=datetime(2026, 3, 15)) == 0
+    assert [f"{m:%Y-%m}" for m in archive.months(user_id)] == ["2026-01", "2026-02"]
+
+    closed = db.query(Trade).filter(Trade.close_time.isnot(None)).order_by(Trade.close_time).all()
+    table = archive.read(db, user_id)
+    assert table["ticket"].to_pylist() == [t.ticket for t in closed]
+
+    window = archive.read(db, user_id, start=datetime(2026, 2, 20), end=datetime(2026, 3, 2))
+    expected = [t.ticket for t in closed if datetime(2026, 2, 20) <= t.close_time < datetime(2026, 3, 2)]
+    assert window["ticket"].to_pylist() == expected
+
+    summary = ReportingService.performance_summary(table)
+    assert summary["trades"] == len(closed)
+    assert summary["net_profit"] == round(sum(t.profit for t in closed), 2)
+    assert summary["wins"] == sum(1 for t in closed if t.profit > 0)
+    assert summary["by_symbol"]["XAUUSD"]["count"] == sum(1 for t in closed if t.symbol == "XAUUSD")
+
+    sessions = IntelligenceEngine.session_performance_columnar(table)
+    london = [t for t in closed if t.session == "London"]
+    assert sessions["London"] == {"count": len(london), "profit": round(sum(t.profit for t in london), 2)}
+
+
+def test_rows_written_after_compaction_reach_their_archived_month(db, tmp_path):
+    user_id = seed(db)
+    archive = TradeArchive(data_dir=str(tmp_path))
+    assert archive.compact(db, now=datetime(2026, 3, 15)) == 2
+
+    # A January trade persisted late, and the open position closed with a February close time
+    db.add(Trade(user_id=user_id, ticket=1000, symbol="EURUSD", volume=1.0, type="buy", profit=5.0,
+                 open_time=datetime(2026, 1, 20), close_time=datetime(2026, 1, 20, 1)))
+    db.query(Trade).filter(Trade.ticket == 999).update({"close_time": datetime(2026, 2, 3), "profit": 7.0})
+    db.commit()
+
+    assert archive.compact(db, now=datetime(2026, 3, 15)) == 2
+    assert archive.snapshot()["files_rewritten"] == 2
+    assert archive.compact(db, now=datetime(2026, 3, 15)) == 0
+    tickets = archive.read(db, user_id, end=datetime(2026, 3, 1))["ticket"].to_pylist()
+    assert 1000 in tickets and 999 in tickets
+    closed = db.query(Trade).filter(Trade.close_time < datetime(2026, 3, 1)).count()
+    assert len(tickets) == closed
@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import session as db_session
+from app.db.session import get_async_db
+from app.models.sql.broker import BrokerAccount
+from app.models.sql.risk_snapshot import RiskRuleSnapshot
+from app.models.sql.trade import Trade
+from app.models.sql.user import User
+from app.routers import auth, reports
+
+
+def build_client(file_db, monkeypatch, user):
+    monkeypatch.setattr(db_session, "SessionLocal", file_db.session)
+
+    async def async_db():
+        async with file_db.async_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(reports.router)
+    app.dependency_overrides[get_async_db] = async_db
+    app.dependency_overrides[auth.get_current_user_async] = lambda: user
+    return TestClient(app)
+
+
+def seed(db):
+    user = User(email="exporter@example.com", hashed_password="x")
+    other = User(email="other@example.com", hashed_password="x")
+    db.add_all([user, other])
+    db.flush()
+    accounts = [BrokerAccount(user_id=user.id, account_id=f"acc-{i}", provider="mock") for i in range(2)]
+    db.add_all(accounts)
+    db.flush()
+    snapshots = [RiskRuleSnapshot(broker_account_id=account.id) for account in accounts]
+    db.add_all(snapshots)
+    db.flush()
+    base = datetime(2026, 3, 1)
+    db.add_all([
+        Trade(user_id=user.id, ticket=i, symbol="EURUSD", volume=1.0, type="buy", profit=float(i),
+              open_time=base + timedelta(days=i % 10), rule_snapshot_id=snapshots[i % 2].id)
+        for i in range(3000)
+    ])
+    db.add(Trade(user_id=other.id, ticket=99999, symbol="GBPUSD", volume=1.0, type="sell", open_time=base))
+    db.commit()
+    return user.id, accounts[0].id
+
+
+def test_trade_export_streams_filtered_csv(file_db, monkeypatch):
+    with file_db.session() as db:
+        user_id, account_id = seed(db)
+        user = db.get(User, user_id)
+        db.expunge(user)
+    client = build_client(file_db, monkeypatch, user)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/reports/trades/export").text)))
+    assert len(rows) == 3000
+    assert list(rows[0]) == ["ticket", "open_time", "close_time", "symbol", "volume", "type", "profit", "session"]
+
+    params = {"account_id": account_id, "start": "2026-03-03T00:00:00", "end": "2026-03-05T00:00:00"}
+    plain = client.get("/reports/trades/export", params=params)
+    tickets = [int(row["ticket"]) for row in csv.DictReader(io.StringIO(plain.text))]
+    # Even tickets belong to the first account; days 2-3 of each ten
+    assert tickets and all(t % 2 == 0 and t % 10 in (2, 3) for t in tickets)
+    assert len(tickets) == 300
+
+    packed = client.get("/reports/trades/export", params={**params, "compress": "true"})
+    assert packed.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(packed.content).decode() == plain.text
+
+    assert client.get("/reports/trades/export", params={"account_id": 999}).status_code == 404
@@ -31,6 +31,7 @@ export const RiskSettings = ({ account }: RiskSettingsProps) => {
         max_daily_trades: account.max_daily_trades || 50,
         max_lot_size: account.max_lot_size || 10.0,
         news_trading_allowed: account.news_trading_allowed ?? true,
+        initial_balance: account.initial_balance ?? "",
     });
 
     const { data: presets = {} } = useQuery({
@@ -76,7 +77,8 @@ export const RiskSettings = ({ account }: RiskSettingsProps) => {
     });
 
     const handleSave = () => {
-        mutation.mutate(settings);
+        // Left blank, drawdown keeps measuring from the first balance seen
+        mutation.mutate({ ...settings, initial_balance: settings.initial_balance || undefined });
     };
 
     return (
@@ -168,6 +170,19 @@ export const RiskSettings = ({ account }: RiskSettingsProps) => {
                         className="bg-black/40 border-white/10 text-white"
                     />
                 </div>
+
+                <div className="space-y-2">
+                    <Label className="text-white/60">Challenge Starting Balance</Label>
+                    <Input
+                        type="number"
+                        step="0.01"
+                        placeholder="First balance seen"
+                        value={settings.initial_balance}
+                        onChange={(e) => setSettings({ ...settings, initial_balance: e.target.value === "" ? "" : parseFloat(e.target.value) })}
+                        className="bg-black/40 border-white/10 text-white"
+                    />
+                    <p className="text-[10px] text-white/40 italic">Drawdown limits are measured from this balance</p>
+                </div>
             </div>
 
             <div className="flex items-center justify-between p-4 bg-accent-primary/5 rounded-lg border border-accent-primary/10">
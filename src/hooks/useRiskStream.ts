@@ -0,0 +1,80 @@
+import { useEffect, useRef, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+
+type RiskView = {
+    account: Record<string, any>;
+    positions: Record<string, any>;
+    risk: any;
+    daily_stats: Record<string, any>;
+    sync: Record<string, any>;
+};
+
+// Live risk push: a full snapshot on connect, then only what changed.
+// Writes into the dashboard queries so their polling can stop while the stream is up.
+export const useRiskStream = () => {
+    const queryClient = useQueryClient();
+    const [connected, setConnected] = useState(false);
+    const viewRef = useRef<RiskView | null>(null);
+
+    useEffect(() => {
+        const token = localStorage.getItem('token');
+        if (!token) return;
+
+        let socket: WebSocket | null = null;
+        let retry: ReturnType<typeof setTimeout> | undefined;
+        let closed = false;
+
+        const apply = (view: RiskView) => {
+            queryClient.setQueryData(['dashboard-overview'], (old: any) => old && ({
+                ...old,
+                account: view.account,
+                risk: view.risk,
+                daily_stats: view.daily_stats,
+            }));
+            queryClient.setQueryData(['dashboard-trades'], Object.values(view.positions));
+        };
+
+        const connect = () => {
+            socket = new WebSocket(`ws://localhost:8000/api/dashboard/ws?token=${encodeURIComponent(token)}`);
+            socket.onopen = () => setConnected(true);
+            socket.onmessage = (event) => {
+                const message = JSON.parse(event.data);
+                if (message.type === 'snapshot') {
+                    viewRef.current = message.data;
+                } else if (message.type === 'delta' && viewRef.current) {
+                    const { account, daily_stats, sync, risk, positions } = message.changes;
+                    const view = viewRef.current;
+                    const next: RiskView = {
+                        account: account ? { ...view.account, ...account } : view.account,
+                        daily_stats: daily_stats ? { ...view.daily_stats, ...daily_stats } : view.daily_stats,
+                        sync: sync ? { ...view.sync, ...sync } : view.sync,
+                        risk: risk ?? view.risk,
+                        positions: view.positions,
+                    };
+                    if (positions) {
+                        next.positions = { ...view.positions };
+                        positions.removed.forEach((ticket: string) => delete next.positions[ticket]);
+                        positions.upserted.forEach((p: any) => { next.positions[String(p.ticket)] = p; });
+                    }
+                    viewRef.current = next;
+                }
+                if (viewRef.current) apply(viewRef.current);
+            };
+            socket.onclose = () => {
+                setConnected(false);
+                viewRef.current = null;
+                // Reconnect for a fresh snapshot; polling covers the gap
+                if (!closed) retry = setTimeout(connect, 3000);
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(retry);
+            socket?.close();
+        };
+    }, [queryClient]);
+
+    return connected;
+};
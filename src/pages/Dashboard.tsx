@@ -19,6 +19,7 @@ import { OnboardingChecklist } from "@/components/dashboard/OnboardingChecklist"
 import { EmptyState } from "@/components/shared/EmptyState";
 import { useNavigate } from "react-router-dom";
 import { useState, useEffect } from "react";
+import { useRiskStream } from "@/hooks/useRiskStream";
 
 import { DashboardSkeleton } from "@/components/dashboard/DashboardSkeleton";
 
@@ -31,16 +32,20 @@ export default function Dashboard() {
     if (reportDownloaded) setHasGeneratedReport(true);
   }, []);
 
+  // Live updates are pushed while the stream is connected; polling is the fallback.
+  // The stream carries no intelligence block, so a slow overview poll keeps it current.
+  const streaming = useRiskStream();
+
   const { data, isLoading, error } = useQuery({
     queryKey: ['dashboard-overview'],
     queryFn: ApiService.getOverview,
-    refetchInterval: 5000,
+    refetchInterval: streaming ? 60000 : 5000,
   });
 
   const { data: trades = [] } = useQuery({
     queryKey: ['dashboard-trades'],
     queryFn: ApiService.getTrades,
-    refetchInterval: 5000,
+    refetchInterval: streaming ? false : 5000,
   });
 
   if (isLoading || (!data && !error)) {
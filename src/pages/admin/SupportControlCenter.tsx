@@ -18,6 +18,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Badge } from "@/components/ui/badge";
 import { useAuth } from "@/context/AuthContext";
+import { ApiService } from "@/services/api";
 
 export default function SupportControlCenter() {
     const { user } = useAuth();
@@ -33,11 +34,8 @@ export default function SupportControlCenter() {
     useEffect(() => {
         const fetchChats = async () => {
             try {
-                const res = await fetch("http://localhost:8000/api/support/chats", {
-                    headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
-                });
-                const data = await res.json();
-                setChats(data);
+                // Every page, not just the first: the listing is keyset-paginated
+                setChats(await ApiService.getSupportChats());
             } catch (e) {
                 console.error("Failed to fetch chats", e);
             } finally {
@@ -52,7 +50,8 @@ export default function SupportControlCenter() {
     // WebSocket for selected chat
     useEffect(() => {
         if (selectedChat) {
-            const socket = new WebSocket(`ws://localhost:8000/api/support/ws/${selectedChat.id}`);
+            const token = localStorage.getItem('token') || '';
+            const socket = new WebSocket(`ws://localhost:8000/api/support/ws/${selectedChat.id}?role=STAFF&token=${encodeURIComponent(token)}`);
             socketRef.current = socket;
 
             socket.onmessage = (event) => {
@@ -78,6 +78,18 @@ export interface DashboardData {
     };
 }
 
+// Keyset-paginated listings send the next page's cursor in X-Next-Cursor; follow it to the last page
+const getAllPages = async (url: string, pageSize = 1000): Promise<any[]> => {
+    const rows: any[] = [];
+    let cursor: string | undefined;
+    do {
+        const response = await api.get(url, { params: cursor ? { limit: pageSize, cursor } : { limit: pageSize } });
+        rows.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return rows;
+};
+
 export const ApiService = {
     // Auth
     login: async (formData: FormData | URLSearchParams): Promise<{ access_token: string }> => {
@@ -145,14 +157,18 @@ export const ApiService = {
         return response.data;
     },
     getAllFeedback: async (): Promise<any[]> => {
-        const response = await api.get('/feedback/admin/all');
-        return response.data;
+        return getAllPages('/feedback/admin/all');
     },
     updateFeedbackStatus: async (id: number, data: { status?: string, admin_notes?: string }) => {
         const response = await api.patch(`/feedback/admin/${id}`, data);
         return response.data;
     },
 
+    // Support
+    getSupportChats: async (): Promise<any[]> => {
+        return getAllPages('/support/chats');
+    },
+
     // Team Management
     getTeamEmployees: async (): Promise<any[]> => {
         const response = await api.get('/admin/team/employees');